@@ -4596,6 +4596,75 @@ async function detectTheoryImageForQuery(query, language = 'ko') {
 // Firebase 프로젝트 설정
 const FIREBASE_PROJECT_ID = 'hairgatormenu-4a43e';
 
+// ==================== 임베딩 모델 (scripts/embedding_models.py와 같은 규칙) ====================
+// styles 컬렉션은 migrate-embedding-model.py로 모델을 바꿈
+// - 설정 문서 embedding_models/<컬렉션>.active = 서비스 모델 (없으면 embedding-001)
+// - 문서마다 두 슬롯(embedding / embeddingShadow)에 모델 태그와 함께 벡터 저장, 전환 중에는 슬롯을 맞바꿈
+// → 읽는 쪽은 active 모델 벡터가 든 슬롯을 고르고, 질의도 같은 모델로 임베딩해야 순위가 맞음
+// (이 규칙을 따르는 읽기: getCutStylesFromStyles, regenerateFemaleRecipeWithStyle, regenerateMaleRecipeWithStyle)
+const EMBEDDING_CONFIG_COLLECTION = 'embedding_models';
+const EMBEDDING_MODELS = {
+  'embedding-001': 'models/embedding-001',
+  'text-embedding-004': 'models/text-embedding-004'
+};
+const LEGACY_EMBEDDING_MODEL = 'models/embedding-001';  // 모델 태그가 없는 예전 벡터
+const ACTIVE_MODEL_TTL_MS = 60 * 1000;
+const activeEmbeddingModelCache = new Map();  // 컬렉션 → { model, loadedAt }
+
+/**
+ * 컬렉션의 서비스 임베딩 모델 ("models/...")
+ * 설정 문서가 없거나 읽기 실패 시 embedding-001
+ */
+async function getActiveEmbeddingModel(collection) {
+  const cached = activeEmbeddingModelCache.get(collection);
+  if (cached && Date.now() - cached.loadedAt < ACTIVE_MODEL_TTL_MS) {
+    return cached.model;
+  }
+
+  let model = LEGACY_EMBEDDING_MODEL;
+  try {
+    const url = `https://firestore.googleapis.com/v1/projects/${FIREBASE_PROJECT_ID}/databases/(default)/documents/${EMBEDDING_CONFIG_COLLECTION}/${collection}`;
+    const response = await fetch(url);
+    if (response.ok) {
+      const doc = await response.json();
+      const active = doc.fields?.active?.stringValue;
+      if (active && EMBEDDING_MODELS[active]) {
+        model = EMBEDDING_MODELS[active];
+      } else if (active) {
+        console.warn(`⚠️ 알 수 없는 임베딩 모델: ${collection} → ${active} (embedding-001 사용)`);
+      }
+    } else if (response.status !== 404) {
+      throw new Error(`Firestore API Error: ${response.status}`);
+    }
+  } catch (error) {
+    // 읽기 실패는 캐시하지 않음 (다음 요청에서 다시 시도)
+    console.error(`❌ ${collection} 임베딩 모델 조회 실패:`, error.message);
+    return cached ? cached.model : model;
+  }
+
+  activeEmbeddingModelCache.set(collection, { model, loadedAt: Date.now() });
+  return model;
+}
+
+/**
+ * 두 슬롯 중 model 벡터 (없으면 null) - scripts/embedding_models.py select_embedding과 같음
+ */
+function selectStyleEmbedding(fields, model) {
+  const slots = [
+    { vector: 'embedding', key: 'embeddingKey', model: 'embeddingModel', updatedAt: 'embeddingUpdatedAt', legacy: true },
+    { vector: 'embeddingShadow', key: 'embeddingShadowKey', model: 'embeddingShadowModel', updatedAt: 'embeddingShadowUpdatedAt', legacy: false }
+  ];
+  for (const slot of slots) {
+    const values = fields[slot.vector]?.arrayValue?.values;
+    if (!values && !fields[slot.key] && !fields[slot.updatedAt]) continue;
+    const stored = fields[slot.model]?.stringValue || (slot.legacy ? LEGACY_EMBEDDING_MODEL : null);
+    if (stored === model) {
+      return values ? values.map(v => parseFloat(v.doubleValue || 0)) : null;
+    }
+  }
+  return null;
+}
+
 /**
  * styles 컬렉션에서 펌 스타일 가져오기
  * ⭐ 펌 레시피는 styles 컬렉션에 있음! (hairstyles 아님!)
@@ -4666,8 +4735,9 @@ async function getPermStylesFromStyles(targetSeries) {
  * styles 컬렉션에서 커트 스타일 가져오기
  * ⭐ 커트 레시피/도해도는 styles 컬렉션에 있음! (hairstyles는 메뉴판용)
  * ⭐ 여자 커트/펌은 대표이미지(resultImage)가 동일함
+ * embeddingModel: 질의를 임베딩할 모델 (getActiveEmbeddingModel('styles')) → 같은 모델 벡터만 추출
  */
-async function getCutStylesFromStyles(targetSeries) {
+async function getCutStylesFromStyles(targetSeries, embeddingModel) {
   const baseUrl = `https://firestore.googleapis.com/v1/projects/${FIREBASE_PROJECT_ID}/databases/(default)/documents/styles`;
   const styles = [];
 
@@ -4706,11 +4776,8 @@ async function getCutStylesFromStyles(targetSeries) {
               }).filter(d => d.url);
             }
 
-            // 임베딩 추출
-            let embedding = null;
-            if (fields.embedding?.arrayValue?.values) {
-              embedding = fields.embedding.arrayValue.values.map(v => parseFloat(v.doubleValue || 0));
-            }
+            // 임베딩 추출 (전환 중이면 섀도 슬롯일 수 있음)
+            const embedding = selectStyleEmbedding(fields, embeddingModel);
 
             styles.push({
               styleId,
@@ -4821,16 +4888,17 @@ async function getFirestoreStyles() {
 
 /**
  * Gemini 임베딩 생성
+ * model: 비교할 문서 벡터와 같은 모델 (styles는 getActiveEmbeddingModel('styles'))
  */
-async function generateQueryEmbedding(query, geminiKey) {
+async function generateQueryEmbedding(query, geminiKey, model = LEGACY_EMBEDDING_MODEL) {
   try {
     const response = await fetch(
-      `https://generativelanguage.googleapis.com/v1/models/embedding-001:embedContent?key=${geminiKey}`,
+      `https://generativelanguage.googleapis.com/v1/${model}:embedContent?key=${geminiKey}`,
       {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
-          model: 'models/embedding-001',
+          model: model,
           content: { parts: [{ text: query }] },
           taskType: 'RETRIEVAL_QUERY'
         })
@@ -7669,6 +7737,7 @@ async function analyzeAndMatchRecipe(payload, geminiKey) {
     const t2 = Date.now();
 
     let seriesStylesAll = [];
+    let stylesEmbeddingModel = LEGACY_EMBEDDING_MODEL;  // 커트 조회 시 styles active 모델로 갱신
 
     // ⭐⭐⭐ 펌/커트 모두 styles 컬렉션에서 조회! (hairstyles에는 diagrams/textRecipe 없음)
     if (serviceType === 'perm') {
@@ -7677,7 +7746,8 @@ async function analyzeAndMatchRecipe(payload, geminiKey) {
       console.log(`📚 styles 컬렉션에서 펌 ${targetSeriesCode} 시리즈: ${seriesStylesAll.length}개`);
     } else {
       // ⭐ 커트도 styles 컬렉션에서 조회! (hairstyles는 랜덤ID라 series 매칭 안됨)
-      const cutStyles = await getCutStylesFromStyles(targetSeriesCode);
+      stylesEmbeddingModel = await getActiveEmbeddingModel('styles');
+      const cutStyles = await getCutStylesFromStyles(targetSeriesCode, stylesEmbeddingModel);
       seriesStylesAll = cutStyles;
       console.log(`📚 styles 컬렉션에서 커트 ${targetSeriesCode} 시리즈: ${seriesStylesAll.length}개`);
     }
@@ -7717,7 +7787,7 @@ async function analyzeAndMatchRecipe(payload, geminiKey) {
       const params56Temp = await analyzeImageStructured(image_base64, mime_type, geminiKey);
       let queryEmbedding = null;
       if (params56Temp.description) {
-        queryEmbedding = await generateQueryEmbedding(params56Temp.description, geminiKey);
+        queryEmbedding = await generateQueryEmbedding(params56Temp.description, geminiKey, stylesEmbeddingModel);
       }
 
       const stylesWithScore = seriesStylesAll.map(style => {
@@ -9948,6 +10018,7 @@ async function regenerateFemaleRecipeWithStyle(payload, geminiKey) {
     const targetSeries = `F${length_code}L`;
     // ⭐ styles 컬렉션 사용 (레시피/도해도 데이터가 여기 있음)
     const stylesUrl = `https://firestore.googleapis.com/v1/projects/hairgatormenu-4a43e/databases/(default)/documents/styles`;
+    const embeddingModel = await getActiveEmbeddingModel('styles');
     const stylesResponse = await fetch(stylesUrl);
     const stylesData = await stylesResponse.json();
 
@@ -9955,10 +10026,7 @@ async function regenerateFemaleRecipeWithStyle(payload, geminiKey) {
       const fields = doc.fields;
       const styleId = doc.name.split('/').pop();
 
-      let embedding = null;
-      if (fields.embedding?.arrayValue?.values) {
-        embedding = fields.embedding.arrayValue.values.map(v => parseFloat(v.doubleValue || 0));
-      }
+      const embedding = selectStyleEmbedding(fields, embeddingModel);
 
       let diagrams = [];
       if (fields.diagrams?.arrayValue?.values) {
@@ -10001,7 +10069,7 @@ async function regenerateFemaleRecipeWithStyle(payload, geminiKey) {
 
     // 4. 임베딩 기반 유사도 검색
     const searchQuery = `${lengthName} ${cut_form} ${params56.fringe_type || ''} ${params56.volume_zone || ''}`.trim();
-    const queryEmbedding = await generateQueryEmbedding(searchQuery, geminiKey);
+    const queryEmbedding = await generateQueryEmbedding(searchQuery, geminiKey, embeddingModel);
 
     const stylesWithSimilarity = targetStyles.map(style => {
       let similarity = 0;
@@ -10692,6 +10760,7 @@ async function regenerateMaleRecipeWithStyle(payload, geminiKey) {
     // 2. Firestore styles 컬렉션에서 남자 커트 스타일 가져오기 (hairstyles에는 diagrams/textRecipe 없음!)
     // ⭐ styles 컬렉션 사용 (남자 69개: SF:14, SP:25, FU:7, PB:9, BZ:5, CP:4, MC:5)
     const hairstylesUrl = `https://firestore.googleapis.com/v1/projects/hairgatormenu-4a43e/databases/(default)/documents/styles`;
+    const embeddingModel = await getActiveEmbeddingModel('styles');
     const hairstylesResponse = await fetch(hairstylesUrl);
     const hairstylesData = await hairstylesResponse.json();
 
@@ -10701,10 +10770,7 @@ async function regenerateMaleRecipeWithStyle(payload, geminiKey) {
         const styleId = doc.name.split('/').pop();
         const gender = fields.gender?.stringValue || '';
 
-        let embedding = null;
-        if (fields.embedding?.arrayValue?.values) {
-          embedding = fields.embedding.arrayValue.values.map(v => parseFloat(v.doubleValue || 0));
-        }
+        const embedding = selectStyleEmbedding(fields, embeddingModel);
 
         let diagrams = [];
         if (fields.diagrams?.arrayValue?.values) {
@@ -10749,7 +10815,7 @@ async function regenerateMaleRecipeWithStyle(payload, geminiKey) {
 
     // 4. 임베딩 기반 유사도 검색
     const searchQuery = `${styleName} ${maleParams.topLength || ''} ${maleParams.fadeType || ''} ${maleParams.texture || ''}`.trim();
-    const queryEmbedding = await generateQueryEmbedding(searchQuery, geminiKey);
+    const queryEmbedding = await generateQueryEmbedding(searchQuery, geminiKey, embeddingModel);
 
     const stylesWithSimilarity = targetStyles.map(style => {
       let similarity = 0;
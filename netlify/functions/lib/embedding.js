@@ -2,23 +2,57 @@
 // 임베딩 생성 및 벡터 검색 모듈
 /* eslint-disable no-unused-vars */
 
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+const crypto = require('crypto');
 const { cosineSimilarity, getLengthPrefix } = require('./utils');
 
 // ==================== Firebase 설정 ====================
 const FIREBASE_PROJECT_ID = 'hairgatormenu-4a43e';
 
+// ==================== 임베딩 번들 설정 ====================
+// scripts/embedding_bundle.py가 만드는 성별별 번들 (embeddings-<gender>.json 포인터 → .bin.gz)
+// EMBEDDING_BUNDLE_DISABLED=1 이면 번들을 쓰지 않고 Firestore REST로 조회
+const DEFAULT_EMBEDDING_MODEL = 'models/text-embedding-004';
+const EMBEDDING_BUNDLE_FORMAT = 1;
+const EMBEDDING_BUNDLE_MAGIC = 'HGEB';
+const EMBEDDING_BUNDLE_HEADER_SIZE = 24;
+const EMBEDDING_BUNDLE_DIRS = [
+  process.env.EMBEDDING_BUNDLE_DIR,
+  path.join(__dirname, '../data/embedding-bundles'),
+  path.join(process.cwd(), 'netlify/functions/data/embedding-bundles'),
+  process.env.LAMBDA_TASK_ROOT && path.join(process.env.LAMBDA_TASK_ROOT, 'netlify/functions/data/embedding-bundles')
+].filter(Boolean);
+
+// 콜드 스타트마다 한 번만 로드 (성별 → 번들 | null)
+const embeddingBundleCache = new Map();
+
+// ==================== 질의 임베딩 캐시 설정 ====================
+// scripts/build-query-embeddings.py가 미리 계산한 질의 표 (query-embeddings-<모델>.json) + 웜 인스턴스 메모리 캐시
+const QUERY_CACHE_MAX_ENTRIES = 500;
+const queryTableCache = new Map();     // 모델 → Map(키 → Float32Array) | null
+const liveQueryCache = new Map();      // "모델\u001f키" → 벡터 (삽입 순서 = 오래된 순)
+
 // ==================== Gemini 임베딩 생성 ====================
-async function generateEmbedding(text, geminiKey) {
+// model: 번들과 같은 모델로 질의를 임베딩해야 유사도가 의미 있음
+// taskType: 문서 임베딩은 retrieval_document → 질의는 RETRIEVAL_QUERY
+async function generateEmbedding(text, geminiKey, model = DEFAULT_EMBEDDING_MODEL, taskType = null) {
   try {
+    const body = {
+      model: model,
+      content: { parts: [{ text }] }
+    };
+    if (taskType) {
+      body.taskType = taskType;
+    }
+
     const response = await fetch(
-      `https://generativelanguage.googleapis.com/v1beta/models/text-embedding-004:embedContent?key=${geminiKey}`,
+      `https://generativelanguage.googleapis.com/v1beta/${model}:embedContent?key=${geminiKey}`,
       {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          model: 'models/text-embedding-004',
-          content: { parts: [{ text }] }
-        })
+        body: JSON.stringify(body)
       }
     );
 
@@ -35,6 +69,196 @@ async function generateEmbedding(text, geminiKey) {
   }
 }
 
+// ==================== 임베딩 번들 로드 ====================
+// float16 → float32 변환 테이블 (65536개, 번들 로드 시 한 번 생성)
+let float16Table = null;
+
+function getFloat16Table() {
+  if (float16Table) return float16Table;
+  float16Table = new Float32Array(65536);
+  for (let h = 0; h < 65536; h++) {
+    const sign = h & 0x8000 ? -1 : 1;
+    const exponent = (h >> 10) & 0x1f;
+    const fraction = h & 0x3ff;
+    if (exponent === 0) {
+      float16Table[h] = sign * Math.pow(2, -14) * (fraction / 1024);
+    } else if (exponent === 0x1f) {
+      float16Table[h] = fraction ? NaN : sign * Infinity;
+    } else {
+      float16Table[h] = sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+    }
+  }
+  return float16Table;
+}
+
+function findEmbeddingBundlePointer(name) {
+  for (const dir of EMBEDDING_BUNDLE_DIRS) {
+    const pointerPath = path.join(dir, `${name}.json`);
+    if (fs.existsSync(pointerPath)) {
+      return { dir, pointer: JSON.parse(fs.readFileSync(pointerPath, 'utf8')) };
+    }
+  }
+  return null;
+}
+
+// 압축 해제된 번들 → { meta, vectors: Float32Array[] }
+function decodeEmbeddingBundle(raw) {
+  const magic = raw.toString('latin1', 0, 4);
+  const version = raw.readUInt16LE(4);
+  if (magic !== EMBEDDING_BUNDLE_MAGIC || version !== EMBEDDING_BUNDLE_FORMAT) {
+    throw new Error(`임베딩 번들 형식 불일치: ${magic} v${version}`);
+  }
+  const dtypeCode = raw.readUInt8(6);
+  const count = raw.readUInt32LE(8);
+  const dims = raw.readUInt32LE(12);
+  const metaLength = raw.readUInt32LE(16);
+
+  const metaStart = EMBEDDING_BUNDLE_HEADER_SIZE;
+  const meta = JSON.parse(raw.toString('utf8', metaStart, metaStart + metaLength));
+  const offset = metaStart + metaLength;
+
+  const vectors = [];
+  if (dtypeCode === 1) {
+    const table = getFloat16Table();
+    for (let i = 0; i < count; i++) {
+      const vector = new Float32Array(dims);
+      const rowStart = offset + i * dims * 2;
+      for (let d = 0; d < dims; d++) {
+        vector[d] = table[raw.readUInt16LE(rowStart + d * 2)];
+      }
+      vectors.push(vector);
+    }
+  } else if (dtypeCode === 2) {
+    for (let i = 0; i < count; i++) {
+      const vector = new Float32Array(dims);
+      const rowStart = offset + i * dims * 4;
+      for (let d = 0; d < dims; d++) {
+        vector[d] = raw.readFloatLE(rowStart + d * 4);
+      }
+      vectors.push(vector);
+    }
+  } else {
+    throw new Error(`지원하지 않는 번들 dtype: ${dtypeCode}`);
+  }
+
+  // 행 목록: 스타일 번들은 styles, 질의 임베딩 표는 queries
+  const rows = meta.styles || meta.queries;
+  if (!Array.isArray(rows) || rows.length !== count) {
+    throw new Error(`번들 행 수 불일치: ${rows?.length} / ${count}`);
+  }
+  return { meta, rows, vectors, dims };
+}
+
+// 포인터가 가리키는 번들 파일 읽기 (해시 확인 + 압축 해제 + 디코딩)
+function readEmbeddingBundle({ dir, pointer }) {
+  const compressed = fs.readFileSync(path.join(dir, pointer.file));
+  const digest = crypto.createHash('sha256').update(compressed).digest('hex');
+  if (digest !== pointer.sha256) {
+    throw new Error(`해시 불일치 (${pointer.file})`);
+  }
+  return decodeEmbeddingBundle(zlib.gunzipSync(compressed));
+}
+
+/**
+ * 성별별 임베딩 번들 로드 (콜드 스타트마다 한 번, 이후 메모리 캐시)
+ * @param {string} gender - 'male' | 'female'
+ * @returns {Object|null} - { model, dims, styles: [{ styleId, ..., embedding: Float32Array }] }, 없거나 깨졌으면 null
+ */
+function loadEmbeddingBundle(gender) {
+  if (process.env.EMBEDDING_BUNDLE_DISABLED === '1') return null;
+  if (embeddingBundleCache.has(gender)) return embeddingBundleCache.get(gender);
+
+  let bundle = null;
+  try {
+    const found = findEmbeddingBundlePointer(`embeddings-${gender}`);
+    if (!found) {
+      console.log(`📦 임베딩 번들 없음 (${gender}) → Firestore 조회`);
+    } else {
+      const { meta, rows, vectors, dims } = readEmbeddingBundle(found);
+      bundle = {
+        model: meta.model || found.pointer.model,
+        collection: meta.collection,
+        dims: dims,
+        builtAt: found.pointer.builtAt,
+        styles: rows.map((style, i) => ({ ...style, embedding: vectors[i] }))
+      };
+      console.log(`📦 임베딩 번들 로드 (${gender}): ${bundle.styles.length}개 x ${dims}차원, ${found.pointer.file}`);
+    }
+  } catch (error) {
+    console.error(`❌ 임베딩 번들 로드 실패 (${gender}) → Firestore 조회:`, error.message);
+    bundle = null;
+  }
+
+  embeddingBundleCache.set(gender, bundle);
+  return bundle;
+}
+
+// ==================== 질의 임베딩 캐시 ====================
+// 질의 → 표 키 (scripts/query_cache.py normalize_query와 같은 규칙: NFKC + 소문자 + 글자/숫자만)
+function normalizeQueryKey(query) {
+  return String(query || '').normalize('NFKC').toLowerCase().replace(/[^\p{L}\p{N}]+/gu, '');
+}
+
+/**
+ * 모델별 질의 임베딩 표 로드 (콜드 스타트마다 한 번)
+ * @param {string} model - 'models/embedding-001' 등 (번들 모델)
+ * @returns {Map|null} - 정규화 키 → Float32Array, 없으면 null
+ */
+function loadQueryEmbeddings(model) {
+  if (process.env.EMBEDDING_BUNDLE_DISABLED === '1') return null;
+  if (queryTableCache.has(model)) return queryTableCache.get(model);
+
+  let table = null;
+  try {
+    const found = findEmbeddingBundlePointer(`query-embeddings-${model.split('/').pop()}`);
+    if (found) {
+      const { meta, rows, vectors } = readEmbeddingBundle(found);
+      if (meta.model !== model) {
+        throw new Error(`모델 불일치: ${meta.model} / ${model}`);
+      }
+      table = new Map(rows.map((row, i) => [row.key, vectors[i]]));
+      console.log(`⚡ 질의 임베딩 표 로드 (${model}): ${table.size}개`);
+    }
+  } catch (error) {
+    console.error(`❌ 질의 임베딩 표 로드 실패 (${model}):`, error.message);
+    table = null;
+  }
+
+  queryTableCache.set(model, table);
+  return table;
+}
+
+/**
+ * 질의 임베딩 (미리 계산한 표 → 웜 인스턴스 캐시 → Gemini 순)
+ * @returns {Array|Float32Array|null}
+ */
+async function getQueryEmbedding(query, geminiKey, model) {
+  const key = normalizeQueryKey(query);
+  const table = loadQueryEmbeddings(model);
+  if (key && table && table.has(key)) {
+    console.log(`⚡ 질의 임베딩 표 적중: "${query}"`);
+    return table.get(key);
+  }
+
+  const cacheKey = `${model}\u001f${key}`;
+  if (key && liveQueryCache.has(cacheKey)) {
+    const cached = liveQueryCache.get(cacheKey);
+    liveQueryCache.delete(cacheKey);        // 최근 사용으로 갱신
+    liveQueryCache.set(cacheKey, cached);
+    console.log(`⚡ 질의 임베딩 캐시 적중: "${query}"`);
+    return cached;
+  }
+
+  const embedding = await generateEmbedding(query, geminiKey, model, 'RETRIEVAL_QUERY');
+  if (embedding && key) {
+    liveQueryCache.set(cacheKey, embedding);
+    if (liveQueryCache.size > QUERY_CACHE_MAX_ENTRIES) {
+      liveQueryCache.delete(liveQueryCache.keys().next().value);
+    }
+  }
+  return embedding;
+}
+
 // ==================== Firestore REST API 스타일 가져오기 ====================
 // ⚠️ 올바른 컬렉션: hairstyles (styles, men_styles 사용 금지!)
 async function getFirestoreStyles(genderFilter = null) {
@@ -108,14 +332,16 @@ async function getFirestoreStyles(genderFilter = null) {
   }
 }
 
-// ==================== 남자 스타일 가져오기 (hairstyles에서 gender='male' 필터) ====================
+// ==================== 남자 스타일 가져오기 (번들 우선, 없으면 hairstyles에서 gender='male' 필터) ====================
 async function getMenStyles() {
-  return await getFirestoreStyles('male');
+  const bundle = loadEmbeddingBundle('male');
+  return bundle ? bundle.styles : await getFirestoreStyles('male');
 }
 
-// ==================== 여자 스타일 가져오기 (hairstyles에서 gender='female' 필터) ====================
+// ==================== 여자 스타일 가져오기 (번들 우선, 없으면 hairstyles에서 gender='female' 필터) ====================
 async function getWomenStyles() {
-  return await getFirestoreStyles('female');
+  const bundle = loadEmbeddingBundle('female');
+  return bundle ? bundle.styles : await getFirestoreStyles('female');
 }
 
 // ==================== 임베딩 기반 Top-K 검색 ====================
@@ -137,8 +363,12 @@ async function searchFirestoreStyles(query, geminiKey, gender = 'female', topK =
   console.log(`🔍 Firestore 스타일 검색: "${query}" (${gender})`);
 
   try {
-    // 1. 쿼리 임베딩 생성
-    const queryEmbedding = await generateEmbedding(query, geminiKey);
+    // 1. 쿼리 임베딩 생성 (미리 계산한 질의면 호출 없이)
+    // 번들 / Firestore 대체 경로 모두 같은 방식: 문서 벡터와 같은 모델 + RETRIEVAL_QUERY
+    // (hairstyles 벡터 모델 = DEFAULT_EMBEDDING_MODEL, 번들은 만든 모델을 model에 기록)
+    const bundle = loadEmbeddingBundle(gender === 'male' ? 'male' : 'female');
+    const queryModel = bundle ? bundle.model : DEFAULT_EMBEDDING_MODEL;
+    const queryEmbedding = await getQueryEmbedding(query, geminiKey, queryModel);
     if (!queryEmbedding) {
       throw new Error('쿼리 임베딩 생성 실패');
     }
@@ -334,6 +564,10 @@ module.exports = {
   getFirestoreStyles,
   getMenStyles,
   getWomenStyles,
+  loadEmbeddingBundle,
+  loadQueryEmbeddings,
+  getQueryEmbedding,
+  normalizeQueryKey,
   searchStylesByEmbedding,
   searchFirestoreStyles,
   searchStylesByCode,
@@ -44,6 +44,10 @@ const {
   getFirestoreStyles,
   getMenStyles,
   getWomenStyles,
+  loadEmbeddingBundle,
+  loadQueryEmbeddings,
+  getQueryEmbedding,
+  normalizeQueryKey,
   searchStylesByEmbedding,
   searchFirestoreStyles,
   searchStylesByCode,
@@ -105,6 +109,10 @@ module.exports = {
   getFirestoreStyles,
   getMenStyles,
   getWomenStyles,
+  loadEmbeddingBundle,
+  loadQueryEmbeddings,
+  getQueryEmbedding,
+  normalizeQueryKey,
   searchStylesByEmbedding,
   searchFirestoreStyles,
   searchStylesByCode,
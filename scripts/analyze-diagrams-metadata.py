@@ -4,20 +4,49 @@
 - 각 도해도 이미지를 Gemini Vision으로 분석
 - L (Lifting), D (Direction), Section 등 핵심 파라미터 추출
 - Firestore styles 컬렉션의 diagrams 배열 업데이트
+- 도해도 / 스타일 단위 체크포인트 저널 → 중단되면 --resume으로 이어서 실행 (Firestore 목록 조회 없음)
+- 기본은 원본 이미지 전송, --preprocess면 축소 / 재인코딩본 전송
+  (분석 값이 같은지 check-diagram-downscale.py로 확인한 뒤에 사용)
+- 기본은 도해도마다 요청 하나, --batch-size N이면 같은 스타일 도해도를 N장씩 묶어서 요청
+  (여러 장을 한 프롬프트로 분석한 값은 정확도 검증 전 - 샘플로 단일 요청 결과와 비교한 뒤에 사용)
 """
 
 import os
 import sys
-import json
 import time
-import base64
-import requests
+import argparse
+import functools
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from blob_store import DEFAULT_BLOB_DIR, BlobStore
+from checkpoint import CheckpointJournal
+from firestore_batch import approx_size
+from firestore_sync import content_hash
+from image_preprocess import (
+    DEFAULT_FORMAT,
+    DEFAULT_MAX_EDGE,
+    DEFAULT_QUALITY,
+    IMAGE_FORMATS,
+    DiagramPreprocessor,
+)
+from profiling import add_bytes, record, span, start_run
+from rate_limiter import TokenBucket
+from style_listing import ANALYSIS_STATUS_FIELDS, fetch_style_fields, stream_styles
+from diagram_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_AGE_DAYS,
+    DiagramAnalysisCache,
+)
+from diagram_analysis import (
+    analyze_diagram_batch,
+    analyze_diagram_image,
+    analyze_styles_concurrently,
+    create_http_session,
+)
+
 sys.stdout.reconfigure(encoding='utf-8')
 
-import functools
 print = functools.partial(print, flush=True)
 
 # ==================== 설정 ====================
@@ -34,6 +63,16 @@ if os.path.exists(env_path):
                 GEMINI_API_KEY = line.split("=", 1)[1].strip().strip('"').strip("'")
                 break
 
+# .env에 없으면 환경변수 사용 (스텁 서버 벤치마크 등)
+GEMINI_API_KEY = GEMINI_API_KEY or os.environ.get("GEMINI_API_KEY")
+
+# 동시 분석 기본값 (--concurrency, --rps로 변경 가능)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RPS = 5.0
+DEFAULT_BATCH_SIZE = 1
+
+CHECKPOINT_NAME = "analyze-diagrams-metadata"
+
 if not GEMINI_API_KEY:
     print("❌ GEMINI_API_KEY가 .env 파일에 없습니다")
     sys.exit(1)
@@ -55,265 +94,232 @@ def init_firebase():
         print(f"❌ Firebase 초기화 실패: {e}")
         return None
 
-# ==================== Gemini Vision 분석 ====================
-
-DIAGRAM_ANALYSIS_PROMPT = """이 헤어컷 도해도(diagram) 이미지를 분석하여 정확한 기술 파라미터를 JSON으로 반환하세요.
-
-【중요】도해도는 헤어컷 기술을 설명하는 그림입니다. 다음을 정확히 읽어내세요:
-
-【Lifting (L) - 들어올리는 각도】⭐ 가장 중요!
-머리카락을 두피에서 들어올리는 각도를 정확히 판단:
-- L0: 0도 (두피에 붙임, 원렝스)
-- L1: 22.5도
-- L2: 45도 (Low Graduation)
-- L3: 67.5도
-- L4: 90도 (두피에서 직각, 기본 Layer) ⭐
-- L5: 112.5도
-- L6: 135도 (High Layer)
-- L7: 157.5도
-- L8: 180도 (완전히 위로)
-
-🎯 판단 기준:
-- 화살표나 선이 두피에서 얼마나 들어올려졌는지 각도 확인
-- 숫자가 표기되어 있으면 그대로 사용
-- "90°", "45°" 등 각도 표기 확인
-
-【Direction (D) - 당기는 방향】
-머리카락을 당기는 방향:
-- D0: 정면 (앞으로)
-- D1: 전방 대각선 45도
-- D2: 측면 (옆으로)
-- D3: 후방 대각선 45도
-- D4: 후면 (뒤로) ⭐ 가장 흔함
-- D5~D8: 반대편 방향
-
-【Section - 섹션 분할 방식】
-- HS (Horizontal Section): 가로 섹션
-- DBS (Diagonal Back Section): 후대각 섹션
-- DFS (Diagonal Forward Section): 전대각 섹션
-- VS (Vertical Section): 세로 섹션
-- RS (Radial Section): 방사형 섹션
-
-【Zone - 작업 영역】
-- Crown: 정수리
-- Top: 상단
-- Side: 측면
-- Back: 후면
-- Nape: 네이프 (목덜미)
-- Fringe: 앞머리
-- Perimeter: 아웃라인
-
-【Cutting Method - 커팅 기법】
-- Blunt: 일자 커팅
-- Point: 포인트 커팅 (가위 끝으로)
-- Slide: 슬라이드 커팅
-- Thinning: 숱치기
-- Texturizing: 질감 커팅
-
-【Output JSON】
-{
-  "lifting": "L4",
-  "lifting_angle": 90,
-  "direction": "D4",
-  "section": "VS",
-  "zone": "Back",
-  "cutting_method": "Point",
-  "guide_line": "이전 섹션" 또는 "고정 가이드" 또는 null,
-  "over_direction": true 또는 false,
-  "notes": "추가 관찰 사항"
-}
-
-⚠️ 주의:
-1. 이미지에 각도 숫자가 있으면 정확히 읽어서 L 코드로 변환
-2. 화살표 방향을 보고 Direction 판단
-3. 섹션 라인 패턴을 보고 Section 판단
-4. 확실하지 않으면 가장 가능성 높은 값 선택
-
-JSON만 반환하세요."""
-
-def analyze_diagram_image(image_url):
-    """Firebase Storage URL의 도해도 이미지를 Gemini Vision으로 분석"""
-    try:
-        # 이미지 다운로드
-        img_response = requests.get(image_url, timeout=30)
-        if img_response.status_code != 200:
-            print(f"  ⚠️ 이미지 다운로드 실패: {img_response.status_code}")
-            return None
-
-        # Base64 인코딩
-        image_base64 = base64.b64encode(img_response.content).decode('utf-8')
-
-        # Content-Type 추정
-        content_type = img_response.headers.get('Content-Type', 'image/png')
-        if 'jpeg' in content_type or 'jpg' in content_type:
-            mime_type = 'image/jpeg'
-        else:
-            mime_type = 'image/png'
-
-        # Gemini Vision API 호출
-        api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+# ==================== Firestore 업데이트 ====================
 
-        payload = {
-            "contents": [{
-                "parts": [
-                    {"inline_data": {"mime_type": mime_type, "data": image_base64}},
-                    {"text": DIAGRAM_ANALYSIS_PROMPT}
-                ]
-            }],
-            "generationConfig": {
-                "temperature": 0.2,
-                "maxOutputTokens": 500
-            }
-        }
+def update_diagram_metadata(db, style_id, diagrams_with_metadata):
+    """Firestore의 스타일 문서에 도해도 메타데이터 업데이트"""
+    try:
+        doc_ref = db.collection('styles').document(style_id)
+        with span("firestore.document_update"):
+            doc_ref.update({
+                'diagrams': diagrams_with_metadata,
+                'diagramsAnalyzedAt': firestore.SERVER_TIMESTAMP
+            })
+        add_bytes("firestore", bytes_out=approx_size(diagrams_with_metadata))
+        return True
+    except Exception as e:
+        print(f"  ❌ Firestore 업데이트 실패: {e}")
+        return False
 
-        response = requests.post(api_url, json=payload, timeout=60)
 
-        if response.status_code != 200:
-            print(f"  ⚠️ Gemini API 오류: {response.status_code}")
-            return None
+# ==================== 분석 대상 ====================
 
-        data = response.json()
-        text = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+def plan_targets(db, args, stats):
+    """분석 대상 스타일 선별 → (targets, {style_id: 현재 diagrams 해시})"""
+    # 1단계: 상태 필드(diagramsAnalyzedAt)만 스트리밍해서 분석 대상 선별
+    print("\n📋 Firestore에서 스타일 목록 가져오기... (상태 필드만)")
 
-        # JSON 파싱
-        text = text.replace('```json', '').replace('```', '').strip()
-        metadata = json.loads(text)
+    total_styles = 0
+    pending_ids = []
+    analyzed_ids = set()
+    for style_id, data in stream_styles(db, 'styles', ANALYSIS_STATUS_FIELDS):
+        if args.style and style_id not in args.style:
+            continue
+        total_styles += 1
 
-        # 배열이 반환된 경우 첫 번째 요소 사용
-        if isinstance(metadata, list):
-            metadata = metadata[0] if metadata else {}
+        # 이미 분석된 스타일 스킵
+        if data.get("diagramsAnalyzedAt") and not args.force:
+            print(f"  ⏭️ {style_id}: 이미 분석됨, 스킵")
+            stats["skipped"] += 1
+            continue
 
-        # dict가 아니면 None 반환
-        if not isinstance(metadata, dict):
-            return None
+        if data.get("diagramsAnalyzedAt"):
+            analyzed_ids.add(style_id)
+        pending_ids.append(style_id)
 
-        return metadata
+    print(f"  총 {total_styles}개 스타일 중 {len(pending_ids)}개 분석 대상")
+    print("-" * 50)
 
-    except json.JSONDecodeError as e:
-        print(f"  ⚠️ JSON 파싱 실패: {e}")
-        return None
-    except Exception as e:
-        print(f"  ⚠️ 분석 실패: {e}")
-        return None
+    # 2단계: 분석 대상 문서만 diagrams 필드 조회
+    targets = []
+    current_hashes = {}
+    for style_id, data in fetch_style_fields(db, 'styles', pending_ids, ["diagrams"]):
+        diagrams = data.get("diagrams", [])
+        if not diagrams:
+            print(f"  ⚠️ {style_id}: 도해도 없음, 스킵")
+            stats["skipped"] += 1
+            continue
 
-# ==================== Firestore 업데이트 ====================
+        targets.append({"id": style_id, "diagrams": diagrams})
+        # 재분석(--force) 결과가 지금 문서와 같으면 쓰지 않도록 현재 내용 해시 보관
+        if style_id in analyzed_ids:
+            current_hashes[style_id] = content_hash(diagrams)
 
-def update_diagram_metadata(db, style_id, diagrams_with_metadata):
-    """Firestore의 스타일 문서에 도해도 메타데이터 업데이트"""
-    try:
-        doc_ref = db.collection('styles').document(style_id)
-        doc_ref.update({
-            'diagrams': diagrams_with_metadata,
-            'diagramsAnalyzedAt': firestore.SERVER_TIMESTAMP
-        })
-        return True
-    except Exception as e:
-        print(f"  ❌ Firestore 업데이트 실패: {e}")
-        return False
+    return targets, current_hashes
 
 # ==================== 메인 ====================
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="도해도 56파라미터 분석 및 Firestore 업데이트")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"동시에 분석할 도해도 수 (기본 {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS,
+                        help=f"Gemini 초당 최대 호출 수, 0이면 제한 없음 (기본 {DEFAULT_RPS})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"요청 하나에 묶을 같은 스타일 도해도 수, 1이면 도해도마다 요청 (기본 {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--burst", type=int, default=None,
+                        help="토큰 버킷 버스트 크기 (기본: rps와 동일)")
+    parser.add_argument("--style", action="append", default=[],
+                        help="지정한 스타일만 분석 (여러 번 사용 가능)")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 이전 실행을 체크포인트에서 이어서 실행 (분석 대상 목록을 다시 조회하지 않음)")
+    parser.add_argument("--force", action="store_true",
+                        help="diagramsAnalyzedAt이 있어도 다시 분석 (캐시 적중분은 Gemini 호출 없음)")
+    parser.add_argument("--no-cache", action="store_true", help="분석 결과 캐시 사용 안 함")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS)
+    parser.add_argument("--cache-max-mb", type=float, default=64)
+    parser.add_argument("--no-blob-store", action="store_true",
+                        help="로컬 이미지 저장소를 쓰지 않고 매번 Storage에서 다운로드")
+    parser.add_argument("--blob-dir", default=DEFAULT_BLOB_DIR)
+    parser.add_argument("--revalidate-images", action="store_true",
+                        help="이미 받은 이미지도 조건부 요청(ETag / If-Modified-Since)으로 변경 확인")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="도해도를 축소/재인코딩해서 전송 (check-diagram-downscale.py로 정확도 확인 후 사용)")
+    parser.add_argument("--max-edge", type=int, default=DEFAULT_MAX_EDGE,
+                        help=f"축소 후 긴 변 최대 픽셀 (기본 {DEFAULT_MAX_EDGE})")
+    parser.add_argument("--image-format", choices=sorted(IMAGE_FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument("--image-quality", type=int, default=DEFAULT_QUALITY)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    start_run("analyze-diagrams-metadata")
+
     print("=" * 70)
     print("도해도 56파라미터 분석 및 Firestore 업데이트")
     print("=" * 70)
 
     # Firebase 초기화
-    db = init_firebase()
+    with span("phase.init_firebase"):
+        db = init_firebase()
     if not db:
         return
 
-    # Firestore에서 모든 스타일 가져오기
-    print("\n📋 Firestore에서 스타일 목록 가져오기...")
-    styles_ref = db.collection('styles')
-    styles = styles_ref.get()
-
-    style_list = []
-    for doc in styles:
-        data = doc.to_dict()
-        style_list.append({
-            "id": doc.id,
-            "data": data
-        })
-
-    print(f"  총 {len(style_list)}개 스타일")
-    print("-" * 50)
-
     # 통계
     stats = {
         "processed": 0,
         "skipped": 0,
+        "unchanged": 0,
         "failed": 0,
-        "diagrams_analyzed": 0
+        "diagrams_analyzed": 0,
+        "diagrams_resumed": 0
     }
 
-    for idx, style in enumerate(style_list):
-        style_id = style["id"]
-        data = style["data"]
-
-        # 이미 분석된 스타일 스킵
-        if data.get("diagramsAnalyzedAt"):
-            print(f"  ⏭️ {style_id}: 이미 분석됨, 스킵")
-            stats["skipped"] += 1
-            continue
-
-        diagrams = data.get("diagrams", [])
-        if not diagrams:
-            print(f"  ⚠️ {style_id}: 도해도 없음, 스킵")
-            stats["skipped"] += 1
-            continue
-
-        print(f"\n📊 [{idx+1}/{len(style_list)}] {style_id} 분석 중... ({len(diagrams)}개 도해도)")
-
-        # 각 도해도 분석
-        diagrams_with_metadata = []
-        for i, diagram in enumerate(diagrams):
-            step = diagram.get("step", i + 1)
-            url = diagram.get("url", "")
-
-            if not url:
-                diagrams_with_metadata.append(diagram)
-                continue
-
-            print(f"  🔍 Step {step} 분석 중...")
-
-            metadata = analyze_diagram_image(url)
-
-            if metadata:
-                # 기존 데이터에 메타데이터 추가
-                updated_diagram = {
-                    "step": step,
-                    "url": url,
-                    "lifting": metadata.get("lifting", "L4"),
-                    "lifting_angle": metadata.get("lifting_angle", 90),
-                    "direction": metadata.get("direction", "D4"),
-                    "section": metadata.get("section", "VS"),
-                    "zone": metadata.get("zone", "Back"),
-                    "cutting_method": metadata.get("cutting_method", "Point"),
-                    "over_direction": metadata.get("over_direction", False),
-                    "notes": metadata.get("notes", "")
-                }
-                diagrams_with_metadata.append(updated_diagram)
-                stats["diagrams_analyzed"] += 1
-                print(f"    ✅ L={metadata.get('lifting')}, D={metadata.get('direction')}, Section={metadata.get('section')}")
-            else:
-                # 분석 실패 시 기존 데이터 유지
-                diagrams_with_metadata.append(diagram)
-                print(f"    ⚠️ 분석 실패, 기존 데이터 유지")
-
-            # Rate limiting
-            time.sleep(1)
+    journal = CheckpointJournal(CHECKPOINT_NAME)
+    plan = journal.resume_plan() if args.resume else None
+    if plan is not None:
+        # 중단된 실행 이어서: 계획은 저널에서, 끝난 스타일은 건너뜀
+        done_styles = journal.done_units("style")
+        targets = [t for t in plan["targets"] if t["id"] not in done_styles]
+        current_hashes = plan["current_hashes"]
+        stats["diagrams_resumed"] = sum(1 for t in targets for d in t["diagrams"]
+                                        if d.get("url") and journal.is_done("diagram", d["url"]))
+        print(f"\n♻️ 체크포인트에서 이어서 실행: 전체 {len(plan['targets'])}개 중 완료 {len(done_styles)}개, "
+              f"남은 스타일 {len(targets)}개 (분석된 도해도 {stats['diagrams_resumed']}장 재사용)")
+    else:
+        if args.resume:
+            print("\n  이어서 실행할 체크포인트가 없어 새로 시작합니다")
+        elif journal.pending():
+            print("\n  ⚠️ 중단된 이전 실행의 체크포인트를 버리고 새로 시작합니다 (이어서 하려면 --resume)")
+        with span("phase.plan_targets"):
+            targets, current_hashes = plan_targets(db, args, stats)
+        journal.start({"targets": targets, "current_hashes": current_hashes})
+
+    total_diagrams = sum(len(t["diagrams"]) for t in targets)
+    print(f"\n📊 {len(targets)}개 스타일, {total_diagrams}개 도해도 분석 시작 "
+          f"(동시 {args.concurrency}개, {args.rps} req/s, 요청당 최대 {args.batch_size}장)")
+
+    session = create_http_session(pool_size=args.concurrency)
+    limiter = TokenBucket(args.rps, args.burst)
+
+    cache = None
+    if not args.no_cache:
+        cache = DiagramAnalysisCache(args.cache_path, max_age_days=args.cache_max_age_days,
+                                     max_bytes=int(args.cache_max_mb * 1024 * 1024))
+        cache.evict()
+
+    blob_store = None if args.no_blob_store else BlobStore(args.blob_dir)
+    preprocessor = None
+    if args.preprocess and not blob_store:
+        print("⚠️ --preprocess는 로컬 이미지 저장소가 필요합니다 - 원본 그대로 전송")
+    elif args.preprocess:
+        preprocessor = DiagramPreprocessor(blob_store, max_edge=args.max_edge,
+                                           image_format=args.image_format, quality=args.image_quality)
+
+    analyze_fn = functools.partial(analyze_diagram_image, api_key=GEMINI_API_KEY,
+                                   session=session, limiter=limiter, cache=cache,
+                                   blob_store=blob_store, revalidate=args.revalidate_images,
+                                   preprocessor=preprocessor)
+    batch_stats = {}
+    analyze_batch_fn = functools.partial(analyze_diagram_batch, api_key=GEMINI_API_KEY,
+                                         session=session, limiter=limiter, cache=cache,
+                                         blob_store=blob_store, revalidate=args.revalidate_images,
+                                         preprocessor=preprocessor, stats=batch_stats)
+
+    # 도해도가 하나 끝날 때마다 저널에 기록 (재개 시 이미 분석한 도해도는 다시 요청하지 않음)
+    def journaled_analyze(url):
+        metadata = journal.get("diagram", url)
+        if metadata is not None:
+            return metadata
+        metadata = analyze_fn(url)
+        if metadata:
+            journal.record("diagram", url, metadata)
+        return metadata
 
+    def journaled_analyze_batch(diagrams):
+        results = [journal.get("diagram", url) for _, url in diagrams]
+        todo = [i for i, metadata in enumerate(results) if metadata is None]
+        if todo:
+            fresh = analyze_batch_fn([diagrams[i] for i in todo])
+            for i, metadata in zip(todo, fresh):
+                if metadata:
+                    journal.record("diagram", diagrams[i][1], metadata)
+                    results[i] = metadata
+        return results
+
+    def on_style_done(style_id, diagrams_with_metadata):
+        # 내용이 그대로면 쓰기 생략 (diagramsAnalyzedAt도 그대로 유지)
+        if current_hashes.get(style_id) == content_hash(diagrams_with_metadata):
+            stats["unchanged"] += 1
+            journal.record("style", style_id)
+            print(f"  ⏭️ {style_id}: 분석 결과 변경 없음, 쓰기 생략")
         # Firestore 업데이트
-        if update_diagram_metadata(db, style_id, diagrams_with_metadata):
+        elif update_diagram_metadata(db, style_id, diagrams_with_metadata):
             stats["processed"] += 1
+            journal.record("style", style_id)
             print(f"  ✅ {style_id}: Firestore 업데이트 완료")
         else:
             stats["failed"] += 1
 
         # 진행 상황
-        if (idx + 1) % 5 == 0:
-            print(f"\n  --- {idx + 1}/{len(style_list)} 완료 ---\n")
+        done = stats["processed"] + stats["unchanged"] + stats["failed"]
+        if done % 5 == 0:
+            print(f"\n  --- {done}/{len(targets)} 완료 ---\n")
+
+    started = time.monotonic()
+    engine_stats = analyze_styles_concurrently(targets, journaled_analyze, on_style_done,
+                                               concurrency=args.concurrency,
+                                               analyze_batch_fn=journaled_analyze_batch, batch_size=args.batch_size)
+    if stats["failed"]:
+        # 실패한 것은 저널에 기록되지 않았으므로 --resume이 그것만 다시 처리
+        journal.close()
+        print(f"\n  ⚠️ 실패 {stats['failed']}개 - 체크포인트 유지 (--resume으로 실패한 것만 다시 실행)")
+    else:
+        journal.finish()
+    elapsed = time.monotonic() - started
+    record("phase.analyze", elapsed)
+    stats["diagrams_analyzed"] = engine_stats["diagrams_analyzed"]
 
     # 최종 통계
     print("\n" + "=" * 70)
@@ -321,8 +327,39 @@ def main():
     print("=" * 70)
     print(f"  처리된 스타일: {stats['processed']}개")
     print(f"  스킵된 스타일: {stats['skipped']}개")
+    print(f"  변경 없음(쓰기 생략): {stats['unchanged']}개")
     print(f"  실패한 스타일: {stats['failed']}개")
     print(f"  분석된 도해도: {stats['diagrams_analyzed']}장")
+    print(f"  분석 실패 도해도: {engine_stats['diagrams_failed']}장")
+    if stats["diagrams_resumed"]:
+        print(f"  체크포인트 재사용 도해도: {stats['diagrams_resumed']}장")
+    print(f"  소요 시간: {elapsed:.1f}초 (레이트 리미터 대기 누적 {limiter.waited:.1f}초)")
+    if batch_stats:
+        print(f"  Gemini 요청: 배치 {batch_stats['requests']}회 + 단일 {batch_stats['single_fallbacks']}회 "
+              f"(깨진 응답 분할 {batch_stats['splits']}회)")
+
+    if cache:
+        cache.evict()
+        entries, size = cache.summary()
+        cs = cache.stats
+        lookups = cs["hits"] + cs["misses"]
+        hit_rate = cs["hits"] / lookups * 100 if lookups else 0
+        print(f"  캐시 적중: {cs['hits']}회 / 미스: {cs['misses']}회 ({hit_rate:.1f}%)")
+        print(f"  캐시 저장: {cs['stores']}건 / 제거: {cs['evicted']}건 (현재 {entries}건, {size / 1024:.1f}KB)")
+        cache.close()
+
+    if preprocessor:
+        pr = preprocessor.report()
+        print(f"  이미지 축소({preprocessor.params}): {pr['images']}장, 전송 페이로드(base64) "
+              f"{pr['payload_source_bytes'] / 1024 / 1024:.1f}MB → {pr['payload_prepared_bytes'] / 1024 / 1024:.1f}MB "
+              f"({pr['saved_ratio']:.1%} 절감)")
+        preprocessor.close()
+
+    if blob_store:
+        bs = blob_store.stats
+        print(f"  이미지: 로컬 {bs['local']}장 / 304 {bs['not_modified']}장 / "
+              f"다운로드 {bs['downloaded']}장 ({bs['bytes_downloaded'] / 1024 / 1024:.1f}MB) / 실패 {bs['failed']}장")
+        blob_store.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+남자 스타일 Firestore 업로드 처리량 측정 (Firestore 에뮬레이터 또는 메모리 대역)
+- 이전: 문서마다 set(merge=True) + 0.05초 대기
+- 이후: firestore_batch.bulk_set() 배치 동시 커밋
+- 측정 후 미리 넣어 둔 embedding 필드가 그대로인지 확인 (merge 보존)
+- --fake RTT_MS: 에뮬레이터 대신 fake_firestore.FakeFirestore (RPC마다 RTT_MS 대기, RPC 수도 출력)
+  → 왕복 횟수 / 동시성 효과만 보여 줌, 실제 Firestore 처리량은 에뮬레이터나 운영 측정으로 확인
+
+사용법:
+  firebase emulators:start --only firestore   (기본 포트 8080)
+  FIRESTORE_EMULATOR_HOST=127.0.0.1:8080 python bench-firestore-upload.py --docs 1000 --workers 1 4 8
+  python bench-firestore-upload.py --fake 20 --docs 1000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import functools
+
+from google.cloud import firestore
+
+from fake_firestore import FakeFirestore
+from firestore_batch import FIRESTORE_BATCH_LIMIT, bulk_set, chunked
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+BENCH_PROJECT = "demo-hairgator-bench"
+
+# ==================== 시드 / 문서 ====================
+
+def make_doc(style_id, rng, diagrams=20):
+    """upload-men-to-firestore.build_style_doc()과 같은 모양의 문서"""
+    return {
+        "styleId": style_id,
+        "series": "SF",
+        "seriesName": "Side Fringe",
+        "category": "men",
+        "resultImage": f"https://firebasestorage.googleapis.com/v0/b/bench/o/{style_id}%2Fresult.png",
+        "diagrams": [{"step": i + 1, "url": f"https://firebasestorage.googleapis.com/v0/b/bench/o/{style_id}%2F{i + 1:02d}.png"}
+                     for i in range(diagrams)],
+        "diagramCount": diagrams,
+        "captionUrl": None,
+        "caption": {"preview": ["사이드 프린지 커트"] * 5, "recipe": {"keywords": ["레이어", "90도"]}},
+        "updatedAt": firestore.SERVER_TIMESTAMP,
+        "benchValue": rng.random(),
+    }
+
+def seed_embeddings(db, collection, style_ids):
+    """임베딩만 있는 문서 미리 생성 (업로드가 이 필드를 지우면 안 됨)"""
+    rng = random.Random(7)
+    collection_ref = db.collection(collection)
+    for chunk in chunked(style_ids, FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for style_id in chunk:
+            batch.set(collection_ref.document(style_id), {
+                "embedding": [rng.uniform(-0.1, 0.1) for _ in range(16)],
+                "embeddingKey": f"bench-{style_id}"
+            })
+        batch.commit()
+
+def check_embeddings(db, collection, style_ids, sample=50):
+    refs = [db.collection(collection).document(sid) for sid in style_ids[:sample]]
+    kept = sum(1 for snap in db.get_all(refs, field_paths=["embeddingKey"])
+               if (snap.to_dict() or {}).get("embeddingKey") == f"bench-{snap.id}")
+    return kept, len(refs)
+
+# ==================== 측정 ====================
+
+def run_sequential(db, collection, docs, sleep):
+    collection_ref = db.collection(collection)
+    for style_id, data in docs:
+        collection_ref.document(style_id).set(data, merge=True)
+        if sleep:
+            time.sleep(sleep)
+
+def measure(label, fn, count, db=None):
+    """fn() 실행 시간 / 처리량 (메모리 대역이면 그 사이 RPC 수도)"""
+    rpcs = db.counters["rpcs"] if isinstance(db, FakeFirestore) else None
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    line = f"  {label:<40} {count:>6}건 {elapsed:>8.2f}초 {count / elapsed:>9.1f} 건/초"
+    if rpcs is not None:
+        line += f" (RPC {db.counters['rpcs'] - rpcs}회)"
+    print(line)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="남자 스타일 업로드 처리량 측정 (에뮬레이터)")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--collection", default="bench_men_styles")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--skip-sleep-baseline", action="store_true",
+                        help="0.05초 대기가 있는 이전 방식 측정 생략 (문서가 많을 때)")
+    parser.add_argument("--fake", type=float, metavar="RTT_MS",
+                        help="에뮬레이터 대신 메모리 대역 사용 (RPC마다 RTT_MS 밀리초 대기)")
+    args = parser.parse_args()
+
+    if args.fake is not None:
+        db = FakeFirestore(rpc_latency=args.fake / 1000)
+        target = f"메모리 대역, RPC당 {args.fake:g}ms"
+    elif os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        db = firestore.Client(project=BENCH_PROJECT)
+        target = f"에뮬레이터 {os.environ['FIRESTORE_EMULATOR_HOST']}"
+    else:
+        print("❌ FIRESTORE_EMULATOR_HOST가 없습니다 (운영 Firestore에서는 실행하지 마세요, 대역은 --fake)")
+        sys.exit(1)
+    rng = random.Random(42)
+    style_ids = [f"SF{i:05d}" for i in range(args.docs)]
+    docs = [(style_id, make_doc(style_id, rng)) for style_id in style_ids]
+
+    print(f"🌱 임베딩 필드 {args.docs}개 문서 생성 중...")
+    seed_embeddings(db, args.collection, style_ids)
+
+    print("=" * 70)
+    print(f"men_styles 업로드 비교 ({args.collection}, {target})")
+    print("=" * 70)
+
+    if not args.skip_sleep_baseline:
+        measure("이전: 문서별 set(merge) + 0.05초 대기",
+                lambda: run_sequential(db, args.collection, docs, 0.05), len(docs), db)
+    measure("문서별 set(merge), 대기 없음",
+            lambda: run_sequential(db, args.collection, docs, 0), len(docs), db)
+
+    for workers in args.workers:
+        report = measure(f"bulk_set 배치 {args.batch_size}건 x 동시 {workers}",
+                         lambda: bulk_set(db, args.collection, docs, merge=True,
+                                          batch_size=args.batch_size, workers=workers), len(docs), db)
+        failed = sum(1 for r in report.values() if r["status"] != "ok")
+        if failed:
+            print(f"    ⚠️ 실패 {failed}건")
+
+    kept, checked = check_embeddings(db, args.collection, style_ids)
+    print("-" * 70)
+    print(f"  embedding 필드 보존: {kept}/{checked} (merge=True)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+IVF 근사 검색 벤치마크 - nprobe별 지연 시간 vs recall (완전 탐색 대비)
+- 합성 임베딩(synthetic_dataset.synthetic_embeddings)을 청크로 생성해서 바로 추가 → 전체 행렬을 두 번 들고 있지 않음
+- 학습 + 추가 시간, 증분 추가(마지막 --insert-fraction 만큼, 중심 재학습 없음) 벡터당 시간
+- 저장한 인덱스를 memmap으로 다시 열고, 같은 벡터 파일로 완전 탐색 (행렬-벡터 곱 + argpartition) 기준 측정
+- 질의는 같은 분포에서 따로 뽑은 벡터 (인덱스에 없는 새 룩 / 스타일)
+- 메모리: 768차원 1,000,000개 = 벡터만 약 2.9GB (부족하면 --dims로 줄여서 비교)
+
+사용법:
+  python bench-ivf-index.py                               # 10,000 / 100,000 / 1,000,000 벡터
+  python bench-ivf-index.py --sizes 100000 --nprobe 1 4 16 64 --queries 200
+  python bench-ivf-index.py --sizes 1000000 --dims 256 --nlist 2048
+"""
+
+import gc
+import sys
+import time
+import argparse
+import tempfile
+import functools
+
+import numpy as np
+
+from ivf_index import DEFAULT_NPROBE, IVFIndex, default_nlist, ivf_paths
+from synthetic_dataset import synthetic_embeddings
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+CHUNK = 65536
+QUERY_SAMPLE_SEED = 1_000_000
+
+# ==================== 측정 ====================
+
+def exact_search(matrix, query, k):
+    """완전 탐색 top-k 행 번호 (VectorIndex.search와 같은 계산)"""
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+def build_index(size, inserts, args):
+    """청크로 생성하면서 학습 + 추가 → (인덱스, 학습 + 추가 초, 증분 추가 벡터당 ms)"""
+    clusters = max(1, size // 50)
+    nlist = args.nlist or default_nlist(size)
+
+    def chunk(i, count):
+        return synthetic_embeddings(count, dims=args.dims, clusters=clusters, seed=args.seed, sample_seed=i)
+
+    started = time.perf_counter()
+    base = size - inserts
+    first = chunk(0, min(base, CHUNK))
+    index = IVFIndex.train(first, nlist, seed=args.seed)
+    for n, start in enumerate(range(0, base, CHUNK)):
+        vectors = first if n == 0 else chunk(n, min(CHUNK, base - start))
+        index.add([f"LOOK{i:07d}" for i in range(start, start + len(vectors))], vectors)
+    index.trained_count = base
+    build_s = time.perf_counter() - started
+
+    # 증분 추가: 새로 임베딩된 스타일이 몇 개씩 들어오는 상황 (배치 100개씩)
+    insert_ms = 0.0
+    if inserts:
+        vectors = chunk(QUERY_SAMPLE_SEED - 1, inserts)
+        started = time.perf_counter()
+        for start in range(0, inserts, 100):
+            index.add([f"NEW{i:07d}" for i in range(start, min(start + 100, inserts))], vectors[start:start + 100])
+        insert_ms = (time.perf_counter() - started) / inserts * 1000
+    return index, build_s, insert_ms
+
+def run_size(size, args, directory):
+    inserts = int(size * args.insert_fraction)
+    index, build_s, insert_ms = build_index(size, inserts, args)
+    nlist = index.nlist
+    collection = f"bench-{size}"
+    index.save(collection, directory)
+    del index
+    gc.collect()
+
+    # 다시 열기 (memmap) - 완전 탐색도 같은 벡터 파일 사용
+    started = time.perf_counter()
+    index = IVFIndex.load(collection, directory)
+    open_ms = (time.perf_counter() - started) * 1000
+    vectors_path, _, _ = ivf_paths(collection, directory)
+    matrix = np.memmap(vectors_path, dtype="<f4", mode="r", shape=(len(index), args.dims))
+    ids = index.meta["ids"]
+
+    queries = synthetic_embeddings(args.queries, dims=args.dims, clusters=max(1, size // 50), seed=args.seed,
+                                   sample_seed=QUERY_SAMPLE_SEED)
+    exact_search(matrix, queries[0], args.k)       # 페이지 캐시 워밍업
+    index.search(queries[0], k=args.k, nprobe=nlist)
+
+    expected, exact_total = [], 0.0
+    for query in queries:
+        started = time.perf_counter()
+        top = exact_search(matrix, query, args.k)
+        exact_total += time.perf_counter() - started
+        expected.append({ids[i] for i in top})
+    exact_ms = exact_total / len(queries) * 1000
+
+    sizes = index.list_sizes()
+    print(f"\n📦 {size:,}개 x {args.dims}차원 - nlist {nlist} (리스트 평균 {sizes.mean():.0f} / 최대 {sizes.max()}), "
+          f"학습 + 추가 {build_s:.1f}초, 증분 추가 {insert_ms:.3f}ms/벡터 ({inserts:,}개), 열기 {open_ms:.1f}ms")
+    print(f"  {'nprobe':>7} {'탐색 비율':>8} {'질의당':>10} {'완전 탐색 대비':>12} {f'recall@{args.k}':>10}")
+    print(f"  {'완전 탐색':>7} {'100.0%':>9} {exact_ms:>8.3f}ms {'1.0배':>13} {1.0:>10.3f}")
+
+    for nprobe in sorted({min(n, nlist) for n in args.nprobe}):
+        hits, total = 0, 0.0
+        for query, exact in zip(queries, expected):
+            started = time.perf_counter()
+            found = index.search(query, k=args.k, nprobe=nprobe)
+            total += time.perf_counter() - started
+            hits += len(exact & {doc_id for doc_id, _ in found})
+        ms = total / len(queries) * 1000
+        recall = hits / (len(queries) * args.k)
+        scanned = np.sort(sizes)[::-1][:nprobe].sum() / len(index) if nprobe < nlist else 1.0
+        mark = " ←" if nprobe == DEFAULT_NPROBE else ""
+        print(f"  {nprobe:>7} {f'≤{scanned * 100:.1f}%':>9} {ms:>8.3f}ms {f'{exact_ms / ms:.1f}배':>13} "
+              f"{recall:>10.3f}{mark}")
+
+    del index, matrix
+    gc.collect()
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF 근사 검색 벤치마크 (지연 시간 vs recall)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--nlist", type=int, help="리스트 수 (기본: √벡터 수)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--insert-fraction", type=float, default=0.01, help="증분 추가로 넣을 비율")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 90)
+    print(f"IVF 근사 검색 vs 완전 탐색 ({args.dims}차원, 질의 {args.queries}개, top-{args.k}, "
+          f"기본 nprobe {DEFAULT_NPROBE} ←)")
+    print("=" * 90)
+
+    with tempfile.TemporaryDirectory(prefix="ivf-index-bench-") as directory:
+        for size in args.sizes:
+            run_size(size, args, directory)
+
+if __name__ == "__main__":
+    main()
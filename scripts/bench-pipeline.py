@@ -0,0 +1,466 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 데이터 파이프라인 벤치마크 (합성 데이터셋 + 로컬 Firestore / Gemini 대역)
+- synthetic_dataset으로 스타일 수별 여자/남자 레시피 폴더 생성 (자막 + 결과 이미지 + SR_ 도해도)
+- 실제 스크립트 함수를 그대로 실행: 인덱스 스캔, validate_dataset, parse_caption, parse-captions,
+  generate_metadata, 남자 업로드(plan_sync + bulk_set), 남자 임베딩, 도해도 Vision 분석
+- Firestore는 fake_firestore.FakeFirestore (메모리), Gemini / 이미지는 stub-gemini-server를 같은 프로세스에서 실행
+- 출력 파일 / 캐시는 전부 작업 폴더 안에만 씀 (scripts/ 결과 파일, .cache는 건드리지 않음)
+- 결과는 bench-results/pipeline.jsonl에 한 줄씩 추가 (커밋, 호스트, 크기, 설정, 단계별 시간 + 구간 p95)
+- 같은 호스트 / 크기 / 설정의 직전 기록과 비교해서 threshold 넘게 느려진 단계는 ❗ 표시
+
+사용법:
+  python bench-pipeline.py                                   # 69 / 1,000 스타일
+  python bench-pipeline.py --sizes 69 1000 50000 --stages index validate parse_caption
+  python bench-pipeline.py --sizes 1000 --latency 0.2 --firestore-latency 0.02 --repeat 3
+  python bench-pipeline.py --sizes 50000 --workdir D:/bench-50k     # 합성 데이터셋 재사용
+  python bench-pipeline.py --fail-on-regression                     # CI 등에서 회귀 시 종료 코드 1
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import functools
+import contextlib
+import statistics
+import subprocess
+import importlib.util
+from datetime import datetime
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(SCRIPTS_DIR, "bench-results", "pipeline.jsonl")
+RESULT_FORMAT = 1
+
+# 이보다 짧은 단계는 잡음이 커서 회귀 판정에서 제외 (초)
+MIN_SIGNIFICANT_SECONDS = 0.05
+
+# 결과에 남길 단계별 구간 수 (합계 시간 순)
+TOP_SPANS = 6
+
+STAGES = ["index", "validate", "parse_caption", "parse-captions", "generate-metadata",
+          "upload-men", "embed-men", "vision"]
+
+def load_script(filename):
+    """하이픈 이름 스크립트를 모듈로 로드"""
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3],
+                                                  os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module     # parse-captions --workers: 워커 프로세스에서 함수 pickle
+    spec.loader.exec_module(module)
+    return module
+
+def git_commit():
+    """현재 커밋 (작업 트리가 바뀌었으면 -dirty)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=SCRIPTS_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ==================== 작업 폴더 ====================
+
+class Workspace:
+    """크기 하나의 합성 데이터셋 + 스크립트 출력 / 캐시 경로"""
+
+    def __init__(self, root, size, men, args, diagram_bytes):
+        from synthetic_dataset import generate_dataset
+
+        self.root = root
+        self.size = size
+        self.men = men
+        self.cache_dir = os.path.join(root, ".cache")
+        self.output_dir = os.path.join(root, "output")
+        self.index_path = os.path.join(self.cache_dir, "dataset-index.json")
+
+        # 같은 설정으로 만든 데이터셋이 있으면 재사용 (5만 스타일은 생성만 수 분)
+        marker_path = os.path.join(root, "bench-dataset.json")
+        marker = {"size": size, "men": men, "seed": args.seed, "diagrams": args.diagrams}
+        if os.path.exists(marker_path):
+            with open(marker_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if existing.get("config") == marker:
+                self.roots = existing["roots"]
+                self.generate_seconds = None
+                return
+            shutil.rmtree(root)
+
+        started = time.perf_counter()
+        self.roots = generate_dataset(os.path.join(root, "dataset"), women=size, men=men,
+                                      diagram_bytes=diagram_bytes, seed=args.seed,
+                                      diagrams=tuple(args.diagrams))
+        self.generate_seconds = time.perf_counter() - started
+        with open(marker_path, 'w', encoding='utf-8') as f:
+            json.dump({"config": marker, "roots": self.roots}, f, ensure_ascii=False)
+
+    def prepare(self):
+        """이전 실행의 출력 / 캐시 삭제 (데이터셋은 유지)"""
+        import dataset_index
+        for path in (self.cache_dir, self.output_dir):
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+        self.load_index = functools.partial(dataset_index.load_dataset_index,
+                                            path=self.index_path, roots=self.roots)
+
+    def output(self, name):
+        return os.path.join(self.output_dir, name)
+
+def redirect_module(module, **values):
+    """스크립트 모듈 전역 교체 (출력 경로, 인덱스 로더 등)"""
+    for name, value in values.items():
+        if not hasattr(module, name):
+            raise AttributeError(f"{module.__name__}.{name} 없음")
+        setattr(module, name, value)
+
+class Bench:
+    """스크립트 모듈 + 대역 서버를 한 번 로드해 두고 크기별로 실행"""
+
+    def __init__(self, args):
+        self.args = args
+        os.environ.setdefault("GEMINI_API_KEY", "stub")    # analyze-diagrams는 키가 없으면 import 시 종료
+
+        self.stub = load_script("stub-gemini-server.py")
+        self.validate = load_script("validate-hair-dataset.py")
+        self.parse = load_script("parse-captions.py")
+        self.metadata = load_script("generate-metadata.py")
+        self.upload = load_script("upload-men-to-firestore.py")
+        self.embed = load_script("generate-men-embeddings.py")
+        self.vision = load_script("analyze-diagrams-metadata.py")
+
+        self.server, self.base_url = self.stub.start_server(
+            0, args.latency, args.image_latency, args.image_size)
+        self.db = None
+
+    def close(self):
+        self.server.shutdown()
+
+    def use(self, workspace):
+        """모든 스크립트 / 공용 모듈의 경로를 작업 폴더로"""
+        import firestore_sync
+        import incremental_build
+        from fake_firestore import FakeFirestore
+
+        workspace.prepare()
+        incremental_build.CACHE_DIR = workspace.cache_dir
+        firestore_sync.CACHE_DIR = workspace.cache_dir
+        redirect_module(self.validate, load_dataset_index=workspace.load_index)
+        redirect_module(self.parse, load_dataset_index=workspace.load_index,
+                        OUTPUT_PATH=workspace.output("parsed-captions.json"),
+                        JSONL_OUTPUT_PATH=workspace.output("parsed-captions.jsonl"))
+        redirect_module(self.metadata, load_dataset_index=workspace.load_index,
+                        OUTPUT_PATH=workspace.output("styles-metadata.json"),
+                        JSONL_OUTPUT_PATH=workspace.output("styles-metadata.jsonl"),
+                        FIRESTORE_DIR=workspace.output("firestore-data"))
+        redirect_module(self.embed, load_dataset_index=workspace.load_index)
+        self.workspace = workspace
+        self.db = FakeFirestore(rpc_latency=self.args.firestore_latency)
+
+    # ==================== 단계 ====================
+    # 각 함수는 [(측정 이름, 처리 개수, 실행 함수)]를 반환 - 실행 함수는 측정 대상만 포함
+
+    def stage_index(self):
+        return [("index.scan", self.workspace.size + self.workspace.men,
+                 lambda: self.workspace.load_index(rebuild=True)),
+                ("index.load", self.workspace.size + self.workspace.men,
+                 lambda: self.workspace.load_index(refresh_stats=True))]
+
+    def stage_validate(self):
+        index = self.workspace.load_index()
+        output_path = self.workspace.output("dataset-validation-result.json")
+        return [("validate", self.workspace.size,
+                 lambda: self.validate.validate_dataset(index, output_path=output_path))]
+
+    def stage_parse_caption(self):
+        from dataset_index import read_text
+        index = self.workspace.load_index()
+        captions = [(style.style_id, read_text(style, style.find_caption()))
+                    for _, styles in index.iter_styles("women") for style in styles if style.find_caption()]
+
+        def run():
+            for style_id, text in captions:
+                self.parse.parse_caption(text, style_id)
+        return [("parse_caption", len(captions), run)]
+
+    def stage_parse_captions(self):
+        size = self.workspace.size
+        # 전체 실행은 매니페스트를 만들지 않음 → 첫 증분 실행(cold)이 해시 계산, 그다음이 변경 없는 재실행
+        return [("parse-captions", size, lambda: self.parse.main(workers=self.args.workers)),
+                ("parse-captions.incremental.cold", size,
+                 lambda: self.parse.main(incremental=True, workers=self.args.workers)),
+                ("parse-captions.incremental", size,
+                 lambda: self.parse.main(incremental=True, workers=self.args.workers))]
+
+    def stage_generate_metadata(self):
+        size = self.workspace.size
+        return [("generate-metadata", size, lambda: self.metadata.generate_metadata()),
+                ("generate-metadata.incremental.cold", size,
+                 lambda: self.metadata.generate_metadata(incremental=True)),
+                ("generate-metadata.incremental", size, lambda: self.metadata.generate_metadata(incremental=True))]
+
+    def upload_men(self):
+        """upload-men-to-firestore.py main()의 준비 → 변경 감지 → 배치 업로드"""
+        from firestore_batch import bulk_set
+        from firestore_sync import SyncLedger, plan_sync
+        from synthetic_dataset import men_upload_styles
+
+        index = self.workspace.load_index()
+        docs = [(style["styleId"], self.upload.build_style_doc(
+                    style, self.upload.parse_caption_file(style["styleId"], index)))
+                for style in men_upload_styles(index)]
+        ledger = SyncLedger("men_styles")
+        plan = plan_sync(self.db, "men_styles", docs, ledger)
+        report = bulk_set(self.db, "men_styles", plan["write"], merge=True)
+        for style_id, data in plan["write"]:
+            if report[style_id]["status"] == "ok":
+                ledger.update(style_id, plan["hashes"][style_id])
+        ledger.save()
+        return report
+
+    def stage_upload_men(self):
+        men = self.workspace.men
+        return [("upload-men", men, self.upload_men),
+                ("upload-men.unchanged", men, self.upload_men)]
+
+    def embed_men(self):
+        """generate-men-embeddings.py main()의 대상 수집 → 배치 임베딩 → 저장"""
+        from firebase_admin import firestore
+        from embedding_models import target_slot
+        from embedding_pipeline import embed_items, save_embeddings
+
+        stats = {"skipped": 0, "no_caption": 0}
+        model, fields = target_slot(self.db, "men_styles")
+        items, keys, _ = self.embed.collect_embedding_items(
+            self.db, argparse.Namespace(rebuild=False), stats, model)
+        embeddings, failed = embed_items(items, "stub", concurrency=self.args.concurrency, rps=0,
+                                         api_base=self.base_url, model=model["model"])
+        save_embeddings(self.db, "men_styles", embeddings, firestore.SERVER_TIMESTAMP, keys,
+                        model=model, fields=fields)
+        return embeddings, failed
+
+    def stage_embed_men(self):
+        if not self.db.count("men_styles"):
+            self.upload_men()      # 임베딩 대상 문서 준비 (측정 안 함)
+        men = self.workspace.men
+        return [("embed-men", men, self.embed_men),
+                ("embed-men.unchanged", men, self.embed_men)]
+
+    def stage_vision(self):
+        from rate_limiter import TokenBucket
+        from diagram_analysis import analyze_diagram_batch, analyze_diagram_image, create_http_session
+
+        # Storage URL 대신 스텁 서버 이미지 URL (스타일 수는 --vision-styles로 제한)
+        index = self.workspace.load_index()
+        styles = []
+        for _, series_styles in index.iter_styles("women"):
+            for style in series_styles:
+                if len(styles) < self.args.vision_styles:
+                    styles.append({"id": style.style_id, "diagrams": [
+                        {"step": i + 1, "url": f"{self.base_url}/images/{f.name}"}
+                        for i, f in enumerate(style.diagrams())]})
+        batch = self.db.batch()
+        for style in styles:
+            batch.set(self.db.collection("styles").document(style["id"]),
+                      {"styleId": style["id"], "diagrams": style["diagrams"]})
+        batch.commit()
+        diagrams = sum(len(style["diagrams"]) for style in styles)
+
+        def run():
+            concurrency = self.args.concurrency
+            session = create_http_session(pool_size=concurrency)
+            limiter = TokenBucket(0)
+            common = {"api_key": "stub", "session": session, "limiter": limiter, "api_base": self.base_url}
+            return self.vision.analyze_styles_concurrently(
+                styles, functools.partial(analyze_diagram_image, **common),
+                lambda style_id, results: self.vision.update_diagram_metadata(self.db, style_id, results),
+                concurrency=concurrency, verbose=False,
+                analyze_batch_fn=functools.partial(analyze_diagram_batch, **common),
+                batch_size=self.args.batch_size)
+        return [("vision", diagrams, run)]
+
+    # ==================== 실행 ====================
+
+    def measure(self, fn):
+        """fn 실행 시간 + 그동안의 구간 기록 (스크립트 출력은 숨김)"""
+        from profiling import collect
+
+        sink = open(os.devnull, 'w', encoding='utf-8') if not self.args.verbose else None
+        with collect() as profiler:
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                started = time.perf_counter()
+                fn()
+                elapsed = time.perf_counter() - started
+        if sink:
+            sink.close()
+        return elapsed, profiler.report()
+
+    def run_stage(self, stage):
+        """단계 하나 → [결과 dict] (--repeat번 실행해서 중앙값)"""
+        results = []
+        for repeat in range(self.args.repeat):
+            if repeat:
+                self.use(self.workspace)    # 첫 실행 / 증분 실행 조건을 매번 같게
+            setup = getattr(self, "stage_" + stage.replace("-", "_"))
+            for i, (name, items, fn) in enumerate(setup()):
+                seconds, report = self.measure(fn)
+                if repeat == 0:
+                    results.append({"stage": name, "items": items, "runs": [], "report": report})
+                results[i]["runs"].append(seconds)
+                results[i]["report"] = report
+        for result in results:
+            result["seconds"] = round(statistics.median(result["runs"]), 4)
+            result["runs"] = [round(s, 4) for s in result["runs"]]
+            result["perSecond"] = round(result["items"] / result["seconds"], 1) if result["seconds"] else None
+            spans = sorted(result.pop("report")["spans"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+            result["spans"] = {name: {k: s[k] for k in ("count", "p50_ms", "p95_ms", "total_ms")}
+                               for name, s in spans[:TOP_SPANS]}
+        return results
+
+# ==================== 결과 저장 / 비교 ====================
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_results(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def comparison_key(record):
+    """같은 조건끼리만 비교 (호스트 / 크기 / 설정 / 단계)"""
+    return (record["host"]["node"], record["size"], json.dumps(record["config"], sort_keys=True), record["stage"])
+
+def find_baseline(history, record):
+    key = comparison_key(record)
+    for previous in reversed(history):
+        if previous.get("format") == RESULT_FORMAT and comparison_key(previous) == key:
+            return previous
+    return None
+
+def print_results(size, records, history, threshold):
+    """단계별 결과 + 직전 기록 대비 변화 → 회귀 목록"""
+    print(f"\n  {'단계':<32} {'개수':>8} {'초':>9} {'개/초':>10}   {'직전 대비':<24}")
+    regressions = []
+    for record in records:
+        baseline = find_baseline(history, record)
+        note = ""
+        if baseline:
+            ratio = (record["seconds"] - baseline["seconds"]) / baseline["seconds"] if baseline["seconds"] else 0
+            note = f"{ratio:+7.1%} ({baseline['commit'] or '?'})"
+            if ratio > threshold and record["seconds"] >= MIN_SIGNIFICANT_SECONDS:
+                regressions.append((size, record["stage"], ratio))
+                note = "❗" + note
+        rate = f"{record['perSecond']:,.1f}" if record["perSecond"] else "-"
+        print(f"  {record['stage']:<32} {record['items']:>8,} {record['seconds']:>9.3f} {rate:>10}   {note}")
+    return regressions
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="오프라인 데이터 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[69, 1000], help="여자 스타일 수 (크기별로 실행)")
+    parser.add_argument("--men-ratio", type=float, default=0.5, help="여자 스타일 수 대비 남자 스타일 수")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--diagrams", type=int, nargs=2, default=[8, 20], metavar=("MIN", "MAX"),
+                        help="스타일당 도해도 수 범위")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1, help="단계별 반복 횟수 (중앙값 기록)")
+    parser.add_argument("--workers", type=int, default=1, help="parse-captions 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="임베딩 / Vision 동시 요청 수")
+    parser.add_argument("--batch-size", type=int, default=10, help="Vision 요청당 도해도 수")
+    parser.add_argument("--vision-styles", type=int, default=20, help="Vision 단계에서 분석할 스타일 수")
+    parser.add_argument("--latency", type=float, default=0.05, help="스텁 Gemini 응답 지연 (초)")
+    parser.add_argument("--image-latency", type=float, default=0.01, help="스텁 이미지 다운로드 지연 (초)")
+    parser.add_argument("--image-size", type=int, default=256, help="더미 도해도 PNG 한 변 픽셀 수")
+    parser.add_argument("--firestore-latency", type=float, default=0.0,
+                        help="메모리 Firestore RPC마다 넣을 지연 (초)")
+    parser.add_argument("--workdir", help="합성 데이터셋 폴더 (지정하면 다음 실행에서 재사용, 기본: 임시 폴더)")
+    parser.add_argument("--results", default=RESULTS_PATH, help="결과 JSONL 경로")
+    parser.add_argument("--no-save", action="store_true", help="결과 파일에 기록하지 않음")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 시간 증가 비율 (기본 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="스크립트 출력 그대로 보기")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    stages = [stage for stage in STAGES if stage in args.stages]
+
+    bench = Bench(args)
+    history = load_results(args.results)
+    commit = git_commit()
+    host = {"node": platform.node(), "platform": platform.platform(), "python": platform.python_version(),
+            "cpus": os.cpu_count()}
+    config = {k: getattr(args, k) for k in ("men_ratio", "diagrams", "seed", "workers", "concurrency",
+                                            "batch_size", "vision_styles", "latency", "image_latency",
+                                            "image_size", "firestore_latency")}
+    recorded_at = datetime.now().isoformat(timespec="seconds")
+    diagram_bytes = bench.stub.make_png(64, 64)
+
+    print("=" * 90)
+    print(f"파이프라인 벤치마크: 크기 {', '.join(f'{s:,}' for s in args.sizes)} / 커밋 {commit or '?'}")
+    print(f"  단계: {', '.join(stages)}")
+    print(f"  Gemini 스텁 {bench.base_url} (지연 {args.latency}s), 메모리 Firestore (지연 {args.firestore_latency}s)")
+    print("=" * 90)
+
+    regressions = []
+    new_records = []
+    temp_root = None if args.workdir else tempfile.mkdtemp(prefix="hairgator-bench-")
+    try:
+        for size in args.sizes:
+            men = max(1, round(size * args.men_ratio))
+            root = os.path.join(args.workdir or temp_root, f"size-{size}")
+            workspace = Workspace(root, size, men, args, diagram_bytes)
+            generated = (f"생성 {workspace.generate_seconds:.1f}초" if workspace.generate_seconds is not None
+                         else "기존 데이터셋 재사용")
+            print(f"\n📦 여자 {size:,} / 남자 {men:,} 스타일 ({generated}): {root}")
+
+            bench.use(workspace)
+            records = []
+            for stage in stages:
+                for result in bench.run_stage(stage):
+                    records.append({
+                        "format": RESULT_FORMAT,
+                        "recordedAt": recorded_at,
+                        "commit": commit,
+                        "host": host,
+                        "size": size,
+                        "config": config,
+                        **result,
+                    })
+            regressions += print_results(size, records, history, args.threshold)
+            new_records += records
+    finally:
+        bench.close()
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+    if not args.no_save:
+        append_results(args.results, new_records)
+        print(f"\n💾 결과 {len(new_records)}건 추가: {args.results}")
+
+    print("-" * 90)
+    if regressions:
+        print(f"❗ 직전 기록보다 {args.threshold:.0%} 넘게 느려진 단계 {len(regressions)}개: "
+              + ", ".join(f"{stage}@{size:,} ({ratio:+.0%})" for size, stage, ratio in regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("✅ 회귀 없음")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 목록 조회 전송량/시간 측정 (Firestore 에뮬레이터 또는 메모리 대역)
+- 이전: collection.get() + to_dict() (embedding, diagrams 전체 다운로드)
+- 이후: style_listing.stream_styles() select 투영 + 대상 문서만 get_all
+- --fake RTT_MS: 에뮬레이터 대신 fake_firestore.FakeFirestore (RPC마다 RTT_MS 대기)
+  → 전송량은 그대로 유효, 시간은 왕복 횟수 + 로컬 처리만 반영 (실제 전송 시간은 에뮬레이터로 확인)
+
+사용법:
+  firebase emulators:start --only firestore   (기본 포트 8080)
+  FIRESTORE_EMULATOR_HOST=127.0.0.1:8080 python bench-style-listing.py --docs 2000
+  python bench-style-listing.py --fake 20 --docs 2000
+
+전송량은 받은 문서를 Firestore Document protobuf로 다시 인코딩한 바이트 수 (응답 본문과 거의 같음)
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import functools
+from datetime import datetime, timezone
+
+from google.cloud import firestore
+from google.cloud.firestore_v1 import _helpers
+from google.cloud.firestore_v1.types import document as document_pb
+
+from fake_firestore import FakeFirestore
+from firestore_batch import FIRESTORE_BATCH_LIMIT, chunked
+from style_listing import (
+    ANALYSIS_STATUS_FIELDS,
+    EMBEDDING_STATUS_FIELDS,
+    fetch_style_fields,
+    stream_styles,
+)
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+BENCH_PROJECT = "demo-hairgator-bench"
+
+# ==================== 측정 도우미 ====================
+
+def encoded_size(doc_id, data):
+    """문서를 Firestore protobuf로 인코딩했을 때 바이트 수"""
+    pb = document_pb.Document(name=doc_id, fields=_helpers.encode_dict(data))
+    return document_pb.Document.pb(pb).ByteSize()
+
+def measure(label, fn):
+    """fn()이 돌려주는 (doc_id, data) 이터레이터를 끝까지 소비하며 시간/바이트 측정"""
+    started = time.perf_counter()
+    docs = 0
+    size = 0
+    for doc_id, data in fn():
+        docs += 1
+        size += encoded_size(doc_id, data)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<44} {docs:>6}건 {size / 1024 / 1024:>9.2f}MB {elapsed:>8.2f}초")
+    return size, elapsed
+
+# ==================== 시드 데이터 ====================
+
+def seed(db, collection, count, analyzed_ratio):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    docs = []
+    for i in range(count):
+        style_id = f"BENCH{i:05d}"
+        data = {
+            "styleId": style_id,
+            "series": "FAL",
+            "embedding": [rng.uniform(-0.1, 0.1) for _ in range(768)],
+            "embeddingKey": f"{i:064x}",
+            "embeddingUpdatedAt": now,
+            "diagrams": [{
+                "step": step + 1,
+                "url": f"https://firebasestorage.googleapis.com/v0/b/bench/o/{style_id}%2FSR_{step + 1:02d}.png",
+                "lifting": "L4", "lifting_angle": 90, "direction": "D4", "section": "VS",
+                "zone": "Back", "cutting_method": "Point", "over_direction": False, "notes": "bench"
+            } for step in range(30)],
+        }
+        if rng.random() < analyzed_ratio:
+            data["diagramsAnalyzedAt"] = now
+        docs.append((style_id, data))
+
+    collection_ref = db.collection(collection)
+    for chunk in chunked(docs, FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for style_id, data in chunk:
+            batch.set(collection_ref.document(style_id), data)
+        batch.commit()
+
+# ==================== 메인 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="스타일 목록 조회 전송량/시간 측정 (에뮬레이터)")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--analyzed-ratio", type=float, default=0.9, help="이미 분석된 문서 비율")
+    parser.add_argument("--collection", default="bench_styles")
+    parser.add_argument("--no-seed", action="store_true")
+    parser.add_argument("--fake", type=float, metavar="RTT_MS",
+                        help="에뮬레이터 대신 메모리 대역 사용 (RPC마다 RTT_MS 밀리초 대기)")
+    args = parser.parse_args()
+
+    if args.fake is not None:
+        db = FakeFirestore(rpc_latency=args.fake / 1000)
+        target = f"메모리 대역, RPC당 {args.fake:g}ms"
+    elif os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        db = firestore.Client(project=BENCH_PROJECT)
+        target = f"에뮬레이터 {os.environ['FIRESTORE_EMULATOR_HOST']}"
+    else:
+        print("❌ FIRESTORE_EMULATOR_HOST가 없습니다 (운영 Firestore에서는 실행하지 마세요, 대역은 --fake)")
+        sys.exit(1)
+
+    if not args.no_seed or args.fake is not None:     # 메모리 대역은 항상 비어 있음
+        print(f"🌱 {args.docs}개 문서 생성 중...")
+        seed(db, args.collection, args.docs, args.analyzed_ratio)
+
+    print("=" * 70)
+    print(f"스타일 목록 조회 비교 ({args.collection}, {target})")
+    print("=" * 70)
+
+    def full_get():
+        for doc in db.collection(args.collection).get():
+            yield doc.id, doc.to_dict()
+
+    before_size, before_time = measure("이전: get() + to_dict() (전체 필드)", full_get)
+
+    emb_size, emb_time = measure("임베딩: select(상태 필드) 스트리밍",
+                                 lambda: stream_styles(db, args.collection, EMBEDDING_STATUS_FIELDS))
+
+    pending = []
+
+    def analysis_phase1():
+        for doc_id, data in stream_styles(db, args.collection, ANALYSIS_STATUS_FIELDS):
+            if not data.get("diagramsAnalyzedAt"):
+                pending.append(doc_id)
+            yield doc_id, data
+
+    ana1_size, ana1_time = measure("도해도 분석 1단계: select(diagramsAnalyzedAt)", analysis_phase1)
+    ana2_size, ana2_time = measure(f"도해도 분석 2단계: 대상 {len(pending)}건 diagrams",
+                                   lambda: fetch_style_fields(db, args.collection, pending, ["diagrams"]))
+
+    print("-" * 70)
+    print(f"  임베딩 단계:     {before_size / max(emb_size, 1):8.1f}배 적은 전송량, "
+          f"{before_time / max(emb_time, 1e-9):6.1f}배 빠름")
+    ana_size, ana_time = ana1_size + ana2_size, ana1_time + ana2_time
+    print(f"  도해도 분석 단계: {before_size / max(ana_size, 1):8.1f}배 적은 전송량, "
+          f"{before_time / max(ana_time, 1e-9):6.1f}배 빠름")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+용어 매칭 엔진 벤치마크 (합성 자막 코퍼스)
+- 이전: 용어마다 `kw in text` 반복 (parse_caption) + 패턴 11개 re.findall (extract_recipe_info)
+- 이후: term_matcher.TermMatcher 한 번의 스캔
+
+사용법:
+  python bench-term-matcher.py                 # 100,000개 자막
+  python bench-term-matcher.py --captions 20000 --words 120
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import functools
+import importlib.util
+import os
+
+from term_matcher import load_theory_terms
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FILLER = ("그리고 머리를 자연스럽게 빗어서 손가락 사이로 잡고 일정한 간격으로 자르겠습니다 "
+          "이렇게 하면 양쪽 길이를 맞춰 주시고 다음 섹션도 같은 방법으로 진행합니다 "
+          "Let's check the balance and keep the guide").split()
+
+def load_script(filename):
+    """하이픈 이름 스크립트를 모듈로 로드"""
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3],
+                                                  os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# ==================== 이전 방식 (비교 기준) ====================
+
+LEGACY_RECIPE_PATTERNS = [
+    r'(\d+도)',
+    r'(레이어|그래듀에이션|Layer|Graduation)',
+    r'(스퀘어 커트|라운드 커트|Square Cut|Round Cut)',
+    r'(클리퍼|Clipper)',
+    r'(코너 제거|Corner Off)',
+    r'(크로스 체킹|Cross Checking)',
+    r'(파이 섹션|Pie Section)',
+    r'(후대각|전대각|Diagonal)',
+    r'(이동 디자인 라인|고정 디자인 라인|Mobile|Stationary)',
+    r'(천체축 각도|Celestial Axis)',
+    r'(다이렉션|Direction|D\d)',
+]
+
+def legacy_parse_caption(text, style_id, normalization, shape_keywords, tech_keywords):
+    """이전 parse_caption 전체 (구조화 형식 → 표 순서 정규화, 없으면 기장 추론 + 키워드 추출)"""
+    result = {
+        "raw": text.strip(),
+        "length": None, "length_normalized": None,
+        "shape": None, "shape_normalized": None,
+        "texture": None, "texture_normalized": None,
+        "bangs": None, "bangs_normalized": None,
+        "difficulty": None, "difficulty_normalized": None,
+        "techniques": []
+    }
+    patterns = {
+        "length": r"기장\s*[:：]\s*([^,，]+)",
+        "shape": r"형태\s*[:：]\s*([^,，]+)",
+        "texture": r"질감\s*[:：]\s*([^,，]+)",
+        "bangs": r"앞머리\s*[:：]\s*([^,，]+)",
+        "difficulty": r"(?:컷\s*)?난이도\s*[:：]\s*([^,，]+)"
+    }
+    has_structured = False
+    for field, pattern in patterns.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            has_structured = True
+            value = match.group(1).strip()
+            result[field] = value
+            for kr_term, en_code in normalization.get(field, {}).items():
+                if kr_term in value:
+                    result[f"{field}_normalized"] = en_code
+                    break
+    if not has_structured:
+        length_map = {'A': ('숏', 'SHORT'), 'B': ('미디엄 숏', 'MEDIUM_SHORT'), 'C': ('미디엄', 'MEDIUM'),
+                      'D': ('미디엄 롱', 'MEDIUM_LONG'), 'E': ('롱', 'LONG'), 'F': ('세미롱', 'SEMI_LONG'),
+                      'G': ('롱', 'LONG'), 'H': ('엑스트라 롱', 'EXTRA_LONG')}
+        if len(style_id) >= 2 and style_id[1] in length_map:
+            result["length"], result["length_normalized"] = length_map[style_id[1]]
+        detected = [(kr, en) for kr, en in shape_keywords if kr in text]
+        if detected:
+            detected.sort(key=lambda x: -len(x[0]))
+            result["shape"], result["shape_normalized"] = detected[0]
+        for kw, code in tech_keywords.items():
+            if kw in text and code not in result["techniques"]:
+                result["techniques"].append(code)
+    return result
+
+def legacy_keywords(text, shape_keywords, tech_keywords):
+    """parse_caption의 이전 키워드 추출 (용어마다 부분 문자열 검색)"""
+    detected = [(kr, en) for kr, en in shape_keywords if kr in text]
+    detected.sort(key=lambda x: -len(x[0]))
+    shape = detected[0][1] if detected else None
+
+    techniques = []
+    for kw, code in tech_keywords.items():
+        if kw in text and code not in techniques:
+            techniques.append(code)
+    return shape, techniques
+
+def legacy_recipe(text):
+    keywords = []
+    for pattern in LEGACY_RECIPE_PATTERNS:
+        keywords.extend(re.findall(pattern, text, re.IGNORECASE))
+    return list(set(keywords))[:15]
+
+# ==================== 합성 코퍼스 ====================
+
+def build_corpus(count, words, vocabulary, term_ratio, seed=42):
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(vocabulary) if rng.random() < term_ratio else rng.choice(FILLER)
+                 for _ in range(words))
+        for _ in range(count)
+    ]
+
+def timed(label, fn, corpus):
+    started = time.perf_counter()
+    results = [fn(text) for text in corpus]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<40} {elapsed:8.2f}초 {len(corpus) / elapsed:>10,.0f} 자막/초")
+    return results, elapsed
+
+# ==================== 메인 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="용어 매칭 엔진 벤치마크")
+    parser.add_argument("--captions", type=int, default=100_000)
+    parser.add_argument("--words", type=int, default=80, help="자막 하나의 단어 수")
+    parser.add_argument("--term-ratio", type=float, default=0.15, help="단어 중 용어 비율")
+    args = parser.parse_args()
+
+    parse_captions = load_script("parse-captions.py")
+    upload_men = load_script("upload-men-to-firestore.py")
+
+    vocabulary = ([kr for kr, _ in parse_captions.SHAPE_KEYWORDS]
+                  + list(parse_captions.TECH_KEYWORDS)
+                  + [name for name, _, _ in load_theory_terms()]
+                  + [kw for kw, _ in upload_men.RECIPE_KEYWORDS]
+                  + ["90도", "45도", "D4", "D0"])
+
+    corpus = build_corpus(args.captions, args.words, vocabulary, args.term_ratio)
+    total_chars = sum(len(text) for text in corpus)
+
+    keyword_matcher = parse_captions.KEYWORD_MATCHER
+    theory_matcher = parse_captions.THEORY_MATCHER
+
+    print("=" * 70)
+    print(f"용어 매칭 벤치마크: 자막 {len(corpus):,}개, 평균 {total_chars / len(corpus):.0f}자, "
+          f"형태+기술 {len(keyword_matcher)}개 / 89용어 {len(theory_matcher)}개")
+    print("=" * 70)
+
+    print("\n[parse_caption 키워드 추출]")
+    legacy, legacy_time = timed(f"이전: 용어별 in 검색 (형태+기술 {len(parse_captions.SHAPE_KEYWORDS) + len(parse_captions.TECH_KEYWORDS)}개)",
+                                lambda t: legacy_keywords(t, parse_captions.SHAPE_KEYWORDS,
+                                                          parse_captions.TECH_KEYWORDS), corpus)
+    _, scan_time = timed(f"이후: KEYWORD_MATCHER.scan ({len(keyword_matcher)}개, 포함 용어까지)",
+                         lambda t: keyword_matcher.scan(t, nested=True), corpus)
+    print(f"  → {legacy_time / scan_time:.1f}배")
+
+    # 결과 비교 (이전 방식과 같은 용어를 잡는지)
+    parsed = [parse_captions.parse_caption(text, "FAL0001") for text in corpus[:10_000]]
+    same_shape = sum(1 for (shape, _), p in zip(legacy, parsed) if shape == p["shape_normalized"])
+    same_tech = sum(1 for (_, techs), p in zip(legacy, parsed) if set(techs) == set(p["techniques"]))
+    print(f"  형태 일치 {same_shape / len(parsed):.1%}, 기술 키워드 일치 {same_tech / len(parsed):.1%} "
+          f"(앞 {len(parsed):,}개 기준)")
+
+    print("\n[parse_caption 전체]")
+    _, legacy_time = timed("이전: parse_caption",
+                           lambda t: legacy_parse_caption(t, "FAL0001", parse_captions.NORMALIZATION,
+                                                          parse_captions.SHAPE_KEYWORDS,
+                                                          parse_captions.TECH_KEYWORDS), corpus)
+    _, new_time = timed("이후: parse_caption", lambda t: parse_captions.parse_caption(t, "FAL0001"), corpus)
+    _, terms_time = timed("이후: parse_caption(terms=True) - 89용어 추가",
+                          lambda t: parse_captions.parse_caption(t, "FAL0001", terms=True), corpus)
+    print(f"  → {legacy_time / new_time:.1f}배 (89용어까지 {legacy_time / terms_time:.1f}배)")
+
+    print("\n[89용어 검색 (--terms)]")
+    all_terms = list(theory_matcher._literals)
+    _, full_time = timed(f"이전 방식: 용어별 in 검색 ({len(all_terms)}개)",
+                         lambda t: [kw for kw in all_terms if kw in t], corpus)
+    _, scan_time = timed(f"이후: THEORY_MATCHER.scan ({len(theory_matcher)}개, 포함 용어까지)",
+                         lambda t: theory_matcher.scan(t, nested=True), corpus)
+    _, find_time = timed("이후: TermMatcher.find_all (위치 포함)", theory_matcher.find_all, corpus)
+    print(f"  → scan {full_time / scan_time:.1f}배, find_all {full_time / find_time:.1f}배")
+
+    print("\n[extract_recipe_info]")
+    _, legacy_time = timed("이전: 패턴 11개 re.findall", legacy_recipe, corpus)
+    _, new_time = timed("이후: TermMatcher 한 번 스캔", upload_men.extract_recipe_info, corpus)
+    print(f"  → {legacy_time / new_time:.1f}배")
+
+if __name__ == "__main__":
+    main()
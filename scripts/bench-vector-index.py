@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 유사도 검색 벤치마크 (합성 768차원 벡터)
+- 이전: 스타일마다 코사인 유사도 루프 (netlify/functions/lib/utils.js cosineSimilarity와 같은 계산) + 전체 정렬
+- 이후: vector_index.VectorIndex - 정규화 행렬 memmap + 행렬-벡터 곱 한 번 + argpartition
+- 준비 비용도 비교: embedding JSON 파싱 vs 인덱스 파일 열기
+- 두 방식의 top-k 결과가 같은지 확인
+
+사용법:
+  python bench-vector-index.py                     # 69 / 1,000 / 10,000 스타일
+  python bench-vector-index.py --sizes 50000 --queries 5 --dims 768 -k 10
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import functools
+
+import numpy as np
+
+from vector_index import VectorIndex, write_index
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 이전 방식 (비교 기준) ====================
+
+def cosine_similarity(a, b):
+    """utils.js cosineSimilarity 그대로 (질의마다 양쪽 노름 재계산)"""
+    if not a or not b or len(a) != len(b):
+        return 0
+    dot = norm_a = norm_b = 0.0
+    for x, y in zip(a, b):
+        dot += x * y
+        norm_a += x * x
+        norm_b += y * y
+    magnitude = math.sqrt(norm_a) * math.sqrt(norm_b)
+    return 0 if magnitude == 0 else dot / magnitude
+
+def loop_search(styles, query, k):
+    """searchStylesByEmbedding: 스타일마다 유사도 계산 → 전체 정렬 → 상위 k개"""
+    scored = [{"id": s["id"], "similarity": cosine_similarity(query, s["embedding"])}
+              for s in styles if s["embedding"]]
+    scored.sort(key=lambda s: s["similarity"], reverse=True)
+    return [(s["id"], s["similarity"]) for s in scored[:k]]
+
+# ==================== 측정 ====================
+
+def timed(fn, repeat=1):
+    """(마지막 결과, 1회 평균 초)"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat
+
+def run_size(size, args, directory):
+    rng = np.random.default_rng(args.seed)
+    matrix = rng.normal(size=(size, args.dims)).astype(np.float32)
+    ids = [f"STYLE{i:06d}" for i in range(size)]
+    queries = rng.normal(size=(args.queries, args.dims)).astype(np.float32)
+
+    # 이전: Firestore 응답처럼 embedding이 JSON 숫자 배열인 스타일 목록
+    payload = json.dumps([{"id": doc_id, "embedding": row.tolist()} for doc_id, row in zip(ids, matrix)])
+    styles, parse_s = timed(lambda: json.loads(payload))
+
+    collection = f"bench-{size}"
+    write_index(collection, [(doc_id, row.tolist(), None) for doc_id, row in zip(ids, matrix)], directory)
+    index, open_s = timed(lambda: VectorIndex.load(collection, directory), repeat=5)
+    index.search(queries[0], k=args.k)    # 페이지 캐시 워밍업 (memmap 첫 접근)
+
+    loop_total = index_total = 0.0
+    mismatched = 0
+    for query in queries:
+        query_list = query.tolist()
+        expected, loop_s = timed(lambda: loop_search(styles, query_list, args.k))
+        actual, index_s = timed(lambda: index.search(query, k=args.k), repeat=20)
+        loop_total += loop_s
+        index_total += index_s
+        if [doc_id for doc_id, _ in expected] != [doc_id for doc_id, _ in actual]:
+            mismatched += 1
+
+    loop_ms = loop_total / len(queries) * 1000
+    index_ms = index_total / len(queries) * 1000
+    print(f"  {size:>9,}  준비 {parse_s * 1000:>9.1f}ms → {open_s * 1000:>7.2f}ms   "
+          f"질의 {loop_ms:>10.2f}ms → {index_ms:>7.3f}ms ({loop_ms / index_ms:>7.0f}배)   "
+          f"top-{args.k} 불일치 {mismatched}/{len(queries)}")
+    return mismatched
+
+def main():
+    parser = argparse.ArgumentParser(description="스타일 유사도 검색 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[69, 1000, 10000])
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"스타일 유사도 검색: 스타일별 코사인 루프 → 벡터 인덱스 ({args.dims}차원, 질의 {args.queries}개)")
+    print("=" * 100)
+    print(f"  {'스타일 수':>9}  {'준비 (JSON 파싱 → 인덱스 열기)':<32} {'질의당 (루프 → 인덱스)':<36}")
+
+    mismatched = 0
+    with tempfile.TemporaryDirectory(prefix="vector-index-bench-") as directory:
+        for size in args.sizes:
+            mismatched += run_size(size, args, directory)
+
+    if mismatched:
+        print("\n❌ 두 방식의 top-k가 다른 질의가 있습니다")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+도해도 / 결과 이미지 로컬 블롭 저장소 (내용 주소 기반)
+- 블롭: scripts/.cache/blobs/objects/<sha256 앞 2자리>/<sha256> (같은 이미지는 한 번만 저장)
+- URL 표: URL → sha256 + ETag + Last-Modified + Content-Type (SQLite)
+- 이미 받은 URL은 네트워크 없이 로컬에서 반환, revalidate=True면 조건부 요청(If-None-Match / If-Modified-Since)
+- 304 응답이면 본문 없이 기존 블롭 사용
+- 읽기는 mmap (base64 인코딩, 해시 계산 시 파일 전체를 bytes로 복사하지 않음)
+"""
+
+import os
+import mmap
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+from diagram_cache import CACHE_DIR
+from profiling import add_bytes, span
+
+# ==================== 설정 ====================
+
+DEFAULT_BLOB_DIR = os.path.join(CACHE_DIR, "blobs")
+FETCH_TIMEOUT = 30
+
+# digest: 내용 SHA-256 (diagram_cache의 image_hash와 같은 값)
+Blob = namedtuple("Blob", ["url", "digest", "size", "content_type", "path"])
+
+# ==================== 저장소 ====================
+
+class BlobStore:
+    """스레드 안전 내용 주소 블롭 저장소 (여러 워커 스레드가 동시에 fetch 가능)"""
+
+    def __init__(self, root=DEFAULT_BLOB_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.stats = {"local": 0, "not_modified": 0, "downloaded": 0, "failed": 0, "bytes_downloaded": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "urls.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url           TEXT PRIMARY KEY,
+                digest        TEXT NOT NULL,
+                size          INTEGER NOT NULL,
+                content_type  TEXT,
+                etag          TEXT,
+                last_modified TEXT,
+                fetched_at    REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def has(self, digest):
+        return os.path.exists(self.object_path(digest))
+
+    def lookup(self, url):
+        """이미 받은 URL의 Blob (블롭 파일이 지워졌으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, size, content_type FROM urls WHERE url=?", (url,)
+            ).fetchone()
+        if row is None or not self.has(row[0]):
+            return None
+        return Blob(url, row[0], row[1], row[2], self.object_path(row[0]))
+
+    def urls(self):
+        """저장소에 있는 URL 목록 (받은 순서)"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT url FROM urls ORDER BY fetched_at")]
+
+    def put(self, data):
+        """bytes 저장 후 digest 반환 (이미 있으면 쓰지 않음)"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _record(self, url, digest, size, content_type, etag, last_modified):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, size, content_type, etag, last_modified, time.time())
+            )
+            self._conn.commit()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def fetch(self, url, session, revalidate=False, timeout=FETCH_TIMEOUT):
+        """URL 이미지를 저장소에 확보하고 Blob 반환 (실패 시 None)
+
+        revalidate=False: 이미 받은 URL은 요청 없이 로컬 블롭 반환
+        revalidate=True: ETag / Last-Modified로 조건부 요청, 304면 로컬 블롭 반환
+        """
+        if not revalidate:
+            blob = self.lookup(url)
+            if blob:
+                self._count("local")
+                return blob
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, size, content_type, etag, last_modified FROM urls WHERE url=?", (url,)
+            ).fetchone()
+
+        headers = {}
+        if row and self.has(row[0]):
+            if row[3]:
+                headers["If-None-Match"] = row[3]
+            if row[4]:
+                headers["If-Modified-Since"] = row[4]
+
+        try:
+            with span("http.image_download", conditional=bool(headers)):
+                response = session.get(url, headers=headers, timeout=timeout)
+        except Exception as e:
+            print(f"  ⚠️ 이미지 다운로드 실패: {e}")
+            self._count("failed")
+            return None
+
+        if response.status_code == 304 and headers:
+            self._count("not_modified")
+            return Blob(url, row[0], row[1], row[2], self.object_path(row[0]))
+
+        if response.status_code != 200:
+            print(f"  ⚠️ 이미지 다운로드 실패: {response.status_code}")
+            self._count("failed")
+            return None
+
+        data = response.content
+        add_bytes("http", bytes_in=len(data))
+        with span("fs.blob_put"):
+            digest = self.put(data)
+        content_type = response.headers.get("Content-Type")
+        self._record(url, digest, len(data), content_type,
+                     response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        self._count("downloaded")
+        self._count("bytes_downloaded", len(data))
+        return Blob(url, digest, len(data), content_type, self.object_path(digest))
+
+    @contextmanager
+    def open(self, digest):
+        """with store.open(digest) as data: → 읽기 전용 mmap (bytes처럼 사용)"""
+        with open(self.object_path(digest), 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+    def summary(self):
+        """(URL 수, 블롭 수, 블롭 전체 바이트)"""
+        with self._lock:
+            url_count = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        blob_count = total = 0
+        for entry in os.scandir(self.objects_dir):
+            if entry.is_dir():
+                for blob in os.scandir(entry.path):
+                    if not blob.name.endswith(".tmp"):
+                        blob_count += 1
+                        total += blob.stat().st_size
+        return url_count, blob_count, total
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+챗봇 함수용 임베딩 번들만 다시 생성 (임베딩 생성 없이)
+- 챗봇 함수가 번들이 없을 때 읽는 것과 같은 데이터: hairstyles 컬렉션을 gender로 거른 문서
+- 임베딩 스크립트(generate-embeddings.py / generate-men-embeddings.py)가 끝날 때 자동으로 만들지만,
+  그 밖에서 hairstyles만 바뀐 경우 이 스크립트로 갱신
+- 내용이 같으면 파일 / 포인터를 건드리지 않음
+
+사용법:
+  python build-embedding-bundle.py                       # female + male
+  python build-embedding-bundle.py --gender male --dtype float32
+  python build-embedding-bundle.py --verify              # 현재 번들 해시 / 형식 확인만
+"""
+
+import os
+import sys
+import hashlib
+import argparse
+import functools
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from embedding_bundle import (
+    BUNDLE_DIR,
+    DEFAULT_DTYPE,
+    DTYPES,
+    BUNDLE_COLLECTION,
+    GENDERS,
+    bundle_name,
+    export_bundle,
+    load_pointer,
+    print_bundle_result,
+    read_bundle,
+)
+from profiling import span, start_run
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
+
+# ==================== Firebase 초기화 ====================
+
+def init_firebase():
+    """Firebase Admin SDK 초기화"""
+    if not os.path.exists(SERVICE_ACCOUNT_KEY):
+        print(f"❌ Firebase 서비스 계정 키가 없습니다: {SERVICE_ACCOUNT_KEY}")
+        return None
+
+    try:
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
+            firebase_admin.initialize_app(cred)
+
+        db = firestore.client()
+        print("✅ Firebase Firestore 초기화 완료")
+        return db
+    except Exception as e:
+        print(f"❌ Firebase 초기화 실패: {e}")
+        return None
+
+# ==================== 확인 ====================
+
+def verify_bundle(gender, out_dir):
+    """포인터 → 번들 파일 해시 / 헤더 / 개수 확인. 반환: 성공 여부"""
+    pointer = load_pointer(bundle_name(gender), out_dir)
+    if not pointer:
+        print(f"  ❌ {gender}: 포인터 없음")
+        return False
+    path = os.path.join(out_dir, pointer["file"])
+    if not os.path.exists(path):
+        print(f"  ❌ {gender}: 번들 파일 없음 ({pointer['file']})")
+        return False
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    if digest != pointer["sha256"]:
+        print(f"  ❌ {gender}: 해시 불일치 ({pointer['file']})")
+        return False
+    meta, matrix = read_bundle(path)
+    if matrix.shape != (pointer["count"], pointer["dims"]) or len(meta["styles"]) != pointer["count"]:
+        print(f"  ❌ {gender}: 개수 불일치 (행렬 {matrix.shape}, 스타일 {len(meta['styles'])})")
+        return False
+    print(f"  ✅ {gender}: {pointer['file']} ({pointer['count']}개 x {pointer['dims']}차원 {pointer['dtype']}, "
+          f"모델 {pointer['model']}, 생성 {pointer['builtAt']})")
+    return True
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="챗봇 함수용 임베딩 번들 생성")
+    parser.add_argument("--gender", action="append", choices=GENDERS, default=[],
+                        help="대상 성별 (여러 번 사용 가능, 기본: 전체)")
+    parser.add_argument("--out-dir", default=BUNDLE_DIR)
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default=DEFAULT_DTYPE)
+    parser.add_argument("--verify", action="store_true", help="생성하지 않고 현재 번들만 확인")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    genders = args.gender or GENDERS
+
+    if args.verify:
+        ok = [verify_bundle(gender, args.out_dir) for gender in genders]
+        sys.exit(0 if all(ok) else 1)
+
+    start_run("build-embedding-bundle")
+    print("=" * 70)
+    print("챗봇 함수용 임베딩 번들 생성")
+    print("=" * 70)
+
+    with span("phase.init_firebase"):
+        db = init_firebase()
+    if not db:
+        sys.exit(1)
+
+    for gender in genders:
+        print(f"\n📋 {gender} ({BUNDLE_COLLECTION}, gender={gender})")
+        with span("phase.export_bundle", gender=gender):
+            pointer, excluded = export_bundle(db, gender, out_dir=args.out_dir, dtype=args.dtype)
+        print_bundle_result(pointer, excluded)
+
+    print(f"\n💾 번들 폴더: {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
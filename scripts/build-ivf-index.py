@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 벡터 인덱스 → IVF 근사 최근접 이웃 인덱스 (build-vector-index.py 다음 단계)
+- 입력: .cache/vector-index/<컬렉션> (임베딩 스크립트가 만든 벡터, Firestore 재조회 없음)
+- 지난 IVF 인덱스가 있으면 증분 갱신: 새 스타일 추가 / 임베딩이 바뀐 스타일 교체 / 없어진 스타일 삭제
+  (중심은 그대로 → 학습 비용 없음, 학습 때보다 2배 넘게 늘었거나 모델 / 차원이 바뀌면 다시 학습)
+- 완료 후 카탈로그 벡터 표본으로 완전 탐색 대비 recall@k 확인 (저장한 기본 nprobe 기준)
+
+사용법:
+  python build-ivf-index.py
+  python build-ivf-index.py --collection styles --nlist 64 --nprobe 8
+  python build-ivf-index.py --rebuild
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+import functools
+
+import numpy as np
+
+from ivf_index import DEFAULT_IVF_DIR, DEFAULT_NPROBE, IVFIndex, default_nlist, ivf_paths, load_ivf_meta
+from profiling import record, span, start_run
+from vector_index import COLLECTIONS, DEFAULT_INDEX_DIR, VectorIndex
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 증분 갱신 ====================
+
+def row_versions(index, matrix):
+    """벡터 인덱스 행 → {id: 버전} (embeddingKey가 없는 행은 벡터 해시)"""
+    versions = index.meta.get("versions") or {}
+    return {doc_id: versions.get(doc_id) or hashlib.sha256(matrix[i].tobytes()).hexdigest()[:16]
+            for i, doc_id in enumerate(index.ids)}
+
+def plan_update(ivf, versions):
+    """(추가 / 교체할 id, 삭제할 id)"""
+    upserts = [doc_id for doc_id, version in versions.items() if ivf.versions.get(doc_id) != version]
+    removed = [doc_id for doc_id in ivf.versions if doc_id not in versions]
+    return upserts, removed
+
+def retrain_reason(previous, source, args):
+    """다시 학습해야 하는 이유 (없으면 None)"""
+    if args.rebuild:
+        return "--rebuild"
+    if previous is None:
+        return "인덱스 없음"
+    if previous.get("model") != source.get("model"):
+        return f"모델 변경 ({previous.get('model')} → {source.get('model')})"
+    if previous.get("dims") != source["dims"]:
+        return f"차원 변경 ({previous.get('dims')} → {source['dims']})"
+    if args.nlist and args.nlist != previous.get("nlist"):
+        return f"nlist 변경 ({previous.get('nlist')} → {args.nlist})"
+    return None
+
+# ==================== 확인 ====================
+
+def check_recall(ivf, ids, matrix, k, nprobe, sample=200, seed=42):
+    """카탈로그 벡터 표본으로 완전 탐색 대비 recall@k (자기 자신 제외)"""
+    k = min(k, len(ids) - 1)
+    if k <= 0:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(ids), min(sample, len(ids)), replace=False)
+    hits = 0
+    for i in positions:
+        scores = matrix @ matrix[i]
+        scores[i] = -np.inf
+        exact = {ids[j] for j in np.argpartition(-scores, k - 1)[:k]}
+        hits += len(exact & {doc_id for doc_id, _ in ivf.search(matrix[i], k=k, nprobe=nprobe, exclude=[ids[i]])})
+    return hits / (len(positions) * k)
+
+# ==================== 컬렉션 ====================
+
+def build_collection(collection, args):
+    """컬렉션 하나 → "built" | "updated" | "unchanged" | "missing" """
+    print(f"\n📋 {collection}")
+    try:
+        source = VectorIndex.load(collection, args.index_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"  ❌ {e} - 먼저 build-vector-index.py를 실행하세요")
+        return "missing"
+
+    matrix = np.asarray(source.matrix, dtype=np.float32)
+    versions = row_versions(source, matrix)
+    positions = {doc_id: i for i, doc_id in enumerate(source.ids)}
+    previous = load_ivf_meta(collection, args.out_dir)
+    reason = retrain_reason(previous, source.meta, args)
+    nprobe = args.nprobe or (previous or {}).get("nprobe") or DEFAULT_NPROBE
+
+    status = "updated"
+    ivf = None
+    if not reason:
+        ivf = IVFIndex.load(collection, args.out_dir, mmap=False)
+        upserts, removed = plan_update(ivf, versions)
+        if not upserts and not removed and nprobe == previous.get("nprobe"):
+            print(f"  ⏭️ 벡터 {len(versions)}개 변경 없음 - 기존 인덱스 유지 (nlist {ivf.nlist}, nprobe {nprobe})")
+            return "unchanged"
+        started = time.perf_counter()
+        ivf.remove(removed)
+        ivf.add(upserts, matrix[[positions[doc_id] for doc_id in upserts]] if upserts else [],
+                {doc_id: versions[doc_id] for doc_id in upserts})
+        record("phase.ivf_incremental", time.perf_counter() - started)
+        if upserts or removed:
+            print(f"  ➕ 증분 갱신: 추가 / 교체 {len(upserts)}개, 삭제 {len(removed)}개 (중심 재학습 없음)")
+        if ivf.needs_retrain():
+            reason = f"학습 때 {ivf.trained_count}개 → 지금 {len(ivf)}개"
+            ivf = None
+
+    if ivf is None:
+        if not len(source):
+            print("  ⏭️ 벡터 없음")
+            return "unchanged"
+        nlist = args.nlist or default_nlist(len(source))
+        print(f"  🧠 학습 ({reason}): 벡터 {len(source)}개 → nlist {nlist}")
+        started = time.perf_counter()
+        ivf = IVFIndex.build(source.ids, matrix, nlist=nlist, versions=versions, seed=args.seed)
+        record("phase.ivf_train", time.perf_counter() - started)
+        status = "built"
+
+    meta = ivf.save(collection, args.out_dir, model=source.meta.get("model"), nprobe=nprobe,
+                    sourceSha256=source.meta["sha256"])
+    sizes = ivf.list_sizes()
+    with span("cpu.ivf_check", collection=collection):
+        recall = check_recall(ivf, source.ids, matrix, args.k, nprobe)
+    vectors_path, _, _ = ivf_paths(collection, args.out_dir)
+    print(f"  ✅ {meta['count']}개 x {meta['dims']}차원, 리스트 {meta['nlist']}개 "
+          f"(크기 최소 {sizes.min()} / 평균 {sizes.mean():.1f} / 최대 {sizes.max()}) → {vectors_path}")
+    print(f"  🎯 nprobe {nprobe}: recall@{min(args.k, len(source) - 1)} {recall:.3f} (완전 탐색 대비)")
+    return status
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="IVF 근사 최근접 이웃 인덱스 생성 / 증분 갱신")
+    parser.add_argument("--collection", action="append", choices=COLLECTIONS, default=[],
+                        help="대상 컬렉션 (여러 번 사용 가능, 기본: 전체)")
+    parser.add_argument("--nlist", type=int, help="리스트 수 (기본: √벡터 수, 바꾸면 다시 학습)")
+    parser.add_argument("--nprobe", type=int, help=f"검색 기본 탐색 리스트 수 (기본: {DEFAULT_NPROBE})")
+    parser.add_argument("-k", type=int, default=10, help="recall 확인의 k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rebuild", action="store_true", help="증분 갱신 대신 다시 학습")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--out-dir", default=DEFAULT_IVF_DIR)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_run("build-ivf-index")
+
+    print("=" * 70)
+    print("IVF 근사 최근접 이웃 인덱스")
+    print("=" * 70)
+
+    results = {}
+    for collection in args.collection or COLLECTIONS:
+        results[collection] = build_collection(collection, args)
+
+    labels = {"built": "학습 + 생성", "updated": "증분 갱신", "unchanged": "변경 없음", "missing": "인덱스 없음"}
+    print("\n" + "=" * 70)
+    print("📊 " + ", ".join(f"{collection}: {labels[status]}" for collection, status in results.items()))
+    print(f"💾 인덱스 폴더: {args.out_dir}")
+    if "missing" in results.values():
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
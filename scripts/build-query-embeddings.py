@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+챗봇 질의 임베딩 표 생성 (query_cache)
+- 남자 스타일 이름(댄디컷, 가일컷, 리젠트컷 ...) + 89용어 + --queries 파일의 질의를 미리 임베딩
+- 모델: 번들과 같은 모델(embedding_bundle.BUNDLE_MODEL)로 표 하나 (--model로 다른 모델 표 추가 생성)
+- 로컬 임베딩 저장소를 쓰므로 어휘가 늘어도 새 질의만 Gemini 호출
+- 챗봇 함수는 정규화한 질의가 표에 있으면 임베딩 호출 없이 바로 유사도 계산
+
+사용법:
+  python build-query-embeddings.py
+  python build-query-embeddings.py --queries frequent-queries.txt --model text-embedding-004
+  python build-query-embeddings.py --list              # 수집한 질의만 출력 (API 호출 없음)
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+
+from embedding_bundle import BUNDLE_DIR, BUNDLE_MODEL, DEFAULT_DTYPE, DTYPES, print_bundle_result
+from embedding_models import MODELS, resolve_model
+from embedding_pipeline import DEFAULT_CONCURRENCY, DEFAULT_RPS
+from embedding_store import DEFAULT_STORE_PATH, EmbeddingStore
+from profiling import record, start_run
+from query_cache import embed_queries, harvest_queries, load_query_file, write_query_table
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+def load_gemini_key():
+    """GEMINI_API_KEY (.env 우선, 없으면 환경변수)"""
+    env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("GEMINI_API_KEY="):
+                    return line.split("=", 1)[1].strip().strip('"').strip("'")
+    return os.environ.get("GEMINI_API_KEY")
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="챗봇 질의 임베딩 표 생성")
+    parser.add_argument("--queries", action="append", default=[], help="추가 질의 파일 (한 줄에 하나)")
+    parser.add_argument("--model", action="append", choices=sorted(MODELS), default=[],
+                        help=f"대상 모델 (기본: 번들 모델 {BUNDLE_MODEL})")
+    parser.add_argument("--list", action="store_true", help="수집한 질의만 출력")
+    parser.add_argument("--out-dir", default=BUNDLE_DIR)
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default=DEFAULT_DTYPE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS)
+    parser.add_argument("--no-store", action="store_true", help="로컬 임베딩 저장소 사용 안 함")
+    parser.add_argument("--store-path", default=DEFAULT_STORE_PATH)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    extra = []
+    for path in args.queries:
+        extra += load_query_file(path)
+    queries = harvest_queries(extra=extra)
+
+    if args.list:
+        for query in queries:
+            print(f"  {query['key']:<24} {query['text']:<28} {query['source']}")
+        print(f"\n총 {len(queries)}개")
+        return
+
+    start_run("build-query-embeddings")
+    print("=" * 70)
+    print(f"챗봇 질의 임베딩 표 생성 ({len(queries)}개 질의)")
+    print("=" * 70)
+
+    models = [resolve_model(name) for name in args.model or [BUNDLE_MODEL]]
+    api_key = load_gemini_key()
+    if not api_key:
+        print("❌ GEMINI_API_KEY가 없습니다")
+        sys.exit(1)
+
+    store = None if args.no_store else EmbeddingStore(args.store_path)
+    failed_total = 0
+    for model in models:
+        print(f"\n🧠 {model['name']}: 질의 {len(queries)}개 임베딩...")
+        started = time.monotonic()
+        embeddings, failed = embed_queries(queries, api_key, model, store=store,
+                                           concurrency=args.concurrency, rps=args.rps)
+        record("phase.embed_queries", time.monotonic() - started)
+        failed_total += len(failed)
+        if failed:
+            print(f"  ⚠️ 임베딩 실패 {len(failed)}개 - 표에서 빠짐 (다시 실행하면 채움)")
+        pointer, excluded = write_query_table(queries, embeddings, model, args.out_dir, args.dtype)
+        print_bundle_result(pointer, excluded)
+
+    if store:
+        ss = store.stats
+        print(f"\n  로컬 저장소: 재사용 {ss['reused']}개 / 재계산 {ss['recomputed']}개")
+        store.close()
+    if failed_total:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
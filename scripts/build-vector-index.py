@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 임베딩 → 로컬 벡터 인덱스 생성 (generate-embeddings.py / generate-men-embeddings.py 다음 단계)
+- Firestore에서 embeddingKey만 먼저 스트리밍 → 지난 인덱스와 같으면 벡터는 내려받지 않고 스킵
+- 바뀌었으면 embedding 필드만 투영 조회해서 .cache/vector-index/<컬렉션>.f32 + .json 재생성
+- 차원이 다른 벡터 / 길이 0 벡터는 제외하고 목록 출력
+- 컬렉션의 active 임베딩 모델 벡터만 사용 (모델 전환 도중이면 섀도 슬롯에서, embedding_models 참고)
+
+사용법:
+  python build-vector-index.py                          # styles + men_styles
+  python build-vector-index.py --collection men_styles
+  python build-vector-index.py --rebuild --out-dir D:/vector-index
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from embedding_models import find_slot, get_active_model, stream_embeddings
+from profiling import record, span, start_run
+from style_listing import EMBEDDING_STATUS_FIELDS, stream_styles
+from vector_index import COLLECTIONS, DEFAULT_INDEX_DIR, index_paths, load_meta, write_index
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
+
+# ==================== Firebase 초기화 ====================
+
+def init_firebase():
+    """Firebase Admin SDK 초기화"""
+    if not os.path.exists(SERVICE_ACCOUNT_KEY):
+        print(f"❌ Firebase 서비스 계정 키가 없습니다: {SERVICE_ACCOUNT_KEY}")
+        return None
+
+    try:
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
+            firebase_admin.initialize_app(cred)
+
+        db = firestore.client()
+        print("✅ Firebase Firestore 초기화 완료")
+        return db
+    except Exception as e:
+        print(f"❌ Firebase 초기화 실패: {e}")
+        return None
+
+# ==================== 인덱스 생성 ====================
+
+def embedding_version(data, model):
+    """문서의 model 임베딩 버전 (embeddingKey, 없는 예전 문서는 embeddingUpdatedAt)"""
+    slot = find_slot(data, model)
+    if not slot:
+        return None
+    if data.get(slot["key"]):
+        return data[slot["key"]]
+    updated_at = data.get(slot["updatedAt"])
+    return updated_at.isoformat() if hasattr(updated_at, "isoformat") else None
+
+def build_collection_index(db, collection, out_dir, rebuild=False):
+    """컬렉션 하나의 인덱스 갱신 → "built" | "unchanged" """
+    model = get_active_model(db, collection)
+    print(f"\n📋 {collection}: 임베딩 상태 확인... (모델 {model['name']})")
+    versions = {}
+    for style_id, data in stream_styles(db, collection, EMBEDDING_STATUS_FIELDS):
+        version = embedding_version(data, model)
+        if version:
+            versions[style_id] = version
+
+    previous = load_meta(collection, out_dir)
+    if (not rebuild and previous and previous.get("versions") == versions
+            and all(os.path.exists(p) for p in index_paths(collection, out_dir))):
+        print(f"  ⏭️ 임베딩 {len(versions)}개 변경 없음 - 기존 인덱스 유지")
+        return "unchanged"
+
+    print(f"  임베딩 {len(versions)}개 내려받는 중...")
+    started = time.perf_counter()
+    rows = [(style_id, vector, embedding_version(data, model))
+            for style_id, data, vector, _ in stream_embeddings(db, collection, model)]
+    record("phase.download_embeddings", time.perf_counter() - started)
+
+    meta, excluded = write_index(collection, rows, out_dir, model=model["model"])
+    for style_id, reason in excluded:
+        print(f"  ⚠️ {style_id}: 제외 ({reason})")
+    matrix_path, _ = index_paths(collection, out_dir)
+    print(f"  ✅ {meta['count']}개 x {meta['dims']}차원 → {matrix_path} "
+          f"({os.path.getsize(matrix_path) / 1024:.1f}KB, 제외 {len(excluded)}개)")
+    return "built"
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="스타일 임베딩 로컬 벡터 인덱스 생성")
+    parser.add_argument("--collection", action="append", choices=COLLECTIONS, default=[],
+                        help="대상 컬렉션 (여러 번 사용 가능, 기본: 전체)")
+    parser.add_argument("--out-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="임베딩이 그대로여도 다시 생성")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_run("build-vector-index")
+
+    print("=" * 70)
+    print("로컬 벡터 인덱스 생성")
+    print("=" * 70)
+
+    with span("phase.init_firebase"):
+        db = init_firebase()
+    if not db:
+        sys.exit(1)
+
+    results = {}
+    for collection in args.collection or COLLECTIONS:
+        results[collection] = build_collection_index(db, collection, args.out_dir, rebuild=args.rebuild)
+
+    print("\n" + "=" * 70)
+    print("📊 " + ", ".join(f"{collection}: {'생성' if status == 'built' else '변경 없음'}"
+                           for collection, status in results.items()))
+    print(f"💾 인덱스 폴더: {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
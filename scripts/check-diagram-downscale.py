@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+도해도 축소 정확도 점검
+- 블롭 저장소의 도해도 중 샘플을 원본 / 축소본으로 각각 분석
+- lifting, direction, section 값이 같은지 비교 (analyze-diagrams-metadata.py --preprocess를 켜기 전 / 축소 설정 변경 전에 실행)
+- 원본 분석은 분석 캐시를 그대로 사용 (이미 분석한 도해도는 Gemini 호출 없음)
+- 축소본 분석 결과도 같은 캐시에 저장되므로 이후 analyze-diagrams-metadata.py 실행에 재사용
+
+사용법:
+  python prefetch-images.py --collection styles       # 먼저 저장소 채우기
+  python check-diagram-downscale.py --sample 50
+  python check-diagram-downscale.py --sample 200 --bytes-only         # Gemini 호출 없이 용량만
+  python check-diagram-downscale.py --max-edge 768 --image-format png
+"""
+
+import os
+import sys
+import random
+import argparse
+import functools
+
+from blob_store import DEFAULT_BLOB_DIR, BlobStore
+from diagram_cache import DEFAULT_CACHE_PATH, DiagramAnalysisCache
+from diagram_analysis import analyze_diagram_image, create_http_session
+from image_preprocess import (
+    DEFAULT_FORMAT,
+    DEFAULT_MAX_EDGE,
+    DEFAULT_QUALITY,
+    IMAGE_FORMATS,
+    DiagramPreprocessor,
+)
+from rate_limiter import TokenBucket
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# 축소해도 바뀌면 안 되는 핵심 파라미터
+CHECK_FIELDS = ["lifting", "direction", "section"]
+
+def load_api_key():
+    env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("GEMINI_API_KEY="):
+                    return line.split("=", 1)[1].strip().strip('"').strip("'")
+    return os.environ.get("GEMINI_API_KEY")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="도해도 축소 전후 분석 결과 비교")
+    parser.add_argument("--sample", type=int, default=50, help="점검할 도해도 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", action="append", default=[], help="점검할 URL 직접 지정 (여러 번 사용 가능)")
+    parser.add_argument("--max-edge", type=int, default=DEFAULT_MAX_EDGE)
+    parser.add_argument("--image-format", choices=sorted(IMAGE_FORMATS), default=DEFAULT_FORMAT)
+    parser.add_argument("--image-quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--bytes-only", action="store_true", help="분석 없이 용량 절감만 계산")
+    parser.add_argument("--min-agreement", type=float, default=0.95,
+                        help="이 비율 미만이면 종료 코드 1 (기본 0.95)")
+    parser.add_argument("--rps", type=float, default=5.0)
+    parser.add_argument("--blob-dir", default=DEFAULT_BLOB_DIR)
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    store = BlobStore(args.blob_dir)
+    session = create_http_session(pool_size=4)
+    preprocessor = DiagramPreprocessor(store, max_edge=args.max_edge, image_format=args.image_format,
+                                       quality=args.image_quality)
+
+    urls = args.url or store.urls()
+    if not args.url and len(urls) > args.sample:
+        urls = random.Random(args.seed).sample(urls, args.sample)
+    if not urls:
+        print("❌ 점검할 도해도가 없습니다. 먼저 prefetch-images.py를 실행하세요.")
+        sys.exit(1)
+
+    print("=" * 70)
+    print(f"도해도 축소 점검: {len(urls)}장, 설정 {preprocessor.params}")
+    print("=" * 70)
+
+    # 1. 용량
+    for url in urls:
+        blob = store.fetch(url, session)
+        if blob:
+            preprocessor.prepare(blob.digest)
+    pr = preprocessor.report()
+    print(f"  원본 {pr['source_bytes'] / 1024:.0f}KB → 축소 {pr['prepared_bytes'] / 1024:.0f}KB "
+          f"({pr['saved_ratio']:.1%} 절감)")
+    print(f"  요청 페이로드(base64) {pr['payload_source_bytes'] / 1024:.0f}KB → "
+          f"{pr['payload_prepared_bytes'] / 1024:.0f}KB")
+
+    if args.bytes_only:
+        preprocessor.close()
+        store.close()
+        return
+
+    api_key = load_api_key()
+    if not api_key:
+        print("❌ GEMINI_API_KEY가 .env 파일에 없습니다")
+        sys.exit(1)
+
+    # 2. 원본 / 축소본 분석 비교
+    cache = DiagramAnalysisCache(args.cache_path)
+    analyze = functools.partial(analyze_diagram_image, api_key=api_key, session=session,
+                                limiter=TokenBucket(args.rps), cache=cache, blob_store=store)
+
+    compared = 0
+    agreed = {field: 0 for field in CHECK_FIELDS}
+    mismatches = []
+    for url in urls:
+        original = analyze(url)
+        downscaled = analyze(url, preprocessor=preprocessor)
+        if not original or not downscaled:
+            print(f"  ⚠️ 분석 실패, 제외: {url}")
+            continue
+        compared += 1
+        diff = {}
+        for field in CHECK_FIELDS:
+            if original.get(field) == downscaled.get(field):
+                agreed[field] += 1
+            else:
+                diff[field] = (original.get(field), downscaled.get(field))
+        if diff:
+            mismatches.append((url, diff))
+
+    cache.close()
+    preprocessor.close()
+    store.close()
+
+    print("-" * 70)
+    if not compared:
+        print("❌ 비교할 분석 결과가 없습니다")
+        sys.exit(1)
+
+    all_agree = compared - len(mismatches)
+    for field in CHECK_FIELDS:
+        print(f"  {field:<10} 일치 {agreed[field]}/{compared} ({agreed[field] / compared:.1%})")
+    print(f"  세 값 모두 일치 {all_agree}/{compared} ({all_agree / compared:.1%})")
+    for url, diff in mismatches[:20]:
+        changes = ", ".join(f"{field} {before}→{after}" for field, (before, after) in diff.items())
+        print(f"  ❗ {changes}  {url}")
+
+    if all_agree / compared < args.min_agreement:
+        print(f"❌ 일치율이 기준({args.min_agreement:.0%}) 미만입니다. --max-edge를 늘리거나 포맷을 바꾸세요.")
+        sys.exit(1)
+    print("✅ 축소 후에도 핵심 파라미터가 유지됩니다")
+
+if __name__ == "__main__":
+    main()
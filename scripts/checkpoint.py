@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+중단 후 이어서 실행하기 위한 체크포인트 저널 (write-ahead, JSONL)
+- scripts/.cache/checkpoints/<작업명>.jsonl
+- 첫 줄: 실행 계획(plan) - 처리할 대상 목록 등 (재개할 때 Firestore를 다시 읽지 않음)
+- 작업 단위(도해도, 임베딩, 업로드)가 끝날 때마다 한 줄 추가 + fsync
+- 정상 종료하면 finished 기록 → 다음 --resume은 새 실행
+- 쓰다가 끊긴 마지막 줄은 무시
+
+사용법:
+  journal = CheckpointJournal("analyze-diagrams-metadata")
+  plan = journal.resume_plan() if args.resume else None
+  if plan is None:
+      plan = {...}; journal.start(plan)
+  ...
+  journal.record("diagram", url, metadata)
+  journal.finish()
+"""
+
+import os
+import json
+import time
+import threading
+
+from dataset_index import CACHE_DIR
+
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, "checkpoints")
+JOURNAL_FORMAT = 1
+
+class CheckpointJournal:
+    """스레드 안전 체크포인트 저널 (워커 스레드에서 바로 record 가능)"""
+
+    def __init__(self, name, path=None, fsync=True):
+        self.name = name
+        self.path = path or os.path.join(CHECKPOINT_DIR, f"{name}.jsonl")
+        self.fsync = fsync
+        self.plan = None
+        self.resumed = False
+        self._done = {}      # (kind, unit) -> data
+        self._file = None
+        self._lock = threading.Lock()
+
+    # ==================== 읽기 ====================
+
+    def _load(self):
+        """(plan, {(kind, unit): data}, finished) - 저널이 없거나 형식이 다르면 plan=None"""
+        if not os.path.exists(self.path):
+            return None, {}, False
+
+        plan, done, finished = None, {}, False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue   # 중단되면서 잘린 줄
+                if entry.get("type") == "plan" and entry.get("format") == JOURNAL_FORMAT:
+                    plan = entry["plan"]
+                elif entry.get("type") == "done":
+                    done[(entry["kind"], entry["unit"])] = entry.get("data")
+                elif entry.get("type") == "finished":
+                    finished = True
+        return plan, done, finished
+
+    def pending(self):
+        """끝나지 않은 이전 실행이 있는지"""
+        plan, _, finished = self._load()
+        return plan is not None and not finished
+
+    def resume_plan(self):
+        """중단된 실행의 계획을 불러와 이어서 기록 (이어갈 실행이 없으면 None)"""
+        plan, done, finished = self._load()
+        if plan is None or finished:
+            return None
+        self.plan = plan
+        self._done = done
+        self.resumed = True
+
+        # 잘린 마지막 줄은 잘라내고 그 뒤부터 이어서 기록
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return plan
+
+    # ==================== 쓰기 ====================
+
+    def _append(self, *entries):
+        lines = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries)
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def start(self, plan):
+        """새 실행 시작 (기존 저널은 버림)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.plan = plan
+        self._done = {}
+        self.resumed = False
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({"type": "plan", "format": JOURNAL_FORMAT, "name": self.name,
+                      "startedAt": time.time(), "plan": plan})
+
+    def record(self, kind, unit, data=None):
+        """작업 단위 하나 완료 기록"""
+        self._append({"type": "done", "kind": kind, "unit": unit, "data": data})
+        with self._lock:
+            self._done[(kind, unit)] = data
+
+    def record_many(self, kind, units):
+        """작업 단위 여러 개 완료 기록 (fsync 한 번) - units: [(unit, data)]"""
+        units = list(units)
+        self._append(*({"type": "done", "kind": kind, "unit": unit, "data": data} for unit, data in units))
+        with self._lock:
+            for unit, data in units:
+                self._done[(kind, unit)] = data
+
+    def is_done(self, kind, unit):
+        with self._lock:
+            return (kind, unit) in self._done
+
+    def get(self, kind, unit, default=None):
+        with self._lock:
+            return self._done.get((kind, unit), default)
+
+    def done_units(self, kind):
+        """{unit: data} (해당 종류만)"""
+        with self._lock:
+            return {unit: data for (k, unit), data in self._done.items() if k == kind}
+
+    def finish(self):
+        """정상 종료 표시 (다음 --resume은 이어갈 것이 없음)"""
+        if self._file:
+            self._append({"type": "finished", "finishedAt": time.time()})
+            self.close()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
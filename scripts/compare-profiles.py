@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+실행 리포트 비교 (profiling.py가 남긴 .cache/profiles/<스크립트>/*.json)
+- 구간별 p50 / p95 / 합계, 채널별 송수신 바이트를 나란히 출력
+- 기준 대비 threshold 이상 느려진 구간은 ❗ 표시, --fail-on-regression이면 종료 코드 1
+
+사용법:
+  python compare-profiles.py parse-captions                 # 해당 스크립트의 최근 두 실행 비교
+  python compare-profiles.py before.json after.json
+  python compare-profiles.py analyze-diagrams-metadata --threshold 0.1 --fail-on-regression
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import functools
+
+from profiling import PROFILE_DIR
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# 이보다 짧은 구간은 잡음이 커서 회귀 판정에서 제외 (ms)
+MIN_SIGNIFICANT_MS = 1.0
+
+def load_report(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def resolve_reports(targets):
+    """[스크립트명] → 최근 두 리포트, [파일, 파일] → 그대로"""
+    if len(targets) == 2:
+        return targets
+    directory = os.path.join(PROFILE_DIR, targets[0])
+    paths = sorted(p for p in glob.glob(os.path.join(directory, "*.json"))
+                   if not p.endswith(".trace.json") and os.path.basename(p) != "latest.json")
+    if len(paths) < 2:
+        print(f"❌ 비교할 리포트가 2개 미만입니다: {directory}")
+        sys.exit(1)
+    return paths[-2:]
+
+def change(before, after):
+    if not before:
+        return None
+    return (after - before) / before
+
+def format_change(ratio):
+    return "   -   " if ratio is None else f"{ratio:+7.1%}"
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="실행 리포트 비교")
+    parser.add_argument("targets", nargs="+", help="스크립트 이름 하나 또는 리포트 파일 두 개 (기준, 비교)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 p95 증가 비율 (기본 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if len(args.targets) > 2:
+        print("❌ 스크립트 이름 하나 또는 리포트 파일 두 개를 지정하세요")
+        sys.exit(2)
+
+    base_path, new_path = resolve_reports(args.targets)
+    base, new = load_report(base_path), load_report(new_path)
+
+    print("=" * 100)
+    print(f"기준: {base_path} ({base.get('startedAt')}, {base['wallSeconds']:.1f}초)")
+    print(f"비교: {new_path} ({new.get('startedAt')}, {new['wallSeconds']:.1f}초, "
+          f"{format_change(change(base['wallSeconds'], new['wallSeconds'])).strip()})")
+    print("=" * 100)
+    print(f"  {'구간':<30} {'횟수':>13} {'p50 ms':>21} {'p95 ms':>21} {'합계 s':>19}")
+
+    regressions = []
+    for name in sorted(set(base["spans"]) | set(new["spans"])):
+        b, n = base["spans"].get(name), new["spans"].get(name)
+        if not b or not n:
+            print(f"  {name:<30} {'(기준에만 있음)' if b else '(비교에만 있음)'}")
+            continue
+        p95_change = change(b["p95_ms"], n["p95_ms"])
+        regressed = (p95_change is not None and p95_change > args.threshold
+                     and n["p95_ms"] >= MIN_SIGNIFICANT_MS)
+        if regressed:
+            regressions.append((name, p95_change))
+        print(f"{'❗' if regressed else '  '}{name:<30} {b['count']:>6}→{n['count']:<6} "
+              f"{b['p50_ms']:>8.1f}→{n['p50_ms']:<8.1f}{format_change(change(b['p50_ms'], n['p50_ms']))} "
+              f"{b['p95_ms']:>8.1f}→{n['p95_ms']:<8.1f}{format_change(p95_change)} "
+              f"{b['total_ms'] / 1000:>7.2f}→{n['total_ms'] / 1000:<7.2f}")
+
+    channels = sorted(set(base.get("bytes", {})) | set(new.get("bytes", {})))
+    if channels:
+        print("-" * 100)
+        for channel in channels:
+            b = base.get("bytes", {}).get(channel, {"in": 0, "out": 0})
+            n = new.get("bytes", {}).get(channel, {"in": 0, "out": 0})
+            print(f"  📦 {channel:<12} 수신 {b['in'] / 1024:>10.1f}→{n['in'] / 1024:<10.1f}KB "
+                  f"송신 {b['out'] / 1024:>10.1f}→{n['out'] / 1024:<10.1f}KB")
+
+    print("-" * 100)
+    if regressions:
+        print(f"❗ p95가 {args.threshold:.0%} 넘게 늘어난 구간 {len(regressions)}개: "
+              + ", ".join(f"{name} ({ratio:+.0%})" for name, ratio in regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+    else:
+        print("✅ 회귀 없음")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 임베딩 압축 (PCA + float16 / int8) + recall@k 리포트 (build-vector-index.py 다음 단계)
+- 로컬 벡터 인덱스(.cache/vector-index)의 정규화 행렬을 읽어서 설정마다 코덱 학습 → recall@k 측정
+  · 기본 설정: PCA 없음 / 256 / 128 / 64 / 32차원 x float32 / float16 / int8
+  · 카탈로그 벡터 자체를 질의로 원본 top-k와 비교 (자기 자신 제외), 1위 일치율도 함께
+- --min-recall / --min-top1 기준을 넘는 가장 작은 설정을 .cache/vector-compressed/<컬렉션>.npz + .json으로 저장
+  (--setting으로 직접 지정 가능, 리포트는 메타 JSON의 report에 같이 저장)
+- 원본 인덱스 sha256과 설정이 지난 실행과 같으면 스킵
+- --synthetic N: 인덱스 없이 합성 벡터로 리포트만 (카탈로그가 커졌을 때 설정 미리 보기)
+
+사용법:
+  python compress-vectors.py
+  python compress-vectors.py --collection men_styles -k 5 --min-recall 0.98
+  python compress-vectors.py --setting pca128-int8
+  python compress-vectors.py --dims 0 128 --dtype int8 --report-only
+  python compress-vectors.py --synthetic 100000 --sample 1000
+"""
+
+import sys
+import json
+import time
+import argparse
+import functools
+
+import numpy as np
+
+from profiling import record, span, start_run
+from synthetic_dataset import synthetic_embeddings
+from vector_compression import (
+    DEFAULT_COMPRESSED_DIR,
+    DEFAULT_DIMS,
+    DEFAULT_SETTING_DTYPES,
+    DTYPES,
+    compressed_paths,
+    evaluate_settings,
+    load_compressed_meta,
+    parse_setting,
+    pick_setting,
+    write_compressed,
+)
+from vector_index import COLLECTIONS, DEFAULT_INDEX_DIR, VectorIndex
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 리포트 ====================
+
+def build_settings(args, source_dims):
+    """[(PCA 차원, dtype)] - 원본 차원 이상인 PCA는 PCA 없음과 같으므로 제외"""
+    settings = [(dims, dtype) for dims in args.dims for dtype in args.dtype
+                if dims == 0 or dims < source_dims]
+    if args.setting:
+        chosen = parse_setting(args.setting)
+        if chosen not in settings:
+            settings.append(chosen)
+    return settings
+
+def print_report(reports, chosen=None):
+    print(f"  {'설정':<16} {'바이트':>6} {'압축률':>7} {'분산':>7} {'recall@k':>9} {'1위 일치':>8}")
+    for r in reports:
+        mark = " ←" if r["setting"] == chosen else ""
+        print(f"  {r['setting']:<16} {r['bytesPerVector']:>6} {r['ratio']:>6.1f}x "
+              f"{r['explainedVariance'] * 100:>6.1f}% {r['recall']:>9.4f} {r['top1']:>8.3f}{mark}")
+
+def report_matrix(matrix, args):
+    """설정별 리포트 → [(리포트, 코덱, 코드)]"""
+    started = time.perf_counter()
+    results = evaluate_settings(matrix, build_settings(args, matrix.shape[1]), k=args.k,
+                                sample=args.sample, seed=args.seed)
+    record("phase.evaluate_compression", time.perf_counter() - started)
+    return results
+
+def choose(reports, args):
+    """저장할 설정 이름 (없으면 None)"""
+    if args.setting:
+        return args.setting
+    return pick_setting(reports, args.min_recall, args.min_top1)
+
+# ==================== 컬렉션 ====================
+
+def compress_collection(collection, args):
+    """컬렉션 하나 압축 → "built" | "unchanged" | "missing" | "rejected" """
+    print(f"\n📋 {collection}")
+    try:
+        index = VectorIndex.load(collection, args.index_dir)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"  ❌ {e} - 먼저 build-vector-index.py를 실행하세요")
+        return "missing"
+    if len(index) < 2:
+        print(f"  ⏭️ 벡터 {len(index)}개 - 압축할 것이 없음")
+        return "unchanged"
+
+    settings_key = json.dumps({"dims": args.dims, "dtype": args.dtype, "k": args.k, "sample": args.sample,
+                               "minRecall": args.min_recall, "minTop1": args.min_top1,
+                               "setting": args.setting}, sort_keys=True)
+    previous = load_compressed_meta(collection, args.out_dir)
+    if (not args.rebuild and not args.report_only and previous
+            and previous.get("sourceSha256") == index.meta["sha256"]
+            and previous.get("settingsKey") == settings_key):
+        print(f"  ⏭️ 인덱스 / 설정 변경 없음 - 기존 압축 유지 ({previous['setting']})")
+        return "unchanged"
+
+    matrix = np.asarray(index.matrix, dtype=np.float32)
+    print(f"  벡터 {len(index)}개 x {index.dims}차원 (원본 {index.dims * 4}바이트/벡터), recall@{min(args.k, len(index) - 1)}")
+    results = report_matrix(matrix, args)
+    reports = [report for report, _, _ in results]
+    chosen = choose(reports, args)
+    print_report(reports, chosen)
+
+    if args.report_only:
+        return "unchanged"
+    if not chosen:
+        print(f"  ❌ recall {args.min_recall} / 1위 일치 {args.min_top1} 기준을 넘는 설정 없음 - 저장하지 않음")
+        return "rejected"
+
+    _, codec, codes = next(r for r in results if r[0]["setting"] == chosen)
+    meta = write_compressed(collection, index.ids, codec, codes, index.meta, reports, args.out_dir,
+                            settings_key=settings_key)
+    codes_path, _ = compressed_paths(collection, args.out_dir)
+    print(f"  ✅ {chosen}: {meta['count']}개 → {codes_path} "
+          f"({meta['bytesPerVector']}바이트/벡터, 원본 대비 {index.dims * 4 / meta['bytesPerVector']:.1f}x 작음)")
+    return "built"
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="스타일 임베딩 압축 + recall@k 리포트")
+    parser.add_argument("--collection", action="append", choices=COLLECTIONS, default=[],
+                        help="대상 컬렉션 (여러 번 사용 가능, 기본: 전체)")
+    parser.add_argument("--dims", type=int, nargs="+", default=DEFAULT_DIMS, help="PCA 차원 (0 = PCA 없음)")
+    parser.add_argument("--dtype", nargs="+", choices=sorted(DTYPES), default=DEFAULT_SETTING_DTYPES)
+    parser.add_argument("-k", type=int, default=10, help="recall@k의 k")
+    parser.add_argument("--sample", type=int, help="recall 측정 질의 수 (기본: 전체 벡터)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-recall", type=float, default=0.95, help="저장할 설정의 최소 recall@k")
+    parser.add_argument("--min-top1", type=float, default=0.9, help="저장할 설정의 최소 1위 일치율")
+    parser.add_argument("--setting", help="리포트와 관계없이 저장할 설정 (예: pca128-int8)")
+    parser.add_argument("--report-only", action="store_true", help="리포트만 출력 (저장 안 함)")
+    parser.add_argument("--rebuild", action="store_true", help="인덱스 / 설정이 그대로여도 다시 생성")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="합성 벡터 N개로 리포트만")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--out-dir", default=DEFAULT_COMPRESSED_DIR)
+    args = parser.parse_args()
+    if args.setting:
+        try:
+            parse_setting(args.setting)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+def main():
+    args = parse_args()
+    start_run("compress-vectors")
+
+    print("=" * 70)
+    print("스타일 임베딩 압축 (PCA + 양자화) / recall@k 리포트")
+    print("=" * 70)
+
+    if args.synthetic:
+        with span("phase.synthetic_vectors", count=args.synthetic):
+            matrix = synthetic_embeddings(args.synthetic)
+        print(f"\n📋 합성 벡터 {len(matrix):,}개 x {matrix.shape[1]}차원, recall@{args.k}"
+              + (f" (질의 {args.sample}개)" if args.sample else ""))
+        results = report_matrix(matrix, args)
+        reports = [report for report, _, _ in results]
+        print_report(reports, choose(reports, args))
+        return
+
+    results = {}
+    for collection in args.collection or COLLECTIONS:
+        results[collection] = compress_collection(collection, args)
+
+    labels = {"built": "생성", "unchanged": "변경 없음", "missing": "인덱스 없음", "rejected": "기준 미달"}
+    print("\n" + "=" * 70)
+    print("📊 " + ", ".join(f"{collection}: {labels[status]}" for collection, status in results.items()))
+    print(f"💾 압축 폴더: {args.out_dir}")
+    if any(status in ("missing", "rejected") for status in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
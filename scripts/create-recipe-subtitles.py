@@ -5,6 +5,11 @@
 """
 
 import os
+import sys
+
+from profiling import add_bytes, span, start_run
+
+sys.stdout.reconfigure(encoding='utf-8')
 
 BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\women_cut_recipe"
 
@@ -86,6 +91,8 @@ def get_series(code):
     return code[:3]
 
 def main():
+    start_run("create-recipe-subtitles")
+
     print("=" * 60)
     print("여자컷 레시피 자막 파일 생성")
     print("=" * 60)
@@ -112,8 +119,9 @@ def main():
 
         # 파일 생성
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with span("fs.write_caption"), open(file_path, 'w', encoding='utf-8') as f:
                 f.write(recipe)
+            add_bytes("fs", bytes_out=len(recipe.encode('utf-8')))
             created += 1
             print(f"ok {code}: 생성 완료")
         except Exception as e:
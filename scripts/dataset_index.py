@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+헤어 데이터셋 단일 스캔 인덱스
+- 여자(women_cut_recipe) / 남자(men_cut_recipe) 레시피 폴더를 os.scandir로 한 번만 순회
+- 스타일별 자막 / 결과 이미지 / 도해도 경로 + 크기 + 수정시각을 인덱스로 저장
+- 각 단계(validate, parse-captions, generate-metadata, 임베딩, 업로드)는 다시 순회하지 않고 인덱스 로드
+- 저장된 인덱스는 시리즈/스타일 폴더 mtime만 확인해서 재사용 (파일 추가/삭제 시 자동 재스캔)
+"""
+
+import os
+import json
+from dataclasses import dataclass, field, asdict
+
+from profiling import CACHE_DIR, add_bytes, span
+
+# ==================== 설정 ====================
+
+WOMEN_BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\women_cut_recipe"
+MEN_BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\men_cut_recipe"
+
+# 여자: 시리즈 코드 = 폴더명
+WOMEN_SERIES = ["FAL", "FBL", "FCL", "FDL", "FEL", "FFL", "FGL", "FHL"]
+
+# 남자: 7개 스타일 카테고리 폴더 매핑
+MEN_SERIES_FOLDERS = {
+    "SF": "1. SIDE FRINGE",
+    "SP": "2. SIDE PART",
+    "FU": "3. FRINGE UP",
+    "PB": "4. PUSHED BACK",
+    "BZ": "5. BUZZ",
+    "CP": "6. CROP",
+    "MC": "7. MOHICAN",
+}
+
+INDEX_PATH = os.path.join(CACHE_DIR, "dataset-index.json")
+INDEX_VERSION = 1
+
+# ==================== 파일 패턴 ====================
+
+def caption_patterns(style_id, include_plain=True):
+    """자막 파일명 후보 (우선순위 순). include_plain=False면 {style_id}.txt 제외 (임베딩 스크립트 기존 동작)"""
+    patterns = [
+        f"{style_id}(자막).txt",
+        f"{style_id}-jamag.txt",
+        f"{style_id}_자막.txt"
+    ]
+    if include_plain:
+        patterns.append(f"{style_id}.txt")
+    return patterns
+
+def result_patterns(style_id, include_artboards=False):
+    """결과 이미지 파일명 후보. include_artboards=True면 검증 스크립트가 쓰던 아트보드 고정 이름 포함"""
+    patterns = ["result.jpg", "result.png", "1.png", "1.jpg",
+                f"{style_id}.jpg", f"{style_id}.png"]
+    if include_artboards:
+        patterns += ["아트보드 – 28.png", "아트보드 – 23.png"]
+    return patterns
+
+def is_diagram(name):
+    """도해도 이미지 (SR_로 시작하는 PNG)"""
+    return name.startswith("SR_") and name.endswith(".png")
+
+# ==================== 인덱스 타입 ====================
+
+@dataclass
+class FileEntry:
+    name: str
+    size: int
+    mtime: float
+
+@dataclass
+class StyleEntry:
+    style_id: str
+    gender: str          # "women" | "men"
+    series: str          # FAL, SF, ...
+    path: str
+    mtime: float         # 스타일 폴더 mtime (파일 추가/삭제 감지용)
+    files: list = field(default_factory=list)   # [FileEntry] 이름순
+
+    def file_map(self):
+        return {f.name: f for f in self.files}
+
+    def find_caption(self, include_plain=True):
+        """자막 FileEntry (없으면 None)"""
+        files = self.file_map()
+        for pattern in caption_patterns(self.style_id, include_plain):
+            if pattern in files:
+                return files[pattern]
+        return None
+
+    def find_result(self, include_artboards=False):
+        """결과 이미지 FileEntry - 고정 패턴 → '아트보드'로 시작하는 첫 파일 순"""
+        files = self.file_map()
+        for pattern in result_patterns(self.style_id, include_artboards):
+            if pattern in files:
+                return files[pattern]
+        for f in self.files:
+            if f.name.startswith("아트보드"):
+                return f
+        return None
+
+    def diagrams(self):
+        """도해도 FileEntry 리스트 (이름순)"""
+        return [f for f in self.files if is_diagram(f.name)]
+
+    def file_path(self, entry):
+        return os.path.join(self.path, entry.name)
+
+@dataclass
+class SeriesEntry:
+    series: str
+    path: str
+    exists: bool
+    mtime: float = 0.0
+    style_ids: list = field(default_factory=list)
+
+@dataclass
+class DatasetIndex:
+    version: int
+    roots: dict            # gender -> base path
+    series: dict           # gender -> [SeriesEntry] (정해진 시리즈 순서)
+    styles: dict           # gender -> {style_id: StyleEntry}
+
+    def iter_styles(self, gender):
+        """(SeriesEntry, [StyleEntry]) 시리즈 순서대로"""
+        for series_entry in self.series.get(gender, []):
+            yield series_entry, [self.styles[gender][sid] for sid in series_entry.style_ids]
+
+    def get(self, gender, style_id):
+        return self.styles.get(gender, {}).get(style_id)
+
+# ==================== 스캔 ====================
+
+def _series_layout(gender):
+    """[(시리즈 코드, 폴더명)]"""
+    if gender == "women":
+        return [(s, s) for s in WOMEN_SERIES]
+    return list(MEN_SERIES_FOLDERS.items())
+
+def _scan_style(gender, series, entry):
+    files = []
+    with os.scandir(entry.path) as it:
+        for f in it:
+            if f.is_file():
+                st = f.stat()
+                files.append(FileEntry(f.name, st.st_size, st.st_mtime))
+    files.sort(key=lambda f: f.name)
+    return StyleEntry(entry.name, gender, series, entry.path, entry.stat().st_mtime, files)
+
+def scan_dataset(roots=None):
+    """데이터셋 전체를 한 번 순회해서 DatasetIndex 생성"""
+    with span("fs.scan_dataset"):
+        return _scan_dataset(roots or {"women": WOMEN_BASE_PATH, "men": MEN_BASE_PATH})
+
+def _scan_dataset(roots):
+    index = DatasetIndex(INDEX_VERSION, dict(roots), {}, {})
+
+    for gender, base_path in roots.items():
+        index.series[gender] = []
+        index.styles[gender] = {}
+        for series, folder in _series_layout(gender):
+            series_path = os.path.join(base_path, folder)
+            if not os.path.isdir(series_path):
+                index.series[gender].append(SeriesEntry(series, series_path, False))
+                continue
+
+            series_entry = SeriesEntry(series, series_path, True, os.stat(series_path).st_mtime)
+            styles = []
+            with os.scandir(series_path) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        styles.append(_scan_style(gender, series, entry))
+            styles.sort(key=lambda s: s.style_id)
+
+            series_entry.style_ids = [s.style_id for s in styles]
+            for style in styles:
+                index.styles[gender][style.style_id] = style
+            index.series[gender].append(series_entry)
+
+    return index
+
+# ==================== 저장 / 로드 ====================
+
+def save_index(index, path=INDEX_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(asdict(index), f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _from_dict(data):
+    series = {g: [SeriesEntry(**s) for s in entries] for g, entries in data["series"].items()}
+    styles = {
+        g: {sid: StyleEntry(**{**s, "files": [FileEntry(**f) for f in s["files"]]}) for sid, s in entries.items()}
+        for g, entries in data["styles"].items()
+    }
+    return DatasetIndex(data["version"], data["roots"], series, styles)
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def is_fresh(index, roots):
+    """시리즈/스타일 폴더 mtime만 비교 (listdir 없이 stat만)"""
+    if index.version != INDEX_VERSION or index.roots != roots:
+        return False
+    for gender, series_entries in index.series.items():
+        for series_entry in series_entries:
+            mtime = _mtime(series_entry.path)
+            if (mtime is not None) != series_entry.exists:
+                return False
+            if series_entry.exists and mtime != series_entry.mtime:
+                return False
+        for style in index.styles[gender].values():
+            if _mtime(style.path) != style.mtime:
+                return False
+    return True
+
+def refresh_file_stats(index):
+    """폴더 내용이 같아도 파일이 덮어써졌을 수 있으므로 인덱스된 파일만 다시 stat"""
+    for styles in index.styles.values():
+        for style in styles.values():
+            for f in style.files:
+                try:
+                    st = os.stat(os.path.join(style.path, f.name))
+                except OSError:
+                    continue
+                f.size, f.mtime = st.st_size, st.st_mtime
+    return index
+
+def load_dataset_index(path=INDEX_PATH, roots=None, rebuild=False, refresh_stats=False):
+    """저장된 인덱스가 최신이면 로드, 아니면 스캔 후 저장
+
+    refresh_stats=True: 파일 크기/mtime까지 다시 확인 (증분 빌드 등 내용 변경 감지가 필요할 때)
+    """
+    roots = roots or {"women": WOMEN_BASE_PATH, "men": MEN_BASE_PATH}
+
+    if not rebuild and os.path.exists(path):
+        try:
+            with span("fs.load_index"):
+                with open(path, 'r', encoding='utf-8') as f:
+                    index = _from_dict(json.load(f))
+                fresh = is_fresh(index, roots)
+                if fresh and refresh_stats:
+                    refresh_file_stats(index)
+            if fresh:
+                return index
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    index = scan_dataset(roots)
+    save_index(index, path)
+    return index
+
+def read_text(style, entry):
+    """인덱스 항목의 텍스트 파일 읽기"""
+    with span("fs.read_text"):
+        with open(style.file_path(entry), 'r', encoding='utf-8') as f:
+            text = f.read()
+    add_bytes("fs", bytes_in=entry.size)
+    return text
+
+def main():
+    """인덱스 생성/갱신: python dataset_index.py [--rebuild]"""
+    import sys
+    import time
+
+    sys.stdout.reconfigure(encoding='utf-8')
+    started = time.perf_counter()
+    index = load_dataset_index(rebuild="--rebuild" in sys.argv)
+    elapsed = time.perf_counter() - started
+
+    for gender, styles in index.styles.items():
+        file_count = sum(len(s.files) for s in styles.values())
+        print(f"  {gender}: {len(styles)}개 스타일, {file_count}개 파일")
+    print(f"💾 인덱스: {INDEX_PATH} ({elapsed * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
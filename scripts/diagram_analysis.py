@@ -0,0 +1,485 @@
+# -*- coding: utf-8 -*-
+"""
+도해도 Gemini Vision 분석 엔진
+- 도해도 이미지 다운로드 + Gemini Vision 호출 (analyze_diagram_image)
+- 스레드 풀로 여러 도해도를 동시에 분석 (analyze_styles_concurrently)
+- 고정 sleep 대신 토큰 버킷(rate_limiter.TokenBucket)으로 호출 속도 제한
+- 이미지 해시 + 프롬프트 해시 + 모델 기준 결과 캐시 (diagram_cache.DiagramAnalysisCache)
+- 이미지는 로컬 블롭 저장소(blob_store.BlobStore)에서 mmap으로 읽음 (재실행 시 다운로드 없음)
+- 보내기 전 축소 + 재인코딩 (image_preprocess.DiagramPreprocessor, 블롭 저장소 필요)
+- 한 스타일의 도해도 여러 장을 요청 하나로 분석 (analyze_diagram_batch, 깨진 응답은 나눠서 재시도)
+"""
+
+import os
+import json
+import base64
+import functools
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from diagram_cache import sha256_hex
+from profiling import add_bytes, span
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+# 로컬 스텁 서버(stub-gemini-server.py)로 돌릴 때는 GEMINI_API_BASE=http://127.0.0.1:8765
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+VISION_MODEL = "gemini-2.0-flash"
+
+# 도해도 분석 실패 시 기본값
+DIAGRAM_DEFAULTS = {
+    "lifting": "L4",
+    "lifting_angle": 90,
+    "direction": "D4",
+    "section": "VS",
+    "zone": "Back",
+    "cutting_method": "Point",
+    "over_direction": False,
+    "notes": ""
+}
+
+# ==================== Gemini Vision 분석 ====================
+
+DIAGRAM_ANALYSIS_PROMPT = """이 헤어컷 도해도(diagram) 이미지를 분석하여 정확한 기술 파라미터를 JSON으로 반환하세요.
+
+【중요】도해도는 헤어컷 기술을 설명하는 그림입니다. 다음을 정확히 읽어내세요:
+
+【Lifting (L) - 들어올리는 각도】⭐ 가장 중요!
+머리카락을 두피에서 들어올리는 각도를 정확히 판단:
+- L0: 0도 (두피에 붙임, 원렝스)
+- L1: 22.5도
+- L2: 45도 (Low Graduation)
+- L3: 67.5도
+- L4: 90도 (두피에서 직각, 기본 Layer) ⭐
+- L5: 112.5도
+- L6: 135도 (High Layer)
+- L7: 157.5도
+- L8: 180도 (완전히 위로)
+
+🎯 판단 기준:
+- 화살표나 선이 두피에서 얼마나 들어올려졌는지 각도 확인
+- 숫자가 표기되어 있으면 그대로 사용
+- "90°", "45°" 등 각도 표기 확인
+
+【Direction (D) - 당기는 방향】
+머리카락을 당기는 방향:
+- D0: 정면 (앞으로)
+- D1: 전방 대각선 45도
+- D2: 측면 (옆으로)
+- D3: 후방 대각선 45도
+- D4: 후면 (뒤로) ⭐ 가장 흔함
+- D5~D8: 반대편 방향
+
+【Section - 섹션 분할 방식】
+- HS (Horizontal Section): 가로 섹션
+- DBS (Diagonal Back Section): 후대각 섹션
+- DFS (Diagonal Forward Section): 전대각 섹션
+- VS (Vertical Section): 세로 섹션
+- RS (Radial Section): 방사형 섹션
+
+【Zone - 작업 영역】
+- Crown: 정수리
+- Top: 상단
+- Side: 측면
+- Back: 후면
+- Nape: 네이프 (목덜미)
+- Fringe: 앞머리
+- Perimeter: 아웃라인
+
+【Cutting Method - 커팅 기법】
+- Blunt: 일자 커팅
+- Point: 포인트 커팅 (가위 끝으로)
+- Slide: 슬라이드 커팅
+- Thinning: 숱치기
+- Texturizing: 질감 커팅
+
+【Output JSON】
+{
+  "lifting": "L4",
+  "lifting_angle": 90,
+  "direction": "D4",
+  "section": "VS",
+  "zone": "Back",
+  "cutting_method": "Point",
+  "guide_line": "이전 섹션" 또는 "고정 가이드" 또는 null,
+  "over_direction": true 또는 false,
+  "notes": "추가 관찰 사항"
+}
+
+⚠️ 주의:
+1. 이미지에 각도 숫자가 있으면 정확히 읽어서 L 코드로 변환
+2. 화살표 방향을 보고 Direction 판단
+3. 섹션 라인 패턴을 보고 Section 판단
+4. 확실하지 않으면 가장 가능성 높은 값 선택
+
+JSON만 반환하세요."""
+
+# 프롬프트가 바뀌면 캐시 키도 바뀌어 모든 도해도가 재분석됨
+PROMPT_HASH = sha256_hex(DIAGRAM_ANALYSIS_PROMPT)
+
+# 여러 도해도를 한 요청으로 보낼 때 프롬프트 뒤에 붙이는 지시문
+DIAGRAM_BATCH_INSTRUCTION = """【여러 도해도 분석】
+위에 도해도 {count}장이 있습니다. 각 이미지 바로 앞의 [Step N] 표시가 그 도해도의 step 번호입니다.
+도해도마다 위 Output JSON 형식으로 따로 분석하고, 각 객체에 "step" 필드(정수)를 추가해서 JSON 배열로 반환하세요.
+예: [{{"step": 1, "lifting": "L4", ...}}, {{"step": 2, "lifting": "L2", ...}}]
+배열에는 {count}개 도해도가 모두 있어야 합니다. JSON 배열만 반환하세요."""
+
+BATCH_PROMPT_HASH = sha256_hex(DIAGRAM_ANALYSIS_PROMPT + DIAGRAM_BATCH_INSTRUCTION)
+BATCH_MAX_OUTPUT_TOKENS = 8192
+
+# 이미지 확보 결과 (data는 직접 다운로드한 경우의 bytes, 블롭 저장소 사용 시 None)
+LoadedImage = namedtuple("LoadedImage", ["image_hash", "mime_type", "data"])
+
+_stats_lock = threading.Lock()
+
+
+def create_http_session(pool_size=8):
+    """keep-alive 커넥션 풀을 공유하는 requests 세션 생성"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def load_diagram_image(image_url, http, blob_store=None, revalidate=False, preprocessor=None):
+    """도해도 이미지 확보 → LoadedImage (실패 시 None)
+
+    blob_store가 있으면 data는 None (보낼 때 저장소에서 mmap으로 읽음)
+    """
+    # 이미지 확보 (블롭 저장소 또는 직접 다운로드)
+    data = None
+    if blob_store is not None:
+        blob = blob_store.fetch(image_url, http, revalidate=revalidate)
+        if blob is None:
+            return None
+        image_hash = blob.digest
+        content_type = blob.content_type or 'image/png'
+    else:
+        with span("http.image_download"):
+            img_response = http.get(image_url, timeout=30)
+        add_bytes("http", bytes_in=len(img_response.content))
+        if img_response.status_code != 200:
+            print(f"  ⚠️ 이미지 다운로드 실패: {img_response.status_code}")
+            return None
+        data = img_response.content
+        image_hash = sha256_hex(data)
+        content_type = img_response.headers.get('Content-Type', 'image/png')
+
+    # Content-Type 추정
+    if 'jpeg' in content_type or 'jpg' in content_type:
+        mime_type = 'image/jpeg'
+    else:
+        mime_type = 'image/png'
+
+    # 축소 + 재인코딩 (실패하면 원본 그대로)
+    if preprocessor is not None and blob_store is not None:
+        prepared = preprocessor.prepare(image_hash)
+        if prepared:
+            image_hash = prepared.digest
+            mime_type = prepared.mime_type
+
+    return LoadedImage(image_hash, mime_type, data)
+
+
+def image_part(image, blob_store=None):
+    """LoadedImage → Gemini inline_data 파트 (Base64 인코딩, 블롭은 mmap으로 읽음)"""
+    with span("cpu.base64_encode"):
+        if image.data is None:
+            with blob_store.open(image.image_hash) as data:
+                image_base64 = base64.b64encode(data).decode('utf-8')
+        else:
+            image_base64 = base64.b64encode(image.data).decode('utf-8')
+    return {"inline_data": {"mime_type": image.mime_type, "data": image_base64}}
+
+
+def generate_json(parts, api_key, http, limiter=None, api_base=None, max_output_tokens=500, timeout=60):
+    """generateContent 호출 후 응답 텍스트를 JSON으로 파싱 (HTTP 오류 시 None, 파싱 실패 시 JSONDecodeError)"""
+    api_url = f"{api_base or GEMINI_API_BASE}/v1beta/models/{VISION_MODEL}:generateContent?key={api_key}"
+
+    payload = {
+        "contents": [{"parts": parts}],
+        "generationConfig": {
+            "temperature": 0.2,
+            "maxOutputTokens": max_output_tokens
+        }
+    }
+
+    # Rate limiting (Gemini 호출에만 적용)
+    if limiter:
+        with span("ratelimit.gemini_vision"):
+            limiter.acquire()
+
+    with span("gemini.generate_content", images=sum(1 for p in parts if "inline_data" in p)):
+        response = http.post(api_url, json=payload, timeout=timeout)
+    request_body = getattr(getattr(response, "request", None), "body", None) or b""
+    add_bytes("gemini", bytes_in=len(response.content), bytes_out=len(request_body))
+
+    if response.status_code != 200:
+        print(f"  ⚠️ Gemini API 오류: {response.status_code}")
+        return None
+
+    data = response.json()
+    text = data.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+
+    # JSON 파싱
+    text = text.replace('```json', '').replace('```', '').strip()
+    return json.loads(text)
+
+
+def analyze_diagram_image(image_url, api_key, session=None, limiter=None, api_base=None, cache=None,
+                          blob_store=None, revalidate=False, preprocessor=None):
+    """Firebase Storage URL의 도해도 이미지를 Gemini Vision으로 분석
+
+    cache가 주어지면 같은 이미지 바이트 + 프롬프트 + 모델 조합은 Gemini 호출 없이 캐시에서 반환
+    blob_store가 주어지면 이미지를 로컬 저장소에서 읽음 (없을 때만 다운로드, revalidate=True면 조건부 요청)
+    preprocessor가 주어지면 축소한 이미지를 보냄 (캐시 키도 축소 이미지 해시)
+    """
+    http = session or requests
+    try:
+        image = load_diagram_image(image_url, http, blob_store, revalidate, preprocessor)
+        if image is None:
+            return None
+
+        # 캐시 조회 (이미지 내용 기준)
+        if cache:
+            cached = cache.get(image.image_hash, PROMPT_HASH, VISION_MODEL)
+            if cached is not None:
+                return cached
+
+        return _analyze_single(image, api_key, http, limiter, api_base, cache, blob_store)
+
+    except json.JSONDecodeError as e:
+        print(f"  ⚠️ JSON 파싱 실패: {e}")
+        return None
+    except Exception as e:
+        print(f"  ⚠️ 분석 실패: {e}")
+        return None
+
+
+def _analyze_single(image, api_key, http, limiter, api_base, cache, blob_store):
+    """이미지 하나를 단일 프롬프트로 분석 (예외는 호출한 쪽에서 처리)"""
+    metadata = generate_json([image_part(image, blob_store), {"text": DIAGRAM_ANALYSIS_PROMPT}],
+                             api_key, http, limiter, api_base)
+
+    # 배열이 반환된 경우 첫 번째 요소 사용
+    if isinstance(metadata, list):
+        metadata = metadata[0] if metadata else {}
+
+    # dict가 아니면 None 반환
+    if not isinstance(metadata, dict):
+        return None
+
+    if cache:
+        cache.put(image.image_hash, PROMPT_HASH, VISION_MODEL, metadata)
+
+    return metadata
+
+# ==================== 여러 도해도 한 번에 분석 ====================
+
+def analyze_diagram_batch(diagrams, api_key, session=None, limiter=None, api_base=None, cache=None,
+                          blob_store=None, revalidate=False, preprocessor=None, stats=None):
+    """한 스타일의 도해도 여러 장을 요청 하나로 분석
+
+    diagrams: [(step, url), ...]
+    반환: diagrams와 같은 순서의 metadata 목록 (실패한 항목은 None)
+
+    - 프롬프트는 요청당 한 번만 보내고 step 번호가 붙은 JSON 배열로 받음
+    - 배열이 깨졌거나(파싱 실패) 일부 step이 빠지면 남은 도해도를 반으로 나눠 재요청
+    - 한 장만 남으면 단일 프롬프트(DIAGRAM_ANALYSIS_PROMPT)로 분석
+    - 캐시는 도해도 단위 (배치 결과 + 단일 분석 결과 모두 재사용)
+    stats: {"requests", "splits", "single_fallbacks"} 누적용 dict (선택)
+    """
+    http = session or requests
+    stats = stats if stats is not None else {}
+    for key in ("requests", "splits", "single_fallbacks"):
+        stats.setdefault(key, 0)
+
+    def count(key):
+        with _stats_lock:
+            stats[key] += 1
+
+    results = [None] * len(diagrams)
+    pending = []   # [(위치, step, LoadedImage)]
+    for i, (step, url) in enumerate(diagrams):
+        try:
+            image = load_diagram_image(url, http, blob_store, revalidate, preprocessor)
+        except Exception as e:
+            print(f"  ⚠️ 분석 실패: {e}")
+            continue
+        if image is None:
+            continue
+        if cache:
+            cached = cache.get(image.image_hash, BATCH_PROMPT_HASH, VISION_MODEL)
+            if cached is None:
+                cached = cache.get(image.image_hash, PROMPT_HASH, VISION_MODEL)
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.append((i, step, image))
+
+    def request_batch(items):
+        """요청 하나로 분석 → {step: metadata} (형식이 맞는 항목만)"""
+        parts = []
+        for _, step, image in items:
+            parts.append({"text": f"[Step {step}]"})
+            parts.append(image_part(image, blob_store))
+        parts.append({"text": DIAGRAM_ANALYSIS_PROMPT + "\n\n" +
+                      DIAGRAM_BATCH_INSTRUCTION.format(count=len(items))})
+
+        count("requests")
+        try:
+            data = generate_json(parts, api_key, http, limiter, api_base,
+                                 max_output_tokens=min(BATCH_MAX_OUTPUT_TOKENS, 500 * len(items)),
+                                 timeout=60 + 10 * len(items))
+        except json.JSONDecodeError as e:
+            print(f"  ⚠️ 배치 JSON 파싱 실패 ({len(items)}장): {e}")
+            return {}
+        except Exception as e:
+            print(f"  ⚠️ 배치 분석 실패 ({len(items)}장): {e}")
+            return {}
+
+        wanted = {str(step) for _, step, _ in items}
+        parsed = {}
+        for entry in data if isinstance(data, list) else []:
+            if isinstance(entry, dict) and str(entry.get("step")) in wanted:
+                metadata = {k: v for k, v in entry.items() if k != "step"}
+                parsed.setdefault(str(entry["step"]), metadata)
+        return parsed
+
+    def solve(items):
+        if len(items) == 1:
+            i, _, image = items[0]
+            count("single_fallbacks")
+            try:
+                results[i] = _analyze_single(image, api_key, http, limiter, api_base, cache, blob_store)
+            except json.JSONDecodeError as e:
+                print(f"  ⚠️ JSON 파싱 실패: {e}")
+            except Exception as e:
+                print(f"  ⚠️ 분석 실패: {e}")
+            return
+
+        parsed = request_batch(items)
+        missing = []
+        for i, step, image in items:
+            metadata = parsed.get(str(step))
+            if metadata is None:
+                missing.append((i, step, image))
+                continue
+            results[i] = metadata
+            if cache:
+                cache.put(image.image_hash, BATCH_PROMPT_HASH, VISION_MODEL, metadata)
+
+        if missing:
+            # 남은 도해도를 반으로 나눠 재요청 (결국 한 장씩까지 내려감)
+            count("splits")
+            half = (len(missing) + 1) // 2
+            solve(missing[:half])
+            if missing[half:]:
+                solve(missing[half:])
+
+    # step 번호가 겹치면 배열로 구분할 수 없으므로 겹치지 않게 나눠서 요청
+    groups = []
+    for item in pending:
+        for group in groups:
+            if all(str(other[1]) != str(item[1]) for other in group):
+                group.append(item)
+                break
+        else:
+            groups.append([item])
+    for group in groups:
+        solve(group)
+
+    return results
+
+
+def build_analyzed_diagram(step, url, metadata):
+    """분석 결과를 Firestore diagrams 배열 항목으로 변환"""
+    updated_diagram = {"step": step, "url": url}
+    for field, default in DIAGRAM_DEFAULTS.items():
+        updated_diagram[field] = metadata.get(field, default)
+    return updated_diagram
+
+# ==================== 동시 분석 엔진 ====================
+
+def analyze_styles_concurrently(styles, analyze_fn, on_style_done, concurrency=8, verbose=True,
+                                analyze_batch_fn=None, batch_size=1):
+    """여러 스타일의 도해도를 스레드 풀에서 동시에 분석
+
+    styles: [{"id": style_id, "diagrams": [...]}, ...]
+    analyze_fn: url -> metadata dict | None (워커 스레드에서 호출)
+    on_style_done: (style_id, diagrams_with_metadata) -> None
+        스타일의 모든 도해도가 끝나면 메인 스레드에서 호출 (Firestore 업데이트 등)
+    analyze_batch_fn: [(step, url)] -> [metadata | None] (주어지고 batch_size > 1이면
+        스타일의 도해도를 batch_size장씩 묶어서 요청 하나로 분석)
+    """
+    stats = {"diagrams_analyzed": 0, "diagrams_failed": 0}
+    batched = analyze_batch_fn is not None and batch_size > 1
+
+    pending = {}   # style_id -> 남은 작업(요청) 수
+    results = {}   # style_id -> diagrams_with_metadata (원래 순서 유지)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {}
+        for style in styles:
+            style_id = style["id"]
+            diagrams = style["diagrams"]
+            results[style_id] = list(diagrams)
+            pending[style_id] = 0
+
+            items = []
+            for i, diagram in enumerate(diagrams):
+                url = diagram.get("url", "")
+                if not url:
+                    continue
+                items.append((i, diagram.get("step", i + 1), url))
+
+            chunk_size = batch_size if batched else 1
+            for start in range(0, len(items), chunk_size):
+                chunk = items[start:start + chunk_size]
+                if batched:
+                    future = executor.submit(analyze_batch_fn, [(step, url) for _, step, url in chunk])
+                else:
+                    future = executor.submit(analyze_fn, chunk[0][2])
+                futures[future] = (style_id, chunk)
+                pending[style_id] += 1
+
+            # URL 있는 도해도가 하나도 없으면 바로 완료 처리
+            if pending[style_id] == 0:
+                on_style_done(style_id, results.pop(style_id))
+
+        for future in as_completed(futures):
+            style_id, chunk = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                print(f"  ⚠️ {style_id} Step {', '.join(str(step) for _, step, _ in chunk)} 분석 실패: {e}")
+                outcome = None
+            if batched:
+                metadatas = outcome or [None] * len(chunk)
+            else:
+                metadatas = [outcome]
+
+            for (i, step, url), metadata in zip(chunk, metadatas):
+                if metadata:
+                    results[style_id][i] = build_analyzed_diagram(step, url, metadata)
+                    stats["diagrams_analyzed"] += 1
+                    if verbose:
+                        print(f"    ✅ {style_id} Step {step}: L={metadata.get('lifting')}, D={metadata.get('direction')}, Section={metadata.get('section')}")
+                else:
+                    # 분석 실패 시 기존 데이터 유지
+                    stats["diagrams_failed"] += 1
+                    if verbose:
+                        print(f"    ⚠️ {style_id} Step {step}: 분석 실패, 기존 데이터 유지")
+
+            pending[style_id] -= 1
+            if pending[style_id] == 0:
+                on_style_done(style_id, results.pop(style_id))
+
+    return stats
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+도해도 분석 결과 캐시 (SQLite, 내용 주소 기반)
+- 키: 이미지 바이트 SHA-256 + DIAGRAM_ANALYSIS_PROMPT 해시 + 모델명
+- 값: 파싱된 메타데이터 JSON
+- 이미지나 프롬프트가 바뀐 도해도만 Gemini로 다시 보냄
+- 오래된 항목(나이) / 전체 크기 기준 LRU 제거
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from dataset_index import CACHE_DIR
+
+# ==================== 설정 ====================
+
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "diagram-analysis.sqlite")
+
+DEFAULT_MAX_AGE_DAYS = 180
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 메타데이터 JSON 합계 기준
+
+def sha256_hex(data):
+    """bytes 또는 str의 SHA-256 hex"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+# ==================== 캐시 ====================
+
+class DiagramAnalysisCache:
+    """스레드 안전 SQLite 분석 결과 캐시"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS diagram_analysis (
+                image_hash  TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                model       TEXT NOT NULL,
+                metadata    TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                last_used   REAL NOT NULL,
+                PRIMARY KEY (image_hash, prompt_hash, model)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON diagram_analysis(last_used)")
+        self._conn.commit()
+
+    def get(self, image_hash, prompt_hash, model):
+        """캐시된 메타데이터 dict 반환 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT metadata FROM diagram_analysis WHERE image_hash=? AND prompt_hash=? AND model=?",
+                (image_hash, prompt_hash, model)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE diagram_analysis SET last_used=? WHERE image_hash=? AND prompt_hash=? AND model=?",
+                (time.time(), image_hash, prompt_hash, model)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return json.loads(row[0])
+
+    def put(self, image_hash, prompt_hash, model, metadata):
+        """분석 결과 저장 (같은 키는 덮어씀)"""
+        text = json.dumps(metadata, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO diagram_analysis VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (image_hash, prompt_hash, model, text, len(text.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self.stats["stores"] += 1
+
+    def evict(self):
+        """나이 초과 항목 삭제 후, 전체 크기가 max_bytes를 넘으면 오래 안 쓴 순서로 삭제"""
+        evicted = 0
+        with self._lock:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                cur = self._conn.execute("DELETE FROM diagram_analysis WHERE created_at < ?", (cutoff,))
+                evicted += cur.rowcount
+
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM diagram_analysis").fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self._conn.execute(
+                        "SELECT image_hash, prompt_hash, model, size FROM diagram_analysis ORDER BY last_used"
+                    ).fetchall()
+                    doomed = []
+                    for image_hash, prompt_hash, model, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        doomed.append((image_hash, prompt_hash, model))
+                        total -= size
+                    self._conn.executemany(
+                        "DELETE FROM diagram_analysis WHERE image_hash=? AND prompt_hash=? AND model=?", doomed
+                    )
+                    evicted += len(doomed)
+
+            self._conn.commit()
+            self.stats["evicted"] += evicted
+        return evicted
+
+    def summary(self):
+        """(항목 수, 전체 바이트)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM diagram_analysis"
+            ).fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+챗봇 함수용 임베딩 번들 (성별당 파일 하나, netlify/functions/lib/embedding.js가 콜드 스타트에 한 번 로드)
+- 함수가 질의마다 Firestore REST로 컬렉션 전체를 읽고 doubleValue 문자열을 다시 숫자로 바꾸던 것을 대체
+- 데이터 소스도 그 조회와 같음: hairstyles 컬렉션을 gender로 거른 문서 (번들이 없을 때 대체 경로와 같은 카탈로그)
+- 번들 = gzip(헤더 + 메타 JSON + 벡터 행렬), 파일명에 내용 SHA-256 앞 12자리
+  · 헤더 24바이트 (little endian): "HGEB", 형식(u16), dtype(u8: 1=float16, 2=float32), 예약(u8),
+    개수(u32), 차원(u32), 메타 길이(u32), 예약(u32)
+  · 메타 JSON: 모델, 컬렉션, 성별, 행 순서대로 표시용 필드(styleId, series, resultImage, diagrams ...)
+  · 벡터: L2 정규화된 행 (float16 기본 - 768차원 x 2바이트)
+- embeddings-<성별>.json 포인터 파일이 현재 번들 파일명 / 해시 / 모델을 가리킴 (성별마다 따로 → 동시 생성 안전)
+- 내용이 같으면 해시도 같음 (gzip mtime 0, 생성 시각은 포인터에만 기록)
+- 같은 형식 / 게시 방식을 질의 임베딩 표(query_cache)도 사용 (메타 JSON 내용만 다름)
+
+사용법:
+  pointer = export_bundle(db, "male")                     # hairstyles(gender=male) → embeddings-male.<해시>.bin.gz
+  meta, matrix = read_bundle(os.path.join(BUNDLE_DIR, pointer["file"]))
+"""
+
+import os
+import glob
+import gzip
+import json
+import struct
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+from embedding_models import ACTIVE_FIELDS, resolve_model
+from profiling import span
+from style_listing import stream_styles
+from vector_index import prepare_rows
+
+# ==================== 설정 ====================
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLE_DIR = os.path.join(REPO_DIR, "netlify", "functions", "data", "embedding-bundles")
+BUNDLE_FORMAT = 1
+MAGIC = b"HGEB"
+HEADER = struct.Struct("<4sHBBIIII")
+DTYPES = {"float16": (1, "<f2"), "float32": (2, "<f4")}
+DEFAULT_DTYPE = "float16"
+
+# embedding.js getFirestoreStyles()가 읽는 컬렉션 (gender 필드로 성별 구분)
+BUNDLE_COLLECTION = "hairstyles"
+GENDERS = ["female", "male"]
+
+# hairstyles 벡터의 모델 = embedding.js DEFAULT_EMBEDDING_MODEL (대체 경로도 질의를 이 모델로 임베딩)
+BUNDLE_MODEL = "text-embedding-004"
+
+# 번들에 넣는 Firestore 표시용 필드 (getFirestoreStyles()와 같은 필드)
+BUNDLE_FIELDS = ["series", "seriesName", "resultImage", "diagrams", "diagramCount", "captionUrl"]
+DIAGRAM_FIELDS = ["lifting", "direction", "section", "zone", "cutting_method"]
+
+def bundle_name(gender):
+    """성별 번들 이름 (포인터 = <이름>.json, 번들 = <이름>.<해시>.bin.gz)"""
+    return f"embeddings-{gender}"
+
+def pointer_path(name, out_dir=BUNDLE_DIR):
+    return os.path.join(out_dir, f"{name}.json")
+
+def load_pointer(name, out_dir=BUNDLE_DIR):
+    """현재 번들 포인터 (없거나 깨졌으면 None)"""
+    try:
+        with open(pointer_path(name, out_dir), 'r', encoding='utf-8') as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return pointer if pointer.get("format") == BUNDLE_FORMAT else None
+
+# ==================== 인코딩 ====================
+
+def display_fields(style_id, data, gender):
+    """embedding.js getFirestoreStyles()가 만들던 스타일 객체와 같은 필드"""
+    diagrams = []
+    for diagram in data.get("diagrams") or []:
+        if not isinstance(diagram, dict):
+            continue
+        diagrams.append({"step": int(diagram.get("step") or 0), "url": diagram.get("url") or "",
+                         **{field: diagram.get(field) for field in DIAGRAM_FIELDS}})
+    return {
+        "styleId": style_id,
+        "series": data.get("series") or "",
+        "seriesName": data.get("seriesName") or "",
+        "gender": gender,
+        "resultImage": data.get("resultImage") or None,
+        "diagrams": diagrams,
+        "diagramCount": int(data.get("diagramCount") or 0),
+        "captionUrl": data.get("captionUrl") or None,
+    }
+
+def encode_bundle(matrix, meta, dtype=DEFAULT_DTYPE):
+    """헤더 + 메타 JSON + 벡터 → 압축 전 바이트 (메타의 행 목록 순서 = 행렬 행 순서)"""
+    code, np_dtype = DTYPES[dtype]
+    meta = json.dumps(meta, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    meta += b" " * (-len(meta) % 4)     # 벡터 시작 위치를 4바이트 정렬 (JS TypedArray 뷰)
+    count, dims = (matrix.shape if matrix.size else (0, 0))
+    header = HEADER.pack(MAGIC, BUNDLE_FORMAT, code, 0, count, dims, len(meta), 0)
+    vectors = np.ascontiguousarray(matrix, dtype=np_dtype).tobytes()
+    return header + meta + vectors
+
+def decode_bundle(raw):
+    """압축 해제된 번들 → (메타 dict, 행렬)"""
+    magic, version, code, _, count, dims, meta_len, _ = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != BUNDLE_FORMAT:
+        raise ValueError(f"임베딩 번들 형식이 다릅니다: {magic!r} v{version}")
+    np_dtype = next(np_dtype for c, np_dtype in DTYPES.values() if c == code)
+    meta = json.loads(raw[HEADER.size:HEADER.size + meta_len])
+    matrix = np.frombuffer(raw, dtype=np_dtype, count=count * dims,
+                           offset=HEADER.size + meta_len).reshape(count, dims)
+    return meta, matrix
+
+def read_bundle(path):
+    with open(path, 'rb') as f:
+        return decode_bundle(gzip.decompress(f.read()))
+
+# ==================== 생성 ====================
+
+def publish_bundle(name, raw, out_dir=BUNDLE_DIR, **fields):
+    """압축 전 번들 → gzip + 해시 파일명으로 저장하고 포인터 교체 → 포인터 dict
+
+    fields는 포인터에 그대로 기록 (개수, 차원, 모델 ...)
+    내용이 같으면 파일 / 포인터 그대로 (생성 시각도 유지), 같은 이름의 이전 번들 파일은 삭제
+    """
+    data = gzip.compress(raw, compresslevel=9, mtime=0)
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f"{name}.{digest[:12]}.bin.gz"
+
+    previous = load_pointer(name, out_dir)
+    if previous and previous.get("sha256") == digest and os.path.exists(os.path.join(out_dir, filename)):
+        return previous
+
+    os.makedirs(out_dir, exist_ok=True)
+    pointer = {
+        "format": BUNDLE_FORMAT,
+        **fields,
+        "file": filename,
+        "sha256": digest,
+        "bytes": len(data),
+        "rawBytes": len(raw),
+        "builtAt": datetime.now().isoformat(timespec="seconds"),
+    }
+    with span("fs.write_bundle", bundle=name):
+        # 번들 파일 → 포인터 순서로 교체 (포인터가 없는 파일을 가리키는 순간이 없음)
+        for path, payload in ((os.path.join(out_dir, filename), data),
+                              (pointer_path(name, out_dir),
+                               json.dumps(pointer, ensure_ascii=False, indent=2).encode("utf-8"))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+    for stale in glob.glob(os.path.join(out_dir, f"{name}.*.bin.gz")):
+        if os.path.basename(stale) != filename:
+            os.remove(stale)
+    return pointer
+
+def write_bundle(gender, rows, model, out_dir=BUNDLE_DIR, dtype=DEFAULT_DTYPE, collection=None):
+    """rows [(style_id, 벡터, 표시 필드)] → 번들 + 포인터 저장, 반환: (포인터 dict, 제외 목록)
+
+    model: 벡터를 만든 Gemini 모델 ("models/...") - 함수가 질의도 같은 모델로 임베딩
+    """
+    displays = {style_id: display for style_id, _, display in rows}
+    with span("cpu.encode_bundle", gender=gender):
+        ids, matrix, _, excluded = prepare_rows([(style_id, vector, None) for style_id, vector, _ in rows])
+        meta = {"model": model, "collection": collection, "gender": gender,
+                "styles": [displays[style_id] for style_id in ids]}
+        raw = encode_bundle(matrix, meta, dtype)
+    pointer = publish_bundle(bundle_name(gender), raw, out_dir, gender=gender, count=len(ids),
+                             dims=int(matrix.shape[1]) if ids else 0, dtype=dtype, model=model,
+                             collection=collection)
+    return pointer, excluded
+
+def export_bundle(db, gender, out_dir=BUNDLE_DIR, dtype=DEFAULT_DTYPE):
+    """hairstyles에서 gender가 같은 문서의 임베딩 + 표시 필드로 번들 생성 → (포인터 dict, 제외 목록)
+
+    embeddingModel 태그가 BUNDLE_MODEL과 다른 벡터는 질의 임베딩과 비교할 수 없으므로 제외 목록으로
+    """
+    model = resolve_model(BUNDLE_MODEL)
+    projection = BUNDLE_FIELDS + [ACTIVE_FIELDS["vector"], ACTIVE_FIELDS["model"]]
+    rows, skipped = [], []
+    # 다른 성별 문서의 벡터는 내려받지 않음 (성별 둘 다 만들어도 벡터마다 한 번만 읽음)
+    for style_id, data in stream_styles(db, BUNDLE_COLLECTION, projection, where=[("gender", "==", gender)]):
+        tagged = data.get(ACTIVE_FIELDS["model"])
+        if tagged and tagged != model["model"]:
+            skipped.append((style_id, f"다른 모델 벡터 ({tagged})"))
+            continue
+        rows.append((style_id, data.get(ACTIVE_FIELDS["vector"]), display_fields(style_id, data, gender)))
+    pointer, excluded = write_bundle(gender, rows, model["model"], out_dir, dtype=dtype,
+                                     collection=BUNDLE_COLLECTION)
+    return pointer, skipped + excluded
+
+def print_bundle_result(pointer, excluded):
+    for style_id, reason in excluded:
+        print(f"  ⚠️ {style_id}: 번들에서 제외 ({reason})", flush=True)
+    print(f"  📦 임베딩 번들: {pointer['file']} ({pointer['count']}개 x {pointer['dims']}차원 {pointer['dtype']}, "
+          f"{pointer['bytes'] / 1024:.1f}KB / 압축 전 {pointer['rawBytes'] / 1024:.1f}KB)", flush=True)
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 모델 레지스트리 + 모델 전환 (섀도 필드)
+- 문서마다 벡터를 만든 모델 / 버전을 함께 저장 (embeddingModel, embeddingModelVersion)
+- 새 모델은 섀도 필드(embeddingShadow...)에 채움 → 기존 embedding은 그대로 서비스
+- 모든 문서가 새 모델을 갖추면 문서별로 두 슬롯을 맞바꾼 뒤 설정 문서의 active 하나만 변경
+  · 읽는 쪽은 select_embedding(data, active)로 두 슬롯 중 active 모델 벡터를 고름
+    → 맞바꾸는 도중에도, active가 바뀌는 순간에도 항상 한 모델의 벡터만 보게 됨
+  · 챗봇 함수(chatbot-api.js)도 같은 규칙: getActiveEmbeddingModel → selectStyleEmbedding → 같은 모델로 질의 임베딩
+- 설정 문서: embedding_models/<컬렉션> {active, shadow, previous, switchedAt}
+- 모델 필드가 없는 예전 문서 = embedding-001 (이 필드가 생기기 전에 쓰던 유일한 모델)
+
+사용법:
+  model = get_active_model(db, "styles")              # 레지스트리 항목 dict
+  vector, key = select_embedding(data, model)
+  for style_id, data, vector, key in stream_embeddings(db, "styles", model, ["series"]): ...
+  covered, missing = embedding_coverage(db, "men_styles", resolve_model("text-embedding-004"))
+"""
+
+from firestore_batch import commit_updates
+from style_listing import EMBEDDING_STATUS_FIELDS, fetch_style_fields, stream_styles
+
+# ==================== 레지스트리 ====================
+
+# 이름 → Gemini 모델 / 버전 (버전: 같은 모델 이름으로 출력이 바뀌면 올림) / 차원
+MODELS = {
+    "embedding-001": {"model": "models/embedding-001", "version": 1, "dims": 768},
+    "text-embedding-004": {"model": "models/text-embedding-004", "version": 1, "dims": 768},
+}
+DEFAULT_MODEL = "embedding-001"
+
+CONFIG_COLLECTION = "embedding_models"
+
+# 슬롯별 필드 이름
+ACTIVE_FIELDS = {
+    "vector": "embedding",
+    "key": "embeddingKey",
+    "model": "embeddingModel",
+    "version": "embeddingModelVersion",
+    "updatedAt": "embeddingUpdatedAt",
+}
+SHADOW_FIELDS = {
+    "vector": "embeddingShadow",
+    "key": "embeddingShadowKey",
+    "model": "embeddingShadowModel",
+    "version": "embeddingShadowModelVersion",
+    "updatedAt": "embeddingShadowUpdatedAt",
+}
+SLOTS = (ACTIVE_FIELDS, SHADOW_FIELDS)
+
+# 두 슬롯의 벡터 필드 (select_embedding에 필요한 필드 = 이것 + EMBEDDING_STATUS_FIELDS)
+VECTOR_FIELDS = [ACTIVE_FIELDS["vector"], SHADOW_FIELDS["vector"]]
+
+def resolve_model(name):
+    """레지스트리 이름 또는 "models/..." → {"name", "model", "version", "dims"}"""
+    for model_name, entry in MODELS.items():
+        if name in (model_name, entry["model"]):
+            return {"name": model_name, **entry}
+    raise ValueError(f"등록되지 않은 임베딩 모델: {name} (사용 가능: {', '.join(sorted(MODELS))})")
+
+def model_tag(model, fields=ACTIVE_FIELDS):
+    """문서에 벡터와 함께 저장하는 모델 / 버전 필드"""
+    return {fields["model"]: model["model"], fields["version"]: model["version"]}
+
+# ==================== 문서 슬롯 ====================
+
+def stored_model(data, fields=ACTIVE_FIELDS):
+    """슬롯에 저장된 벡터의 모델 ("models/..."), 벡터가 없으면 None"""
+    if not (data.get(fields["key"]) or data.get(fields["updatedAt"]) or data.get(fields["vector"])):
+        return None
+    if data.get(fields["model"]):
+        return data[fields["model"]]
+    return MODELS[DEFAULT_MODEL]["model"] if fields is ACTIVE_FIELDS else None
+
+def find_slot(data, model):
+    """model 벡터가 들어 있는 슬롯 필드 dict (없으면 None)"""
+    for fields in SLOTS:
+        if stored_model(data, fields) == model["model"]:
+            return fields
+    return None
+
+def select_embedding(data, model):
+    """두 슬롯 중 model 벡터 → (벡터, embeddingKey), 없으면 (None, None)"""
+    fields = find_slot(data, model)
+    if not fields:
+        return None, None
+    return data.get(fields["vector"]), data.get(fields["key"])
+
+def has_embedding_key(data, key):
+    """두 슬롯 중 하나라도 이 embeddingKey 벡터를 갖고 있는지 (텍스트 / 모델 모두 같음)"""
+    return key in (data.get(ACTIVE_FIELDS["key"]), data.get(SHADOW_FIELDS["key"]))
+
+def stream_embeddings(db, collection, model, fields=()):
+    """model 벡터를 가진 문서 → [(id, data, 벡터, embeddingKey)]
+
+    active 슬롯 벡터만 투영 조회하고, 섀도 슬롯에 있는 문서(전환 도중)만 섀도 벡터를 추가 조회
+    → 전환이 끝난 뒤 섀도에 남은 이전 모델 벡터는 내려받지 않음
+    """
+    rows, in_shadow = [], {}
+    projection = list(fields) + [ACTIVE_FIELDS["vector"]] + EMBEDDING_STATUS_FIELDS
+    for style_id, data in stream_styles(db, collection, projection):
+        slot = find_slot(data, model)
+        if slot is ACTIVE_FIELDS:
+            rows.append((style_id, data, data.get(slot["vector"]), data.get(slot["key"])))
+        elif slot is SHADOW_FIELDS:
+            in_shadow[style_id] = data
+    for style_id, shadow in fetch_style_fields(db, collection, in_shadow, [SHADOW_FIELDS["vector"]]):
+        data = in_shadow[style_id]
+        rows.append((style_id, data, shadow.get(SHADOW_FIELDS["vector"]), data.get(SHADOW_FIELDS["key"])))
+    return [row for row in rows if row[2]]
+
+# ==================== 설정 문서 ====================
+
+def load_config(db, collection):
+    snapshot = db.collection(CONFIG_COLLECTION).document(collection).get()
+    return (snapshot.to_dict() or {}) if snapshot.exists else {}
+
+def get_active_model(db, collection):
+    """컬렉션의 현재 서비스 모델 (설정 문서가 없으면 DEFAULT_MODEL)"""
+    return resolve_model(load_config(db, collection).get("active") or DEFAULT_MODEL)
+
+def target_slot(db, collection, shadow_model=None):
+    """임베딩 스크립트가 채울 (모델, 슬롯 필드)
+
+    기본은 설정 문서의 active 모델 → active 슬롯, shadow_model이 있으면 그 모델 → 섀도 슬롯
+    (active 슬롯에 다른 모델을 쓰면 한 컬렉션에 모델이 섞이므로 모델 지정은 섀도에서만)
+    """
+    if shadow_model:
+        return resolve_model(shadow_model), SHADOW_FIELDS
+    return get_active_model(db, collection), ACTIVE_FIELDS
+
+def begin_migration(db, collection, model, server_timestamp):
+    """섀도 채우기 시작 기록 (같은 모델이면 그대로 이어서)"""
+    db.collection(CONFIG_COLLECTION).document(collection).set(
+        {"shadow": model["name"], "shadowStartedAt": server_timestamp}, merge=True)
+
+def set_active_model(db, collection, model, previous, server_timestamp):
+    """서비스 모델 전환 - 문서 하나 쓰기라서 원자적"""
+    db.collection(CONFIG_COLLECTION).document(collection).set({
+        "active": model["name"],
+        "previous": previous["name"],
+        "shadow": None,
+        "switchedAt": server_timestamp,
+    }, merge=True)
+
+# ==================== 커버리지 / 전환 ====================
+
+def embedding_coverage(db, collection, model):
+    """임베딩이 있는 문서 중 model 벡터를 가진 비율 → (covered, missing id 리스트)
+
+    벡터는 내려받지 않고 상태 필드만 스트리밍
+    """
+    covered, missing = 0, []
+    for style_id, data in stream_styles(db, collection, EMBEDDING_STATUS_FIELDS):
+        if not any(stored_model(data, fields) for fields in SLOTS):
+            continue
+        if find_slot(data, model):
+            covered += 1
+        else:
+            missing.append(style_id)
+    return covered, missing
+
+def promote_shadow(db, collection, model, on_commit=None):
+    """섀도 슬롯에 model 벡터가 있는 문서마다 두 슬롯을 맞바꿈 → (맞바꾼 id, 실패 id)
+
+    이전 모델 벡터는 섀도 슬롯에 남음 (되돌릴 때 같은 방식으로 다시 맞바꾸면 됨)
+    이미 active 슬롯에 model이 있는 문서는 건너뜀 → 중단 후 다시 실행해도 안전
+    """
+    updates = {}
+    for style_id, data in stream_styles(db, collection, VECTOR_FIELDS + EMBEDDING_STATUS_FIELDS):
+        if find_slot(data, model) is not SHADOW_FIELDS:
+            continue
+        old_model = stored_model(data, ACTIVE_FIELDS)
+        fields = {}
+        for role in ACTIVE_FIELDS:
+            fields[ACTIVE_FIELDS[role]] = data.get(SHADOW_FIELDS[role])
+            fields[SHADOW_FIELDS[role]] = data.get(ACTIVE_FIELDS[role])
+        # 모델 필드가 없던 예전 벡터는 섀도로 옮기면서 모델을 명시
+        if old_model:
+            fields[SHADOW_FIELDS["model"]] = old_model
+            fields[SHADOW_FIELDS["version"]] = data.get(ACTIVE_FIELDS["version"]) or resolve_model(old_model)["version"]
+        updates[style_id] = fields
+    if not updates:
+        return [], []
+    return commit_updates(db, collection, updates, on_commit=on_commit)
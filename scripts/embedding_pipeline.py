@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Gemini 배치 임베딩 파이프라인 (generate-embeddings.py / generate-men-embeddings.py 공용)
+- 여러 자막 텍스트를 batchEmbedContents 요청 하나에 묶어서 전송 (요청당 최대 100개)
+- 배치들을 스레드 풀에서 동시에 실행, 토큰 버킷으로 초당 요청 수 제한
+- 결과는 Firestore WriteBatch로 최대 500개씩 저장
+- embedding_store가 주어지면 텍스트가 바뀌지 않은 항목은 저장된 벡터 재사용
+- 저장할 때 벡터를 만든 모델 / 버전을 함께 기록 (embedding_models 레지스트리)
+"""
+
+import os
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import TokenBucket
+from firestore_batch import chunked, commit_updates
+from embedding_models import ACTIVE_FIELDS, DEFAULT_MODEL, MODELS, model_tag
+from embedding_store import embedding_key
+from profiling import add_bytes, span
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+EMBEDDING_MODEL = MODELS[DEFAULT_MODEL]["model"]
+TASK_TYPE = "retrieval_document"
+
+MAX_TEXT_CHARS = 8000       # 임베딩 모델 입력 제한
+MAX_BATCH_SIZE = 100        # batchEmbedContents 요청당 최대 개수
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RPS = 5.0
+MAX_RETRIES = 3
+
+# ==================== 배치 임베딩 ====================
+
+def prepare_text(text):
+    """실제로 모델에 보내는 텍스트 (길이 제한 적용) - 저장소 키도 이 텍스트 기준"""
+    return text[:MAX_TEXT_CHARS]
+
+def item_embedding_key(item, model=EMBEDDING_MODEL, task_type=TASK_TYPE):
+    """요청 항목의 embeddingKey (Firestore 문서에 저장해 변경 여부 판단)"""
+    return embedding_key(model, task_type, item.get("title"), prepare_text(item["text"]))
+
+def embed_batch(items, api_key, session=None, api_base=None, model=EMBEDDING_MODEL, task_type=TASK_TYPE):
+    """items([{"id", "text", "title"}])를 한 번의 batchEmbedContents 요청으로 임베딩
+
+    반환: items와 같은 순서의 벡터 리스트 (실패 시 예외)
+    """
+    http = session or requests
+    url = f"{api_base or GEMINI_API_BASE}/v1beta/{model}:batchEmbedContents?key={api_key}"
+
+    payload = {
+        "requests": [{
+            "model": model,
+            "content": {"parts": [{"text": prepare_text(item["text"])}]},
+            "taskType": task_type.upper(),
+            **({"title": item["title"]} if item.get("title") else {})
+        } for item in items]
+    }
+
+    with span("gemini.batch_embed", items=len(items)):
+        response = http.post(url, json=payload, timeout=120)
+    request_body = getattr(getattr(response, "request", None), "body", None) or b""
+    add_bytes("gemini", bytes_in=len(response.content), bytes_out=len(request_body))
+    if response.status_code != 200:
+        raise RuntimeError(f"Gemini 배치 임베딩 오류: {response.status_code} {response.text[:200]}")
+
+    embeddings = response.json().get("embeddings", [])
+    if len(embeddings) != len(items):
+        raise RuntimeError(f"임베딩 개수 불일치: 요청 {len(items)}개, 응답 {len(embeddings)}개")
+
+    return [e["values"] for e in embeddings]
+
+def embed_items(items, api_key, batch_size=MAX_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                rps=DEFAULT_RPS, api_base=None, model=EMBEDDING_MODEL, task_type=TASK_TYPE, store=None,
+                on_batch=None):
+    """여러 배치를 동시에 임베딩
+
+    store(EmbeddingStore)가 있으면 같은 (모델, task_type, title, 텍스트)는 API 호출 없이 재사용
+    on_batch: 배치 하나가 끝날 때마다 [(id, 벡터)]로 호출 (체크포인트 기록 등)
+    반환: ({id: 벡터}, [실패한 id])
+    """
+    embeddings, failed = {}, []
+
+    if store:
+        pending = []
+        for item in items:
+            vector = store.get(model, task_type, item.get("title"), prepare_text(item["text"]))
+            if vector is None:
+                pending.append(item)
+            else:
+                embeddings[item["id"]] = vector
+        items = pending
+
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    batches = list(chunked(items, batch_size))
+    limiter = TokenBucket(rps)
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def run(batch):
+        for attempt in range(MAX_RETRIES):
+            with span("ratelimit.gemini_embed"):
+                limiter.acquire()
+            try:
+                return embed_batch(batch, api_key, session=session, api_base=api_base,
+                                   model=model, task_type=task_type)
+            except Exception as e:
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                wait = 2 ** attempt
+                print(f"  ⚠️ 배치 임베딩 재시도 ({attempt + 1}/{MAX_RETRIES - 1}, {wait}초 후): {e}")
+                time.sleep(wait)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(run, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                vectors = future.result()
+            except Exception as e:
+                print(f"  ❌ 배치 임베딩 실패 ({len(batch)}개): {e}")
+                failed.extend(item["id"] for item in batch)
+                continue
+            for item, vector in zip(batch, vectors):
+                embeddings[item["id"]] = vector
+            if on_batch:
+                on_batch([(item["id"], vector) for item, vector in zip(batch, vectors)])
+            if store:
+                store.put_many([(model, task_type, item.get("title"), prepare_text(item["text"]), vector)
+                                for item, vector in zip(batch, vectors)])
+
+    return embeddings, failed
+
+# ==================== Firestore 저장 ====================
+
+def save_embeddings(db, collection, embeddings, server_timestamp, keys=None, on_commit=None,
+                    model=None, fields=ACTIVE_FIELDS):
+    """임베딩을 WriteBatch(최대 500개)로 저장. 반환: (성공 id, 실패 id)
+
+    keys({id: embeddingKey})가 있으면 함께 저장 → 다음 실행에서 텍스트 변경 여부 판단
+    model(레지스트리 항목)이 있으면 모델 / 버전도 함께 저장
+    fields: 저장할 슬롯 (embedding_models.ACTIVE_FIELDS / SHADOW_FIELDS)
+    on_commit: 배치 커밋이 성공할 때마다 저장된 id 리스트로 호출
+    """
+    keys = keys or {}
+    updates = {}
+    for style_id, vector in embeddings.items():
+        updates[style_id] = {
+            fields["vector"]: vector,
+            fields["updatedAt"]: server_timestamp
+        }
+        if style_id in keys:
+            updates[style_id][fields["key"]] = keys[style_id]
+        if model:
+            updates[style_id].update(model_tag(model, fields))
+    return commit_updates(db, collection, updates, on_commit=on_commit)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 임베딩 저장소 (SQLite)
+- 키: (모델, task_type, title, 실제 전송 텍스트의 SHA-256)
+- 값: float32 바이트 (JSON double 리스트 대비 약 1/5 크기)
+- 재생성 시 텍스트가 바뀐 스타일만 Gemini로 다시 임베딩
+- 재사용/재계산/제거 건수 집계
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+from dataset_index import CACHE_DIR
+
+# ==================== 설정 ====================
+
+DEFAULT_STORE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite")
+DEFAULT_MAX_AGE_DAYS = 90  # 이 기간 동안 한 번도 쓰이지 않은 벡터는 제거
+
+def text_hash(text):
+    """임베딩 입력 텍스트의 SHA-256 hex"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def embedding_key(model, task_type, title, text):
+    """Firestore 문서에 함께 저장하는 단일 키 (모델/태스크/제목/텍스트 중 하나라도 바뀌면 달라짐)"""
+    raw = "\x1f".join([model, task_type, title or "", text_hash(text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def pack_vector(vector):
+    return array("f", vector).tobytes()
+
+def unpack_vector(blob):
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+# ==================== 저장소 ====================
+
+class EmbeddingStore:
+    """스레드 안전 SQLite 임베딩 저장소"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_age_days = max_age_days
+        self.stats = {"reused": 0, "recomputed": 0, "evicted": 0}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model      TEXT NOT NULL,
+                task_type  TEXT NOT NULL,
+                title      TEXT NOT NULL,
+                text_hash  TEXT NOT NULL,
+                dims       INTEGER NOT NULL,
+                vector     BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL,
+                PRIMARY KEY (model, task_type, title, text_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, model, task_type, title, text):
+        """저장된 벡터 반환 (없으면 None). 적중 시 reused 집계"""
+        key = (model, task_type, title or "", text_hash(text))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE model=? AND task_type=? AND title=? AND text_hash=?", key
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE embeddings SET last_used=? WHERE model=? AND task_type=? AND title=? AND text_hash=?",
+                (time.time(),) + key
+            )
+            self._conn.commit()
+            self.stats["reused"] += 1
+        return unpack_vector(row[0])
+
+    def put_many(self, entries):
+        """[(model, task_type, title, text, vector), ...] 저장. recomputed 집계"""
+        now = time.time()
+        rows = [
+            (model, task_type, title or "", text_hash(text), len(vector), pack_vector(vector), now, now)
+            for model, task_type, title, text, vector in entries
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self.stats["recomputed"] += len(rows)
+
+    def evict(self):
+        """max_age_days 동안 쓰이지 않은 벡터 제거"""
+        if not self.max_age_days:
+            return 0
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock:
+            evicted = self._conn.execute("DELETE FROM embeddings WHERE last_used < ?", (cutoff,)).rowcount
+            self._conn.commit()
+            self.stats["evicted"] += evicted
+        return evicted
+
+    def summary(self):
+        """(벡터 수, 벡터 바이트 합계)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
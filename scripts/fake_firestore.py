@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+메모리 Firestore (벤치마크용 로컬 대역)
+- 파이프라인 스크립트가 쓰는 부분만 구현: collection / document, set(merge) / update, batch,
+  where("==").select().stream(), get_all
+- SERVER_TIMESTAMP는 쓰는 시점의 UTC 시각, DELETE_FIELD는 필드 삭제로 처리
+- 없는 문서 update()는 NotFound (배치는 통째로 실패 → bulk_set의 문서 단위 재시도 경로도 측정됨)
+- rpc_latency로 커밋 / get_all / 스트림 페이지마다 네트워크 왕복 시간 흉내
+- Firestore 에뮬레이터가 있으면 그쪽이 더 정확함 (bench-firestore-upload.py 참고)
+
+사용법:
+  db = FakeFirestore(rpc_latency=0.02)
+  bulk_set(db, "men_styles", docs)
+"""
+
+import copy
+import time
+import threading
+from datetime import datetime, timezone
+
+from google.api_core import exceptions as gexc
+from google.cloud.firestore_v1 import DELETE_FIELD, SERVER_TIMESTAMP
+
+# 스트리밍 조회 한 번에 받는 문서 수 (페이지마다 rpc_latency 한 번)
+STREAM_PAGE_SIZE = 300
+
+def _resolve(value, now):
+    """쓰기 값의 SERVER_TIMESTAMP를 실제 시각으로"""
+    if value is SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, dict):
+        return {k: _resolve(v, now) for k, v in value.items() if v is not DELETE_FIELD}
+    if isinstance(value, list):
+        return [_resolve(v, now) for v in value]
+    return value
+
+def _merge(target, data, now):
+    """set(merge=True): 중첩 map은 필드 단위로 합치기"""
+    for key, value in data.items():
+        if value is DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            target[key] = _resolve(value, now)
+
+def _update(target, fields, now):
+    """update(): "a.b" 필드 경로는 중첩 map 안의 값만 교체"""
+    for path, value in fields.items():
+        node = target
+        *parents, leaf = path.split(".")
+        for part in parents:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        if value is DELETE_FIELD:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = _resolve(value, now)
+
+def _project(data, fields):
+    if fields is None:
+        return copy.deepcopy(data)
+    return {f: copy.deepcopy(data[f]) for f in fields if f in data}
+
+class DocumentSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return self._data
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+class DocumentReference:
+    def __init__(self, db, collection, doc_id):
+        self._db = db
+        self.collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self.collection}/{self.id}"
+
+    def get(self, field_paths=None):
+        self._db._wait()
+        return self._db._snapshot(self.collection, self.id, field_paths)
+
+    def set(self, data, merge=False):
+        self._db._wait()
+        self._db._apply([("set", self, data, merge)])
+
+    def update(self, fields):
+        self._db._wait()
+        self._db._apply([("update", self, fields, False)])
+
+    def delete(self):
+        self._db._wait()
+        self._db._apply([("delete", self, None, False)])
+
+class Query:
+    def __init__(self, db, collection, fields=None, filters=()):
+        self._db = db
+        self.collection = collection
+        self.fields = fields
+        self.filters = tuple(filters)
+
+    def select(self, fields):
+        return Query(self._db, self.collection, list(fields), self.filters)
+
+    def where(self, field, op, value):
+        if op != "==":
+            raise NotImplementedError(f"FakeFirestore where: {op}")
+        return Query(self._db, self.collection, self.fields, self.filters + ((field, value),))
+
+    def stream(self):
+        with self._db._lock:
+            docs = self._db._collections.get(self.collection, {})
+            doc_ids = sorted(doc_id for doc_id, data in docs.items()
+                             if all(data.get(field) == value for field, value in self.filters))
+        for i, doc_id in enumerate(doc_ids):
+            if i % STREAM_PAGE_SIZE == 0:
+                self._db._wait()
+            snapshot = self._db._snapshot(self.collection, doc_id, self.fields)
+            if snapshot.exists:
+                yield snapshot
+
+    def get(self):
+        return list(self.stream())
+
+class CollectionReference(Query):
+    def document(self, doc_id):
+        return DocumentReference(self._db, self.collection, doc_id)
+
+class WriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, ref, data, merge=False):
+        self._writes.append(("set", ref, data, merge))
+
+    def update(self, ref, fields):
+        self._writes.append(("update", ref, fields, False))
+
+    def delete(self, ref):
+        self._writes.append(("delete", ref, None, False))
+
+    def commit(self):
+        self._db._wait()
+        self._db._apply(self._writes)
+        self._db.counters["commits"] += 1
+
+class FakeFirestore:
+    """firestore.Client 대역 (스레드 안전, 문서는 {컬렉션: {doc_id: dict}})"""
+
+    def __init__(self, rpc_latency=0.0):
+        self.rpc_latency = rpc_latency
+        self.counters = {"rpcs": 0, "commits": 0, "writes": 0, "reads": 0}
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return CollectionReference(self, name)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def get_all(self, refs, field_paths=None):
+        self._wait()
+        return [self._snapshot(ref.collection, ref.id, field_paths) for ref in refs]
+
+    # ==================== 내부 ====================
+
+    def _wait(self):
+        with self._lock:
+            self.counters["rpcs"] += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+    def _snapshot(self, collection, doc_id, fields):
+        with self._lock:
+            data = self._collections.get(collection, {}).get(doc_id)
+            self.counters["reads"] += 1
+            return DocumentSnapshot(doc_id, None if data is None else _project(data, fields))
+
+    def _apply(self, writes):
+        """쓰기 목록을 원자적으로 적용 (하나라도 실패하면 아무것도 반영하지 않음)"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for op, ref, data, _ in writes:
+                if op == "update" and ref.id not in self._collections.get(ref.collection, {}):
+                    raise gexc.NotFound(f"No document to update: {ref.path}")
+            for op, ref, data, merge in writes:
+                docs = self._collections.setdefault(ref.collection, {})
+                if op == "delete":
+                    docs.pop(ref.id, None)
+                elif op == "update":
+                    _update(docs[ref.id], data, now)
+                elif merge and ref.id in docs:
+                    _merge(docs[ref.id], data, now)
+                else:
+                    docs[ref.id] = _resolve(data, now)
+            self.counters["writes"] += len(writes)
+
+    def count(self, collection):
+        with self._lock:
+            return len(self._collections.get(collection, {}))
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Firestore 배치 쓰기 유틸
+- 문서별 update() 대신 WriteBatch로 최대 500개씩 묶어 커밋
+- bulk_set: 여러 배치를 동시에 커밋, 실패한 배치는 문서 단위로 나눠서 지수 백오프 재시도
+"""
+
+import json
+import time
+import random
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from google.api_core import exceptions as gexc
+
+from profiling import add_bytes, span
+
+print = functools.partial(print, flush=True)
+
+# Firestore WriteBatch 한 번에 넣을 수 있는 최대 쓰기 수
+FIRESTORE_BATCH_LIMIT = 500
+
+# 일시적 오류 (재시도 대상) - 그 외(권한, 잘못된 값 등)는 바로 실패 처리
+TRANSIENT_ERRORS = (
+    gexc.Aborted,
+    gexc.DeadlineExceeded,
+    gexc.InternalServerError,
+    gexc.ResourceExhausted,
+    gexc.ServiceUnavailable,
+    gexc.TooManyRequests,
+    gexc.GatewayTimeout,
+    ConnectionError,
+)
+
+BULK_DEFAULTS = {
+    "batch_size": 100,      # 배치 하나의 문서 수 (작을수록 동시 커밋 수가 늘어남)
+    "workers": 4,           # 동시 커밋 스레드 수
+    "max_retries": 5,       # 문서별 재시도 횟수
+    "base_delay": 0.5,      # 첫 재시도 대기 (초), 이후 2배씩
+    "max_delay": 16.0,
+}
+
+def chunked(items, size):
+    """리스트를 size개씩 나누기"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def commit_updates(db, collection, updates, batch_size=FIRESTORE_BATCH_LIMIT, on_commit=None):
+    """{doc_id: fields} 를 batch.update()로 묶어서 커밋
+
+    on_commit: 배치 커밋이 성공할 때마다 그 배치의 doc_id 리스트로 호출 (체크포인트 기록 등)
+    반환: (성공 doc_id 리스트, 실패 doc_id 리스트)
+    """
+    batch_size = min(batch_size, FIRESTORE_BATCH_LIMIT)
+    collection_ref = db.collection(collection)
+    succeeded, failed = [], []
+
+    for chunk in chunked(list(updates.items()), batch_size):
+        batch = db.batch()
+        for doc_id, fields in chunk:
+            batch.update(collection_ref.document(doc_id), fields)
+        try:
+            with span("firestore.batch_commit", docs=len(chunk)):
+                batch.commit()
+            add_bytes("firestore", bytes_out=sum(approx_size(fields) for _, fields in chunk))
+            succeeded.extend(doc_id for doc_id, _ in chunk)
+            if on_commit:
+                on_commit([doc_id for doc_id, _ in chunk])
+        except Exception as e:
+            print(f"  ❌ Firestore 배치 커밋 실패 ({len(chunk)}건): {e}")
+            failed.extend(doc_id for doc_id, _ in chunk)
+
+    return succeeded, failed
+
+def approx_size(data):
+    """문서 데이터의 대략적인 전송 크기 (JSON 직렬화 기준, 계측용)"""
+    return len(json.dumps(data, ensure_ascii=False, default=str).encode("utf-8"))
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """attempt번째 재시도 대기 시간 (지수 증가 + 지터)"""
+    return min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+def _set_document_with_retry(ref, data, merge, max_retries, base_delay, max_delay):
+    """문서 하나 set() - 일시적 오류만 백오프 재시도
+
+    반환: (성공 여부, 시도 횟수, 오류 메시지)
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with span("firestore.document_set"):
+                ref.set(data, merge=merge)
+            add_bytes("firestore", bytes_out=approx_size(data))
+            return True, attempt, None
+        except TRANSIENT_ERRORS as e:
+            if attempt > max_retries:
+                return False, attempt, f"{type(e).__name__}: {e}"
+            time.sleep(backoff_delay(attempt - 1, base_delay, max_delay))
+        except Exception as e:
+            return False, attempt, f"{type(e).__name__}: {e}"
+
+def bulk_set(db, collection, docs, merge=True, batch_size=BULK_DEFAULTS["batch_size"],
+             workers=BULK_DEFAULTS["workers"], max_retries=BULK_DEFAULTS["max_retries"],
+             base_delay=BULK_DEFAULTS["base_delay"], max_delay=BULK_DEFAULTS["max_delay"],
+             on_document=None):
+    """[(doc_id, data)]를 WriteBatch로 묶어 동시에 커밋
+
+    - merge=True면 batch.set(..., merge=True)라서 data에 없는 필드(embedding 등)는 그대로 유지
+    - 배치 커밋이 실패하면 어느 문서 때문인지 알 수 없으므로 그 배치만 문서 단위 set()으로 재시도
+    - on_document(doc_id, 결과): 문서 하나가 끝날 때마다 호출 (스레드에서 호출됨)
+
+    반환: {doc_id: {"status": "ok"|"failed", "attempts": n, "error": 메시지 또는 None}}
+    """
+    batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+    collection_ref = db.collection(collection)
+    report = {}
+    report_lock = threading.Lock()
+
+    def finish(doc_id, ok, attempts, error):
+        result = {"status": "ok" if ok else "failed", "attempts": attempts, "error": error}
+        with report_lock:
+            report[doc_id] = result
+        if on_document:
+            on_document(doc_id, result)
+
+    def commit_chunk(chunk):
+        batch = db.batch()
+        for doc_id, data in chunk:
+            batch.set(collection_ref.document(doc_id), data, merge=merge)
+        try:
+            with span("firestore.batch_commit", docs=len(chunk)):
+                batch.commit()
+            add_bytes("firestore", bytes_out=sum(approx_size(data) for _, data in chunk))
+            for doc_id, _ in chunk:
+                finish(doc_id, True, 1, None)
+            return
+        except Exception as e:
+            batch_error = e
+
+        # 배치 실패 → 문서 단위로 재시도 (배치 시도 1회 포함해서 집계)
+        if not isinstance(batch_error, TRANSIENT_ERRORS):
+            print(f"  ⚠️ 배치 커밋 실패 ({len(chunk)}건, {type(batch_error).__name__}) → 문서 단위 재시도")
+        for doc_id, data in chunk:
+            ok, attempts, error = _set_document_with_retry(
+                collection_ref.document(doc_id), data, merge, max_retries, base_delay, max_delay
+            )
+            finish(doc_id, ok, attempts + 1, error)
+
+    chunks = list(chunked(list(docs), batch_size))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for future in [executor.submit(commit_chunk, chunk) for chunk in chunks]:
+            future.result()
+
+    return report
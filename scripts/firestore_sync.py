@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+변경된 문서만 쓰는 Firestore 동기화
+- 보낼 문서 데이터에서 타임스탬프(createdAt, updatedAt, SERVER_TIMESTAMP 값)를 뺀 뒤 안정적인 SHA-256 계산
+- 해시는 문서의 contentHash 필드 + 로컬 원장(scripts/.cache/firestore-sync-<컬렉션>.json)에 저장
+- 원장에 같은 해시가 있으면 읽기/쓰기 없이 스킵, 원장에 없는 문서만 contentHash 필드를 투영 조회
+- 이미 있는 문서에는 createdAt을 다시 보내지 않음 (merge로 덮어쓰던 문제)
+"""
+
+import os
+import json
+import hashlib
+from datetime import date, datetime
+
+from dataset_index import CACHE_DIR
+from style_listing import fetch_style_fields
+
+CONTENT_HASH_FIELD = "contentHash"
+
+# 해시에서 제외할 필드 (실행할 때마다 값이 바뀌는 것들)
+TIMESTAMP_FIELDS = {"createdAt", "updatedAt"}
+
+def _is_timestamp_value(value):
+    """SERVER_TIMESTAMP 같은 Sentinel 또는 datetime 값"""
+    return isinstance(value, (datetime, date)) or type(value).__name__ == "Sentinel"
+
+def _strip_timestamps(value):
+    if isinstance(value, dict):
+        return {
+            k: _strip_timestamps(v) for k, v in value.items()
+            if k not in TIMESTAMP_FIELDS and k != CONTENT_HASH_FIELD and not _is_timestamp_value(v)
+        }
+    if isinstance(value, (list, tuple)):
+        return [_strip_timestamps(v) for v in value]
+    return value
+
+def content_hash(doc_data):
+    """타임스탬프를 뺀 문서 내용의 SHA-256 (키 순서와 무관)"""
+    canonical = json.dumps(_strip_timestamps(doc_data), sort_keys=True, ensure_ascii=False,
+                           separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# ==================== 로컬 원장 ====================
+
+class SyncLedger:
+    """{doc_id: 마지막으로 쓴 contentHash} (컬렉션별 JSON 파일)"""
+
+    def __init__(self, collection, path=None):
+        self.collection = collection
+        self.path = path or os.path.join(CACHE_DIR, f"firestore-sync-{collection}.json")
+        self.hashes = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.hashes = json.load(f).get("hashes", {})
+            except (ValueError, OSError):
+                self.hashes = {}
+
+    def get(self, doc_id):
+        return self.hashes.get(doc_id)
+
+    def update(self, doc_id, digest):
+        self.hashes[doc_id] = digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"collection": self.collection, "hashes": self.hashes}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+# ==================== 동기화 계획 ====================
+
+def plan_sync(db, collection, docs, ledger, verify_remote=False):
+    """쓸 문서만 골라내기
+
+    docs: [(doc_id, data)]
+    verify_remote=True: 원장을 믿지 않고 모든 문서의 contentHash를 Firestore에서 확인
+
+    반환: {
+        "write":     [(doc_id, data + contentHash)] - 새 문서 또는 내용이 바뀐 문서,
+        "unchanged": [doc_id],
+        "hashes":    {doc_id: 해시},
+        "remote_checked": Firestore에서 확인한 문서 수
+    }
+    """
+    hashes = {doc_id: content_hash(data) for doc_id, data in docs}
+
+    # 1. 원장에 없거나(다른 PC, 첫 실행) 검증 모드면 Firestore의 contentHash 필드만 조회
+    to_check = [doc_id for doc_id, _ in docs if verify_remote or ledger.get(doc_id) != hashes[doc_id]]
+    remote = {}
+    if to_check:
+        for doc_id, data in fetch_style_fields(db, collection, to_check, [CONTENT_HASH_FIELD]):
+            remote[doc_id] = data.get(CONTENT_HASH_FIELD)
+            if remote[doc_id] == hashes[doc_id]:
+                ledger.update(doc_id, hashes[doc_id])
+    checked = set(to_check)
+
+    write, unchanged = [], []
+    for doc_id, data in docs:
+        digest = hashes[doc_id]
+        if doc_id in checked:
+            if remote.get(doc_id) == digest:
+                unchanged.append(doc_id)
+                continue
+            exists = doc_id in remote
+        else:
+            unchanged.append(doc_id)
+            continue
+
+        payload = {k: v for k, v in data.items() if not (exists and k == "createdAt")}
+        payload[CONTENT_HASH_FIELD] = digest
+        write.append((doc_id, payload))
+
+    return {"write": write, "unchanged": unchanged, "hashes": hashes, "remote_checked": len(to_check)}
@@ -1,18 +1,36 @@
 # -*- coding: utf-8 -*-
 """
 남자 커트 스타일 임베딩 생성
-- Firestore men_styles 컬렉션에서 스타일 정보 읽기
-- 자막 파일 텍스트로 임베딩 생성
-- Firestore에 임베딩 벡터 저장
+- Firestore men_styles 컬렉션에서 스타일 상태 필드만 읽기 (select 투영 + 스트리밍)
+- 자막 파일 텍스트로 임베딩 생성 (embedding_pipeline: 배치 + 동시 요청)
+- Firestore에 임베딩 벡터 저장 (WriteBatch 500개 단위)
+- 임베딩 배치 / 저장 배치마다 체크포인트 기록 → 중단되면 --resume으로 이어서 실행
 """
 
 import os
+import re
 import sys
-import json
 import time
+import argparse
 import firebase_admin
 from firebase_admin import credentials, firestore
-import google.generativeai as genai
+
+from embedding_pipeline import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RPS,
+    MAX_BATCH_SIZE,
+    embed_items,
+    item_embedding_key,
+    save_embeddings,
+)
+from checkpoint import CheckpointJournal
+from embedding_bundle import BUNDLE_DIR, DEFAULT_DTYPE, DTYPES, export_bundle, print_bundle_result
+from embedding_models import MODELS, find_slot, has_embedding_key, target_slot
+from dataset_index import load_dataset_index, read_text
+from embedding_store import DEFAULT_MAX_AGE_DAYS, DEFAULT_STORE_PATH, EmbeddingStore
+from profiling import record, span, start_run
+from style_aliases import men_series_description
+from style_listing import EMBEDDING_STATUS_FIELDS, stream_styles
 
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stdout.flush()
@@ -22,8 +40,9 @@ print = functools.partial(print, flush=True)
 
 # ==================== 설정 ====================
 
+CHECKPOINT_NAME = "generate-men-embeddings"
+
 SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
-BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\men_cut_recipe"
 
 # 7개 스타일 카테고리 폴더 매핑
 SERIES_FOLDERS = {
@@ -72,26 +91,22 @@ def init_firebase():
 # ==================== Gemini 초기화 ====================
 
 def init_gemini():
-    """Gemini API 초기화"""
+    """Gemini API 키 확인 (배치 임베딩은 REST로 호출하므로 키 문자열 반환)"""
     if not GEMINI_API_KEY:
         # firebase-config.js에서 읽기 시도
         config_path = r"C:\Users\김민재\Desktop\Hairgator_chatbot\js\firebase-config.js"
         if os.path.exists(config_path):
             with open(config_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                import re
                 match = re.search(r'geminiApiKey:\s*["\']([^"\']+)["\']', content)
                 if match:
-                    api_key = match.group(1)
-                    genai.configure(api_key=api_key)
                     print("✅ Gemini API 초기화 완료 (config에서 키 읽음)")
-                    return True
+                    return match.group(1)
         print("❌ Gemini API 키가 없습니다")
-        return False
+        return None
 
-    genai.configure(api_key=GEMINI_API_KEY)
     print("✅ Gemini API 초기화 완료")
-    return True
+    return GEMINI_API_KEY
 
 # ==================== 시리즈 코드 추출 ====================
 
@@ -104,35 +119,24 @@ def get_series_code(style_id):
 
 # ==================== 자막 텍스트 읽기 ====================
 
-def get_caption_text(style_id):
-    """자막 파일에서 텍스트 읽기"""
+def get_caption_text(index, style_id):
+    """자막 파일에서 텍스트 읽기 (파일 목록은 데이터셋 인덱스에서)"""
     series = get_series_code(style_id)
     if not series:
         return None
-
-    series_folder = SERIES_FOLDERS.get(series)
-    if not series_folder:
+    style = index.get("men", style_id)
+    if not style or style.series != series:
         return None
 
-    style_path = os.path.join(BASE_PATH, series_folder, style_id)
-
-    caption_patterns = [
-        f"{style_id}(자막).txt",
-        f"{style_id}-jamag.txt",
-        f"{style_id}_자막.txt"
-    ]
-
-    for pattern in caption_patterns:
-        caption_path = os.path.join(style_path, pattern)
-        if os.path.exists(caption_path):
-            try:
-                with open(caption_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            except Exception as e:
-                print(f"  ⚠️ 자막 읽기 실패: {style_id} - {e}")
-                return None
+    caption = style.find_caption(include_plain=False)
+    if not caption:
+        return None
 
-    return None
+    try:
+        return read_text(style, caption)
+    except Exception as e:
+        print(f"  ⚠️ 자막 읽기 실패: {style_id} - {e}")
+        return None
 
 # ==================== 임베딩용 텍스트 생성 ====================
 
@@ -140,20 +144,11 @@ def build_embedding_text(style_id, caption_text=None):
     """임베딩용 텍스트 구성 (자막이 없어도 스타일 정보로 생성)"""
     series = get_series_code(style_id)
 
-    # 시리즈별 기본 설명
-    series_descriptions = {
-        "SF": "Side Fringe 사이드프린지 앞머리를 앞으로 내려 자연스럽게 흐르는 스타일 댄디컷 시스루댄디 슬릭컷",
-        "SP": "Side Part 사이드파트 가르마 가르마컷 가일컷 시스루가르마 플랫컷 리프컷 포마드컷 드롭컷 하프컷 숏가일 리젠트컷 애즈컷",
-        "FU": "Fringe Up 프린지업 앞머리 끝만 위로 올린 스타일 아이비리그컷 크랙컷",
-        "PB": "Pushed Back 푸시드백 슬릭백 모발 전체가 뒤쪽으로 넘어가는 스타일 폼파도르컷 언더컷",
-        "BZ": "Buzz Cut 버즈컷 가장 짧은 커트 스타일 클리퍼",
-        "CP": "Crop Cut 크롭컷 버즈보다 조금 긴 스타일 스왓컷 숏크롭",
-        "MC": "Mohican 모히칸 센터를 세워 강조하는 스타일 모히칸컷",
-    }
-
+    # 시리즈별 기본 설명 (style_aliases - 고객이 부르는 스타일 이름 포함)
     base_text = f"남자 헤어스타일 {style_id}"
-    if series and series in series_descriptions:
-        base_text += f" {series_descriptions[series]}"
+    description = men_series_description(series)
+    if description:
+        base_text += f" {description}"
 
     if caption_text:
         # 자막이 있으면 합치기
@@ -163,63 +158,103 @@ def build_embedding_text(style_id, caption_text=None):
 
     return combined
 
-# ==================== 임베딩 생성 ====================
+# ==================== 임베딩 요청 항목 ====================
 
-def generate_embedding(text, style_id):
-    """Gemini로 텍스트 임베딩 생성"""
-    try:
-        # 텍스트가 너무 길면 자르기 (임베딩 모델 제한)
-        max_chars = 8000
-        if len(text) > max_chars:
-            text = text[:max_chars]
-
-        # 임베딩 생성 (embedding-001 모델 사용 - 여자 스타일과 동일)
-        result = genai.embed_content(
-            model="models/embedding-001",
-            content=text,
-            task_type="retrieval_document",
-            title=f"남자 헤어스타일 {style_id} 레시피"
-        )
-
-        embedding = result['embedding']
-        return embedding
+def build_embedding_item(style_id, text):
+    """배치 임베딩 요청 항목 구성 (embedding-001 모델 사용 - 여자 스타일과 동일)"""
+    return {
+        "id": style_id,
+        "text": text,
+        "title": f"남자 헤어스타일 {style_id} 레시피"
+    }
 
-    except Exception as e:
-        print(f"  ❌ 임베딩 생성 실패: {style_id} - {e}")
-        return None
+# ==================== 임베딩 대상 ====================
+
+def collect_embedding_items(db, args, stats, model):
+    """Firestore 상태 필드 + 로컬 자막으로 임베딩 대상 수집 → (items, {styleId: embeddingKey}, {styleId: 자막 여부})"""
+    # Firestore에서 스타일 상태 필드만 스트리밍 (embedding 벡터는 내려받지 않음)
+    print("\n📋 Firestore men_styles에서 스타일 목록 가져오기... (상태 필드만)")
+    style_stream = stream_styles(db, "men_styles", EMBEDDING_STATUS_FIELDS)
+    print("-" * 50)
+
+    # 로컬 자막 파일 목록 (데이터셋 인덱스, 스타일마다 폴더를 다시 뒤지지 않음)
+    index = load_dataset_index()
+
+    # 임베딩 대상 수집
+    items = []
+    keys = {}
+    has_caption = {}
+    total = 0
+    for style_id, data in style_stream:
+        total += 1
+
+        # 자막 텍스트 가져오기
+        caption_text = get_caption_text(index, style_id)
+        has_caption[style_id] = bool(caption_text)
+
+        # 임베딩용 텍스트 생성 (자막 없어도 기본 설명으로 생성)
+        embedding_text = build_embedding_text(style_id, caption_text)
+        item = build_embedding_item(style_id, embedding_text)
+        key = item_embedding_key(item, model=model["model"])
+
+        # embeddingKey가 그대로면 스킵 (벡터와 항상 함께 저장됨, 두 슬롯 중 어디에 있어도 됨)
+        if has_embedding_key(data, key) and not args.rebuild:
+            print(f"  ⏭️ {style_id}: 임베딩 최신 상태, 스킵")
+            stats["skipped"] += 1
+            continue
+        if find_slot(data, model):
+            print(f"  🔄 {style_id}: 임베딩 텍스트 변경 감지, 재생성")
+
+        if not caption_text:
+            stats["no_caption"] += 1
+        items.append(item)
+        keys[style_id] = key
+
+    print(f"  총 {total}개 스타일 중 {len(items)}개 임베딩 대상")
+    return items, keys, has_caption
 
 # ==================== 메인 ====================
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Gemini 임베딩 생성 - 남자 커트 스타일")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE,
+                        help=f"요청당 텍스트 수 (최대 {MAX_BATCH_SIZE})")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="동시 배치 요청 수")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS, help="초당 최대 배치 요청 수 (0=무제한)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="모든 스타일 임베딩 재저장 (텍스트가 안 바뀐 항목은 로컬 저장소 벡터 재사용)")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 이전 실행을 체크포인트에서 이어서 실행 (Firestore 목록을 다시 읽지 않음)")
+    parser.add_argument("--no-store", action="store_true", help="로컬 임베딩 저장소 사용 안 함")
+    parser.add_argument("--store-path", default=DEFAULT_STORE_PATH)
+    parser.add_argument("--store-max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help="이 기간 동안 쓰이지 않은 저장소 벡터 제거")
+    parser.add_argument("--shadow", choices=sorted(MODELS),
+                        help="이 모델로 섀도 필드(embeddingShadow)만 채움 - 모델 전환용 (migrate-embedding-model.py)")
+    parser.add_argument("--no-bundle", action="store_true", help="챗봇 함수용 임베딩 번들 생성 안 함")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR)
+    parser.add_argument("--bundle-dtype", choices=sorted(DTYPES), default=DEFAULT_DTYPE)
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    start_run("generate-men-embeddings")
+
     print("=" * 70)
     print("Gemini 임베딩 생성 - 남자 커트 스타일")
     print("=" * 70)
 
     # Firebase 초기화
-    db = init_firebase()
+    with span("phase.init_firebase"):
+        db = init_firebase()
     if not db:
         return
 
     # Gemini 초기화
-    if not init_gemini():
+    api_key = init_gemini()
+    if not api_key:
         return
 
-    # Firestore에서 남자 스타일 가져오기
-    print("\n📋 Firestore men_styles에서 스타일 목록 가져오기...")
-    styles_ref = db.collection("men_styles")
-    styles = styles_ref.get()
-
-    style_list = []
-    for doc in styles:
-        data = doc.to_dict()
-        style_list.append({
-            "id": doc.id,
-            "data": data
-        })
-
-    print(f"  총 {len(style_list)}개 스타일")
-    print("-" * 50)
-
     # 통계
     stats = {
         "success": 0,
@@ -228,58 +263,95 @@ def main():
         "no_caption": 0
     }
 
-    for idx, style in enumerate(style_list):
-        style_id = style["id"]
-        data = style["data"]
-
-        # 이미 임베딩이 있는지 확인
-        if data.get("embedding"):
-            print(f"  ⏭️ {style_id}: 임베딩 이미 존재, 스킵")
-            stats["skipped"] += 1
-            continue
-
-        # 자막 텍스트 가져오기
-        caption_text = get_caption_text(style_id)
-        if not caption_text:
-            stats["no_caption"] += 1
-
-        # 임베딩용 텍스트 생성 (자막 없어도 기본 설명으로 생성)
-        embedding_text = build_embedding_text(style_id, caption_text)
-
-        # 임베딩 생성
-        embedding = generate_embedding(embedding_text, style_id)
-        if not embedding:
-            stats["failed"] += 1
-            continue
+    # 임베딩 모델 / 저장 슬롯 (기본: 설정 문서의 active 모델, --shadow면 섀도 슬롯)
+    model, fields = target_slot(db, "men_styles", args.shadow)
+    print(f"\n🧬 임베딩 모델: {model['name']} (v{model['version']}, {'섀도' if args.shadow else 'active'} 슬롯)")
+
+    # 임베딩 대상 (--resume이면 체크포인트의 계획에서 저장까지 끝난 스타일을 뺀 나머지)
+    journal = CheckpointJournal(CHECKPOINT_NAME + ("-shadow" if args.shadow else ""))
+    plan = journal.resume_plan() if args.resume else None
+    if plan is not None and plan.get("model", model["name"]) != model["name"]:
+        print(f"\n  ⚠️ 체크포인트가 다른 모델({plan['model']})이라 새로 시작합니다")
+        plan = None
+    if plan is not None:
+        saved_before = journal.done_units("saved")
+        items = [item for item in plan["items"] if item["id"] not in saved_before]
+        keys, has_caption = plan["keys"], plan["has_caption"]
+        print(f"\n♻️ 체크포인트에서 이어서 실행: 전체 {len(plan['items'])}개 중 저장 완료 {len(saved_before)}개, "
+              f"남은 {len(items)}개")
+    else:
+        if args.resume:
+            print("\n  이어서 실행할 체크포인트가 없어 새로 시작합니다")
+        elif journal.pending():
+            print("\n  ⚠️ 중단된 이전 실행의 체크포인트를 버리고 새로 시작합니다 (이어서 하려면 --resume)")
+        with span("phase.collect_items"):
+            items, keys, has_caption = collect_embedding_items(db, args, stats, model)
+        journal.start({"model": model["name"], "items": items, "keys": keys, "has_caption": has_caption})
+
+    store = None
+    if not args.no_store:
+        store = EmbeddingStore(args.store_path, max_age_days=args.store_max_age_days)
+
+    if not items:
+        print("\n  임베딩할 스타일이 없습니다")
+    else:
+        # 배치 임베딩 생성
+        print(f"\n🧠 {len(items)}개 임베딩 생성 중... (배치 {args.batch_size}개, 동시 {args.concurrency}개)")
+        started = time.monotonic()
+        resumed = {item["id"]: journal.get("embedding", item["id"]) for item in items
+                   if journal.is_done("embedding", item["id"])}
+        embeddings, failed = embed_items([item for item in items if item["id"] not in resumed], api_key,
+                                         batch_size=args.batch_size, concurrency=args.concurrency,
+                                         rps=args.rps, model=model["model"], store=store,
+                                         on_batch=lambda pairs: journal.record_many("embedding", pairs))
+        embeddings.update(resumed)
+        record("phase.embed", time.monotonic() - started)
+        stats["failed"] += len(failed)
+        print(f"  임베딩 {len(embeddings)}개 생성 ({time.monotonic() - started:.1f}초, 체크포인트 재사용 {len(resumed)}개)")
+
+        # Firestore에 저장 (배치 커밋마다 체크포인트 기록)
+        with span("phase.save_embeddings"):
+            saved, save_failed = save_embeddings(
+                db, "men_styles", embeddings, firestore.SERVER_TIMESTAMP, keys=keys,
+                on_commit=lambda ids: journal.record_many("saved", [(style_id, None) for style_id in ids]),
+                model=model, fields=fields)
+        for style_id in saved:
+            caption_mark = "✓" if has_caption[style_id] else "△"
+            print(f"  ✅ {style_id}: 임베딩 저장 (차원: {len(embeddings[style_id])}) 자막{caption_mark}")
+        stats["success"] += len(saved)
+        stats["failed"] += len(save_failed)
+        print(f"  소요 시간: {time.monotonic() - started:.1f}초")
+    if stats["failed"]:
+        # 실패한 것은 저널에 기록되지 않았으므로 --resume이 그것만 다시 처리
+        journal.close()
+        print(f"\n  ⚠️ 실패 {stats['failed']}개 - 체크포인트 유지 (--resume으로 실패한 것만 다시 실행)")
+    else:
+        journal.finish()
 
-        # Firestore에 저장
-        try:
-            styles_ref.document(style_id).update({
-                "embedding": embedding,
-                "embeddingUpdatedAt": firestore.SERVER_TIMESTAMP
-            })
-            caption_mark = "✓" if caption_text else "△"
-            print(f"  ✅ {style_id}: 임베딩 저장 (차원: {len(embedding)}) 자막{caption_mark}")
-            stats["success"] += 1
-        except Exception as e:
-            print(f"  ❌ {style_id}: Firestore 저장 실패 - {e}")
-            stats["failed"] += 1
-
-        # 진행 상황
-        if (idx + 1) % 10 == 0:
-            print(f"\n  --- {idx + 1}/{len(style_list)} 완료 ---\n")
-
-        # Rate limiting (Gemini API 제한)
-        time.sleep(0.3)
+    # 챗봇 함수용 번들 (hairstyles male 문서, 내용이 같으면 파일 유지) - 임베딩을 갱신할 때마다 함께 갱신
+    # 섀도 채우기는 서비스 중인 벡터를 바꾸지 않으므로 번들도 그대로
+    if not args.no_bundle and not args.shadow:
+        print("\n📦 임베딩 번들 생성 중...")
+        with span("phase.export_bundle"):
+            pointer, excluded = export_bundle(db, "male", out_dir=args.bundle_dir, dtype=args.bundle_dtype)
+        print_bundle_result(pointer, excluded)
 
     # 최종 통계
     print("\n" + "=" * 70)
     print("📊 임베딩 생성 완료 통계")
     print("=" * 70)
     print(f"  성공: {stats['success']}개")
-    print(f"  스킵 (이미 존재): {stats['skipped']}개")
+    print(f"  스킵 (최신 상태): {stats['skipped']}개")
     print(f"  실패: {stats['failed']}개")
     print(f"  자막 없음 (기본 설명 사용): {stats['no_caption']}개")
 
+    if store:
+        store.evict()
+        count, size = store.summary()
+        ss = store.stats
+        print(f"  로컬 저장소: 재사용 {ss['reused']}개 / 재계산 {ss['recomputed']}개 / 제거 {ss['evicted']}개 "
+              f"(현재 {count}개, {size / 1024:.1f}KB)")
+        store.close()
+
 if __name__ == "__main__":
     main()
@@ -3,18 +3,31 @@
 명령 1-3: 메타데이터 JSON 생성 스크립트
 - 각 스타일별 통합 메타데이터 생성
 - GCS 업로드 및 Firestore 저장용 JSON 생성
+- --incremental: 입력 파일이 바뀐 스타일만 다시 생성
+  · 집계 파일을 스타일 단위로 고치는 것은 --jsonl만 (바뀌지 않은 스타일은 이전 줄을 그대로 복사)
+  · JSON 집계(styles-metadata.json)는 한 파일이라 증분 모드에서도 전체를 다시 직렬화함
 """
 
 import os
 import sys
 import json
+import argparse
 from datetime import datetime
 
+from dataset_index import load_dataset_index, read_text
+from incremental_build import BuildManifest, load_previous_records
+from jsonl_store import JsonlWriter
+from profiling import add_bytes, span, start_run
+
 sys.stdout.reconfigure(encoding='utf-8')
 
-# 데이터셋 경로
-BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\women_cut_recipe"
-SERIES = ["FAL", "FBL", "FCL", "FDL", "FEL", "FFL", "FGL", "FHL"]
+# 출력 경로
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "styles-metadata.json")
+JSONL_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "styles-metadata.jsonl")
+FIRESTORE_DIR = os.path.join(os.path.dirname(__file__), "firestore-data")
+
+# 메타데이터 생성 로직이 바뀌면 올릴 것 (증분 모드에서 전체 재생성)
+METADATA_BUILD_VERSION = 1
 
 # 기장 코드 매핑
 LENGTH_MAP = {
@@ -48,161 +61,248 @@ def detect_shape_from_text(text):
 
     return None
 
-def generate_metadata():
-    print("=" * 70)
-    print("메타데이터 JSON 생성")
-    print("=" * 70)
-
-    all_metadata = []
-    stats = {
-        "total": 0,
-        "with_caption": 0,
-        "with_result": 0,
-        "with_diagrams": 0
+def metadata_inputs(style):
+    """메타데이터에 영향을 주는 입력 파일 (자막 / 결과 이미지 / 도해도)"""
+    entries = [style.find_caption(), style.find_result()] + style.diagrams()
+    return [entry for entry in entries if entry]
+
+def build_style_metadata(style, series):
+    """스타일 폴더 하나의 메타데이터 생성"""
+    style_id = style.style_id
+
+    # 기본 메타데이터
+    length_code = style_id[1] if len(style_id) >= 2 else None
+    length_info = LENGTH_MAP.get(length_code, {})
+
+    metadata = {
+        "styleId": style_id,
+        "series": series,
+        "length": {
+            "code": length_code,
+            "ko": length_info.get('ko'),
+            "en": length_info.get('en'),
+            "order": length_info.get('order')
+        },
+        "shape": None,
+        "texture": None,
+        "bangs": None,
+        "difficulty": None,
+        "caption": None,
+        "files": {
+            "result": None,
+            "diagrams": [],
+            "caption": None
+        },
+        "gcsUrls": {
+            "result": None,
+            "diagrams": []
+        },
+        "createdAt": datetime.now().isoformat(),
+        "embedding": None  # Gemini 임베딩용
     }
 
-    for series in SERIES:
-        series_path = os.path.join(BASE_PATH, series)
-        if not os.path.exists(series_path):
-            continue
-
-        style_folders = sorted([d for d in os.listdir(series_path)
-                               if os.path.isdir(os.path.join(series_path, d))])
-
-        print(f"\n📁 {series} 시리즈: {len(style_folders)}개")
-        print("-" * 50)
-
-        for style_id in style_folders:
-            style_path = os.path.join(series_path, style_id)
-            stats["total"] += 1
-
-            # 기본 메타데이터
-            length_code = style_id[1] if len(style_id) >= 2 else None
-            length_info = LENGTH_MAP.get(length_code, {})
-
-            metadata = {
-                "styleId": style_id,
-                "series": series,
-                "length": {
-                    "code": length_code,
-                    "ko": length_info.get('ko'),
-                    "en": length_info.get('en'),
-                    "order": length_info.get('order')
-                },
-                "shape": None,
-                "texture": None,
-                "bangs": None,
-                "difficulty": None,
-                "caption": None,
-                "files": {
-                    "result": None,
-                    "diagrams": [],
-                    "caption": None
-                },
-                "gcsUrls": {
-                    "result": None,
-                    "diagrams": []
-                },
-                "createdAt": datetime.now().isoformat(),
-                "embedding": None  # Gemini 임베딩용
-            }
-
-            files = os.listdir(style_path)
-
-            # 1. 자막 파일
-            caption_patterns = [f"{style_id}(자막).txt", f"{style_id}-jamag.txt",
-                               f"{style_id}_자막.txt", f"{style_id}.txt"]
-            for pattern in caption_patterns:
-                if pattern in files:
-                    caption_path = os.path.join(style_path, pattern)
-                    try:
-                        with open(caption_path, 'r', encoding='utf-8') as f:
-                            caption_text = f.read().strip()
-                        metadata["caption"] = caption_text
-                        metadata["files"]["caption"] = pattern
-                        stats["with_caption"] += 1
-
-                        # 형태 추출
-                        shape_info = detect_shape_from_text(caption_text)
-                        if shape_info:
-                            metadata["shape"] = shape_info
-                    except:
-                        pass
-                    break
-
-            # 2. 결과 이미지
-            result_patterns = ["result.jpg", "result.png", "1.png", "1.jpg",
-                             f"{style_id}.jpg", f"{style_id}.png"]
-            for pattern in result_patterns:
-                if pattern in files:
-                    metadata["files"]["result"] = pattern
-                    stats["with_result"] += 1
-                    break
-
-            # 아트보드 패턴
-            if not metadata["files"]["result"]:
-                for f in files:
-                    if f.startswith("아트보드"):
-                        metadata["files"]["result"] = f
-                        stats["with_result"] += 1
-                        break
-
-            # 3. 도해도 이미지들
-            diagrams = sorted([f for f in files if f.startswith("SR_") and f.endswith(".png")])
-            metadata["files"]["diagrams"] = diagrams
-            if diagrams:
-                stats["with_diagrams"] += 1
-
-            # GCS URL 미리 설정 (버킷명은 나중에 변경)
-            bucket_name = "hairgator-styles"
-            if metadata["files"]["result"]:
-                metadata["gcsUrls"]["result"] = f"gs://{bucket_name}/{series}/{style_id}/{metadata['files']['result']}"
-            for diag in diagrams:
-                metadata["gcsUrls"]["diagrams"].append(f"gs://{bucket_name}/{series}/{style_id}/{diag}")
-
-            all_metadata.append(metadata)
-
-            # 상태 출력
-            caption_ok = "📄" if metadata["caption"] else "❌"
-            result_ok = "🖼️" if metadata["files"]["result"] else "❌"
-            diag_cnt = len(diagrams)
-            shape_str = metadata["shape"]["ko"] if metadata["shape"] else "-"
-
-            print(f"  ✅ {style_id}: {caption_ok} | {result_ok} | 📊{diag_cnt}장 | {metadata['length']['ko']} | {shape_str}")
-
-    # 통계 출력
-    print("\n" + "=" * 70)
-    print("📊 메타데이터 생성 완료")
+    # 1. 자막 파일
+    caption = style.find_caption()
+    if caption:
+        try:
+            caption_text = read_text(style, caption).strip()
+            metadata["caption"] = caption_text
+            metadata["files"]["caption"] = caption.name
+
+            # 형태 추출
+            shape_info = detect_shape_from_text(caption_text)
+            if shape_info:
+                metadata["shape"] = shape_info
+        except:
+            pass
+
+    # 2. 결과 이미지 (고정 패턴 → 아트보드 패턴)
+    result = style.find_result()
+    if result:
+        metadata["files"]["result"] = result.name
+
+    # 3. 도해도 이미지들
+    diagrams = [f.name for f in style.diagrams()]
+    metadata["files"]["diagrams"] = diagrams
+
+    # GCS URL 미리 설정 (버킷명은 나중에 변경)
+    bucket_name = "hairgator-styles"
+    if metadata["files"]["result"]:
+        metadata["gcsUrls"]["result"] = f"gs://{bucket_name}/{series}/{style_id}/{metadata['files']['result']}"
+    for diag in diagrams:
+        metadata["gcsUrls"]["diagrams"].append(f"gs://{bucket_name}/{series}/{style_id}/{diag}")
+
+    return metadata
+
+def print_style_status(metadata):
+    caption_ok = "📄" if metadata["caption"] else "❌"
+    result_ok = "🖼️" if metadata["files"]["result"] else "❌"
+    diag_cnt = len(metadata["files"]["diagrams"])
+    shape_str = metadata["shape"]["ko"] if metadata["shape"] else "-"
+
+    print(f"  ✅ {metadata['styleId']}: {caption_ok} | {result_ok} | 📊{diag_cnt}장 | {metadata['length']['ko']} | {shape_str}")
+
+def empty_stats():
+    return {"total": 0, "with_caption": 0, "with_result": 0, "with_diagrams": 0}
+
+def add_stats(stats, metadata):
+    """스타일 레코드 하나를 통계에 반영 (재사용된 스타일 포함)"""
+    stats["total"] += 1
+    stats["with_caption"] += 1 if metadata["files"]["caption"] else 0
+    stats["with_result"] += 1 if metadata["files"]["result"] else 0
+    stats["with_diagrams"] += 1 if metadata["files"]["diagrams"] else 0
+    return stats
+
+def firestore_file_path(style_id):
+    return os.path.join(FIRESTORE_DIR, f"{style_id}.json")
+
+def write_firestore_file(meta):
+    text = json.dumps(meta, ensure_ascii=False, indent=2)
+    with span("fs.write_firestore_file"), open(firestore_file_path(meta["styleId"]), 'w', encoding='utf-8') as f:
+        f.write(text)
+    add_bytes("fs", bytes_out=len(text.encode('utf-8')))
+
+def generate_metadata(incremental=False, jsonl=False):
+    """incremental=True: 입력 파일이 바뀐 스타일만 다시 생성하고 나머지는 이전 결과 재사용
+    jsonl=True: styles-metadata.jsonl에 스타일이 만들어지는 대로 한 줄씩 기록 (+ 오프셋 인덱스)
+    """
+    print("=" * 70)
+    print("메타데이터 JSON 생성" + (" (증분 모드)" if incremental else "") + (" (JSONL)" if jsonl else ""))
     print("=" * 70)
-    print(f"총 스타일: {stats['total']}개")
-    print(f"자막 있음: {stats['with_caption']}개")
-    print(f"결과 이미지: {stats['with_result']}개")
-    print(f"도해도 있음: {stats['with_diagrams']}개")
-
-    # JSON 저장
-    output_path = os.path.join(os.path.dirname(__file__), "styles-metadata.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump({
+    if incremental and not jsonl:
+        print("💡 JSON 집계 파일은 증분 모드에서도 전체를 다시 씀 (스타일 단위로 고치려면 --jsonl)")
+
+    output_path = JSONL_OUTPUT_PATH if jsonl else OUTPUT_PATH
+
+    # 증분 모드에서는 파일 덮어쓰기까지 감지하도록 크기/mtime 갱신
+    with span("phase.load_index"):
+        index = load_dataset_index(refresh_stats=incremental)
+    manifest = BuildManifest("generate-metadata", METADATA_BUILD_VERSION)
+    with span("phase.load_previous"):
+        previous = load_previous_records(output_path) if incremental else {}
+
+    all_metadata = []    # JSON 모드에서만 모음 (JSONL은 바로 기록)
+    writer = JsonlWriter(JSONL_OUTPUT_PATH) if jsonl else None
+    stats = empty_stats()
+    style_ids = []
+    rebuilt = 0          # 새로 생성한 스타일 수
+    reused = 0
+    firestore_written = 0
+
+    os.makedirs(FIRESTORE_DIR, exist_ok=True)
+
+    try:
+        for series_entry, styles in index.iter_styles("women"):
+            series = series_entry.series
+            if not series_entry.exists:
+                continue
+
+            print(f"\n📁 {series} 시리즈: {len(styles)}개")
+            print("-" * 50)
+
+            series_reused = 0
+            for style in styles:
+                style_id = style.style_id
+                # 입력 해시는 증분 모드에서만 (전체 생성은 매니페스트를 건드리지 않음 → 파일을 다시 읽지 않음)
+                inputs = manifest.fingerprint(style, metadata_inputs(style)) if incremental else None
+                raw = None       # 재사용하는 JSONL 줄 (다시 직렬화하지 않고 복사)
+
+                if incremental and style_id in previous and manifest.is_unchanged(style_id, inputs):
+                    if writer:
+                        raw = previous.raw(style_id)
+                    metadata = json.loads(raw) if raw else previous[style_id]
+                    series_reused += 1
+                    # Firestore용 개별 JSON은 없을 때만 다시 씀
+                    if not os.path.exists(firestore_file_path(style_id)):
+                        write_firestore_file(metadata)
+                        firestore_written += 1
+                else:
+                    with span("cpu.build_style_metadata"):
+                        metadata = build_style_metadata(style, series)
+                    if incremental:
+                        manifest.record(style_id, inputs)
+                    rebuilt += 1
+                    print_style_status(metadata)
+                    write_firestore_file(metadata)
+                    firestore_written += 1
+
+                add_stats(stats, metadata)
+                style_ids.append(style_id)
+                if writer and raw:
+                    writer.write_raw(style_id, raw)
+                elif writer:
+                    writer.write(metadata)
+                else:
+                    all_metadata.append(metadata)
+
+            if series_reused:
+                print(f"  ♻️ 변경 없음: {series_reused}개 재사용")
+            reused += series_reused
+
+        removed = manifest.prune(style_ids)
+
+        # 통계 출력
+        print("\n" + "=" * 70)
+        print("📊 메타데이터 생성 완료")
+        print("=" * 70)
+        print(f"총 스타일: {stats['total']}개")
+        print(f"자막 있음: {stats['with_caption']}개")
+        print(f"결과 이미지: {stats['with_result']}개")
+        print(f"도해도 있음: {stats['with_diagrams']}개")
+        if incremental:
+            print(f"재생성: {rebuilt}개 / 재사용: {reused}개 / 삭제: {len(removed)}개 (해시 계산 {manifest.hashed}개 파일)")
+
+        if incremental and not rebuilt and not removed and os.path.exists(output_path):
+            manifest.save()
+            print("\n✅ 변경된 스타일 없음 - 출력 파일 유지")
+            return all_metadata
+
+        # 저장
+        summary = {
             "generatedAt": datetime.now().isoformat(),
             "totalStyles": stats["total"],
-            "stats": stats,
-            "styles": all_metadata
-        }, f, ensure_ascii=False, indent=2)
-
-    print(f"\n💾 메타데이터 저장: {output_path}")
-
-    # Firestore 업로드용 개별 JSON도 생성
-    firestore_dir = os.path.join(os.path.dirname(__file__), "firestore-data")
-    os.makedirs(firestore_dir, exist_ok=True)
-
-    for meta in all_metadata:
-        style_file = os.path.join(firestore_dir, f"{meta['styleId']}.json")
-        with open(style_file, 'w', encoding='utf-8') as f:
-            json.dump(meta, f, ensure_ascii=False, indent=2)
-
-    print(f"💾 Firestore용 개별 JSON: {firestore_dir}/ ({len(all_metadata)}개 파일)")
-
+            "stats": stats
+        }
+        if writer:
+            # 이전 JSONL을 연 채로 교체하면 Windows에서 PermissionError → 재사용이 끝났으니 먼저 닫음
+            if hasattr(previous, "close"):
+                previous.close()
+            with span("fs.write_output"):
+                writer.commit(meta=summary)
+            print(f"\n💾 메타데이터 저장: {JSONL_OUTPUT_PATH} (+ .idx 오프셋 인덱스)")
+        else:
+            with span("fs.write_output"), open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+                json.dump({**summary, "styles": all_metadata}, f, ensure_ascii=False, indent=2)
+            print(f"\n💾 메타데이터 저장: {OUTPUT_PATH}")
+    finally:
+        if writer:
+            writer.discard()
+        if hasattr(previous, "close"):
+            previous.close()
+
+    # 데이터셋에서 사라진 스타일의 Firestore용 JSON 정리 (증분 모드)
+    if incremental:
+        for style_id in removed:
+            if os.path.exists(firestore_file_path(style_id)):
+                os.remove(firestore_file_path(style_id))
+        print(f"💾 Firestore용 개별 JSON: {FIRESTORE_DIR}/ ({firestore_written}개 갱신, {len(removed)}개 삭제)")
+    else:
+        print(f"💾 Firestore용 개별 JSON: {FIRESTORE_DIR}/ ({firestore_written}개 파일)")
+
+    if incremental:
+        manifest.save()
     return all_metadata
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="메타데이터 JSON 생성")
+    parser.add_argument("--incremental", action="store_true",
+                        help="입력 파일(자막/결과 이미지/도해도)이 바뀐 스타일만 다시 생성 "
+                             "(처음 한 번은 모든 입력 파일 해시 계산)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="styles-metadata.jsonl (한 줄 = 한 스타일) + 오프셋 인덱스로 스트리밍 출력")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    generate_metadata()
+    args = parse_args()
+    start_run("generate-metadata")
+    generate_metadata(incremental=args.incremental, jsonl=args.jsonl)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Vision 호출 전 도해도 이미지 축소 + 재인코딩
+- 긴 변을 max_edge 이하로 축소 (선 도해도는 원본 해상도가 필요 없음)
+- WebP / JPEG / 팔레트 PNG로 재인코딩
+- 결과는 블롭 저장소(blob_store.BlobStore)에 저장, (원본 해시 + 변환 설정) → 결과 해시 표로 캐시
+- 재인코딩해도 작아지지 않으면 원본 그대로 사용 (이미 작은 선 그림 PNG 등)
+"""
+
+import os
+import io
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+from PIL import Image
+
+from blob_store import DEFAULT_BLOB_DIR
+from profiling import span
+
+# ==================== 설정 ====================
+
+DEFAULT_MAX_EDGE = 1024
+DEFAULT_FORMAT = "webp"
+DEFAULT_QUALITY = 85
+PALETTE_COLORS = 64
+
+IMAGE_FORMATS = {
+    # 이름: (Pillow 포맷, MIME)
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+# digest: 실제로 보낼 이미지의 SHA-256 (분석 캐시 키로 사용)
+PreparedImage = namedtuple("PreparedImage", ["digest", "mime_type", "source_size", "size", "width", "height"])
+
+def sniff_mime_type(data):
+    """이미지 바이트 앞부분으로 MIME 판별"""
+    head = bytes(data[:12])
+    if head.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+def encode_image(img, image_format=DEFAULT_FORMAT, quality=DEFAULT_QUALITY):
+    """PIL 이미지 → bytes"""
+    pil_format = IMAGE_FORMATS[image_format][0]
+    out = io.BytesIO()
+    if image_format == "png":
+        # 선 도해도는 색이 적어서 팔레트로 충분
+        img.convert("RGB").quantize(colors=PALETTE_COLORS, method=Image.Quantize.MEDIANCUT).save(
+            out, pil_format, optimize=True)
+    elif image_format == "jpeg":
+        img.convert("RGB").save(out, pil_format, quality=quality, optimize=True)
+    else:
+        img.save(out, pil_format, quality=quality, method=6)
+    return out.getvalue()
+
+def downscale_image(data, max_edge=DEFAULT_MAX_EDGE, image_format=DEFAULT_FORMAT, quality=DEFAULT_QUALITY):
+    """이미지 bytes(또는 mmap) → (bytes, mime_type, width, height)
+
+    재인코딩 결과가 원본보다 작지 않으면 원본을 그대로 반환
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        resized = max(img.size) > max_edge
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        if image_format == "jpeg" and img.mode in ("RGBA", "LA"):
+            # 투명 배경은 흰색으로
+            background = Image.new("RGB", img.size, "white")
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        if resized:
+            img = img.copy()
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        encoded = encode_image(img, image_format, quality)
+        width, height = img.size
+
+    if len(encoded) >= len(data):
+        with Image.open(io.BytesIO(data)) as original:
+            width, height = original.size
+        return bytes(data), sniff_mime_type(data), width, height
+    return encoded, IMAGE_FORMATS[image_format][1], width, height
+
+# ==================== 캐시 ====================
+
+class DiagramPreprocessor:
+    """원본 블롭 → 축소 블롭 (스레드 안전, 같은 원본 + 설정은 한 번만 변환)"""
+
+    def __init__(self, blob_store, max_edge=DEFAULT_MAX_EDGE, image_format=DEFAULT_FORMAT,
+                 quality=DEFAULT_QUALITY, path=None):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"지원하지 않는 포맷: {image_format}")
+        self.blob_store = blob_store
+        self.max_edge = max_edge
+        self.image_format = image_format
+        self.quality = quality
+        self.params = f"{image_format}-q{quality}-max{max_edge}"
+        self.stats = {"prepared": 0, "cached": 0, "failed": 0, "source_bytes": 0, "prepared_bytes": 0}
+
+        self._lock = threading.Lock()
+        path = path or os.path.join(getattr(blob_store, "root", DEFAULT_BLOB_DIR), "prepared.sqlite")
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prepared (
+                source_digest TEXT NOT NULL,
+                params        TEXT NOT NULL,
+                digest        TEXT NOT NULL,
+                mime_type     TEXT NOT NULL,
+                source_size   INTEGER NOT NULL,
+                size          INTEGER NOT NULL,
+                width         INTEGER NOT NULL,
+                height        INTEGER NOT NULL,
+                created_at    REAL NOT NULL,
+                PRIMARY KEY (source_digest, params)
+            )
+        """)
+        self._conn.commit()
+
+    def _count(self, prepared, cached):
+        with self._lock:
+            self.stats["cached" if cached else "prepared"] += 1
+            self.stats["source_bytes"] += prepared.source_size
+            self.stats["prepared_bytes"] += prepared.size
+
+    def prepare(self, source_digest):
+        """원본 블롭 해시 → PreparedImage (실패 시 None, 원본을 그대로 보내면 됨)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest, mime_type, source_size, size, width, height FROM prepared "
+                "WHERE source_digest=? AND params=?", (source_digest, self.params)
+            ).fetchone()
+        if row and self.blob_store.has(row[0]):
+            prepared = PreparedImage(*row)
+            self._count(prepared, cached=True)
+            return prepared
+
+        try:
+            with self.blob_store.open(source_digest) as data, span("cpu.image_downscale"):
+                source_size = len(data)
+                encoded, mime_type, width, height = downscale_image(
+                    data, self.max_edge, self.image_format, self.quality)
+        except Exception as e:
+            print(f"  ⚠️ 이미지 축소 실패 ({source_digest[:12]}): {e}")
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+
+        digest = self.blob_store.put(encoded)
+        prepared = PreparedImage(digest, mime_type, source_size, len(encoded), width, height)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prepared VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (source_digest, self.params, *prepared, time.time())
+            )
+            self._conn.commit()
+        self._count(prepared, cached=False)
+        return prepared
+
+    def report(self):
+        """요청 페이로드(base64) 기준 절감 통계"""
+        source = self.stats["source_bytes"]
+        prepared = self.stats["prepared_bytes"]
+        return {
+            "images": self.stats["prepared"] + self.stats["cached"],
+            "source_bytes": source,
+            "prepared_bytes": prepared,
+            "payload_source_bytes": (source + 2) // 3 * 4,
+            "payload_prepared_bytes": (prepared + 2) // 3 * 4,
+            "saved_ratio": 1 - prepared / source if source else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+증분 빌드 매니페스트 (generate-metadata, parse-captions 공용)
+- 스타일별 입력 파일(자막 / 결과 이미지 / 도해도)의 크기 + mtime + SHA-256 기록
+- 크기/mtime이 그대로면 해시를 다시 계산하지 않음 (바뀐 파일만 읽음)
+- mtime만 바뀌고 내용이 같으면(복사, touch) 변경 없음으로 처리
+- 단계 로직이 바뀌면 version을 올려서 전체 재생성
+"""
+
+import os
+import json
+import hashlib
+
+from dataset_index import CACHE_DIR
+from jsonl_store import JsonlRecords
+from profiling import add_bytes, span
+
+MANIFEST_FORMAT = 1
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """파일 내용 SHA-256 hex (큰 이미지도 청크 단위로 읽음)"""
+    digest = hashlib.sha256()
+    size = 0
+    with span("fs.hash_file"), open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    add_bytes("fs", bytes_in=size)
+    return digest.hexdigest()
+
+class BuildManifest:
+    """단계별 입력 파일 매니페스트 (scripts/.cache/<stage>-manifest.json)"""
+
+    def __init__(self, stage, version, path=None):
+        self.stage = stage
+        self.version = version
+        self.path = path or os.path.join(CACHE_DIR, f"{stage}-manifest.json")
+        self.styles = {}     # style_id -> {파일명: {size, mtime, sha256}}
+        self.hashed = 0      # 이번 실행에서 실제로 해시를 계산한 파일 수
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("format") == MANIFEST_FORMAT and data.get("version") == version:
+                    self.styles = data.get("styles", {})
+            except (ValueError, OSError):
+                pass
+
+    def fingerprint(self, style, entries):
+        """인덱스 FileEntry 목록 → {파일명: {size, mtime, sha256}}"""
+        previous = self.styles.get(style.style_id, {})
+        inputs = {}
+        for entry in entries:
+            prev = previous.get(entry.name)
+            if prev and prev["size"] == entry.size and prev["mtime"] == entry.mtime:
+                inputs[entry.name] = prev
+                continue
+            inputs[entry.name] = {
+                "size": entry.size,
+                "mtime": entry.mtime,
+                "sha256": file_sha256(style.file_path(entry))
+            }
+            self.hashed += 1
+        return inputs
+
+    def is_unchanged(self, style_id, inputs):
+        """파일 구성과 내용 해시가 지난 빌드와 같은지"""
+        previous = self.styles.get(style_id)
+        if previous is None or previous.keys() != inputs.keys():
+            return False
+        return all(previous[name]["sha256"] == inputs[name]["sha256"] for name in inputs)
+
+    def record(self, style_id, inputs):
+        self.styles[style_id] = inputs
+
+    def prune(self, style_ids):
+        """데이터셋에서 사라진 스타일 제거 후 제거된 ID 목록 반환"""
+        keep = set(style_ids)
+        removed = [sid for sid in self.styles if sid not in keep]
+        for sid in removed:
+            del self.styles[sid]
+        return removed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": MANIFEST_FORMAT,
+                "stage": self.stage,
+                "version": self.version,
+                "styles": self.styles
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def load_previous_records(path, key="styles"):
+    """이전 산출물에서 {styleId: 레코드} 로드 (없거나 깨졌으면 빈 dict)
+
+    .jsonl이면 전체를 읽지 않고 오프셋 인덱스로 필요한 스타일만 읽는 JsonlRecords 반환
+    """
+    if path.endswith(".jsonl"):
+        return JsonlRecords(path)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {record["styleId"]: record for record in json.load(f).get(key, [])}
+    except (ValueError, KeyError, OSError):
+        return {}
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+대규모 스타일 / 룩 카탈로그용 근사 최근접 이웃 인덱스 (IVF, 순수 NumPy)
+- 학습: 정규화 벡터에 구면 k-means → 중심(centroid) nlist개 (표본 최대 TRAIN_SAMPLE_PER_LIST x nlist 행)
+- 역리스트: 벡터마다 가장 가까운 중심의 리스트에 넣음
+- 검색: 질의와 가까운 중심 nprobe개의 리스트만 내적 → top-k (nprobe = nlist면 완전 탐색과 같음)
+- 증분 추가 / 삭제: 중심은 그대로 두고 리스트에만 추가 / 제거 (재학습 없음)
+  · 학습 때보다 RETRAIN_GROWTH배 넘게 늘면 needs_retrain() → build-ivf-index.py가 다시 학습
+- 파일: .cache/ivf-index/<컬렉션>.f32 (리스트 순서로 이어 붙인 벡터) + .centroids.f32 + .json
+  (ID 표, 리스트 경계 offsets, 버전, 학습 정보) → 열 때 memmap, 리스트는 슬라이스라 복사 없음
+
+사용법:
+  index = IVFIndex.build(ids, matrix, nlist=1024)
+  index = IVFIndex.train(sample, nlist=1024); index.add(chunk_ids, chunk)    # 나눠서 넣기
+  index.add(["LOOK0001"], [vector])
+  index.search(query_vector, k=10, nprobe=16)     # [(id, 유사도), ...]
+  index.save("looks"); IVFIndex.load("looks")
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+from profiling import span
+from vector_index import CACHE_DIR, normalize_rows
+
+# ==================== 설정 ====================
+
+DEFAULT_IVF_DIR = os.path.join(CACHE_DIR, "ivf-index")
+IVF_FORMAT = 1
+
+DEFAULT_NPROBE = 16
+KMEANS_ITERATIONS = 12
+TRAIN_SAMPLE_PER_LIST = 64
+RETRAIN_GROWTH = 2.0
+ASSIGN_CHUNK = 16384
+
+def default_nlist(count):
+    """리스트 수 기본값 ≈ √N (리스트당 평균 √N개 → 중심 비교와 리스트 스캔 비용이 비슷)"""
+    return max(1, min(count, int(round(np.sqrt(count)))))
+
+def ivf_paths(collection, directory=DEFAULT_IVF_DIR):
+    """(벡터 경로, 중심 경로, 메타 경로)"""
+    base = os.path.join(directory, collection)
+    return base + ".f32", base + ".centroids.f32", base + ".json"
+
+# ==================== 학습 / 할당 ====================
+
+def assign_lists(matrix, centroids, chunk=ASSIGN_CHUNK):
+    """행마다 가장 가까운(내적이 큰) 중심 번호"""
+    assignments = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), chunk):
+        block = np.asarray(matrix[start:start + chunk], dtype=np.float32)
+        assignments[start:start + chunk] = (block @ centroids.T).argmax(axis=1)
+    return assignments
+
+def train_centroids(matrix, nlist, iterations=KMEANS_ITERATIONS, seed=42):
+    """구면 k-means (정규화 벡터, 내적 기준) → (nlist, 차원) 정규화 중심
+
+    표본만으로 학습 (TRAIN_SAMPLE_PER_LIST x nlist 행), 빈 리스트는 무작위 표본 행으로 다시 시작
+    """
+    rng = np.random.default_rng(seed)
+    count = len(matrix)
+    nlist = max(1, min(nlist, count))
+    sample_size = min(count, nlist * TRAIN_SAMPLE_PER_LIST)
+    sample = np.sort(rng.choice(count, sample_size, replace=False)) if sample_size < count else np.arange(count)
+    sample = np.asarray(matrix[sample], dtype=np.float32)
+
+    with span("cpu.train_ivf", nlist=nlist, rows=len(sample)):
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = assign_lists(sample, centroids)
+            order = np.argsort(assignments, kind="stable")
+            counts = np.bincount(assignments, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            sums = np.zeros_like(centroids)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+            centroids = normalize_rows(sums).astype(np.float32)
+    return centroids
+
+# ==================== 인덱스 ====================
+
+class IVFIndex:
+    """중심 + 역리스트 (리스트마다 벡터 블록 / 행 번호 블록, 검색할 때 한 배열로 합침)"""
+
+    def __init__(self, centroids, meta=None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.nlist = len(self.centroids)
+        self.dims = self.centroids.shape[1]
+        self.meta = dict(meta or {})
+        self.ids = []                 # 행 번호 → id (삭제된 행은 None)
+        self.versions = {}
+        self._positions = {}          # id → 행 번호
+        self._row_list = []           # 행 번호 → 리스트 번호
+        self._vectors = [[] for _ in range(self.nlist)]
+        self._rows = [[] for _ in range(self.nlist)]
+        self.trained_count = self.meta.get("trainedCount", 0)
+
+    # ---------- 생성 ----------
+
+    @classmethod
+    def train(cls, sample, nlist, iterations=KMEANS_ITERATIONS, seed=42, meta=None):
+        """중심만 학습한 빈 인덱스 (벡터를 나눠서 add할 때)"""
+        index = cls(train_centroids(sample, nlist, iterations, seed), meta)
+        index.trained_count = len(sample)
+        return index
+
+    @classmethod
+    def build(cls, ids, matrix, nlist=None, versions=None, iterations=KMEANS_ITERATIONS, seed=42, meta=None):
+        """학습 + 전체 추가 (행렬은 ASSIGN_CHUNK 단위로 나눠 넣음 → 임시 배열이 청크 크기로 제한)"""
+        ids = list(ids)
+        index = cls.train(matrix, nlist or default_nlist(len(ids)), iterations, seed, meta)
+        for start in range(0, len(ids), ASSIGN_CHUNK):
+            index.add(ids[start:start + ASSIGN_CHUNK], matrix[start:start + ASSIGN_CHUNK])
+        index.versions.update(versions or {})
+        index.trained_count = len(ids)
+        return index
+
+    def add(self, ids, vectors, versions=None):
+        """벡터 추가 (이미 있는 id는 교체, 한 번에 같은 id가 여럿이면 마지막 것) - 중심은 그대로, 가까운 리스트에만 붙임"""
+        ids = list(ids)
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        last = {doc_id: i for i, doc_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids = [ids[i] for i in keep]
+            vectors = vectors[keep]
+        vectors = normalize_rows(vectors)
+        if vectors.shape[1] != self.dims:
+            raise ValueError(f"벡터 차원 {vectors.shape[1]} != 인덱스 차원 {self.dims}")
+        self.remove([doc_id for doc_id in ids if doc_id in self._positions])
+
+        with span("cpu.ivf_add", rows=len(ids)):
+            assignments = assign_lists(vectors, self.centroids)
+            first = len(self.ids)
+            rows = np.arange(first, first + len(ids))
+            self.ids.extend(ids)
+            self._row_list.extend(assignments.tolist())
+            self._positions.update((doc_id, first + i) for i, doc_id in enumerate(ids))
+            if versions:
+                self.versions.update(versions)
+
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+            for c in np.flatnonzero(np.diff(bounds)):
+                block = order[bounds[c]:bounds[c + 1]]
+                self._vectors[c].append(vectors[block])
+                self._rows[c].append(rows[block])
+
+    def remove(self, ids):
+        """id 삭제 → 실제로 지운 수 (해당 리스트만 다시 만듦)"""
+        by_list = {}
+        for doc_id in ids:
+            row = self._positions.pop(doc_id, None)
+            if row is None:
+                continue
+            self.ids[row] = None
+            self.versions.pop(doc_id, None)
+            by_list.setdefault(self._row_list[row], set()).add(row)
+
+        for c, rows in by_list.items():
+            vectors, list_rows = self._list(c)
+            keep = ~np.isin(list_rows, list(rows))
+            self._vectors[c] = [vectors[keep]]
+            self._rows[c] = [list_rows[keep]]
+        return sum(len(rows) for rows in by_list.values())
+
+    # ---------- 조회 ----------
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _list(self, c):
+        """리스트 c → (벡터 행렬, 행 번호) - 블록이 여러 개면 하나로 합쳐 둠"""
+        if len(self._vectors[c]) != 1:
+            if not self._vectors[c]:
+                return np.zeros((0, self.dims), dtype=np.float32), np.zeros(0, dtype=np.int64)
+            self._vectors[c] = [np.concatenate(self._vectors[c])]
+            self._rows[c] = [np.concatenate(self._rows[c])]
+        return self._vectors[c][0], self._rows[c][0]
+
+    def list_sizes(self):
+        return np.array([sum(len(rows) for rows in self._rows[c]) for c in range(self.nlist)])
+
+    def needs_retrain(self):
+        """학습 이후 RETRAIN_GROWTH배 넘게 늘었는지 (중심이 데이터 분포를 못 따라감)"""
+        return len(self) > max(self.trained_count, 1) * RETRAIN_GROWTH
+
+    def vector(self, doc_id):
+        """저장된 (정규화된) 벡터, 없으면 None"""
+        row = self._positions.get(doc_id)
+        if row is None:
+            return None
+        vectors, rows = self._list(self._row_list[row])
+        return np.array(vectors[np.flatnonzero(rows == row)[0]])
+
+    def search(self, query, k=5, nprobe=None, exclude=()):
+        """top-k [(id, 유사도)] (유사도 내림차순) - 가까운 리스트 nprobe개만 탐색"""
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape != (self.dims,):
+            raise ValueError(f"질의 차원 {query.shape} != 인덱스 차원 {self.dims}")
+        norm = np.linalg.norm(query)
+        if norm == 0 or not len(self):
+            return []
+        query = query / norm
+        nprobe = min(nprobe or self.meta.get("nprobe") or DEFAULT_NPROBE, self.nlist)
+
+        with span("cpu.ivf_search", nprobe=nprobe):
+            centroid_scores = self.centroids @ query
+            probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < self.nlist \
+                else np.arange(self.nlist)
+            scores, rows = [], []
+            for c in probe:
+                vectors, list_rows = self._list(c)
+                if len(list_rows):
+                    scores.append(vectors @ query)
+                    rows.append(list_rows)
+            if not rows:
+                return []
+            scores = np.concatenate(scores)
+            rows = np.concatenate(rows)
+
+            excluded = [row for row in (self._positions.get(doc_id) for doc_id in exclude) if row is not None]
+            candidates = len(rows)
+            if excluded:
+                mask = np.isin(rows, excluded)
+                scores[mask] = -np.inf
+                candidates -= int(mask.sum())
+            k = min(k, candidates)
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    # ---------- 저장 ----------
+
+    def save(self, collection, directory=DEFAULT_IVF_DIR, **fields):
+        """리스트 순서로 벡터를 이어 붙여 저장 (벡터 → 중심 → 메타 순서로 교체) → 메타 dict"""
+        vectors_path, centroids_path, meta_path = ivf_paths(collection, directory)
+        os.makedirs(directory, exist_ok=True)
+
+        offsets, ids, digest = [0], [], hashlib.sha256()
+        with span("fs.write_ivf_index", collection=collection):
+            tmp_path = vectors_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                for c in range(self.nlist):
+                    vectors, rows = self._list(c)
+                    data = np.ascontiguousarray(vectors, dtype="<f4").tobytes()
+                    f.write(data)
+                    digest.update(data)
+                    ids.extend(self.ids[row] for row in rows)
+                    offsets.append(len(ids))
+            os.replace(tmp_path, vectors_path)
+
+            tmp_path = centroids_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(np.ascontiguousarray(self.centroids, dtype="<f4").tobytes())
+            os.replace(tmp_path, centroids_path)
+
+            meta = {
+                **self.meta,
+                **fields,
+                "format": IVF_FORMAT,
+                "collection": collection,
+                "dims": self.dims,
+                "count": len(ids),
+                "nlist": self.nlist,
+                "trainedCount": self.trained_count,
+                "sha256": digest.hexdigest(),
+                "builtAt": datetime.now().isoformat(timespec="seconds"),
+                "offsets": offsets,
+                "ids": ids,
+                "versions": {doc_id: self.versions[doc_id] for doc_id in ids if doc_id in self.versions},
+            }
+            tmp_path = meta_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, meta_path)
+        self.meta = meta
+        return meta
+
+    @classmethod
+    def load(cls, collection, directory=DEFAULT_IVF_DIR, mmap=True):
+        """인덱스 열기 (벡터는 memmap, 리스트는 슬라이스)
+
+        mmap=False: 메모리로 읽음 (증분 갱신 후 같은 경로에 다시 저장할 때 - Windows는 매핑된 파일을 교체할 수 없음)
+        """
+        meta = load_ivf_meta(collection, directory)
+        if meta is None:
+            raise FileNotFoundError(f"IVF 인덱스가 없습니다: {ivf_paths(collection, directory)[2]}")
+        vectors_path, centroids_path, _ = ivf_paths(collection, directory)
+        dims, count, nlist = meta["dims"], meta["count"], meta["nlist"]
+        if os.path.getsize(vectors_path) != count * dims * 4:
+            raise ValueError(f"IVF 인덱스 크기 불일치: {vectors_path}")
+
+        centroids = np.fromfile(centroids_path, dtype="<f4").reshape(nlist, dims)
+        if not count:
+            vectors = np.zeros((0, dims), dtype=np.float32)
+        elif mmap:
+            vectors = np.memmap(vectors_path, dtype="<f4", mode="r", shape=(count, dims))
+        else:
+            vectors = np.fromfile(vectors_path, dtype="<f4").reshape(count, dims)
+        index = cls(centroids, meta)
+        index.ids = list(meta["ids"])
+        index.versions = dict(meta.get("versions", {}))
+        index._positions = {doc_id: row for row, doc_id in enumerate(index.ids)}
+        offsets = meta["offsets"]
+        for c in range(nlist):
+            start, end = offsets[c], offsets[c + 1]
+            index._row_list.extend([c] * (end - start))
+            if end > start:
+                index._vectors[c] = [vectors[start:end]]
+                index._rows[c] = [np.arange(start, end)]
+        return index
+
+def load_ivf_meta(collection, directory=DEFAULT_IVF_DIR):
+    """메타 JSON (없거나 깨졌으면 None)"""
+    _, _, meta_path = ivf_paths(collection, directory)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format") == IVF_FORMAT else None
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 레코드 JSONL 저장 (한 줄 = 한 스타일) + 오프셋 인덱스
+- 스타일이 만들어지는 즉시 한 줄씩 기록 (전체 리스트를 메모리에 모으지 않음)
+- <파일>.idx: {styleId: [바이트 오프셋, 길이]} + 집계 통계(meta)
+- 스타일 하나만 필요하면 seek 한 번으로 읽음, 전체는 한 줄씩 스트리밍
+- 임시 파일에 쓰고 완료 시 교체 (중간에 실패해도 이전 파일 유지)
+- 증분 빌드는 바뀌지 않은 레코드를 이전 파일의 줄 그대로 복사 (write_raw - 다시 직렬화하지 않음)
+
+사용법:
+  python jsonl_store.py styles-metadata.jsonl FAL0001   # 스타일 하나 출력
+  python jsonl_store.py parsed-captions.jsonl           # 집계(meta)와 스타일 수 출력
+"""
+
+import os
+import sys
+import json
+
+INDEX_FORMAT = 1
+
+def index_path(path):
+    return path + ".idx"
+
+# ==================== 쓰기 ====================
+
+class JsonlWriter:
+    """with JsonlWriter(path) as writer: writer.write(record) ... writer.commit(meta)
+
+    commit 없이 블록을 빠져나오면(예외 포함) 임시 파일을 버리고 기존 파일 유지
+    """
+
+    def __init__(self, path, key="styleId"):
+        self.path = path
+        self.key = key
+        self.count = 0
+        self._offsets = {}
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, 'wb')
+
+    def write(self, record):
+        self.write_raw(record[self.key], json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def write_raw(self, key, line):
+        """이미 직렬화된 한 줄(JsonlRecords.raw) 그대로 기록"""
+        self._offsets[key] = [self._file.tell(), len(line)]
+        self._file.write(line)
+        self.count += 1
+
+    def commit(self, meta=None):
+        """파일 교체 + 오프셋 인덱스 기록
+
+        같은 파일을 읽는 JsonlRecords는 먼저 close() (Windows는 열린 파일을 os.replace로 교체 불가)
+        """
+        self._file.close()
+        idx_tmp = index_path(self.path) + ".tmp"
+        with open(idx_tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "format": INDEX_FORMAT,
+                "key": self.key,
+                "count": self.count,
+                "meta": meta or {},
+                "offsets": self._offsets
+            }, f, ensure_ascii=False)
+        os.replace(self._tmp_path, self.path)
+        os.replace(idx_tmp, index_path(self.path))
+        self._file = None
+
+    def discard(self):
+        if self._file:
+            self._file.close()
+            os.remove(self._tmp_path)
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.discard()
+        return False
+
+# ==================== 읽기 ====================
+
+def load_offset_index(path):
+    """오프셋 인덱스 로드 (없으면 None)"""
+    if not os.path.exists(index_path(path)):
+        return None
+    with open(index_path(path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_records(path):
+    """JSONL 전체를 한 줄씩 스트리밍"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+class JsonlRecords:
+    """styleId로 레코드 하나씩 읽는 읽기 전용 매핑 (필요할 때만 seek해서 읽음)"""
+
+    def __init__(self, path):
+        self.path = path
+        index = load_offset_index(path) or {}
+        self.meta = index.get("meta", {})
+        self._offsets = index.get("offsets", {})
+        self._file = open(path, 'rb') if self._offsets and os.path.exists(path) else None
+
+    def __contains__(self, style_id):
+        return self._file is not None and style_id in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, style_id):
+        return json.loads(self.raw(style_id))
+
+    def raw(self, style_id):
+        """레코드 한 줄 (줄바꿈 포함 bytes) - 파싱 없이 JsonlWriter.write_raw로 복사할 때"""
+        if style_id not in self:
+            raise KeyError(style_id)
+        offset, length = self._offsets[style_id]
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def get(self, style_id, default=None):
+        return self[style_id] if style_id in self else default
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+def read_record(path, style_id):
+    """스타일 하나만 읽기 (없으면 None)"""
+    records = JsonlRecords(path)
+    try:
+        return records.get(style_id)
+    finally:
+        records.close()
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    path = sys.argv[1]
+    if len(sys.argv) > 2:
+        record = read_record(path, sys.argv[2])
+        if record is None:
+            print(f"❌ {sys.argv[2]}: 없음")
+            return
+        print(json.dumps(record, ensure_ascii=False, indent=2))
+    else:
+        index = load_offset_index(path) or {}
+        print(json.dumps(index.get("meta", {}), ensure_ascii=False, indent=2))
+        print(f"스타일 {index.get('count', 0)}개")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 모델 전환 (서비스 중단 없이 한 번에)
+1. 설정 문서(embedding_models/<컬렉션>)에 전환 중인 모델 기록
+2. generate-embeddings.py / generate-men-embeddings.py --shadow <모델>을 컬렉션별로 동시에 실행
+   → 새 모델 벡터를 섀도 필드에 채움 (배치 + 동시 요청 + 로컬 저장소 + 체크포인트 그대로 사용)
+3. 커버리지 100%면 문서별로 두 슬롯을 맞바꾸고 설정 문서의 active를 변경 (embedding_models 참고)
+- 중간에 멈추면 같은 명령을 다시 실행 (--resume이면 체크포인트에서 이어서, 이미 채운 문서는 스킵)
+- 되돌리기도 같은 명령: 이전 모델 벡터가 섀도 슬롯에 남아 있어서 임베딩 호출 없이 맞바꾸기만 함
+- 전환은 벡터를 읽는 모든 쪽이 active 모델 슬롯을 고를 때만 안전 (읽는 쪽 목록: firestore-schema.md "임베딩 모델 전환")
+  → 규칙을 따르지 않는 읽기가 남은 컬렉션은 COLLECTION_SCRIPTS에 넣지 않음 (hairstyles)
+
+사용법:
+  python migrate-embedding-model.py --status
+  python migrate-embedding-model.py --model text-embedding-004
+  python migrate-embedding-model.py --model text-embedding-004 --resume --concurrency 8 --rps 10
+  python migrate-embedding-model.py --model text-embedding-004 --collection men_styles --no-switch
+"""
+
+import os
+import sys
+import argparse
+import threading
+import functools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from embedding_models import (
+    MODELS,
+    begin_migration,
+    embedding_coverage,
+    get_active_model,
+    load_config,
+    promote_shadow,
+    resolve_model,
+    set_active_model,
+)
+from embedding_pipeline import DEFAULT_CONCURRENCY, DEFAULT_RPS, MAX_BATCH_SIZE
+from profiling import span, start_run
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 컬렉션 → 임베딩 스크립트 (읽는 쪽이 모두 active 모델 슬롯을 고르는 컬렉션만)
+COLLECTION_SCRIPTS = {
+    "styles": "generate-embeddings.py",
+    "men_styles": "generate-men-embeddings.py",
+}
+
+# ==================== Firebase 초기화 ====================
+
+def init_firebase():
+    """Firebase Admin SDK 초기화"""
+    if not os.path.exists(SERVICE_ACCOUNT_KEY):
+        print(f"❌ Firebase 서비스 계정 키가 없습니다: {SERVICE_ACCOUNT_KEY}")
+        return None
+
+    try:
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
+            firebase_admin.initialize_app(cred)
+
+        db = firestore.client()
+        print("✅ Firebase Firestore 초기화 완료")
+        return db
+    except Exception as e:
+        print(f"❌ Firebase 초기화 실패: {e}")
+        return None
+
+# ==================== 섀도 채우기 ====================
+
+_print_lock = threading.Lock()
+
+def run_backfill(collection, model, args):
+    """임베딩 스크립트를 --shadow로 실행 (출력은 [컬렉션] 접두어로) → 종료 코드"""
+    script = COLLECTION_SCRIPTS[collection]
+    command = [sys.executable, "-u", os.path.join(SCRIPTS_DIR, script), "--shadow", model["name"],
+               "--batch-size", str(args.batch_size), "--concurrency", str(args.concurrency),
+               "--rps", str(args.rps)]
+    if args.resume:
+        command.append("--resume")
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+
+    process = subprocess.Popen(command, cwd=SCRIPTS_DIR, env=env, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, encoding="utf-8", errors="replace")
+    for line in process.stdout:
+        with _print_lock:
+            print(f"[{collection}] {line.rstrip()}")
+    return process.wait()
+
+# ==================== 전환 ====================
+
+def print_status(db, collections):
+    for collection in collections:
+        config = load_config(db, collection)
+        active = get_active_model(db, collection)
+        print(f"\n📋 {collection}: active {active['name']} (v{active['version']})"
+              + (f", 전환 중 {config['shadow']}" if config.get("shadow") else "")
+              + (f", 이전 {config['previous']}" if config.get("previous") else ""))
+        for name in sorted(MODELS):
+            covered, missing = embedding_coverage(db, collection, resolve_model(name))
+            total = covered + len(missing)
+            if covered:
+                print(f"  {name:<20} {covered}/{total} ({covered / total * 100:.1f}%)")
+
+def switch_collection(db, collection, model, previous, args):
+    """커버리지 확인 → 슬롯 맞바꾸기 → active 변경. 반환: 성공 여부"""
+    covered, missing = embedding_coverage(db, collection, model)
+    total = covered + len(missing)
+    print(f"\n📊 {collection}: {model['name']} 커버리지 {covered}/{total}")
+    if missing:
+        print(f"  ❌ {len(missing)}개 문서에 새 모델 벡터 없음 - 전환하지 않음 (예: {', '.join(missing[:5])})")
+        print("  같은 명령을 다시 실행하면 빠진 문서만 채웁니다")
+        return False
+    if args.no_switch:
+        print("  ⏭️ --no-switch: 섀도 채우기까지만")
+        return True
+
+    with span("phase.promote_shadow", collection=collection):
+        promoted, failed = promote_shadow(db, collection, model)
+    if failed:
+        print(f"  ❌ 슬롯 맞바꾸기 실패 {len(failed)}개 - active는 {previous['name']} 유지 (다시 실행하면 이어서)")
+        return False
+    set_active_model(db, collection, model, previous, firestore.SERVER_TIMESTAMP)
+    print(f"  ✅ 슬롯 맞바꾸기 {len(promoted)}개 → active: {previous['name']} → {model['name']}")
+    return True
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="임베딩 모델 전환 (섀도 필드 채우기 → 원자적 전환)")
+    parser.add_argument("--model", choices=sorted(MODELS), help="전환할 모델")
+    parser.add_argument("--collection", action="append", choices=sorted(COLLECTION_SCRIPTS), default=[],
+                        help="대상 컬렉션 (여러 번 사용 가능, 기본: 전체)")
+    parser.add_argument("--status", action="store_true", help="모델별 커버리지만 출력")
+    parser.add_argument("--resume", action="store_true", help="섀도 채우기를 체크포인트에서 이어서 실행")
+    parser.add_argument("--no-switch", action="store_true", help="섀도 채우기 + 커버리지 확인까지만")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="컬렉션당 동시 배치 요청 수")
+    parser.add_argument("--rps", type=float, default=DEFAULT_RPS, help="컬렉션당 초당 최대 배치 요청 수")
+    args = parser.parse_args()
+    if not args.status and not args.model:
+        parser.error("--model 또는 --status가 필요합니다")
+    return args
+
+def main():
+    args = parse_args()
+    collections = args.collection or sorted(COLLECTION_SCRIPTS)
+
+    with span("phase.init_firebase"):
+        db = init_firebase()
+    if not db:
+        sys.exit(1)
+
+    if args.status:
+        print_status(db, collections)
+        return
+
+    start_run("migrate-embedding-model")
+    model = resolve_model(args.model)
+    print("=" * 70)
+    print(f"임베딩 모델 전환 → {model['name']} ({model['model']} v{model['version']})")
+    print("=" * 70)
+
+    previous = {}
+    for collection in collections:
+        previous[collection] = get_active_model(db, collection)
+        if previous[collection]["name"] == model["name"]:
+            print(f"  ⏭️ {collection}: 이미 {model['name']}")
+            continue
+        begin_migration(db, collection, model, firestore.SERVER_TIMESTAMP)
+    pending = [c for c in collections if previous[c]["name"] != model["name"]]
+    if not pending:
+        return
+
+    # 컬렉션별 섀도 채우기 동시 실행
+    print(f"\n🧠 섀도 채우기: {', '.join(pending)}")
+    with span("phase.backfill"), ThreadPoolExecutor(max_workers=len(pending)) as executor:
+        codes = dict(zip(pending, executor.map(lambda c: run_backfill(c, model, args), pending)))
+    for collection, code in codes.items():
+        if code != 0:
+            print(f"  ⚠️ {collection}: 임베딩 스크립트 종료 코드 {code} (커버리지로 전환 여부 판단)")
+
+    results = {c: switch_collection(db, c, model, previous[c], args) for c in pending}
+
+    print("\n" + "=" * 70)
+    print("📊 " + ", ".join(f"{c}: {'완료' if ok else '미완료'}" for c, ok in results.items()))
+    if all(results.values()) and not args.no_switch:
+        print("💡 로컬 벡터 인덱스는 embeddingKey가 바뀌어 다음 build-vector-index.py / run-pipeline.py에서 재생성됩니다")
+    if not all(results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,40 @@
 명령 1-2: 자막 파싱 및 용어 추출 스크립트
 - 자막 파일에서 기장, 형태, 질감, 앞머리, 난이도 추출
 - 정규화된 용어 매핑
+- --terms: 자막에 나오는 89용어 ID 목록도 기록 (용어가 많아 파싱이 느려지므로 필요할 때만)
+- --incremental: 자막이 바뀐 스타일만 다시 파싱
+  · 집계 파일을 스타일 단위로 고치는 것은 --jsonl만 (바뀌지 않은 스타일은 이전 줄을 그대로 복사)
+  · JSON 집계(parsed-captions.json)는 한 파일이라 증분 모드에서도 전체를 다시 직렬화함
 """
 
 import os
 import sys
 import json
 import re
+import math
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from dataset_index import load_dataset_index, read_text
+from incremental_build import BuildManifest, load_previous_records
+from jsonl_store import JsonlWriter
+from profiling import collect, get_profiler, span, start_run
+from term_matcher import TermMatcher, load_theory_terms
 
 sys.stdout.reconfigure(encoding='utf-8')
 
-# 데이터셋 경로
-BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\women_cut_recipe"
-SERIES = ["FAL", "FBL", "FCL", "FDL", "FEL", "FFL", "FGL", "FHL"]
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "parsed-captions.json")
+JSONL_OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "parsed-captions.jsonl")
+
+# parse_caption 로직/용어표가 바뀌면 올릴 것 (증분 모드에서 전체 재파싱)
+PARSE_BUILD_VERSION = 3
+
+DISTRIBUTION_FIELDS = ["length", "shape", "texture", "bangs", "difficulty"]
+
+# --workers 사용 시 워커 하나에 한 번에 넘기는 최대 스타일 수
+PARSE_CHUNK_SIZE = 256
 
 # 용어 정규화 매핑
 NORMALIZATION = {
@@ -80,12 +102,85 @@ NORMALIZATION = {
     }
 }
 
-def parse_caption(text, style_id):
+# 형태 키워드 (구조화 형식이 없는 기술적 자막용)
+SHAPE_KEYWORDS = [
+    ("원랭스", "ONE_LENGTH"),
+    ("그래쥬에이션", "GRADUATION"),
+    ("그레쥬에이션", "GRADUATION"),
+    ("스퀘어 레이어", "SQUARE_LAYER"),
+    ("스퀘어레이어", "SQUARE_LAYER"),
+    ("스퀘어 커트", "SQUARE_CUT"),
+    ("스퀘어커트", "SQUARE_CUT"),
+    ("레이어", "LAYER"),
+    ("디스커넥션", "DISCONNECTION"),
+]
+
+# 기술 키워드 (89용어 기반)
+TECH_KEYWORDS = {
+    # 섹션 (70번 용어)
+    "가로섹션": "HS",
+    "세로섹션": "VS",
+    "후대각 섹션": "DBS",
+    "후대각섹션": "DBS",
+    "전대각 섹션": "DFS",
+    "전대각섹션": "DFS",
+    "파이섹션": "PIE",
+
+    # 디자인라인 (31번 용어)
+    "고정 디자인라인": "STATIONARY_DL",
+    "고정디자인라인": "STATIONARY_DL",
+    "고정 디자인 라인": "STATIONARY_DL",
+    "이동 디자인라인": "MOBILE_DL",
+    "이동디자인라인": "MOBILE_DL",
+    "이동 디자인 라인": "MOBILE_DL",
+    "혼합 디자인라인": "COMBINATION_DL",
+    "혼합디자인라인": "COMBINATION_DL",
+    "혼합 디자인 라인": "COMBINATION_DL",
+
+    # 각도 (54번, 33번 용어)
+    "천체축": "CELESTIAL_AXIS",
+    "천체축각도": "CELESTIAL_AXIS",
+    "천체축 각도": "CELESTIAL_AXIS",
+    "다이렉션": "DIRECTION",
+    "리프트": "LIFTING",
+
+    # 분배 (35번 용어)
+    "변이분배": "SHIFTED_DIST",
+    "변이 분배": "SHIFTED_DIST",
+
+    # 커팅 기법 (19, 81번 등)
+    "포인트컷": "POINT_CUT",
+    "포인트 컷": "POINT_CUT",
+    "블런트": "BLUNT",
+    "블런트컷": "BLUNT_CUT",
+    "위빙": "WEAVING",
+    "슬라이싱": "SLICING",
+    "스퀘어커트": "SQUARE_CUT",
+    "스퀘어 커트": "SQUARE_CUT",
+}
+
+# 필드별 정규화 매처 (값에 든 용어 중 표에 먼저 나오는 용어 우선 - TermMatcher.best)
+NORMALIZATION_MATCHERS = {
+    field: TermMatcher([(kr, field, en) for kr, en in table.items()])
+    for field, table in NORMALIZATION.items()
+}
+
+# 형태 + 기술 키워드 매처 (구조화 형식이 없는 자막만 스캔)
+KEYWORD_MATCHER = TermMatcher(
+    [(kr, "shape", en) for kr, en in SHAPE_KEYWORDS]
+    + [(kw, "technique", code) for kw, code in TECH_KEYWORDS.items()]
+)
+
+# 89용어 매처 (--terms일 때만 스캔 - 용어 173개라 키워드 추출보다 훨씬 느림)
+THEORY_MATCHER = TermMatcher(load_theory_terms())
+
+def parse_caption(text, style_id, terms=False):
     """자막 텍스트를 파싱하여 구조화된 데이터로 변환
 
     자막 내용이 기술적 설명인 경우:
     - 스타일 코드에서 기장 추론 (A=숏, B=미디엄숏, C=미디엄, D=미디엄롱, E=롱, F=세미롱, G=롱, H=엑스트라롱)
     - 텍스트에서 형태 키워드 추출 (원랭스, 그래쥬에이션, 레이어 등)
+    terms=True: 자막에 나오는 89용어 ID 목록도 추가 (result["terms"])
     """
     result = {
         "raw": text.strip(),
@@ -102,6 +197,11 @@ def parse_caption(text, style_id):
         "techniques": []
     }
 
+    # 89용어 (nested: "스퀘어 레이어" 안의 "레이어"처럼 다른 용어 안에 든 용어도 포함)
+    if terms:
+        result["terms"] = sorted({term.code for _, theory_terms in THEORY_MATCHER.scan(text, nested=True)
+                                  for term in theory_terms})
+
     # 1. 먼저 구조화된 형식 체크 (기장:, 형태: 등)
     patterns = {
         "length": r"기장\s*[:：]\s*([^,，]+)",
@@ -118,11 +218,9 @@ def parse_caption(text, style_id):
             has_structured = True
             value = match.group(1).strip()
             result[field] = value
-            norm_map = NORMALIZATION.get(field, {})
-            for kr_term, en_code in norm_map.items():
-                if kr_term in value:
-                    result[f"{field}_normalized"] = en_code
-                    break
+            norm = NORMALIZATION_MATCHERS[field].best(value)
+            if norm:
+                result[f"{field}_normalized"] = norm.terms[0].code
 
     # 2. 구조화된 형식이 없으면 기술적 자막에서 추출
     if not has_structured:
@@ -145,173 +243,299 @@ def parse_caption(text, style_id):
             if length_code in length_map:
                 result["length"], result["length_normalized"] = length_map[length_code]
 
-        # 텍스트에서 형태 키워드 추출
-        shape_keywords = [
-            ("원랭스", "ONE_LENGTH"),
-            ("그래쥬에이션", "GRADUATION"),
-            ("그레쥬에이션", "GRADUATION"),
-            ("스퀘어 레이어", "SQUARE_LAYER"),
-            ("스퀘어레이어", "SQUARE_LAYER"),
-            ("스퀘어 커트", "SQUARE_CUT"),
-            ("스퀘어커트", "SQUARE_CUT"),
-            ("레이어", "LAYER"),
-            ("디스커넥션", "DISCONNECTION"),
-        ]
-
-        detected_shapes = []
-        for kr, en in shape_keywords:
-            if kr in text:
-                detected_shapes.append((kr, en))
-
-        if detected_shapes:
-            # 가장 구체적인 것 선택 (글자수가 긴 것)
-            detected_shapes.sort(key=lambda x: -len(x[0]))
-            result["shape"], result["shape_normalized"] = detected_shapes[0]
-
-        # 기술 키워드 추출 (89용어 기반)
-        tech_keywords = {
-            # 섹션 (70번 용어)
-            "가로섹션": "HS",
-            "세로섹션": "VS",
-            "후대각 섹션": "DBS",
-            "후대각섹션": "DBS",
-            "전대각 섹션": "DFS",
-            "전대각섹션": "DFS",
-            "파이섹션": "PIE",
-
-            # 디자인라인 (31번 용어)
-            "고정 디자인라인": "STATIONARY_DL",
-            "고정디자인라인": "STATIONARY_DL",
-            "고정 디자인 라인": "STATIONARY_DL",
-            "이동 디자인라인": "MOBILE_DL",
-            "이동디자인라인": "MOBILE_DL",
-            "이동 디자인 라인": "MOBILE_DL",
-            "혼합 디자인라인": "COMBINATION_DL",
-            "혼합디자인라인": "COMBINATION_DL",
-            "혼합 디자인 라인": "COMBINATION_DL",
-
-            # 각도 (54번, 33번 용어)
-            "천체축": "CELESTIAL_AXIS",
-            "천체축각도": "CELESTIAL_AXIS",
-            "천체축 각도": "CELESTIAL_AXIS",
-            "다이렉션": "DIRECTION",
-            "리프트": "LIFTING",
-
-            # 분배 (35번 용어)
-            "변이분배": "SHIFTED_DIST",
-            "변이 분배": "SHIFTED_DIST",
-
-            # 커팅 기법 (19, 81번 등)
-            "포인트컷": "POINT_CUT",
-            "포인트 컷": "POINT_CUT",
-            "블런트": "BLUNT",
-            "블런트컷": "BLUNT_CUT",
-            "위빙": "WEAVING",
-            "슬라이싱": "SLICING",
-            "스퀘어커트": "SQUARE_CUT",
-            "스퀘어 커트": "SQUARE_CUT",
-        }
-
-        for kw, code in tech_keywords.items():
-            if kw in text:
-                if code not in result["techniques"]:
-                    result["techniques"].append(code)
+        # 형태 / 기술 키워드를 한 번에 스캔
+        # (nested: "블런트컷" 안의 "블런트"처럼 다른 키워드 안에 든 키워드도 `kw in text`처럼 찾음)
+        shape, shape_rank = None, None
+        technique_codes = {}   # priority -> 코드
+        for matched, keyword_terms in KEYWORD_MATCHER.scan(text, nested=True):
+            for term in keyword_terms:
+                if term.category == "technique":
+                    technique_codes[term.priority] = term.code
+                    continue
+                # 형태는 가장 구체적인 것 = 글자수가 긴 것 (같으면 용어표 순서)
+                rank = (-len(matched), term.priority)
+                if shape_rank is None or rank < shape_rank:
+                    shape, shape_rank = (matched, term.code), rank
+        if shape:
+            result["shape"], result["shape_normalized"] = shape
+
+        # 기술 키워드 (89용어 기반, 용어표 순서 유지)
+        for priority in sorted(technique_codes):
+            code = technique_codes[priority]
+            if code not in result["techniques"]:
+                result["techniques"].append(code)
 
     return result
 
-def main():
+def parse_style(style, series, terms=False):
+    """스타일 폴더 하나의 자막 파싱 (자막 없으면 None)"""
+    caption = style.find_caption()
+    if not caption:
+        return None
+
+    text = read_text(style, caption)
+    with span("cpu.parse_caption"):
+        parsed = parse_caption(text, style.style_id, terms=terms)
+    parsed["styleId"] = style.style_id
+    parsed["series"] = series
+    return parsed
+
+def add_to_distribution(distribution, parsed):
+    """레코드 하나를 분포에 반영"""
+    for field in DISTRIBUTION_FIELDS:
+        val = parsed.get(f"{field}_normalized") or parsed.get(field) or "UNKNOWN"
+        distribution[field][val] = distribution[field].get(val, 0) + 1
+    return distribution
+
+def compute_distribution(records):
+    """파싱 결과 레코드에서 용어 분포 집계"""
+    distribution = {field: {} for field in DISTRIBUTION_FIELDS}
+    for parsed in records:
+        add_to_distribution(distribution, parsed)
+    return distribution
+
+def merge_distributions(a, b):
+    """부분 분포 두 개 합치기 (reduce 단계)"""
+    merged = {field: dict(a.get(field, {})) for field in DISTRIBUTION_FIELDS}
+    for field in DISTRIBUTION_FIELDS:
+        for val, cnt in b.get(field, {}).items():
+            merged[field][val] = merged[field].get(val, 0) + cnt
+    return merged
+
+def finalize_distribution(distribution):
+    """개수 내림차순 → 값 이름순으로 고정 (워커 수/처리 순서와 상관없이 같은 출력)"""
+    return {
+        field: dict(sorted(distribution[field].items(), key=lambda x: (-x[1], x[0])))
+        for field in DISTRIBUTION_FIELDS
+    }
+
+def parse_style_chunk(jobs, terms=False):
+    """워커 프로세스 작업: [(StyleEntry, series)] 읽기 + 파싱
+
+    반환: ([(style_id, parsed 또는 None, 오류 메시지)], 이 청크의 부분 분포)
+    """
+    results = []
+    for style, series in jobs:
+        try:
+            results.append((style.style_id, parse_style(style, series, terms), None))
+        except Exception as e:
+            results.append((style.style_id, None, str(e)))
+    partial = compute_distribution(parsed for _, parsed, _ in results if parsed)
+    return results, partial
+
+def parse_style_chunk_in_worker(jobs, terms=False):
+    """프로세스 풀용 parse_style_chunk - 워커에서 잰 구간 시간도 함께 반환"""
+    with collect() as profiler:
+        results, partial = parse_style_chunk(jobs, terms)
+    return results, partial, profiler.export()
+
+def iter_parse_results(jobs, workers, partials, terms=False):
+    """파싱 작업을 청크로 나눠 실행 (workers > 1이면 프로세스 풀)
+
+    yield: (style_id, parsed 또는 None, 오류) - jobs 순서 그대로, 청크가 끝나는 대로
+    partials: 청크별 부분 분포를 여기에 추가
+    """
+    if not jobs:
+        return
+
+    chunk_size = max(1, min(PARSE_CHUNK_SIZE, math.ceil(len(jobs) / (workers * 4))))
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            worker = functools.partial(parse_style_chunk_in_worker, terms=terms)
+            for results, partial, timings in executor.map(worker, chunks):
+                get_profiler().merge(timings)
+                partials.append(partial)
+                yield from results
+    else:
+        for chunk in chunks:
+            results, partial = parse_style_chunk(chunk, terms)
+            partials.append(partial)
+            yield from results
+
+def main(incremental=False, workers=1, jsonl=False, terms=False):
+    """incremental=True: 자막 파일이 바뀐 스타일만 다시 파싱하고 나머지는 이전 결과 재사용
+    workers > 1: 자막 읽기 + 파싱을 프로세스 풀에 분산 (출력 파일은 워커 수와 상관없이 동일)
+    jsonl=True: parsed-captions.jsonl에 스타일이 파싱되는 대로 한 줄씩 기록 (+ 오프셋 인덱스)
+    terms=True: 스타일마다 89용어 ID 목록(terms)도 기록
+    """
     print("=" * 70)
-    print("자막 파싱 및 용어 추출")
+    print("자막 파싱 및 용어 추출" + (" (증분 모드)" if incremental else "") + (" (JSONL)" if jsonl else ""))
     print("=" * 70)
+    if incremental and not jsonl:
+        print("💡 JSON 집계 파일은 증분 모드에서도 전체를 다시 씀 (스타일 단위로 고치려면 --jsonl)")
+
+    output_path = JSONL_OUTPUT_PATH if jsonl else OUTPUT_PATH
+
+    # 증분 모드에서는 파일 덮어쓰기까지 감지하도록 크기/mtime 갱신
+    with span("phase.load_index"):
+        index = load_dataset_index(refresh_stats=incremental)
+    # terms 여부가 이전 실행과 다르면 레코드 모양이 달라지므로 전체 재파싱
+    manifest = BuildManifest("parse-captions", f"{PARSE_BUILD_VERSION}+terms" if terms else PARSE_BUILD_VERSION)
+    with span("phase.load_previous"):
+        previous = load_previous_records(output_path) if incremental else {}
+    plan_started = time.perf_counter()
+
+    # 1. 스타일별 처리 계획 (재사용 / 자막 없음 / 파싱)
+    plan = []        # [(series, [(style_id, 상태)])]
+    jobs = []
+    inputs_by_style = {}
+    for series_entry, styles in index.iter_styles("women"):
+        series = series_entry.series
+        if not series_entry.exists:
+            continue
 
-    all_parsed = []
-    stats = {
-        "total": 0,
-        "parsed": 0,
-        "length": {},
-        "shape": {},
-        "texture": {},
-        "bangs": {},
-        "difficulty": {}
-    }
+        entries = []
+        for style in styles:
+            style_id = style.style_id
+
+            # 입력은 자막 파일 하나 (자막 없는 스타일은 빈 입력으로 기록)
+            # 해시는 증분 모드에서만 (전체 파싱은 매니페스트를 건드리지 않음 → 자막을 두 번 읽지 않음)
+            caption = style.find_caption()
+            inputs = manifest.fingerprint(style, [caption] if caption else []) if incremental else None
+
+            if incremental and manifest.is_unchanged(style_id, inputs) and (style_id in previous or not caption):
+                entries.append((style_id, "reused" if caption else "reused_empty"))
+            elif not caption:
+                entries.append((style_id, "no_caption"))
+                if incremental:
+                    manifest.record(style_id, inputs)
+            else:
+                entries.append((style_id, "parse"))
+                inputs_by_style[style_id] = inputs
+                jobs.append((style, series))
+        plan.append((series, entries))
+    get_profiler().record("phase.plan", time.perf_counter() - plan_started)
+
+    # 2. 파싱 (직렬 또는 프로세스 풀) - 결과는 스타일 순서대로 흘러나옴
+    partials = []
+    results = iter_parse_results(jobs, workers, partials, terms)
+
+    # 3. 스타일 순서대로 결과 정리
+    all_parsed = []      # JSON 모드에서만 모음 (JSONL은 바로 기록)
+    writer = JsonlWriter(JSONL_OUTPUT_PATH) if jsonl else None
+    reused_distribution = compute_distribution([])
+    total = 0
+    parsed_count = 0
+    reparsed = 0     # 새로 파싱한 스타일
+    changed = 0      # 입력이 바뀐 스타일 (자막 삭제 포함)
+    reused = 0
+
+    try:
+        for series, entries in plan:
+            print(f"\n📁 {series} 시리즈: {len(entries)}개")
+            print("-" * 50)
+
+            series_reused = 0
+            for style_id, status in entries:
+                total += 1
+
+                if status in ("reused", "reused_empty"):
+                    if status == "reused":
+                        # JSONL은 이전 줄을 그대로 복사 (다시 직렬화하지 않음)
+                        raw = previous.raw(style_id) if writer else None
+                        record = json.loads(raw) if raw else previous[style_id]
+                        add_to_distribution(reused_distribution, record)
+                        parsed_count += 1
+                        if writer:
+                            writer.write_raw(style_id, raw)
+                        else:
+                            all_parsed.append(record)
+                    series_reused += 1
+                    continue
+
+                changed += 1
+                if status == "no_caption":
+                    print(f"  ❌ {style_id}: 자막 없음")
+                    continue
+
+                result_id, parsed, error = next(results)
+                assert result_id == style_id
+                if error:
+                    print(f"  ❌ {style_id}: 파싱 오류 - {error}")
+                    continue
+
+                if incremental:
+                    manifest.record(style_id, inputs_by_style[style_id])
+                reparsed += 1
+                parsed_count += 1
+                if writer:
+                    writer.write(parsed)
+                else:
+                    all_parsed.append(parsed)
+                print(f"  ✅ {style_id}: {parsed['length']} | {parsed['shape']} | {parsed['texture']}")
 
-    for series in SERIES:
-        series_path = os.path.join(BASE_PATH, series)
-        if not os.path.exists(series_path):
-            continue
+            if series_reused:
+                print(f"  ♻️ 변경 없음: {series_reused}개 재사용")
+            reused += series_reused
 
-        style_folders = sorted([d for d in os.listdir(series_path)
-                               if os.path.isdir(os.path.join(series_path, d))])
-
-        print(f"\n📁 {series} 시리즈: {len(style_folders)}개")
-        print("-" * 50)
-
-        for style_id in style_folders:
-            style_path = os.path.join(series_path, style_id)
-            stats["total"] += 1
-
-            # 자막 파일 찾기
-            caption_file = None
-            for pattern in [f"{style_id}(자막).txt", f"{style_id}-jamag.txt",
-                           f"{style_id}_자막.txt", f"{style_id}.txt"]:
-                fp = os.path.join(style_path, pattern)
-                if os.path.exists(fp):
-                    caption_file = fp
-                    break
-
-            if not caption_file:
-                print(f"  ❌ {style_id}: 자막 없음")
-                continue
-
-            # 파싱
-            try:
-                with open(caption_file, 'r', encoding='utf-8') as f:
-                    text = f.read()
-
-                parsed = parse_caption(text, style_id)
-                parsed["styleId"] = style_id
-                parsed["series"] = series
-                all_parsed.append(parsed)
-                stats["parsed"] += 1
-
-                # 통계 수집
-                for field in ["length", "shape", "texture", "bangs", "difficulty"]:
-                    val = parsed.get(f"{field}_normalized") or parsed.get(field) or "UNKNOWN"
-                    stats[field][val] = stats[field].get(val, 0) + 1
+        removed = manifest.prune([style_id for _, entries in plan for style_id, _ in entries])
 
-                print(f"  ✅ {style_id}: {parsed['length']} | {parsed['shape']} | {parsed['texture']}")
+        # 분포: 워커 청크별 부분 분포 + 재사용 레코드 분포를 reduce
+        distribution = finalize_distribution(functools.reduce(
+            merge_distributions, partials + [reused_distribution], compute_distribution([])
+        ))
 
-            except Exception as e:
-                print(f"  ❌ {style_id}: 파싱 오류 - {e}")
+        # 통계 출력
+        print("\n" + "=" * 70)
+        print("📊 용어 분포 통계")
+        print("=" * 70)
 
-    # 통계 출력
-    print("\n" + "=" * 70)
-    print("📊 용어 분포 통계")
-    print("=" * 70)
+        for field in DISTRIBUTION_FIELDS:
+            print(f"\n■ {field.upper()}:")
+            for val, cnt in distribution[field].items():
+                print(f"   {val}: {cnt}개")
 
-    for field in ["length", "shape", "texture", "bangs", "difficulty"]:
-        print(f"\n■ {field.upper()}:")
-        for val, cnt in sorted(stats[field].items(), key=lambda x: -x[1]):
-            print(f"   {val}: {cnt}개")
-
-    # JSON 저장
-    output_path = os.path.join(os.path.dirname(__file__), "parsed-captions.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump({
-            "total": stats["total"],
-            "parsed": stats["parsed"],
-            "distribution": {
-                "length": stats["length"],
-                "shape": stats["shape"],
-                "texture": stats["texture"],
-                "bangs": stats["bangs"],
-                "difficulty": stats["difficulty"]
-            },
-            "styles": all_parsed
-        }, f, ensure_ascii=False, indent=2)
-
-    print(f"\n💾 파싱 결과 저장: {output_path}")
-    print(f"\n✅ 완료: {stats['parsed']}/{stats['total']}개 스타일 파싱됨")
+        if incremental:
+            print(f"\n재파싱: {reparsed}개 / 재사용: {reused}개 / 삭제: {len(removed)}개 (해시 계산 {manifest.hashed}개 파일)")
+
+        if incremental and not changed and not removed and os.path.exists(output_path):
+            manifest.save()
+            print(f"\n✅ 변경된 자막 없음 - 출력 파일 유지 ({parsed_count}/{total}개 스타일)")
+            return
+
+        # 저장
+        summary = {
+            "total": total,
+            "parsed": parsed_count,
+            "distribution": distribution
+        }
+        with span("fs.write_output"):
+            if writer:
+                # 이전 JSONL을 연 채로 교체하면 Windows에서 PermissionError → 재사용이 끝났으니 먼저 닫음
+                if hasattr(previous, "close"):
+                    previous.close()
+                writer.commit(meta=summary)
+            else:
+                with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
+                    json.dump({**summary, "styles": all_parsed}, f, ensure_ascii=False, indent=2)
+    finally:
+        results.close()
+        if writer:
+            writer.discard()
+        if hasattr(previous, "close"):
+            previous.close()
+
+    if incremental:
+        manifest.save()
+
+    print(f"\n💾 파싱 결과 저장: {output_path}" + (" (+ .idx 오프셋 인덱스)" if jsonl else ""))
+    print(f"\n✅ 완료: {parsed_count}/{total}개 스타일 파싱됨")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="자막 파싱 및 용어 추출")
+    parser.add_argument("--incremental", action="store_true",
+                        help="자막 파일이 바뀐 스타일만 다시 파싱 (처음 한 번은 모든 자막 해시 계산)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="자막 읽기/파싱 프로세스 수 (기본 1 = 직렬)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="parsed-captions.jsonl (한 줄 = 한 스타일) + 오프셋 인덱스로 스트리밍 출력")
+    parser.add_argument("--terms", action="store_true",
+                        help="스타일마다 자막에 나오는 89용어 ID 목록(terms)도 기록")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    start_run("parse-captions")
+    main(incremental=args.incremental, workers=max(1, args.workers), jsonl=args.jsonl, terms=args.terms)
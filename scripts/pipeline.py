@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""
+스크립트 단계 DAG 실행기 (run-pipeline.py에서 사용)
+- 단계(Stage) = 스크립트 + 인자 + 입력/출력 아티팩트, 의존 관계는 아티팩트로 자동 연결
+- 아티팩트 타입별 지문(fingerprint): 파일 내용 해시, 데이터셋 인덱스, 블롭 저장소 URL 표,
+  Firestore(생산 단계 지문 + 실행 시각)
+- 단계 지문 = 스크립트(+ 가져오는 로컬 모듈) 소스 + 인자 + 입력 지문 → 지난 성공 실행과 같으면 스킵
+- 선행 단계가 모두 끝난 단계부터 서브프로세스로 동시 실행 (스레드 풀, 최대 동시 수 제한)
+- 단계 출력은 [단계명] 접두어로 콘솔 + .cache/pipeline/logs/<단계>.log에 기록
+- 상태: .cache/pipeline/state.json, 실행 리포트: .cache/pipeline/last-run.json
+
+각 스크립트는 argv 파싱, 모듈 로드 시 sys.exit / stdout 재설정 등 부작용이 있어서
+같은 프로세스에서 import하지 않고 서브프로세스로 실행 (실패해도 다른 단계에 영향 없음)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from dataset_index import CACHE_DIR, load_dataset_index
+from blob_store import DEFAULT_BLOB_DIR
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(CACHE_DIR, "pipeline")
+STATE_PATH = os.path.join(PIPELINE_DIR, "state.json")
+REPORT_PATH = os.path.join(PIPELINE_DIR, "last-run.json")
+LOG_DIR = os.path.join(PIPELINE_DIR, "logs")
+STATE_FORMAT = 1
+
+# 생산 단계가 그래프에 없는 Firestore 컬렉션은 이 시간이 지나면 바뀌었다고 봄
+DEFAULT_REMOTE_TTL_HOURS = 24
+
+def _sha256_json(value):
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+# ==================== 아티팩트 ====================
+
+@dataclass(frozen=True)
+class Artifact:
+    """단계 사이를 오가는 데이터 (name이 같으면 같은 아티팩트)"""
+    name: str
+
+    kind = "artifact"
+    local = True     # False: 로컬에서 지문을 계산할 수 없음 (생산 단계 지문 + 실행 시각 사용)
+
+    def fingerprint(self):
+        """현재 내용 지문 (없으면 None)"""
+        return None
+
+    def exists(self):
+        return True
+
+@dataclass(frozen=True)
+class FileArtifact(Artifact):
+    """로컬 파일 또는 폴더 (폴더는 파일명 + 크기 + mtime)"""
+    path: str = ""
+
+    kind = "file"
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def fingerprint(self):
+        if os.path.isdir(self.path):
+            entries = []
+            for root, _, files in os.walk(self.path):
+                for name in files:
+                    st = os.stat(os.path.join(root, name))
+                    entries.append((os.path.relpath(os.path.join(root, name), self.path), st.st_size, st.st_mtime))
+            return _sha256_json(sorted(entries))
+        if not os.path.exists(self.path):
+            return None
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+@dataclass(frozen=True)
+class DatasetArtifact(Artifact):
+    """원본 데이터셋 (성별) - 인덱스의 스타일별 파일명 + 크기 + mtime"""
+    gender: str = "women"
+
+    kind = "dataset"
+
+    def fingerprint(self):
+        index = load_dataset_index(refresh_stats=True)
+        styles = index.styles.get(self.gender, {})
+        return _sha256_json({
+            style_id: [(f.name, f.size, f.mtime) for f in style.files]
+            for style_id, style in styles.items()
+        })
+
+@dataclass(frozen=True)
+class BlobStoreArtifact(Artifact):
+    """로컬 이미지 블롭 저장소 - URL → 내용 해시 표"""
+    root: str = DEFAULT_BLOB_DIR
+
+    kind = "blobs"
+
+    def fingerprint(self):
+        path = os.path.join(self.root, "urls.sqlite")
+        if not os.path.exists(path):
+            return None
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("SELECT url, digest FROM urls ORDER BY url").fetchall()
+        finally:
+            conn.close()
+        return _sha256_json(rows)
+
+@dataclass(frozen=True)
+class FirestoreArtifact(Artifact):
+    """Firestore 컬렉션 (fields가 있으면 해당 필드만) - 원격이라 생산 단계 실행으로 추적"""
+    collection: str = ""
+    fields: tuple = ()
+
+    kind = "firestore"
+    local = False
+
+# ==================== 단계 ====================
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    args: list = field(default_factory=list)
+    inputs: list = field(default_factory=list)     # [Artifact]
+    outputs: list = field(default_factory=list)    # [Artifact]
+    description: str = ""
+
+    @property
+    def script_path(self):
+        return os.path.join(SCRIPTS_DIR, self.script)
+
+_IMPORT_RE = re.compile(r"^\s*(?:from\s+([A-Za-z_][\w]*)\s+import|import\s+([A-Za-z_][\w]*))", re.MULTILINE)
+
+def source_fingerprint(script_path):
+    """스크립트 + 가져오는 scripts/ 로컬 모듈(재귀) 소스 해시"""
+    digest = hashlib.sha256()
+    pending, seen = [script_path], set()
+    while pending:
+        path = pending.pop()
+        if path in seen or not os.path.exists(path):
+            continue
+        seen.add(path)
+        with open(path, 'rb') as f:
+            source = f.read()
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0" + source)
+        for match in _IMPORT_RE.finditer(source.decode("utf-8", errors="ignore")):
+            module = match.group(1) or match.group(2)
+            pending.append(os.path.join(SCRIPTS_DIR, f"{module}.py"))
+    return digest.hexdigest()
+
+class PipelineGraph:
+    """단계 목록 → 아티팩트 생산자로 의존 관계 계산"""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+        self.producer = {}
+        for stage in stages:
+            for artifact in stage.outputs:
+                if artifact.name in self.producer:
+                    raise ValueError(f"아티팩트 {artifact.name}를 두 단계가 생산: "
+                                     f"{self.producer[artifact.name]}, {stage.name}")
+                self.producer[artifact.name] = stage.name
+        self.deps = {
+            stage.name: sorted({self.producer[a.name] for a in stage.inputs if a.name in self.producer})
+            for stage in stages
+        }
+        self.order = self._toposort()
+
+    def _toposort(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("단계 순환 의존: " + " → ".join(path + [name]))
+            state[name] = "visiting"
+            for dep in self.deps[name]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def upstream(self, names):
+        """지정한 단계 + 모든 선행 단계"""
+        result, pending = set(), list(names)
+        while pending:
+            name = pending.pop()
+            if name not in result:
+                result.add(name)
+                pending.extend(self.deps[name])
+        return result
+
+    def downstream(self, names):
+        """지정한 단계 + 모든 후행 단계"""
+        result, pending = set(), list(names)
+        while pending:
+            name = pending.pop()
+            if name not in result:
+                result.add(name)
+                pending.extend(n for n, deps in self.deps.items() if name in deps)
+        return result
+
+# ==================== 상태 ====================
+
+def load_state(path=STATE_PATH):
+    """{단계명: {fingerprint, finishedAt, outputs}}"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (ValueError, OSError):
+        return {}
+    return data.get("stages", {}) if data.get("format") == STATE_FORMAT else {}
+
+def save_state(stages, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"format": STATE_FORMAT, "stages": stages}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+# ==================== 실행 ====================
+
+class PipelineRunner:
+    """준비된 단계부터 동시 실행, 입력이 그대로인 단계는 스킵
+
+    selected: 실행 대상 단계 (나머지는 현재 상태 그대로 입력으로만 사용)
+    force: 지문이 같아도 실행할 단계
+    """
+
+    def __init__(self, graph, selected=None, force=(), max_parallel=4, dry_run=False,
+                 remote_ttl_hours=DEFAULT_REMOTE_TTL_HOURS, python=sys.executable, state_path=STATE_PATH):
+        self.graph = graph
+        self.selected = set(selected or graph.stages)
+        self.force = set(force)
+        self.max_parallel = max(1, max_parallel)
+        self.dry_run = dry_run
+        self.remote_ttl = remote_ttl_hours * 3600
+        self.python = python
+        self.state_path = state_path
+        self.state = load_state(state_path)
+
+        self.artifact_fp = {}      # 아티팩트 이름 → 이번 실행 기준 지문
+        self.results = {}          # 단계명 → {status, seconds, reason, returncode}
+        self._lock = threading.Lock()
+        self._fingerprint_lock = threading.Lock()
+        self._print_lock = threading.Lock()
+
+    # ---------- 지문 ----------
+
+    def _artifact_fingerprint(self, artifact):
+        """입력 아티팩트 지문 (생산 단계가 끝난 뒤에 호출)"""
+        # 데이터셋 인덱스 갱신 등이 겹치지 않도록 지문 계산은 한 번에 하나씩
+        with self._fingerprint_lock:
+            if artifact.name in self.artifact_fp:
+                return self.artifact_fp[artifact.name]
+            if artifact.local:
+                fp = artifact.fingerprint()
+            else:
+                producer = self.graph.producer.get(artifact.name)
+                fp = self.state.get(producer, {}).get("outputs", {}).get(artifact.name) if producer else None
+            with self._lock:
+                self.artifact_fp[artifact.name] = fp
+            return fp
+
+    def stage_fingerprint(self, stage):
+        return _sha256_json({
+            "source": source_fingerprint(stage.script_path),
+            "args": stage.args,
+            "inputs": {a.name: self._artifact_fingerprint(a) for a in stage.inputs},
+        })
+
+    def skip_reason(self, stage, fingerprint):
+        """스킵 가능하면 사유 문자열, 실행해야 하면 None"""
+        if stage.name in self.force:
+            return None
+        previous = self.state.get(stage.name)
+        if not previous or previous.get("fingerprint") != fingerprint:
+            return None
+        if not all(a.exists() for a in stage.outputs):
+            return None
+        external = [a for a in stage.inputs if not a.local and a.name not in self.graph.producer]
+        if external and time.time() - previous.get("finishedAt", 0) > self.remote_ttl:
+            return None
+        return "입력 변경 없음"
+
+    def _publish_outputs(self, stage, fingerprint, finished_at=None):
+        """끝난(또는 스킵된) 단계의 출력 지문 확정
+
+        원격 출력은 내용을 볼 수 없으므로 단계 지문 + 그 출력을 만든 실행 시각
+        → 단계 지문이 같아도 다시 실행했으면(외부 입력 TTL 만료, --force) 후행 단계 지문이 바뀜
+        """
+        for artifact in stage.outputs:
+            with self._fingerprint_lock:
+                if artifact.local:
+                    fp = artifact.fingerprint()
+                else:
+                    fp = _sha256_json([fingerprint, finished_at]) if fingerprint else None
+                with self._lock:
+                    self.artifact_fp[artifact.name] = fp
+
+    # ---------- 서브프로세스 ----------
+
+    def _log(self, name, line):
+        with self._print_lock:
+            print(f"[{name}] {line}", flush=True)
+
+    def _run_process(self, stage):
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_path = os.path.join(LOG_DIR, f"{stage.name}.log")
+        env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+        command = [self.python, "-u", stage.script_path, *stage.args]
+
+        with open(log_path, 'w', encoding='utf-8') as log:
+            process = subprocess.Popen(command, cwd=SCRIPTS_DIR, env=env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, encoding="utf-8", errors="replace")
+            for line in process.stdout:
+                log.write(line)
+                self._log(stage.name, line.rstrip("\n"))
+            return process.wait()
+
+    def _execute(self, name):
+        """단계 하나 처리 → (status, reason)"""
+        stage = self.graph.stages[name]
+        failed_deps = [d for d in self.graph.deps[name] if self.results[d]["status"] in ("failed", "blocked")]
+        if failed_deps:
+            return "blocked", f"선행 단계 실패: {', '.join(failed_deps)}"
+
+        if name not in self.selected:
+            previous = self.state.get(name, {})
+            self._publish_outputs(stage, previous.get("fingerprint"), previous.get("finishedAt"))
+            return "not-selected", "선택되지 않음"
+        if self.dry_run and any(self.results[d]["status"] == "would-run" for d in self.graph.deps[name]):
+            # 선행 단계 출력이 아직 바뀌지 않았으므로 지문 비교 불가
+            return "would-run", "선행 단계 실행 후 판단"
+
+        fingerprint = self.stage_fingerprint(stage)
+
+        reason = self.skip_reason(stage, fingerprint)
+        if reason:
+            self._publish_outputs(stage, fingerprint, self.state[name].get("finishedAt"))
+            return "skipped", reason
+        if self.dry_run:
+            self._publish_outputs(stage, fingerprint)
+            return "would-run", "실행 예정"
+
+        self._log(name, f"▶ 시작: {stage.script} {' '.join(stage.args)}".rstrip())
+        returncode = self._run_process(stage)
+        if returncode != 0:
+            return "failed", f"종료 코드 {returncode}"
+
+        finished_at = time.time()
+        self._publish_outputs(stage, fingerprint, finished_at)
+        with self._lock:
+            self.state[name] = {
+                "fingerprint": fingerprint,
+                "finishedAt": finished_at,
+                "outputs": {a.name: self.artifact_fp.get(a.name) for a in stage.outputs},
+            }
+            save_state(self.state, self.state_path)
+        return "ok", ""
+
+    def _timed(self, name):
+        started = time.perf_counter()
+        try:
+            status, reason = self._execute(name)
+        except Exception as e:
+            status, reason = "failed", f"{type(e).__name__}: {e}"
+        return name, status, reason, time.perf_counter() - started, started
+
+    def run(self):
+        """전체 실행 → results (단계 순서대로)"""
+        remaining = list(self.graph.order)
+        running = {}
+        run_started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while remaining or running:
+                ready = [n for n in remaining if all(d in self.results for d in self.graph.deps[n])]
+                for name in ready:
+                    remaining.remove(name)
+                    running[executor.submit(self._timed, name)] = name
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    name, status, reason, seconds, started = future.result()
+                    self.results[name] = {
+                        "status": status,
+                        "reason": reason,
+                        "seconds": round(seconds, 3),
+                        "startOffset": round(started - run_started, 3),
+                    }
+                    if status in ("ok", "failed"):
+                        self._log(name, f"{'✅' if status == 'ok' else '❌'} {status} ({seconds:.1f}초) {reason}".rstrip())
+
+        self.wall_seconds = time.perf_counter() - run_started
+        return {name: self.results[name] for name in self.graph.order}
+
+    def write_report(self, path=REPORT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        executed = [r["seconds"] for r in self.results.values() if r["status"] in ("ok", "failed")]
+        report = {
+            "startedAt": time.time() - self.wall_seconds,
+            "wallSeconds": round(self.wall_seconds, 3),
+            "serialSeconds": round(sum(executed), 3),
+            "maxParallel": self.max_parallel,
+            "dryRun": self.dry_run,
+            "stages": {name: self.results[name] for name in self.graph.order if name in self.results},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+도해도 / 결과 이미지를 로컬 블롭 저장소로 미리 받기
+- Firestore styles, men_styles 문서의 diagrams[].url + resultImage 필드만 스트리밍
+- keep-alive 커넥션 풀 세션으로 동시 다운로드 (이미 받은 URL은 요청 없음)
+- --revalidate: 받은 URL도 조건부 요청, 바뀐 이미지만 다시 받음
+- 이후 analyze-diagrams-metadata.py 등은 로컬 디스크에서 이미지를 읽음
+
+사용법:
+  python prefetch-images.py
+  python prefetch-images.py --collection styles --workers 16 --revalidate
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import firebase_admin
+from firebase_admin import credentials, firestore
+
+from blob_store import DEFAULT_BLOB_DIR, BlobStore
+from diagram_analysis import create_http_session
+from profiling import record, span, start_run
+from style_listing import stream_styles
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 설정 ====================
+
+SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
+
+COLLECTIONS = ["styles", "men_styles"]
+IMAGE_FIELDS = ["diagrams", "resultImage"]
+
+# ==================== Firebase 초기화 ====================
+
+def init_firebase():
+    """Firebase Admin SDK 초기화"""
+    if not os.path.exists(SERVICE_ACCOUNT_KEY):
+        print(f"❌ Firebase 서비스 계정 키가 없습니다: {SERVICE_ACCOUNT_KEY}")
+        return None
+
+    try:
+        try:
+            firebase_admin.get_app()
+        except ValueError:
+            cred = credentials.Certificate(SERVICE_ACCOUNT_KEY)
+            firebase_admin.initialize_app(cred)
+
+        db = firestore.client()
+        print("✅ Firebase 초기화 완료")
+        return db
+    except Exception as e:
+        print(f"❌ Firebase 초기화 실패: {e}")
+        return None
+
+# ==================== URL 수집 ====================
+
+def collect_image_urls(db, collections, style_ids=None):
+    """문서 순서대로 중복 없는 이미지 URL 목록"""
+    urls = {}
+    for collection in collections:
+        for style_id, data in stream_styles(db, collection, IMAGE_FIELDS):
+            if style_ids and style_id not in style_ids:
+                continue
+            for diagram in data.get("diagrams") or []:
+                if diagram.get("url"):
+                    urls[diagram["url"]] = True
+            if data.get("resultImage"):
+                urls[data["resultImage"]] = True
+    return list(urls)
+
+# ==================== 메인 ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="도해도 / 결과 이미지 로컬 저장소 프리페치")
+    parser.add_argument("--collection", action="append", choices=COLLECTIONS,
+                        help="대상 컬렉션 (기본: styles, men_styles 모두)")
+    parser.add_argument("--style", action="append", default=[], help="지정한 스타일만 (여러 번 사용 가능)")
+    parser.add_argument("--workers", type=int, default=8, help="동시 다운로드 수 (커넥션 풀 크기)")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="이미 받은 이미지도 ETag / If-Modified-Since로 변경 확인")
+    parser.add_argument("--blob-dir", default=DEFAULT_BLOB_DIR)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start_run("prefetch-images")
+
+    print("=" * 70)
+    print("이미지 프리페치 (로컬 블롭 저장소)")
+    print("=" * 70)
+
+    db = init_firebase()
+    if not db:
+        sys.exit(1)
+
+    collections = args.collection or COLLECTIONS
+    with span("phase.collect_urls"):
+        urls = collect_image_urls(db, collections, set(args.style))
+    print(f"\n📋 {', '.join(collections)}: 이미지 URL {len(urls)}개")
+
+    store = BlobStore(args.blob_dir)
+    session = create_http_session(pool_size=args.workers)
+
+    started = time.perf_counter()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(store.fetch, url, session, args.revalidate) for url in urls]
+        for future in as_completed(futures):
+            future.result()
+            done += 1
+            if done % 100 == 0:
+                print(f"  --- {done}/{len(urls)} 완료 ---")
+    elapsed = time.perf_counter() - started
+    record("phase.fetch", elapsed)
+
+    url_count, blob_count, total = store.summary()
+    stats = store.stats
+    store.close()
+
+    print("\n" + "=" * 70)
+    print("📊 프리페치 완료 통계")
+    print("=" * 70)
+    print(f"  로컬 보유(요청 없음): {stats['local']}장")
+    print(f"  변경 없음(304): {stats['not_modified']}장")
+    print(f"  다운로드: {stats['downloaded']}장 ({stats['bytes_downloaded'] / 1024 / 1024:.1f}MB)")
+    print(f"  실패: {stats['failed']}장")
+    print(f"  저장소: URL {url_count}개 → 블롭 {blob_count}개, {total / 1024 / 1024:.1f}MB")
+    print(f"  소요 시간: {elapsed:.1f}초")
+    if stats["failed"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
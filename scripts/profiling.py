@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+스크립트 실행 계측 (구간 시간, 분포, 입출력 바이트)
+- span("fs.scan") 등 구간별 시간을 기록 → 이름별 횟수 / 합계 / p50 / p95 / p99 / 최대
+- 이름 앞부분(fs, cpu, http, gemini, firestore, cache ...)이 분류, Chrome trace의 cat으로도 사용
+- add_bytes("gemini", bytes_in=..., bytes_out=...)로 채널별 송수신 바이트 집계
+- start_run(이름)을 호출한 스크립트는 종료 시 .cache/profiles/<이름>/<시각>.json (+ latest.json) 리포트 저장
+- HAIRGATOR_TRACE=1이면 같은 이름의 .trace.json (chrome://tracing, Perfetto에서 열기)도 저장
+- 공용 모듈은 전역 프로파일러에 기록 (start_run 없이 import만 한 경우에는 리포트를 쓰지 않음)
+
+사용법:
+  profiler = start_run("parse-captions")
+  with span("cpu.parse_caption", style=style_id):
+      ...
+  add_bytes("fs", bytes_in=len(text))
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# dataset_index가 이 모듈을 가져오므로 캐시 경로는 여기서 정의 (다른 모듈은 dataset_index.CACHE_DIR 사용)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+PROFILE_DIR = os.environ.get("HAIRGATOR_PROFILE_DIR") or os.path.join(CACHE_DIR, "profiles")
+TRACE_ENV = "HAIRGATOR_TRACE"
+REPORT_FORMAT = 1
+
+# Chrome trace 이벤트 상한 (분포 통계는 상한과 무관하게 전부 집계)
+MAX_TRACE_EVENTS = 200000
+
+def percentile(sorted_values, q):
+    """정렬된 값의 q 분위 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(durations):
+    """구간 시간 리스트(초) → 통계 dict (ms)"""
+    values = sorted(durations)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "total_ms": round(total * 1000, 3),
+        "mean_ms": round(total / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+class Profiler:
+    """스레드 안전 구간 / 바이트 / 카운터 기록기"""
+
+    def __init__(self, name=None, trace=False):
+        self.name = name
+        self.trace = trace
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.durations = {}     # 구간 이름 → [초]
+        self.bytes = {}         # 채널 → {"in": n, "out": n}
+        self.counters = {}
+        self.events = []        # Chrome trace 이벤트 (trace=True일 때만)
+        self.dropped_events = 0
+        self._lock = threading.Lock()
+
+    # ==================== 기록 ====================
+
+    def record(self, name, seconds, start=None, attrs=None):
+        """구간 하나 기록 (start: perf_counter 기준 시작 시각)"""
+        with self._lock:
+            self.durations.setdefault(name, []).append(seconds)
+            if not self.trace:
+                return
+            if len(self.events) >= MAX_TRACE_EVENTS:
+                self.dropped_events += 1
+                return
+            start = start if start is not None else time.perf_counter() - seconds
+            event = {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": round((start - self.started) * 1e6, 1),
+                "dur": round(seconds * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+            if attrs:
+                event["args"] = attrs
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, start, attrs or None)
+
+    def add_bytes(self, channel, bytes_in=0, bytes_out=0):
+        with self._lock:
+            entry = self.bytes.setdefault(channel, {"in": 0, "out": 0})
+            entry["in"] += bytes_in
+            entry["out"] += bytes_out
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    # ==================== 워커 프로세스 ====================
+
+    def export(self):
+        """다른 프로세스로 넘길 수 있는 기록 (구간 시간 / 바이트 / 카운터)"""
+        with self._lock:
+            return {
+                "durations": {name: list(values) for name, values in self.durations.items()},
+                "bytes": {channel: dict(entry) for channel, entry in self.bytes.items()},
+                "counters": dict(self.counters),
+            }
+
+    def merge(self, exported):
+        """워커 프로세스에서 export()한 기록 합치기 (trace 이벤트는 합치지 않음)"""
+        with self._lock:
+            for name, values in exported["durations"].items():
+                self.durations.setdefault(name, []).extend(values)
+            for channel, entry in exported["bytes"].items():
+                mine = self.bytes.setdefault(channel, {"in": 0, "out": 0})
+                mine["in"] += entry["in"]
+                mine["out"] += entry["out"]
+            for name, amount in exported["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    # ==================== 리포트 ====================
+
+    def report(self):
+        with self._lock:
+            durations = {name: list(values) for name, values in self.durations.items()}
+            byte_counts = {channel: dict(entry) for channel, entry in self.bytes.items()}
+            counters = dict(self.counters)
+        return {
+            "format": REPORT_FORMAT,
+            "run": self.name,
+            "startedAt": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "wallSeconds": round(time.perf_counter() - self.started, 3),
+            "argv": sys.argv[1:],
+            "spans": {name: summarize(values) for name, values in sorted(durations.items())},
+            "bytes": byte_counts,
+            "counters": counters,
+        }
+
+    def write(self, directory=None):
+        """리포트(JSON) + trace 저장 → 리포트 경로"""
+        directory = directory or os.path.join(PROFILE_DIR, self.name or "unnamed")
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d-%H%M%S")
+        report = self.report()
+        path = os.path.join(directory, f"{stamp}-{os.getpid()}.json")
+        for target in (path, os.path.join(directory, "latest.json")):
+            with open(target, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if self.trace:
+            with self._lock:
+                events = list(self.events)
+            trace_path = path[:-len(".json")] + ".trace.json"
+            with open(trace_path, 'w', encoding='utf-8') as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                           "otherData": {"run": self.name, "droppedEvents": self.dropped_events}}, f)
+        return path
+
+    def print_summary(self, top=8):
+        """총 시간이 큰 구간 순으로 간단히 출력"""
+        report = self.report()
+        spans = sorted(report["spans"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        if not spans and not report["bytes"]:
+            return
+        print(f"\n⏱️ 구간별 시간 (상위 {min(top, len(spans))}개, 전체 {report['wallSeconds']:.1f}초)")
+        for name, s in spans[:top]:
+            print(f"  {name:<28} {s['count']:>7}회  합계 {s['total_ms'] / 1000:>8.2f}초  "
+                  f"p50 {s['p50_ms']:>8.1f}ms  p95 {s['p95_ms']:>8.1f}ms  p99 {s['p99_ms']:>8.1f}ms")
+        for channel, entry in sorted(report["bytes"].items()):
+            print(f"  📦 {channel:<12} 수신 {entry['in'] / 1024:>10.1f}KB  송신 {entry['out'] / 1024:>10.1f}KB")
+
+# ==================== 전역 프로파일러 ====================
+
+_profiler = Profiler()
+
+def get_profiler():
+    return _profiler
+
+def start_run(name, trace=None):
+    """스크립트 시작 시 호출 - 종료(sys.exit 포함)할 때 리포트 저장"""
+    global _profiler
+    if trace is None:
+        trace = os.environ.get(TRACE_ENV, "") not in ("", "0")
+    _profiler = Profiler(name, trace=trace)
+    atexit.register(_finish, _profiler)
+    return _profiler
+
+def _finish(profiler):
+    try:
+        profiler.print_summary()
+        path = profiler.write()
+        print(f"📈 실행 리포트: {path}", flush=True)
+    except Exception as e:
+        print(f"⚠️ 실행 리포트 저장 실패: {e}", flush=True)
+
+@contextmanager
+def collect():
+    """프로세스 풀 워커 작업에서 사용 - 작업 동안의 기록만 따로 모음 (부모에서 merge)"""
+    global _profiler
+    previous = _profiler
+    _profiler = Profiler()
+    try:
+        yield _profiler
+    finally:
+        _profiler = previous
+
+def span(name, **attrs):
+    """with span("http.image_download"): ... (전역 프로파일러)"""
+    return _profiler.span(name, **attrs)
+
+def record(name, seconds):
+    _profiler.record(name, seconds)
+
+def add_bytes(channel, bytes_in=0, bytes_out=0):
+    _profiler.add_bytes(channel, bytes_in, bytes_out)
+
+def count(name, amount=1):
+    _profiler.count(name, amount)
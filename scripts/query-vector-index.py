@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 벡터 인덱스 top-k 검색 (build-vector-index.py로 만든 인덱스)
+- --style: 인덱스에 있는 스타일 벡터로 비슷한 스타일 찾기 (자기 자신 제외)
+- --text: 질의 텍스트를 Gemini로 임베딩(retrieval_query)해서 검색
+- --compressed: compress-vectors.py로 만든 압축 인덱스로 검색 (질의는 원본 벡터 그대로)
+- --ann: build-ivf-index.py로 만든 IVF 근사 인덱스로 검색 (--nprobe로 탐색 리스트 수 조절)
+- 인덱스 열기 / 검색 시간 출력
+
+사용법:
+  python query-vector-index.py --collection men_styles --style SF1001 -k 5
+  python query-vector-index.py --text "앞머리 있는 레이어드 단발" -k 10
+  python query-vector-index.py --collection men_styles --style SF1001 --compressed
+  python query-vector-index.py --text "리젠트컷" --collection men_styles --ann --nprobe 32
+"""
+
+import os
+import sys
+import time
+import argparse
+import functools
+
+from embedding_pipeline import embed_batch
+from ivf_index import DEFAULT_IVF_DIR, IVFIndex
+from vector_compression import DEFAULT_COMPRESSED_DIR, CompressedIndex
+from vector_index import COLLECTIONS, DEFAULT_INDEX_DIR, VectorIndex
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+QUERY_TASK_TYPE = "retrieval_query"
+
+def load_gemini_key():
+    """GEMINI_API_KEY (.env 우선, 없으면 환경변수)"""
+    env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("GEMINI_API_KEY="):
+                    return line.split("=", 1)[1].strip().strip('"').strip("'")
+    return os.environ.get("GEMINI_API_KEY")
+
+def embed_query(text, model):
+    api_key = load_gemini_key()
+    if not api_key:
+        print("❌ GEMINI_API_KEY가 없습니다 (--text 검색에 필요)")
+        sys.exit(1)
+    return embed_batch([{"id": "query", "text": text}], api_key, model=model, task_type=QUERY_TASK_TYPE)[0]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="로컬 벡터 인덱스 검색")
+    parser.add_argument("--collection", choices=COLLECTIONS, default="styles")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--style", help="이 스타일과 비슷한 스타일 검색")
+    query.add_argument("--text", help="질의 텍스트 (Gemini 임베딩)")
+    parser.add_argument("-k", type=int, default=5, help="결과 수")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--verify", action="store_true", help="행렬 SHA-256 확인 후 검색")
+    parser.add_argument("--compressed", action="store_true", help="압축 인덱스로 검색 (compress-vectors.py)")
+    parser.add_argument("--compressed-dir", default=DEFAULT_COMPRESSED_DIR)
+    parser.add_argument("--ann", action="store_true", help="IVF 근사 인덱스로 검색 (build-ivf-index.py)")
+    parser.add_argument("--nprobe", type=int, help="--ann 탐색 리스트 수 (기본: 인덱스에 저장된 값)")
+    parser.add_argument("--ivf-dir", default=DEFAULT_IVF_DIR)
+    args = parser.parse_args()
+    if args.ann and args.compressed:
+        parser.error("--ann과 --compressed는 함께 쓸 수 없습니다")
+    return args
+
+def main():
+    args = parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.ann:
+            index = IVFIndex.load(args.collection, args.ivf_dir)
+        elif args.compressed:
+            index = CompressedIndex.load(args.collection, args.compressed_dir, verify=args.verify)
+        else:
+            index = VectorIndex.load(args.collection, args.index_dir, verify=args.verify)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}")
+        builder = "build-ivf-index.py" if args.ann else "compress-vectors.py" if args.compressed else "build-vector-index.py"
+        print(f"먼저 {builder}를 실행하세요.")
+        sys.exit(1)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    if args.style:
+        query = index.vector(args.style)
+        if query is None:
+            print(f"❌ 인덱스에 없는 스타일: {args.style}")
+            sys.exit(1)
+        exclude = [args.style]
+    else:
+        query = embed_query(args.text, index.meta.get("model") or "models/embedding-001")
+        exclude = []
+
+    started = time.perf_counter()
+    if args.ann:
+        results = index.search(query, k=args.k, nprobe=args.nprobe, exclude=exclude)
+    else:
+        results = index.search(query, k=args.k, exclude=exclude)
+    search_ms = (time.perf_counter() - started) * 1000
+
+    if args.ann:
+        label = f", IVF nlist {index.nlist} / nprobe {args.nprobe or index.meta.get('nprobe')}"
+    else:
+        label = f", 압축 {index.meta['setting']}" if args.compressed else ""
+    print(f"🔍 {args.collection} ({len(index)}개 x {index.dims}차원{label}, 생성 {index.meta.get('builtAt')}) "
+          f"- 질의: {args.style or args.text}")
+    print("-" * 50)
+    for rank, (style_id, score) in enumerate(results, 1):
+        print(f"  {rank:>3}. {style_id:<12} {score:.4f}")
+    print("-" * 50)
+    print(f"  인덱스 열기 {load_ms:.2f}ms / 검색 {search_ms:.2f}ms")
+
+if __name__ == "__main__":
+    main()
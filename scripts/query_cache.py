@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+자주 들어오는 챗봇 질의의 임베딩을 미리 계산해 두는 표 (모델별 파일 하나)
+- 질의 어휘: 남자 시리즈 / 스타일 이름(style_aliases) + 89용어(hairgator-theory-data.json) + 추가 질의 파일
+- 키: 정규화한 질의 텍스트 (NFKC + 소문자 + 글자 / 숫자만) → "댄디 컷", "댄디컷!" 모두 "댄디컷"
+  · netlify/functions/lib/embedding.js normalizeQueryKey()와 같은 규칙
+- Gemini retrieval_query 임베딩을 배치로 계산 (embedding_pipeline + 로컬 임베딩 저장소 → 새 어휘만 호출)
+- 파일 형식 / 게시 방식은 임베딩 번들과 같음 (query-embeddings-<모델>.json 포인터 → .bin.gz)
+  · 메타: {"model", "taskType", "queries": [{"key", "text", "source"}]}
+
+사용법:
+  queries = harvest_queries(extra=["투블럭 댄디컷"])
+  embeddings, failed = embed_queries(queries, api_key, resolve_model("embedding-001"))
+  pointer = write_query_table(queries, embeddings, model)
+"""
+
+import re
+import json
+import unicodedata
+
+from embedding_bundle import BUNDLE_DIR, DEFAULT_DTYPE, encode_bundle, publish_bundle
+from embedding_pipeline import embed_items
+from profiling import span
+from style_aliases import men_style_aliases
+from term_matcher import THEORY_DATA_PATH
+from vector_index import prepare_rows
+
+# ==================== 설정 ====================
+
+QUERY_TASK_TYPE = "retrieval_query"
+
+def table_name(model):
+    """질의 임베딩 표 이름 (JS는 번들 모델 "models/<이름>"에서 같은 이름을 만듦)"""
+    return f"query-embeddings-{model['name']}"
+
+def normalize_query(text):
+    """질의 → 표 키 (공백 / 구두점 / 대소문자 차이 무시)"""
+    return re.sub(r"[\W_]+", "", unicodedata.normalize("NFKC", text).lower())
+
+# ==================== 질의 어휘 ====================
+
+def load_theory_queries(path=THEORY_DATA_PATH):
+    """89용어 한글 / 영문 이름 → [(텍스트, 출처)] (괄호 설명은 제거)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        categories = json.load(f)["terms89"]["categories"]
+
+    queries = []
+    for category in categories.values():
+        for term in category["terms"]:
+            for name in (term.get("ko"), term.get("en")):
+                name = re.sub(r"\s*\(.*?\)", "", name or "").strip()
+                if name:
+                    queries.append((name, f"theory:{term['id']}"))
+    return queries
+
+def load_query_file(path):
+    """추가 질의 파일 (한 줄에 하나, # 주석) → [(텍스트, 출처)]"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    return [(line, "file") for line in lines if line and not line.startswith("#")]
+
+def harvest_queries(theory_path=THEORY_DATA_PATH, extra=()):
+    """전체 질의 어휘 → [{"key", "text", "source"}] (키가 같으면 먼저 나온 텍스트 하나만)"""
+    candidates = [(text, f"men-series:{series}") for text, series in men_style_aliases()]
+    candidates += load_theory_queries(theory_path)
+    candidates += list(extra)
+
+    queries, seen = [], set()
+    for text, source in candidates:
+        key = normalize_query(text)
+        if key and key not in seen:
+            seen.add(key)
+            queries.append({"key": key, "text": text, "source": source})
+    return queries
+
+# ==================== 임베딩 / 저장 ====================
+
+def embed_queries(queries, api_key, model, store=None, **kwargs):
+    """질의 임베딩 (retrieval_query) → ({키: 벡터}, [실패한 키])"""
+    items = [{"id": q["key"], "text": q["text"]} for q in queries]
+    return embed_items(items, api_key, model=model["model"], task_type=QUERY_TASK_TYPE, store=store, **kwargs)
+
+def write_query_table(queries, embeddings, model, out_dir=BUNDLE_DIR, dtype=DEFAULT_DTYPE):
+    """질의 임베딩 표 저장 → (포인터 dict, 제외 목록). 내용이 같으면 파일 / 포인터 유지"""
+    by_key = {q["key"]: q for q in queries}
+    with span("cpu.encode_query_table", model=model["name"]):
+        keys, matrix, _, excluded = prepare_rows([(key, embeddings.get(key), None) for key in by_key])
+        meta = {"model": model["model"], "taskType": QUERY_TASK_TYPE, "queries": [by_key[key] for key in keys]}
+        raw = encode_bundle(matrix, meta, dtype)
+    pointer = publish_bundle(table_name(model), raw, out_dir, count=len(keys),
+                             dims=int(matrix.shape[1]) if keys else 0, dtype=dtype, model=model["model"],
+                             taskType=QUERY_TASK_TYPE)
+    return pointer, excluded
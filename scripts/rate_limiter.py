@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+토큰 버킷 레이트 리미터
+- 고정 time.sleep() 대신 초당 요청 수(RPS) 기준으로 호출 간격 제어
+- 여러 스레드가 하나의 버킷을 공유 (Gemini API 호출 제한용)
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷
+
+    rate: 초당 보충되는 토큰 수 (0 이하면 제한 없음)
+    capacity: 버킷 최대 크기 (순간 버스트 허용량, 기본값은 rate)
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # 누적 대기 시간 (초)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기 후 대기한 시간(초) 반환 (버킷 크기보다 많이 요청하면 ValueError)"""
+        if self.rate <= 0:
+            return 0.0
+        if tokens > self.capacity:
+            raise ValueError(f"요청 토큰 {tokens} > 버킷 크기 {self.capacity:g} (영원히 채워지지 않음)")
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.waited += waited
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
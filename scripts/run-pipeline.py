@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+데이터셋 → Firestore 전체 갱신 파이프라인 실행
+- 검증 → 자막 파싱 / 메타데이터 생성, 남자 업로드 → 임베딩 → 벡터 인덱스 → 압축 / IVF, 이미지 프리페치 → 도해도 분석을 한 번에
+- 의존 관계가 없는 단계는 동시 실행 (남녀 임베딩, 자막 파싱과 이미지 프리페치 등)
+- 입력(데이터셋 파일, 앞 단계 출력, 스크립트 소스, 인자)이 지난 성공 실행과 같으면 스킵
+- 단계별 소요 시간 표 + .cache/pipeline/last-run.json 리포트
+
+사용법:
+  python run-pipeline.py                       # 바뀐 단계만 실행
+  python run-pipeline.py --list                # 단계 / 의존 관계 보기
+  python run-pipeline.py --dry-run             # 실행할 단계만 확인
+  python run-pipeline.py --only embed-men --only embed-women
+  python run-pipeline.py --force analyze-diagrams
+  python run-pipeline.py --force all --max-parallel 2
+"""
+
+import os
+import sys
+import argparse
+import functools
+
+from pipeline import (
+    DEFAULT_REMOTE_TTL_HOURS,
+    REPORT_PATH,
+    SCRIPTS_DIR,
+    BlobStoreArtifact,
+    DatasetArtifact,
+    FileArtifact,
+    FirestoreArtifact,
+    PipelineGraph,
+    PipelineRunner,
+    Stage,
+)
+from embedding_bundle import BUNDLE_DIR
+from ivf_index import DEFAULT_IVF_DIR
+from profiling import TRACE_ENV
+from vector_compression import DEFAULT_COMPRESSED_DIR
+from vector_index import DEFAULT_INDEX_DIR
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 아티팩트 ====================
+
+WOMEN_DATASET = DatasetArtifact("dataset:women", gender="women")
+MEN_DATASET = DatasetArtifact("dataset:men", gender="men")
+THEORY_DATA = FileArtifact("file:theory-data", path=os.path.join(SCRIPTS_DIR, "hairgator-theory-data.json"))
+VALIDATION_RESULT = FileArtifact("file:validation", path=os.path.join(SCRIPTS_DIR, "dataset-validation-result.json"))
+PARSED_CAPTIONS = FileArtifact("file:parsed-captions", path=os.path.join(SCRIPTS_DIR, "parsed-captions.json"))
+STYLES_METADATA = FileArtifact("file:styles-metadata", path=os.path.join(SCRIPTS_DIR, "styles-metadata.json"))
+FIRESTORE_FILES = FileArtifact("file:firestore-data", path=os.path.join(SCRIPTS_DIR, "firestore-data"))
+IMAGE_BLOBS = BlobStoreArtifact("blobs:images")
+VECTOR_INDEX = FileArtifact("file:vector-index", path=DEFAULT_INDEX_DIR)
+COMPRESSED_VECTORS = FileArtifact("file:vector-compressed", path=DEFAULT_COMPRESSED_DIR)
+IVF_INDEX = FileArtifact("file:ivf-index", path=DEFAULT_IVF_DIR)
+EMBEDDING_BUNDLES = FileArtifact("file:embedding-bundles", path=BUNDLE_DIR)
+QUERY_EMBEDDINGS = FileArtifact("file:query-embeddings", path=BUNDLE_DIR)
+
+# 여자 스타일 문서는 이 파이프라인 밖에서 올라감 → --remote-ttl 기준으로만 변경 판단
+WOMEN_STYLES = FirestoreArtifact("firestore:styles", collection="styles")
+MEN_STYLES = FirestoreArtifact("firestore:men_styles", collection="men_styles")
+WOMEN_EMBEDDINGS = FirestoreArtifact("firestore:styles#embedding", collection="styles",
+                                     fields=("embedding", "embeddingKey"))
+MEN_EMBEDDINGS = FirestoreArtifact("firestore:men_styles#embedding", collection="men_styles",
+                                   fields=("embedding", "embeddingKey"))
+DIAGRAM_METADATA = FirestoreArtifact("firestore:styles#diagrams", collection="styles",
+                                     fields=("diagrams", "diagramsAnalyzedAt"))
+# 챗봇 메뉴판 컬렉션 (챗봇 함수 / 임베딩 번들의 데이터 소스, 이 파이프라인 밖에서 갱신)
+HAIRSTYLES = FirestoreArtifact("firestore:hairstyles", collection="hairstyles")
+
+# ==================== 단계 ====================
+
+STAGES = [
+    Stage("validate", "validate-hair-dataset.py",
+          inputs=[WOMEN_DATASET], outputs=[VALIDATION_RESULT],
+          description="데이터셋 파일 구조 검증"),
+    Stage("parse-captions", "parse-captions.py", ["--incremental"],
+          inputs=[WOMEN_DATASET, VALIDATION_RESULT, THEORY_DATA], outputs=[PARSED_CAPTIONS],
+          description="자막 파싱 + 용어 추출"),
+    Stage("generate-metadata", "generate-metadata.py", ["--incremental"],
+          inputs=[WOMEN_DATASET, VALIDATION_RESULT], outputs=[STYLES_METADATA, FIRESTORE_FILES],
+          description="스타일 메타데이터 JSON 생성"),
+    Stage("upload-men", "upload-men-to-firestore.py",
+          inputs=[MEN_DATASET], outputs=[MEN_STYLES],
+          description="남자 스타일 Firestore 업로드 (바뀐 문서만)"),
+    # 임베딩 스크립트는 끝날 때 번들도 만들지만, 파이프라인에서는 embedding-bundle 단계가 한 번에 생성
+    Stage("embed-women", "generate-embeddings.py", ["--no-bundle"],
+          inputs=[WOMEN_STYLES], outputs=[WOMEN_EMBEDDINGS],
+          description="여자 스타일 임베딩"),
+    Stage("embed-men", "generate-men-embeddings.py", ["--no-bundle"],
+          inputs=[MEN_STYLES], outputs=[MEN_EMBEDDINGS],
+          description="남자 스타일 임베딩"),
+    Stage("vector-index", "build-vector-index.py",
+          inputs=[WOMEN_EMBEDDINGS, MEN_EMBEDDINGS], outputs=[VECTOR_INDEX],
+          description="유사도 검색용 로컬 벡터 인덱스"),
+    Stage("compress-vectors", "compress-vectors.py",
+          inputs=[VECTOR_INDEX], outputs=[COMPRESSED_VECTORS],
+          description="벡터 인덱스 압축 (PCA + 양자화) + recall@k 리포트"),
+    Stage("ivf-index", "build-ivf-index.py",
+          inputs=[VECTOR_INDEX], outputs=[IVF_INDEX],
+          description="IVF 근사 최근접 이웃 인덱스 (증분 갱신)"),
+    Stage("prefetch-images", "prefetch-images.py",
+          inputs=[WOMEN_STYLES, MEN_STYLES], outputs=[IMAGE_BLOBS],
+          description="도해도 / 결과 이미지 로컬 저장소로 받기"),
+    Stage("analyze-diagrams", "analyze-diagrams-metadata.py",
+          inputs=[WOMEN_STYLES, IMAGE_BLOBS], outputs=[DIAGRAM_METADATA],
+          description="도해도 Vision 분석"),
+    Stage("embedding-bundle", "build-embedding-bundle.py",
+          inputs=[HAIRSTYLES, WOMEN_EMBEDDINGS, MEN_EMBEDDINGS], outputs=[EMBEDDING_BUNDLES],
+          description="챗봇 함수용 임베딩 번들 (hairstyles 성별별, 임베딩 단계 뒤에 갱신)"),
+    Stage("query-embeddings", "build-query-embeddings.py",
+          inputs=[THEORY_DATA], outputs=[QUERY_EMBEDDINGS],
+          description="챗봇 질의 임베딩 표 (스타일 이름 + 89용어)"),
+]
+
+STATUS_LABELS = {
+    "ok": "✅ 실행",
+    "failed": "❌ 실패",
+    "blocked": "⛔ 중단",
+    "skipped": "⏭️ 스킵",
+    "not-selected": "· 제외",
+    "would-run": "▶ 실행 예정",
+}
+
+def parse_args(stage_names):
+    parser = argparse.ArgumentParser(description="스크립트 단계 DAG 실행")
+    parser.add_argument("--only", action="append", choices=stage_names, default=[],
+                        help="이 단계만 실행 (여러 번 사용 가능, 나머지는 현재 결과를 입력으로 사용)")
+    parser.add_argument("--with-downstream", action="store_true",
+                        help="--only 단계의 후행 단계까지 실행")
+    parser.add_argument("--force", action="append", choices=stage_names + ["all"], default=[],
+                        help="입력이 같아도 실행 (all: 전체)")
+    parser.add_argument("--max-parallel", type=int, default=4, help="동시 실행 단계 수")
+    parser.add_argument("--remote-ttl", type=float, default=DEFAULT_REMOTE_TTL_HOURS,
+                        help="외부에서 갱신되는 Firestore 컬렉션을 바뀌었다고 볼 시간 (시간 단위)")
+    parser.add_argument("--trace", action="store_true",
+                        help="각 단계 실행 리포트와 함께 Chrome trace(.trace.json)도 저장")
+    parser.add_argument("--dry-run", action="store_true", help="실행하지 않고 실행/스킵 판단만")
+    parser.add_argument("--list", action="store_true", help="단계 목록과 의존 관계 출력")
+    return parser.parse_args()
+
+def print_graph(graph):
+    for name in graph.order:
+        stage = graph.stages[name]
+        deps = ", ".join(graph.deps[name]) or "-"
+        print(f"  {name:<18} ← {deps}")
+        print(f"  {'':<18}   {stage.script} {' '.join(stage.args)}  ({stage.description})")
+        print(f"  {'':<18}   입력: {', '.join(a.name for a in stage.inputs)}")
+        print(f"  {'':<18}   출력: {', '.join(a.name for a in stage.outputs)}")
+
+def print_summary(graph, results, report):
+    print("\n" + "=" * 70)
+    print("📊 파이프라인 결과")
+    print("=" * 70)
+    for name in graph.order:
+        result = results[name]
+        label = STATUS_LABELS.get(result["status"], result["status"])
+        seconds = f"{result['seconds']:.1f}초" if result["status"] in ("ok", "failed") else "-"
+        print(f"  {name:<18} {label:<12} {seconds:>8}  {result['reason']}")
+    print("-" * 70)
+    print(f"  전체 소요: {report['wallSeconds']:.1f}초 (단계 합계 {report['serialSeconds']:.1f}초, "
+          f"동시 실행 {report['maxParallel']}개)")
+    print(f"💾 리포트: {REPORT_PATH}")
+
+def main():
+    graph = PipelineGraph(STAGES)
+    args = parse_args(list(graph.stages))
+
+    if args.list:
+        print_graph(graph)
+        return
+
+    if args.trace:
+        os.environ[TRACE_ENV] = "1"    # 단계 서브프로세스로 전달
+
+    selected = set(graph.stages)
+    if args.only:
+        selected = graph.downstream(args.only) if args.with_downstream else set(args.only)
+    force = set(graph.stages) if "all" in args.force else set(args.force)
+
+    print("=" * 70)
+    print("파이프라인 실행" + (" (dry-run)" if args.dry_run else "") + f": {len(selected)}/{len(graph.stages)}개 단계")
+    print("=" * 70)
+
+    runner = PipelineRunner(graph, selected=selected, force=force, max_parallel=args.max_parallel,
+                            dry_run=args.dry_run, remote_ttl_hours=args.remote_ttl)
+    results = runner.run()
+    report = runner.write_report()
+    print_summary(graph, results, report)
+
+    if any(r["status"] in ("failed", "blocked") for r in results.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 Gemini / 이미지 스텁 서버 (처리량 측정용)
+- GET  /images/<name>.png            : 더미 도해도 PNG 반환
+- POST /v1beta/models/<model>:generateContent : 고정 도해도 분석 JSON 반환
+  (이미지가 여러 장이면 [Step N] 표시 기준 JSON 배열, --malformed-rate 비율로 깨진/빠진 배열 응답)
+- POST /v1beta/models/<model>:batchEmbedContents / :embedContent : 텍스트 해시 기반 결정적 768차원 벡터
+- 응답 지연(--latency, --image-latency)으로 실제 네트워크 대기 시간 흉내
+
+사용법:
+  python stub-gemini-server.py --port 8765
+  GEMINI_API_BASE=http://127.0.0.1:8765 GEMINI_API_KEY=stub python analyze-diagrams-metadata.py
+
+  # 서버를 띄우고 동시 분석 엔진 처리량 바로 측정
+  python stub-gemini-server.py --bench --styles 70 --diagrams 30 --concurrency 16 --rps 0
+
+  # 도해도 여러 장을 한 요청으로 (배치 크기별 요청 수 / 프롬프트 바이트 비교)
+  python stub-gemini-server.py --bench --styles 20 --concurrency 8 --batch-size 1 10 30 --malformed-rate 0.2
+
+  # 배치 임베딩 파이프라인 처리량 측정
+  python stub-gemini-server.py --bench embeddings --styles 2000 --concurrency 1 4 8
+"""
+
+import sys
+import json
+import time
+import zlib
+import random
+import struct
+import hashlib
+import argparse
+import threading
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+print = functools.partial(print, flush=True)
+
+# ==================== 더미 응답 ====================
+
+STUB_DIAGRAM_METADATA = {
+    "lifting": "L4",
+    "lifting_angle": 90,
+    "direction": "D4",
+    "section": "VS",
+    "zone": "Back",
+    "cutting_method": "Point",
+    "guide_line": "이전 섹션",
+    "over_direction": False,
+    "notes": "stub"
+}
+
+EMBEDDING_DIMS = 768
+
+def make_embedding(text):
+    """텍스트마다 항상 같은 값이 나오는 더미 임베딩"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-0.1, 0.1) for _ in range(EMBEDDING_DIMS)]
+
+def make_png(width, height):
+    """단색 그레이스케일 PNG 바이트 생성 (PIL 없이)"""
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xffffffff)
+
+    raw = b"".join(b"\x00" + bytes([(x * 7 + y) % 256 for x in range(width)]) for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+# ==================== 핸들러 ====================
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive 지원
+
+    # 서버 시작 시 설정
+    latency = 0.0
+    image_latency = 0.0
+    image_bytes = b""
+    malformed_rate = 0.0
+    rng = random.Random(7)
+    counters = None
+    counters_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, key, n=1):
+        with self.counters_lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self._count("bytes_out", len(body))
+
+    def _send_json(self, obj, status=200):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if self.path.startswith("/images/"):
+            time.sleep(self.image_latency)
+            self._count("image_requests")
+            self._send(200, self.image_bytes, "image/png")
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self._count("bytes_in", length)
+
+        path = self.path.split("?", 1)[0]
+        if path.endswith(":generateContent"):
+            time.sleep(self.latency)
+            self._count("generate_requests")
+            parts = json.loads(body)["contents"][0]["parts"]
+            images = sum(1 for part in parts if "inline_data" in part)
+            steps = [part["text"][len("[Step "):-1] for part in parts
+                     if part.get("text", "").startswith("[Step ")]
+            self._count("generate_images", images)
+            self._count("prompt_bytes", sum(len(part.get("text", "").encode("utf-8")) for part in parts))
+
+            if images > 1:
+                answer = [{"step": int(step), **STUB_DIAGRAM_METADATA} for step in steps]
+                with self.counters_lock:
+                    roll = self.rng.random()
+                if roll < self.malformed_rate / 2:
+                    text = json.dumps(answer, ensure_ascii=False)[:-20]     # 잘린 배열
+                elif roll < self.malformed_rate:
+                    text = json.dumps(answer[:len(answer) // 2], ensure_ascii=False)   # 일부만
+                else:
+                    text = json.dumps(answer, ensure_ascii=False)
+            else:
+                text = json.dumps(STUB_DIAGRAM_METADATA, ensure_ascii=False)
+            self._send_json({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+        elif path.endswith(":batchEmbedContents"):
+            time.sleep(self.latency)
+            requests_ = json.loads(body).get("requests", [])
+            self._count("embed_requests")
+            self._count("embed_texts", len(requests_))
+            self._send_json({"embeddings": [
+                {"values": make_embedding(r["content"]["parts"][0]["text"])} for r in requests_
+            ]})
+        elif path.endswith(":embedContent"):
+            time.sleep(self.latency)
+            self._count("embed_requests")
+            self._count("embed_texts")
+            text = json.loads(body)["content"]["parts"][0]["text"]
+            self._send_json({"embedding": {"values": make_embedding(text)}})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+def start_server(port, latency, image_latency, image_size, malformed_rate=0.0):
+    """백그라운드 스레드에서 스텁 서버 실행 후 (server, base_url) 반환"""
+    StubHandler.latency = latency
+    StubHandler.malformed_rate = malformed_rate
+    StubHandler.image_latency = image_latency
+    StubHandler.image_bytes = make_png(image_size, image_size)
+    StubHandler.counters = {}
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# ==================== 벤치마크 ====================
+
+def run_embedding_bench(base_url, args):
+    from embedding_pipeline import embed_items
+
+    items = [{"id": f"STUB{s:05d}", "text": f"스텁 자막 {s} " * 50, "title": f"헤어스타일 STUB{s:05d} 레시피"}
+             for s in range(args.styles)]
+
+    for concurrency in args.concurrency:
+        started = time.monotonic()
+        embeddings, failed = embed_items(items, "stub", concurrency=concurrency, rps=args.rps,
+                                         api_base=base_url)
+        elapsed = time.monotonic() - started
+        print(f"  동시 {concurrency:>3}개: {len(items)}개 / {elapsed:6.2f}초 = {len(items) / elapsed:8.1f} 개/초 "
+              f"(성공 {len(embeddings)}, 실패 {len(failed)})")
+
+def run_bench(base_url, args):
+    from rate_limiter import TokenBucket
+    from diagram_analysis import (
+        analyze_diagram_batch,
+        analyze_diagram_image,
+        analyze_styles_concurrently,
+        create_http_session,
+    )
+
+    styles = [{
+        "id": f"STUB{s:04d}",
+        "diagrams": [{"step": d + 1, "url": f"{base_url}/images/STUB{s:04d}_{d + 1:02d}.png"}
+                     for d in range(args.diagrams)]
+    } for s in range(args.styles)]
+    total = args.styles * args.diagrams
+
+    for batch_size in args.batch_size:
+        for concurrency in args.concurrency:
+            session = create_http_session(pool_size=concurrency)
+            limiter = TokenBucket(args.rps)
+            analyze_fn = functools.partial(analyze_diagram_image, api_key="stub", session=session,
+                                           limiter=limiter, api_base=base_url)
+            analyze_batch_fn = functools.partial(analyze_diagram_batch, api_key="stub", session=session,
+                                                 limiter=limiter, api_base=base_url)
+            done_styles = []
+            before = dict(StubHandler.counters)
+
+            started = time.monotonic()
+            stats = analyze_styles_concurrently(styles, analyze_fn,
+                                                lambda style_id, diagrams: done_styles.append(style_id),
+                                                concurrency=concurrency, verbose=False,
+                                                analyze_batch_fn=analyze_batch_fn, batch_size=batch_size)
+            elapsed = time.monotonic() - started
+
+            requests_ = StubHandler.counters.get("generate_requests", 0) - before.get("generate_requests", 0)
+            prompt_kb = (StubHandler.counters.get("prompt_bytes", 0) - before.get("prompt_bytes", 0)) / 1024
+            print(f"  배치 {batch_size:>3}장 / 동시 {concurrency:>3}개: {total}장 / {elapsed:6.2f}초 = "
+                  f"{total / elapsed:7.1f} 장/초, 요청 {requests_}회, 프롬프트 {prompt_kb:,.0f}KB "
+                  f"(성공 {stats['diagrams_analyzed']}, 실패 {stats['diagrams_failed']}, 스타일 {len(done_styles)})")
+
+# ==================== 메인 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 Gemini/이미지 스텁 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.8, help="Gemini 응답 지연 (초)")
+    parser.add_argument("--image-latency", type=float, default=0.1, help="이미지 다운로드 지연 (초)")
+    parser.add_argument("--image-size", type=int, default=256, help="더미 PNG 한 변 픽셀 수")
+    parser.add_argument("--bench", nargs="?", const="diagrams", choices=["diagrams", "embeddings"],
+                        help="서버를 띄우고 처리량 측정 (기본: diagrams)")
+    parser.add_argument("--styles", type=int, default=10)
+    parser.add_argument("--diagrams", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--rps", type=float, default=0, help="토큰 버킷 초당 호출 수 (0=무제한)")
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1],
+                        help="요청 하나에 묶을 도해도 수 (diagrams 벤치마크)")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="여러 장 요청에 깨진/일부만 있는 배열로 응답할 비율")
+    args = parser.parse_args()
+
+    server, base_url = start_server(0 if args.bench else args.port,
+                                    args.latency, args.image_latency, args.image_size, args.malformed_rate)
+
+    if args.bench:
+        print("=" * 70)
+        if args.bench == "embeddings":
+            print(f"배치 임베딩 처리량 (지연 Gemini {args.latency}s)")
+            print("=" * 70)
+            run_embedding_bench(base_url, args)
+        else:
+            print(f"도해도 동시 분석 처리량 (지연 Gemini {args.latency}s / 이미지 {args.image_latency}s)")
+            print("=" * 70)
+            run_bench(base_url, args)
+        print(f"\n  요청 수: {StubHandler.counters}")
+        server.shutdown()
+        return
+
+    print(f"✅ 스텁 서버 실행 중: {base_url} (Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
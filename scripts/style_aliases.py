@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+남자 시리즈별 이름 / 고객이 실제로 부르는 스타일 이름 (댄디컷, 가일컷, 리젠트컷 ...)
+- generate-men-embeddings.py: 임베딩 텍스트의 시리즈 설명 (men_series_description)
+- build-query-embeddings.py: 자주 들어오는 질의 어휘 (men_style_aliases)
+- 시리즈 설명 문자열은 embeddingKey에 들어가므로 항목을 바꾸면 남자 스타일 임베딩이 모두 다시 생성됨
+"""
+
+# 시리즈 → 이름(영문 / 한글 / 통칭), 설명, 세부 스타일 이름
+MEN_SERIES_TERMS = {
+    "SF": {
+        "names": ["Side Fringe", "사이드프린지"],
+        "description": "앞머리를 앞으로 내려 자연스럽게 흐르는 스타일",
+        "aliases": ["댄디컷", "시스루댄디", "슬릭컷"],
+    },
+    "SP": {
+        "names": ["Side Part", "사이드파트", "가르마"],
+        "description": "",
+        "aliases": ["가르마컷", "가일컷", "시스루가르마", "플랫컷", "리프컷", "포마드컷", "드롭컷", "하프컷",
+                    "숏가일", "리젠트컷", "애즈컷"],
+    },
+    "FU": {
+        "names": ["Fringe Up", "프린지업"],
+        "description": "앞머리 끝만 위로 올린 스타일",
+        "aliases": ["아이비리그컷", "크랙컷"],
+    },
+    "PB": {
+        "names": ["Pushed Back", "푸시드백", "슬릭백"],
+        "description": "모발 전체가 뒤쪽으로 넘어가는 스타일",
+        "aliases": ["폼파도르컷", "언더컷"],
+    },
+    "BZ": {
+        "names": ["Buzz Cut", "버즈컷"],
+        "description": "가장 짧은 커트 스타일",
+        "aliases": ["클리퍼"],
+    },
+    "CP": {
+        "names": ["Crop Cut", "크롭컷"],
+        "description": "버즈보다 조금 긴 스타일",
+        "aliases": ["스왓컷", "숏크롭"],
+    },
+    "MC": {
+        "names": ["Mohican", "모히칸"],
+        "description": "센터를 세워 강조하는 스타일",
+        "aliases": ["모히칸컷"],
+    },
+}
+
+def men_series_description(series):
+    """임베딩 텍스트에 넣는 시리즈 설명 (없는 시리즈면 None)"""
+    terms = MEN_SERIES_TERMS.get(series)
+    if not terms:
+        return None
+    return " ".join(part for part in [*terms["names"], terms["description"], *terms["aliases"]] if part)
+
+def men_style_aliases():
+    """[(질의 텍스트, 시리즈)] - 시리즈 이름 + 세부 스타일 이름"""
+    return [(name, series) for series, terms in MEN_SERIES_TERMS.items()
+            for name in terms["names"] + terms["aliases"]]
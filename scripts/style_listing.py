@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Firestore 스타일 목록 조회 (필드 투영 + 스트리밍)
+- collection.get() + to_dict()는 768차원 embedding, diagrams 배열까지 전부 내려받음
+- 단계별로 필요한 필드만 select()로 읽고, 리스트로 모으지 않고 스트리밍
+- 실제로 처리할 문서만 get_all(field_paths=...)로 필요한 필드 추가 조회
+"""
+
+import time
+
+from profiling import count, record
+
+# 임베딩 단계: 스킵 판단에 필요한 상태 필드 (embedding 벡터 자체는 읽지 않음)
+# 모델 전환 중에는 섀도 슬롯 상태도 필요 (embedding_models 참고)
+EMBEDDING_STATUS_FIELDS = [
+    "embeddingKey", "embeddingUpdatedAt", "embeddingModel", "embeddingModelVersion",
+    "embeddingShadowKey", "embeddingShadowUpdatedAt", "embeddingShadowModel", "embeddingShadowModelVersion",
+]
+
+# 도해도 분석 단계: 스킵 판단용 상태 필드
+ANALYSIS_STATUS_FIELDS = ["diagramsAnalyzedAt"]
+
+# get_all 한 번에 요청할 문서 수
+GET_ALL_CHUNK = 100
+
+def stream_styles(db, collection, fields, where=()):
+    """select() 투영으로 지정 필드만 스트리밍
+
+    where: [(필드, 연산자, 값)] - 서버에서 거를 조건 (걸러진 문서는 내려받지 않음)
+    yield: (doc_id, {필드: 값}) - 필드가 없는 문서도 빈 dict로 포함
+    """
+    query = db.collection(collection)
+    for field, op, value in where:
+        query = query.where(field, op, value)
+    stream = iter(query.select(fields).stream())
+    while True:
+        # 소비하는 쪽 처리 시간은 빼고 다음 문서를 받는 시간만 기록 (페이지 경계에서 느려짐)
+        started = time.perf_counter()
+        snapshot = next(stream, None)
+        record("firestore.stream_next", time.perf_counter() - started)
+        if snapshot is None:
+            return
+        count("firestore.docs_read")
+        yield snapshot.id, snapshot.to_dict() or {}
+
+def fetch_style_fields(db, collection, doc_ids, fields):
+    """지정한 문서들만 필요한 필드로 조회
+
+    yield: (doc_id, {필드: 값}) - 존재하지 않는 문서는 건너뜀
+    """
+    collection_ref = db.collection(collection)
+    doc_ids = list(doc_ids)
+    for i in range(0, len(doc_ids), GET_ALL_CHUNK):
+        refs = [collection_ref.document(doc_id) for doc_id in doc_ids[i:i + GET_ALL_CHUNK]]
+        started = time.perf_counter()
+        snapshots = list(db.get_all(refs, field_paths=fields))
+        record("firestore.get_all", time.perf_counter() - started)
+        count("firestore.docs_read", len(snapshots))
+        for snapshot in snapshots:
+            if snapshot.exists:
+                yield snapshot.id, snapshot.to_dict() or {}
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+합성 레시피 데이터셋 생성 (벤치마크용)
+- 실제 폴더 구조 그대로: women_cut_recipe/<시리즈>/<스타일ID>/, men_cut_recipe/<번호. 카테고리>/<스타일ID>/
+- 스타일마다 자막 txt, 결과 이미지, SR_ 도해도 PNG (더미 바이트)
+- 자막은 firestore-data/*.json의 실제 자막 문장을 섞어서 생성 (없으면 기본 문장) → 용어 매칭 분포가 실제와 비슷
+- 시드가 같으면 파일 내용이 항상 같음 (커밋 간 비교 가능)
+
+사용법:
+  roots = generate_dataset(tmp_dir, women=1000, men=300, diagram_bytes=png)
+  index = load_dataset_index(path=..., roots=roots)
+  vectors = synthetic_embeddings(10000)          # 임베딩 모양의 정규화 벡터 (numpy)
+"""
+
+import os
+import glob
+import json
+import random
+
+import numpy as np
+
+from dataset_index import MEN_SERIES_FOLDERS, WOMEN_SERIES
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "firestore-data")
+
+# 실제 자막이 없을 때 쓰는 문장 (레시피 용어 포함)
+FALLBACK_SENTENCES = [
+    "가로섹션을 이용하여 진행한다.",
+    "천체축 각도 0도와 스퀘어 라인으로 고정 디자인라인을 이용하여 진행한다.",
+    "후대각 섹션으로 45도 리프팅하여 그래쥬에이션을 만든다.",
+    "세로섹션 90도 리프팅으로 레이어를 연결한다.",
+    "이전 섹션을 가이드로 이동 디자인 라인을 사용한다.",
+    "D4 방향으로 오버 다이렉션하여 길이를 남긴다.",
+    "포인트 커트로 끝선을 부드럽게 정리한다.",
+    "클리퍼로 네이프를 정리하고 크로스 체킹으로 좌우 균형을 확인한다.",
+    "앞머리는 얼굴 라인을 따라 사이드로 연결한다.",
+    "Let's check the balance and keep the guide.",
+]
+
+# 자막 파일명 패턴 비율 (dataset_index.caption_patterns 순서)
+CAPTION_SUFFIXES = ["(자막).txt", "(자막).txt", "(자막).txt", "-jamag.txt", "_자막.txt"]
+
+def load_caption_corpus(directory=CORPUS_DIR):
+    """firestore-data/*.json 자막을 문장 단위로 모으기"""
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                caption = json.load(f).get("caption") or ""
+        except (ValueError, OSError):
+            continue
+        sentences.extend(s.strip() + "." for s in caption.replace("\n", " ").split(".") if s.strip())
+    return sentences or list(FALLBACK_SENTENCES)
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _make_caption(rng, corpus, lines):
+    return "\n".join(rng.choice(corpus) for _ in range(lines)) + "\n"
+
+def _write_style(style_dir, style_id, diagram_prefix, rng, corpus, diagram_bytes, options):
+    os.makedirs(style_dir, exist_ok=True)
+    if rng.random() >= options["missing_caption_rate"]:
+        suffix = rng.choice(CAPTION_SUFFIXES)
+        text = _make_caption(rng, corpus, rng.randint(*options["caption_lines"]))
+        _write(os.path.join(style_dir, f"{style_id}{suffix}"), text.encode("utf-8"))
+    if rng.random() >= options["missing_result_rate"]:
+        _write(os.path.join(style_dir, rng.choice(["1.png", "result.jpg"])), diagram_bytes)
+    for step in range(1, rng.randint(*options["diagrams"]) + 1):
+        _write(os.path.join(style_dir, f"SR_{diagram_prefix}_{step:02d}.png"), diagram_bytes)
+
+def _distribute(total, buckets):
+    """total개 스타일을 buckets개 시리즈에 고르게 나누기"""
+    base, extra = divmod(total, buckets)
+    return [base + (1 if i < extra else 0) for i in range(buckets)]
+
+def generate_dataset(root, women, men, diagram_bytes, seed=42, corpus=None, diagrams=(8, 20),
+                     caption_lines=(20, 60), missing_caption_rate=0.05, missing_result_rate=0.03):
+    """root 아래 합성 데이터셋 생성 → {"women": 경로, "men": 경로} (load_dataset_index의 roots)"""
+    rng = random.Random(seed)
+    corpus = corpus or load_caption_corpus()
+    options = {
+        "diagrams": diagrams,
+        "caption_lines": caption_lines,
+        "missing_caption_rate": missing_caption_rate,
+        "missing_result_rate": missing_result_rate,
+    }
+    roots = {
+        "women": os.path.join(root, "women_cut_recipe"),
+        "men": os.path.join(root, "men_cut_recipe"),
+    }
+
+    # 여자: FAL0001, FAL0002 ... (도해도 SR_FAL_0001_01.png)
+    for series, count in zip(WOMEN_SERIES, _distribute(women, len(WOMEN_SERIES))):
+        for n in range(1, count + 1):
+            style_id = f"{series}{n:04d}"
+            _write_style(os.path.join(roots["women"], series, style_id), style_id, f"{series}_{n:04d}",
+                         rng, corpus, diagram_bytes, options)
+
+    # 남자: SF1001, SF1002 ... (카테고리 폴더 아래)
+    for (series, folder), count in zip(MEN_SERIES_FOLDERS.items(), _distribute(men, len(MEN_SERIES_FOLDERS))):
+        for n in range(1, count + 1):
+            style_id = f"{series}{1000 + n}"
+            _write_style(os.path.join(roots["men"], folder, style_id), style_id, style_id,
+                         rng, corpus, diagram_bytes, options)
+
+    return roots
+
+def men_upload_styles(index, storage_base="https://firebasestorage.googleapis.com/v0/b/bench/o"):
+    """upload-men-result.json의 styles 항목 모양으로 변환 (Storage 업로드 결과 대역)"""
+    styles = []
+    for _, series_styles in index.iter_styles("men"):
+        for style in series_styles:
+            result = style.find_result()
+            styles.append({
+                "styleId": style.style_id,
+                "series": style.series,
+                "resultImage": f"{storage_base}/{style.style_id}%2F{result.name}" if result else None,
+                "diagrams": [{"step": i + 1, "url": f"{storage_base}/{style.style_id}%2F{f.name}"}
+                             for i, f in enumerate(style.diagrams())],
+                "captionUrl": None,
+            })
+    return styles
+
+def synthetic_embeddings(count, dims=768, rank=64, clusters=None, seed=42, sample_seed=None):
+    """임베딩과 비슷한 모양의 L2 정규화 float32 벡터 (count, dims)
+
+    실제 임베딩처럼 공통 방향 + 저차원 구조(rank) + 스타일 군집을 가짐
+    (정규분포 벡터는 모든 방향 분산이 같아서 PCA / 근사 검색 평가가 비현실적으로 나빠짐)
+    sample_seed: 구조(seed, clusters)는 그대로 두고 다른 표본을 뽑을 때 (나눠서 생성 / 별도 질의 세트)
+    """
+    rng = np.random.default_rng(seed)
+    clusters = clusters or max(1, count // 50)
+    basis = rng.normal(size=(rank, dims)).astype(np.float32) / np.sqrt(rank)
+    offset = rng.normal(size=dims).astype(np.float32) * 3.0 / np.sqrt(dims)
+    centers = rng.normal(size=(clusters, rank)).astype(np.float32)
+    # 뒤쪽 잠재 차원일수록 분산이 작게 (실제 임베딩의 고유값 감소와 비슷하게)
+    decay = np.linspace(1.0, 0.1, rank, dtype=np.float32)
+    if sample_seed is not None:
+        rng = np.random.default_rng([seed, sample_seed])
+
+    vectors = np.empty((count, dims), dtype=np.float32)
+    for start in range(0, count, 65536):
+        n = min(65536, count - start)
+        latent = (centers[rng.integers(clusters, size=n)] + 0.6 * rng.normal(size=(n, rank))) * decay
+        block = latent.astype(np.float32) @ basis + offset
+        block += rng.normal(scale=2.0 / np.sqrt(dims), size=(n, dims)).astype(np.float32)
+        vectors[start:start + n] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
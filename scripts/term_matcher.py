@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+헤어 용어 다중 패턴 매칭 엔진
+- 89용어(hairgator-theory-data.json) + 자막 파싱 용어표를 정규식 하나로 컴파일
+- 용어마다 `kw in text`를 반복하지 않고 텍스트를 한 번만 훑어서 모든 용어를 위치와 함께 찾음
+- 같은 위치에서 시작하는 용어가 여럿이면 가장 긴 용어 우선 (스퀘어 레이어 > 레이어)
+- nested=True면 긴 용어 안에 들어 있거나 걸쳐 있는 용어도 모두 보고 (Aho-Corasick과 같은 결과)
+- 리터럴 용어는 공통 접두사 트라이로 묶어서 위치마다 시도하는 분기 수를 줄임
+"""
+
+import os
+import re
+import json
+from collections import namedtuple
+from dataclasses import dataclass
+
+THEORY_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hairgator-theory-data.json")
+
+# ==================== 매칭 결과 ====================
+
+@dataclass(frozen=True)
+class Term:
+    category: str
+    code: str
+    priority: int     # 용어표 순서 (작을수록 먼저 등록된 용어)
+
+class TermMatch(namedtuple("TermMatch", "start end text terms")):
+    """start/end: 위치, text: 실제 텍스트에서 잘라낸 문자열 (대소문자 그대로),
+    terms: 이 문자열에 등록된 Term들 (여러 카테고리에 같은 용어가 있을 수 있음)
+
+    스타일 수만큼 대량으로 만들어지므로 가벼운 namedtuple 사용
+    """
+    __slots__ = ()
+
+    def term(self, category):
+        """해당 카테고리의 Term (없으면 None)"""
+        for term in self.terms:
+            if term.category == category:
+                return term
+        return None
+
+# ==================== 트라이 정규식 ====================
+
+def _trie_pattern(words):
+    """리터럴 목록 → 접두사 트라이 정규식 (끝나는 노드는 탐욕적 선택이라 긴 용어 우선)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+# ==================== 매처 ====================
+
+class TermMatcher:
+    """한 번의 스캔으로 모든 용어를 찾는 매처
+
+    entries:  [(용어, 카테고리, 코드)] - 등록 순서가 priority
+    patterns: [(정규식, 카테고리, 코드)] - 숫자 각도처럼 리터럴로 표현할 수 없는 용어 (리터럴보다 먼저 시도)
+    """
+
+    def __init__(self, entries, patterns=None, ignore_case=False):
+        self.ignore_case = ignore_case
+        self._literals = {}
+        self._patterns = []
+
+        priority = 0
+        for text, category, code in entries:
+            key = text.lower() if ignore_case else text
+            terms = self._literals.setdefault(key, [])
+            if not any(t.category == category for t in terms):
+                terms.append(Term(category, code, priority))
+            priority += 1
+        self._literals = {key: tuple(terms) for key, terms in self._literals.items()}
+
+        # 용어 안에 포함된 다른 용어 [(오프셋, 용어)] - "블런트컷" 안의 "블런트" 등
+        self._nested = {}
+        for key in self._literals:
+            inner = []
+            for other in self._literals:
+                if other == key:
+                    continue
+                offset = key.find(other)
+                while offset != -1:
+                    inner.append((offset, other))
+                    offset = key.find(other, offset + 1)
+            if inner:
+                self._nested[key] = sorted(inner)
+
+        # 용어 안에서 시작해서 밖으로 이어질 수 있는 다른 용어의 오프셋 - "스퀘어 레이어" → [4] ("레이어 & 웨이트")
+        self._overlaps = {}
+        for key in self._literals:
+            offsets = [offset for offset in range(1, len(key))
+                       if any(len(other) > len(key) - offset and other.startswith(key[offset:])
+                              for other in self._literals)]
+            if offsets:
+                self._overlaps[key] = offsets
+
+        alternatives = []
+        for i, (pattern, category, code) in enumerate(patterns or []):
+            self._patterns.append((Term(category, code, priority),))
+            alternatives.append(f"(?P<p{i}>{pattern})")
+            priority += 1
+
+        # 리터럴만 있으면 그룹 없이 컴파일 (lastgroup 조회 생략)
+        trie = _trie_pattern(self._literals) if self._literals else ""
+        if self._patterns and trie:
+            alternatives.append(f"(?P<lit>{trie})")
+            pattern = "|".join(alternatives)
+        else:
+            pattern = "|".join(alternatives) or trie or "(?!)"
+
+        flags = re.IGNORECASE if ignore_case else 0
+        self._regex = re.compile(pattern, flags)
+
+    def __len__(self):
+        return len(self._literals) + len(self._patterns)
+
+    def finditer(self, text, nested=False):
+        """겹치지 않는 매칭을 왼쪽부터 (같은 위치에서는 가장 긴 용어)
+
+        nested=True: 텍스트에 나오는 모든 리터럴 용어 (Aho-Corasick과 같은 결과)
+          - 매칭된 용어 안에 들어 있는 짧은 용어는 바로 뒤에 이어서 반환
+          - 매칭 안에서 시작해서 밖으로 이어지는 용어도 반환
+            ("스퀘어 레이어 & 웨이트" → 스퀘어 레이어, 레이어, 레이어 & 웨이트, 웨이트)
+        """
+        if nested:
+            yield from self._finditer_nested(text)
+            return
+        literals = self._literals
+        fold = self.ignore_case
+        for m in self._regex.finditer(text):
+            group = m.lastgroup
+            matched = m.group()
+            start = m.start()
+            if group is None or group == "lit":
+                key = matched.lower() if fold else matched
+                yield TermMatch(start, m.end(), matched, literals[key])
+            else:
+                yield TermMatch(start, m.end(), matched, self._patterns[int(group[1:])])
+
+    def _finditer_nested(self, text):
+        """finditer 매칭마다 안쪽 용어 + 안에서 시작해서 밖으로 이어지는 용어(_overlaps 위치만 match)를 이어서 반환
+
+        covered = 지금까지 보고한 리터럴 매칭의 최대 끝 위치. 그 안에서 끝나는 용어는 앞 매칭의 안쪽 용어로
+        이미 보고했으므로 건너뜀
+        """
+        literals = self._literals
+        nested = self._nested
+        overlaps = self._overlaps
+        fold = self.ignore_case
+        match = self._regex.match
+        covered = 0
+        for m in self._regex.finditer(text):
+            group = m.lastgroup
+            if group is not None and group != "lit":
+                # 정규식 용어(각도 등)는 겹쳐 찾지 않음 ("45도" 안의 "5도")
+                yield TermMatch(m.start(), m.end(), m.group(), self._patterns[int(group[1:])])
+                continue
+            while m is not None and m.end() > covered:
+                start, end = m.span()
+                matched = m.group()
+                key = matched.lower() if fold else matched
+                yield TermMatch(start, end, matched, literals[key])
+                if key in nested:
+                    for offset, inner in nested[key]:
+                        if start + offset + len(inner) > covered:
+                            yield TermMatch(start + offset, start + offset + len(inner),
+                                            matched[offset:offset + len(inner)], literals[inner])
+                covered = end
+                m = None
+                if key in overlaps:
+                    # 걸쳐 있는 용어 중 가장 앞의 것 (그 뒤에 걸친 용어는 그 용어의 _overlaps로 이어서 찾음)
+                    for offset in overlaps[key]:
+                        o = match(text, start + offset)
+                        if o is not None and o.end() > end and o.lastgroup in (None, "lit"):
+                            m = o
+                            break
+
+    def scan(self, text, nested=False):
+        """위치 없이 [(매칭 문자열, Term들)] 반환 - 대량 처리용 빠른 경로 (findall 한 번)
+
+        nested=True: 매칭마다 안쪽 용어(_nested)를 이어 붙임 - finditer(nested=True)와 같은 결과
+          밖으로 이어지는 용어가 실제로 있을 때만(_overlaps 위치에서 더 긴 매칭) 위치를 따라가는 경로로 다시 스캔
+        """
+        if self._patterns:
+            return [(m.text, m.terms) for m in self.finditer(text, nested)]
+        literals = self._literals
+        fold = self.ignore_case
+        found = []
+        if not nested:
+            for s in self._regex.findall(text):
+                key = s.lower() if fold else s
+                found.append((s, literals[key]))
+            return found
+
+        inner_terms = self._nested
+        overlaps = self._overlaps
+        match = self._regex.match
+        for m in self._regex.finditer(text):
+            s = m.group()
+            key = s.lower() if fold else s
+            found.append((s, literals[key]))
+            if key in overlaps:
+                start, end = m.span()
+                if any((o := match(text, start + offset)) is not None and o.end() > end
+                       for offset in overlaps[key]):
+                    return [(t.text, t.terms) for t in self._finditer_nested(text)]
+            for offset, inner in inner_terms.get(key, ()):
+                found.append((s[offset:offset + len(inner)], literals[inner]))
+        return found
+
+    def find_all(self, text, category=None, nested=False):
+        matches = list(self.finditer(text, nested))
+        if category is None:
+            return matches
+        return [m for m in matches if m.term(category)]
+
+    def first(self, text, category=None, nested=False):
+        """가장 왼쪽 매칭 (없으면 None)"""
+        for m in self.finditer(text, nested):
+            if category is None or m.term(category):
+                return m
+        return None
+
+    def best(self, text, category=None):
+        """용어표 순서(priority)가 가장 앞선 용어의 매칭 (없으면 None)
+
+        표 순서대로 `kw in text`를 시도해서 처음 걸린 용어를 쓰던 것과 같은 결과
+        (다른 용어 안에 들어 있거나 걸쳐 있는 용어도 후보이므로 nested로 스캔)
+        """
+        found, found_priority = None, None
+        for m in self.finditer(text, nested=True):
+            for term in m.terms:
+                if category is not None and term.category != category:
+                    continue
+                if found is None or term.priority < found_priority:
+                    found, found_priority = m, term.priority
+        return found
+
+# ==================== 89용어 ====================
+
+def load_theory_terms(path=THEORY_DATA_PATH):
+    """hairgator-theory-data.json 89용어 → [(용어, "theory", 용어 ID)]
+
+    한글 이름 기준, 괄호 설명은 제거하고 띄어쓰기 없는 표기도 함께 등록
+    (예: "블런트 컷" → "블런트 컷", "블런트컷")
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        categories = json.load(f)["terms89"]["categories"]
+
+    entries = []
+    for category in categories.values():
+        for term in category["terms"]:
+            name = re.sub(r"\s*\(.*?\)", "", term["ko"]).strip()
+            if not name:
+                continue
+            entries.append((name, "theory", term["id"]))
+            if " " in name:
+                entries.append((name.replace(" ", ""), "theory", term["id"]))
+    return entries
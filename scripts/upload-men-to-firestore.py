@@ -3,6 +3,8 @@
 남자 커트 Firestore 메타데이터 업로드
 - upload-men-result.json을 읽어서 Firestore에 저장
 - men_styles 컬렉션에 각 스타일 문서 생성
+- 기본은 동기화 모드: 내용 해시(contentHash)가 같은 문서는 쓰지 않음 (--force로 전체 쓰기)
+- 문서별 업로드 완료를 체크포인트에 기록 → 중단되면 --resume으로 남은 문서만 업로드
 """
 
 import os
@@ -10,8 +12,17 @@ import sys
 import json
 import firebase_admin
 from firebase_admin import credentials, firestore
-import re
 import time
+import argparse
+import threading
+from datetime import datetime
+
+from checkpoint import CheckpointJournal
+from dataset_index import load_dataset_index, read_text
+from firestore_batch import BULK_DEFAULTS, FIRESTORE_BATCH_LIMIT, bulk_set
+from firestore_sync import CONTENT_HASH_FIELD, SyncLedger, content_hash, plan_sync
+from profiling import record, span, start_run
+from term_matcher import TermMatcher
 
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stdout.flush()
@@ -23,7 +34,8 @@ print = functools.partial(print, flush=True)
 
 SERVICE_ACCOUNT_KEY = r"C:\Users\김민재\Desktop\Hairgator_chatbot\hairgatormenu-4a43e-firebase-adminsdk-fbsvc-0d9a088b16.json"
 UPLOAD_RESULT_PATH = os.path.join(os.path.dirname(__file__), "upload-men-result.json")
-BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\men_cut_recipe"
+UPLOAD_REPORT_PATH = os.path.join(os.path.dirname(__file__), "upload-men-firestore-report.json")
+CHECKPOINT_NAME = "upload-men-to-firestore"
 
 # 7개 스타일 카테고리 정보
 SERIES_INFO = {
@@ -95,44 +107,58 @@ def get_series_code(style_id):
             return prefix
     return None
 
-def parse_caption_file(style_id, base_path):
-    """자막 파일을 파싱하여 스텝별 설명 추출"""
+def parse_caption_file(style_id, index):
+    """자막 파일을 파싱하여 스텝별 설명 추출 (파일 목록은 데이터셋 인덱스에서)"""
     series = get_series_code(style_id)
     if not series:
         return None
 
-    series_folder = SERIES_INFO[series]["folder"]
-    style_path = os.path.join(base_path, series_folder, style_id)
-
-    caption_patterns = [
-        f"{style_id}(자막).txt",
-        f"{style_id}-jamag.txt",
-        f"{style_id}_자막.txt"
-    ]
-
-    for pattern in caption_patterns:
-        caption_path = os.path.join(style_path, pattern)
-        if os.path.exists(caption_path):
-            try:
-                with open(caption_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                lines = [line.strip() for line in content.split('\n') if line.strip()]
-                recipe_info = extract_recipe_info(content)
-
-                return {
-                    "raw": content,
-                    "lines": lines[:10],
-                    "recipe": recipe_info
-                }
-            except Exception as e:
-                print(f"  ⚠️ 자막 파싱 실패: {style_id} - {e}")
-                return None
+    style = index.get("men", style_id)
+    if not style or style.series != series:
+        return None
 
-    return None
+    caption = style.find_caption(include_plain=False)
+    if not caption:
+        return None
+
+    try:
+        content = read_text(style, caption)
+
+        lines = [line.strip() for line in content.split('\n') if line.strip()]
+        recipe_info = extract_recipe_info(content)
+
+        return {
+            "raw": content,
+            "lines": lines[:10],
+            "recipe": recipe_info
+        }
+    except Exception as e:
+        print(f"  ⚠️ 자막 파싱 실패: {style_id} - {e}")
+        return None
+
+# 레시피 키워드 (남자 커트 용어 포함) - 영문은 대소문자 무시
+RECIPE_KEYWORDS = [
+    ("레이어", "LAYER"), ("그래듀에이션", "GRADUATION"), ("Layer", "LAYER"), ("Graduation", "GRADUATION"),
+    ("스퀘어 커트", "SQUARE_CUT"), ("라운드 커트", "ROUND_CUT"), ("Square Cut", "SQUARE_CUT"), ("Round Cut", "ROUND_CUT"),
+    ("클리퍼", "CLIPPER"), ("Clipper", "CLIPPER"),
+    ("코너 제거", "CORNER_OFF"), ("Corner Off", "CORNER_OFF"),
+    ("크로스 체킹", "CROSS_CHECKING"), ("Cross Checking", "CROSS_CHECKING"),
+    ("파이 섹션", "PIE"), ("Pie Section", "PIE"),
+    ("후대각", "DBS"), ("전대각", "DFS"), ("Diagonal", "DIAGONAL"),
+    ("이동 디자인 라인", "MOBILE_DL"), ("고정 디자인 라인", "STATIONARY_DL"),
+    ("Mobile", "MOBILE_DL"), ("Stationary", "STATIONARY_DL"),
+    ("천체축 각도", "CELESTIAL_AXIS"), ("Celestial Axis", "CELESTIAL_AXIS"),
+    ("다이렉션", "DIRECTION"), ("Direction", "DIRECTION"),
+]
+
+RECIPE_MATCHER = TermMatcher(
+    [(kw, "recipe", code) for kw, code in RECIPE_KEYWORDS],
+    patterns=[(r"\d+도", "angle", "ANGLE"), (r"D\d", "direction", "DIRECTION")],
+    ignore_case=True
+)
 
 def extract_recipe_info(content):
-    """자막에서 레시피 정보 추출 (남자 커트 용어 포함)"""
+    """자막에서 레시피 정보 추출 (남자 커트 용어 포함, 한 번의 스캔)"""
     recipe = {
         "angle": None,
         "lifting": None,
@@ -140,33 +166,17 @@ def extract_recipe_info(content):
         "keywords": []
     }
 
-    keywords = []
-    patterns = [
-        r'(\d+도)',
-        r'(레이어|그래듀에이션|Layer|Graduation)',
-        r'(스퀘어 커트|라운드 커트|Square Cut|Round Cut)',
-        r'(클리퍼|Clipper)',
-        r'(코너 제거|Corner Off)',
-        r'(크로스 체킹|Cross Checking)',
-        r'(파이 섹션|Pie Section)',
-        r'(후대각|전대각|Diagonal)',
-        r'(이동 디자인 라인|고정 디자인 라인|Mobile|Stationary)',
-        r'(천체축 각도|Celestial Axis)',
-        r'(다이렉션|Direction|D\d)',
-    ]
-
-    for pattern in patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
-        keywords.extend(matches)
-
-    recipe["keywords"] = list(set(keywords))[:15]
+    # 처음 나온 순서대로 중복 제거
+    keywords = list(dict.fromkeys(m.text for m in RECIPE_MATCHER.finditer(content)))
+
+    recipe["keywords"] = keywords[:15]
 
     return recipe
 
 # ==================== Firestore 업로드 ====================
 
-def upload_style_to_firestore(db, style_data, caption_data):
-    """단일 스타일을 Firestore에 업로드"""
+def build_style_doc(style_data, caption_data):
+    """Firestore men_styles 문서 데이터 (embedding 필드는 넣지 않음 → merge로 기존 값 유지)"""
     style_id = style_data["styleId"]
     series = style_data.get("series") or get_series_code(style_id)
 
@@ -189,22 +199,50 @@ def upload_style_to_firestore(db, style_data, caption_data):
             "recipe": caption_data.get("recipe", {})
         }
 
-    try:
-        # men_styles 컬렉션에 저장 (merge=True로 기존 embedding 필드 보존)
-        db.collection("men_styles").document(style_id).set(doc_data, merge=True)
-        return True
-    except Exception as e:
-        print(f"  ❌ Firestore 저장 실패: {style_id} - {e}")
-        return False
+    return doc_data
+
+def write_upload_report(report, style_ids, path=UPLOAD_REPORT_PATH):
+    """문서별 성공/실패 리포트 저장"""
+    documents = [{"styleId": style_id, **report[style_id]} for style_id in style_ids if style_id in report]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "generatedAt": datetime.now().isoformat(),
+            "collection": "men_styles",
+            "total": len(documents),
+            "succeeded": sum(1 for d in documents if d["status"] == "ok"),
+            "failed": sum(1 for d in documents if d["status"] == "failed"),
+            "unchanged": sum(1 for d in documents if d["status"] == "unchanged"),
+            "retried": sum(1 for d in documents if d["attempts"] > 1),
+            "documents": documents
+        }, f, ensure_ascii=False, indent=2)
 
 # ==================== 메인 ====================
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="남자 커트 Firestore 메타데이터 업로드")
+    parser.add_argument("--workers", type=int, default=BULK_DEFAULTS["workers"], help="동시 배치 커밋 수")
+    parser.add_argument("--batch-size", type=int, default=BULK_DEFAULTS["batch_size"],
+                        help=f"배치 하나의 문서 수 (최대 {FIRESTORE_BATCH_LIMIT})")
+    parser.add_argument("--max-retries", type=int, default=BULK_DEFAULTS["max_retries"],
+                        help="일시적 오류 시 문서별 재시도 횟수")
+    parser.add_argument("--report", default=UPLOAD_REPORT_PATH, help="문서별 결과 리포트 경로")
+    parser.add_argument("--force", action="store_true", help="내용이 같아도 모든 문서 다시 쓰기")
+    parser.add_argument("--resume", action="store_true",
+                        help="중단된 이전 업로드를 체크포인트에서 이어서 실행 (변경 확인 조회 없이 남은 문서만)")
+    parser.add_argument("--verify-remote", action="store_true",
+                        help="로컬 원장을 믿지 않고 모든 문서의 contentHash를 Firestore에서 확인")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    start_run("upload-men-to-firestore")
+
     print("=" * 70)
     print("Firestore 메타데이터 업로드 - 남자 커트 스타일")
     print("=" * 70)
 
-    db = init_firebase()
+    with span("phase.init_firebase"):
+        db = init_firebase()
     if not db:
         return
 
@@ -220,39 +258,118 @@ def main():
     print(f"\n📋 총 {len(styles)}개 스타일 처리 예정")
     print("-" * 50)
 
+    # 로컬 자막 파일 목록 (데이터셋 인덱스)
+    with span("phase.load_index"):
+        index = load_dataset_index()
+
     stats = {
         "success": 0,
         "failed": 0,
+        "unchanged": 0,
         "with_caption": 0
     }
 
-    for idx, style_data in enumerate(styles):
+    # 1. 문서 데이터 준비
+    prepare_started = time.perf_counter()
+    docs = []
+    style_info = {}
+    for style_data in styles:
         style_id = style_data["styleId"]
 
-        caption_data = parse_caption_file(style_id, BASE_PATH)
+        caption_data = parse_caption_file(style_id, index)
         if caption_data:
             stats["with_caption"] += 1
 
-        success = upload_style_to_firestore(db, style_data, caption_data)
-        if success:
-            stats["success"] += 1
-            diagram_count = len(style_data.get("diagrams", []))
-            caption_mark = "✓" if caption_data else "✗"
-            print(f"  ✅ {style_id}: 도해도 {diagram_count}장 | 자막 {caption_mark}")
+        docs.append((style_id, build_style_doc(style_data, caption_data)))
+        style_info[style_id] = (len(style_data.get("diagrams", [])), "✓" if caption_data else "✗")
+    record("phase.prepare_docs", time.perf_counter() - prepare_started)
+
+    # 2. 바뀐 문서만 선별 (contentHash 비교)
+    ledger = SyncLedger("men_styles")
+    all_ids = [style_id for style_id, _ in docs]
+    report = {}
+    journal = CheckpointJournal(CHECKPOINT_NAME)
+    checkpoint = journal.resume_plan() if args.resume else None
+    if checkpoint is not None:
+        # 중단된 업로드 이어서: 쓰기 대상은 체크포인트 계획에서, 이미 올린 문서는 제외
+        doc_map = dict(docs)
+        existing = set(checkpoint["existing"])
+        uploaded = journal.done_units("upload")
+        to_write = []
+        for style_id in checkpoint["write"]:
+            if style_id in uploaded or style_id not in doc_map:
+                continue
+            data = {k: v for k, v in doc_map[style_id].items() if not (style_id in existing and k == "createdAt")}
+            to_write.append((style_id, {**data, CONTENT_HASH_FIELD: content_hash(data)}))
+        print(f"\n♻️ 체크포인트에서 이어서 업로드: 전체 {len(checkpoint['write'])}건 중 완료 {len(uploaded)}건, "
+              f"남은 {len(to_write)}건")
+    else:
+        if args.resume:
+            print("\n  이어서 실행할 체크포인트가 없어 새로 시작합니다")
+        elif journal.pending():
+            print("\n  ⚠️ 중단된 이전 업로드의 체크포인트를 버리고 새로 시작합니다 (이어서 하려면 --resume)")
+        if args.force:
+            to_write = [(style_id, {**data, CONTENT_HASH_FIELD: content_hash(data)}) for style_id, data in docs]
         else:
-            stats["failed"] += 1
-
-        if (idx + 1) % 10 == 0:
-            print(f"\n  --- {idx + 1}/{len(styles)} 완료 ---\n")
-
-        time.sleep(0.05)
+            with span("phase.plan_sync"):
+                plan = plan_sync(db, "men_styles", docs, ledger, verify_remote=args.verify_remote)
+            to_write = plan["write"]
+            for style_id in plan["unchanged"]:
+                report[style_id] = {"status": "unchanged", "attempts": 0, "error": None}
+            stats["unchanged"] = len(plan["unchanged"])
+            print(f"\n🔍 변경 감지: 쓰기 {len(to_write)}건 / 변경 없음 {stats['unchanged']}건 "
+                  f"(Firestore 확인 {plan['remote_checked']}건)")
+        journal.start({
+            "write": [style_id for style_id, _ in to_write],
+            "existing": [style_id for style_id, data in to_write if "createdAt" not in data]
+        })
+
+    # 3. 배치 동시 커밋 (문서별 재시도)
+    print(f"\n🚀 배치 업로드: 배치당 {args.batch_size}건, 동시 {args.workers}개")
+    done = [0]
+    done_lock = threading.Lock()
+    write_hashes = {style_id: data[CONTENT_HASH_FIELD] for style_id, data in to_write}
+
+    def on_document(style_id, result):
+        with done_lock:
+            done[0] += 1
+            diagram_count, caption_mark = style_info[style_id]
+            if result["status"] == "ok":
+                journal.record("upload", style_id, write_hashes[style_id])
+                retry_note = f" (시도 {result['attempts']}회)" if result["attempts"] > 1 else ""
+                print(f"  ✅ {style_id}: 도해도 {diagram_count}장 | 자막 {caption_mark}{retry_note}")
+            else:
+                print(f"  ❌ Firestore 저장 실패: {style_id} - {result['error']}")
+            if done[0] % 10 == 0:
+                print(f"\n  --- {done[0]}/{len(to_write)} 완료 ---\n")
+
+    started = time.perf_counter()
+    written = bulk_set(db, "men_styles", to_write, merge=True, batch_size=args.batch_size,
+                       workers=args.workers, max_retries=args.max_retries, on_document=on_document)
+    elapsed = time.perf_counter() - started
+    record("phase.bulk_upload", elapsed)
+    report.update(written)
+
+    # 성공한 문서만 원장에 기록 (실패한 문서는 다음 실행에서 다시 시도, 중단 전 실행분 포함)
+    for style_id, digest in journal.done_units("upload").items():
+        if digest:
+            ledger.update(style_id, digest)
+    ledger.save()
+    journal.finish()
+
+    stats["success"] = sum(1 for r in written.values() if r["status"] == "ok")
+    stats["failed"] = sum(1 for r in written.values() if r["status"] == "failed")
+    write_upload_report(report, all_ids, args.report)
 
     print("\n" + "=" * 70)
     print("📊 업로드 완료 통계")
     print("=" * 70)
     print(f"  성공: {stats['success']}개")
     print(f"  실패: {stats['failed']}개")
+    print(f"  변경 없음(쓰기 생략): {stats['unchanged']}개")
     print(f"  자막 포함: {stats['with_caption']}개")
+    print(f"  소요 시간: {elapsed:.1f}초")
+    print(f"  리포트: {args.report}")
 
 if __name__ == "__main__":
     main()
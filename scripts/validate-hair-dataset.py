@@ -8,20 +8,24 @@
 
 import os
 import sys
-import glob
 import json
+import time
 from collections import defaultdict
 
+from dataset_index import load_dataset_index
+from profiling import record, span, start_run
+
 # Windows 콘솔 UTF-8 출력 설정
 sys.stdout.reconfigure(encoding='utf-8')
 
-# 데이터셋 경로
-BASE_PATH = r"C:\Users\김민재\Desktop\2. 헤어게이터_이론-20251105T045428Z-1-001\women_cut_recipe"
+OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "dataset-validation-result.json")
 
-# 시리즈 목록
-SERIES = ["FAL", "FBL", "FCL", "FDL", "FEL", "FFL", "FGL", "FHL"]
+def validate_dataset(index=None, output_path=OUTPUT_PATH):
+    """데이터셋 검증 (index: dataset_index.DatasetIndex, 없으면 저장된 인덱스 로드/스캔)"""
+    with span("phase.load_index"):
+        index = index or load_dataset_index()
+    validate_started = time.perf_counter()
 
-def validate_dataset():
     print("=" * 70)
     print("헤어 데이터셋 파일 구조 검증")
     print("=" * 70)
@@ -36,30 +40,25 @@ def validate_dataset():
         "diagram_counts": defaultdict(int)
     }
 
-    # 각 시리즈별로 스캔
-    for series in SERIES:
-        series_path = os.path.join(BASE_PATH, series)
+    # 각 시리즈별로 검사 (파일 목록은 인덱스에서)
+    for series_entry, styles in index.iter_styles("women"):
+        series = series_entry.series
 
-        if not os.path.exists(series_path):
+        if not series_entry.exists:
             print(f"\n⚠️  시리즈 폴더 없음: {series}")
             continue
 
-        # 시리즈 내 스타일 폴더들
-        style_folders = [d for d in os.listdir(series_path)
-                        if os.path.isdir(os.path.join(series_path, d))]
-        style_folders.sort()
-
-        print(f"\n📁 {series} 시리즈: {len(style_folders)}개 스타일")
+        print(f"\n📁 {series} 시리즈: {len(styles)}개 스타일")
         print("-" * 50)
 
-        for style_id in style_folders:
-            style_path = os.path.join(series_path, style_id)
+        for style in styles:
+            style_id = style.style_id
             stats["total_styles"] += 1
 
             style_info = {
                 "styleId": style_id,
                 "series": series,
-                "path": style_path,
+                "path": style.path,
                 "hasCaption": False,
                 "hasResult": False,
                 "diagramCount": 0,
@@ -70,44 +69,20 @@ def validate_dataset():
                 }
             }
 
-            # 폴더 내 파일들 스캔
-            files = os.listdir(style_path)
-
             # 1. 자막 파일 찾기 (여러 패턴 지원)
-            caption_patterns = [
-                f"{style_id}(자막).txt",
-                f"{style_id}-jamag.txt",
-                f"{style_id}_자막.txt",
-                f"{style_id}.txt"
-            ]
-
-            for pattern in caption_patterns:
-                if pattern in files:
-                    style_info["hasCaption"] = True
-                    style_info["files"]["caption"] = pattern
-                    break
-
-            # 2. 결과 이미지 찾기
-            result_patterns = ["result.jpg", "result.png", "1.png", "1.jpg",
-                             f"{style_id}.jpg", f"{style_id}.png",
-                             "아트보드 – 28.png", "아트보드 – 23.png"]
-
-            for pattern in result_patterns:
-                if pattern in files:
-                    style_info["hasResult"] = True
-                    style_info["files"]["result"] = pattern
-                    break
-
-            # 아트보드 패턴으로 한번 더 찾기
-            if not style_info["hasResult"]:
-                for f in files:
-                    if f.startswith("아트보드"):
-                        style_info["hasResult"] = True
-                        style_info["files"]["result"] = f
-                        break
+            caption = style.find_caption()
+            if caption:
+                style_info["hasCaption"] = True
+                style_info["files"]["caption"] = caption.name
+
+            # 2. 결과 이미지 찾기 (고정 패턴 → 아트보드 패턴)
+            result = style.find_result(include_artboards=True)
+            if result:
+                style_info["hasResult"] = True
+                style_info["files"]["result"] = result.name
 
             # 3. 도해도 이미지 찾기 (SR_로 시작하는 PNG)
-            diagrams = sorted([f for f in files if f.startswith("SR_") and f.endswith(".png")])
+            diagrams = [f.name for f in style.diagrams()]
             style_info["diagramCount"] = len(diagrams)
             style_info["files"]["diagrams"] = diagrams
             stats["diagram_counts"][len(diagrams)] += 1
@@ -136,6 +111,8 @@ def validate_dataset():
 
             all_styles.append(style_info)
 
+    record("phase.validate_styles", time.perf_counter() - validate_started)
+
     # 최종 통계
     print("\n" + "=" * 70)
     print("📊 최종 통계")
@@ -181,8 +158,7 @@ def validate_dataset():
     print(f"   - 합계: {total_captions + total_results + total_diagrams}개 파일")
 
     # JSON으로 저장
-    output_path = os.path.join(os.path.dirname(__file__), "dataset-validation-result.json")
-    with open(output_path, 'w', encoding='utf-8') as f:
+    with span("fs.write_report"), open(output_path, 'w', encoding='utf-8') as f:
         json.dump({
             "stats": {
                 "total_styles": stats["total_styles"],
@@ -202,4 +178,5 @@ def validate_dataset():
     return all_styles, stats
 
 if __name__ == "__main__":
+    start_run("validate-hair-dataset")
     validate_dataset()
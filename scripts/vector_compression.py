@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 벡터 압축 (PCA 차원 축소 + float16 / int8 스칼라 양자화)
+- 입력: 로컬 벡터 인덱스(vector_index)의 정규화 float32 행렬 → Firestore를 다시 읽지 않음
+- 설정 이름: "<차원>-<dtype>" (full-float32 = 원본과 같은 크기, pca128-int8 = 128차원 PCA + int8)
+  · PCA: 카탈로그 평균을 빼고 공분산(차원 x 차원) 고유분해 → 분산이 큰 주성분부터 투영
+  · int8: 차원별 스케일(최대 절댓값 / 127)로 대칭 양자화 → 원소당 1바이트
+- 질의는 평균을 빼지 않고 같은 주성분에 투영 → 점수 = 코드 · (스케일 x 투영 질의) + <평균, 질의>
+  (마지막 항은 모든 행에 같은 값 → 순위는 앞 항으로 정해지고, 더하면 점수가 코사인 유사도 근사값)
+- recall@k: 카탈로그 벡터 자체를 질의로 (자기 자신 제외) 원본 top-k와 압축 top-k 비교
+- 결과: .cache/vector-compressed/<컬렉션>.npz (코드, 평균, 주성분, 스케일) + <컬렉션>.json (ID 표, 설정, 리포트)
+  · 원본 인덱스 폴더와 나눠 둠 → 파이프라인에서 벡터 인덱스 단계 출력 지문이 압축 결과로 바뀌지 않음
+
+사용법:
+  codec = Codec.fit(matrix, dims=128, dtype="int8")
+  result = recall_at_k(matrix, codec, codec.encode(matrix), k=10)
+  write_compressed("men_styles", index.ids, codec, codec.encode(matrix), index.meta, report)
+  index = CompressedIndex.load("men_styles")
+  index.search(query_vector, k=5)       # VectorIndex.search와 같음
+"""
+
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+from profiling import span
+from vector_index import CACHE_DIR, VectorIndex
+
+# ==================== 설정 ====================
+
+DEFAULT_COMPRESSED_DIR = os.path.join(CACHE_DIR, "vector-compressed")
+COMPRESSED_FORMAT = 1
+
+# dtype → 저장 형식
+DTYPES = {"float32": "<f4", "float16": "<f2", "int8": "i1"}
+INT8_MAX = 127
+
+# 리포트 기본 설정 (0 = PCA 없음)
+DEFAULT_DIMS = [0, 256, 128, 64, 32]
+DEFAULT_SETTING_DTYPES = ["float32", "float16", "int8"]
+
+def setting_name(dims, dtype):
+    """(PCA 차원, dtype) → "pca128-int8" / "full-float16" """
+    return f"{f'pca{dims}' if dims else 'full'}-{dtype}"
+
+def parse_setting(name):
+    """"pca128-int8" → (128, "int8"), "full-float16" → (0, "float16")"""
+    match = re.fullmatch(r"(?:full|pca(\d+))-(float32|float16|int8)", name)
+    if not match:
+        raise ValueError(f"압축 설정 형식 오류: {name} (예: full-float16, pca128-int8)")
+    return int(match.group(1) or 0), match.group(2)
+
+def compressed_paths(collection, directory=DEFAULT_COMPRESSED_DIR):
+    """(코드 / 파라미터 .npz 경로, 메타 경로)"""
+    base = os.path.join(directory, collection)
+    return base + ".npz", base + ".json"
+
+# ==================== 코덱 ====================
+
+def _mean(matrix):
+    return matrix.mean(axis=0) if len(matrix) else np.zeros(matrix.shape[1], dtype=np.float32)
+
+def fit_pca(matrix):
+    """(평균, 주성분 행렬 (분산 내림차순, 차원 x 차원), 고유값)
+
+    n x d SVD 대신 d x d 공분산 고유분해 → 행이 많아도 메모리 / 시간이 차원에만 비례
+    행 수보다 뒤쪽 주성분은 분산 0 (리포트의 분산 비율로 확인)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    with span("cpu.fit_pca", rows=len(matrix)):
+        mean = _mean(matrix)
+        centered = (matrix - mean).astype(np.float64)
+        eigvals, eigvecs = np.linalg.eigh(centered.T @ centered)
+        order = np.argsort(eigvals)[::-1]
+    return mean, eigvecs[:, order].T.astype(np.float32), eigvals[order].clip(min=0)
+
+class Codec:
+    """PCA 투영 + 스칼라 양자화 파라미터 (components가 None이면 차원 축소 없음)"""
+
+    def __init__(self, dtype, mean, components=None, scale=None, explained=1.0):
+        if dtype not in DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {dtype}")
+        self.dtype = dtype
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = None if components is None else np.asarray(components, dtype=np.float32)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+        self.explained = float(explained)
+
+    @property
+    def dims(self):
+        """코드 차원"""
+        return len(self.mean) if self.components is None else len(self.components)
+
+    @property
+    def name(self):
+        return setting_name(0 if self.components is None else self.dims, self.dtype)
+
+    @property
+    def bytes_per_vector(self):
+        return self.dims * np.dtype(DTYPES[self.dtype]).itemsize
+
+    @classmethod
+    def fit(cls, matrix, dims=0, dtype="float32", pca=None):
+        """카탈로그 행렬로 평균 / 주성분 / int8 스케일 학습
+
+        dims가 0이거나 원본 차원 이상이면 PCA 없이 평균만 뺌
+        pca: fit_pca(matrix) 결과 (설정 여러 개를 평가할 때 고유분해를 한 번만 하도록)
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        mean, components, explained = _mean(matrix), None, 1.0
+        if dims and dims < matrix.shape[1]:
+            mean, eigvecs, eigvals = pca or fit_pca(matrix)
+            components = eigvecs[:dims]
+            total = eigvals.sum()
+            explained = float(eigvals[:dims].sum() / total) if total > 0 else 1.0
+
+        codec = cls(dtype, mean, components, explained=explained)
+        if dtype == "int8":
+            peak = np.abs(codec.project(matrix)).max(axis=0) if len(matrix) else np.ones(codec.dims)
+            peak[peak == 0] = 1.0
+            codec.scale = (peak / INT8_MAX).astype(np.float32)
+        return codec
+
+    def project(self, matrix):
+        """(n, 원본 차원) → 평균을 뺀 (n, dims) float32"""
+        centered = np.asarray(matrix, dtype=np.float32) - self.mean
+        return centered if self.components is None else centered @ self.components.T
+
+    def encode(self, matrix):
+        """(n, 원본 차원) → 저장할 코드 (n, dims)"""
+        projected = self.project(matrix)
+        if self.dtype == "int8":
+            return np.clip(np.rint(projected / self.scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+        return projected.astype(DTYPES[self.dtype])
+
+    def decode(self, codes):
+        """코드 → 원본 공간 근사 벡터 (평균 포함)"""
+        projected = np.asarray(codes, dtype=np.float32)
+        if self.scale is not None:
+            projected = projected * self.scale
+        if self.components is not None:
+            projected = projected @ self.components
+        return projected + self.mean
+
+    def scores(self, codes, queries):
+        """질의 (q, 원본 차원) x 코드 (n, dims) → (q, n) 근사 내적"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        weights = queries
+        if self.components is not None:
+            weights = weights @ self.components.T
+        if self.scale is not None:
+            weights = weights * self.scale
+        return weights @ np.asarray(codes, dtype=np.float32).T + (queries @ self.mean)[:, None]
+
+# ==================== recall@k ====================
+
+def _top_k_rows(scores, k):
+    """(q, n) 점수 → 행마다 상위 k개 열 번호 (순서 무관)"""
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+def recall_at_k(matrix, codec, codes, k=10, sample=None, seed=42, chunk=256):
+    """카탈로그 벡터를 질의로 원본 top-k 대비 압축 top-k 비율 (자기 자신 제외)
+
+    반환: {"k", "queries", "recall", "top1"} - top1: 1위가 같은 질의 비율
+    sample: 질의 수 제한 (None이면 전체 행)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    count = len(matrix)
+    k = min(k, count - 1)
+    if k <= 0:
+        return {"k": max(k, 0), "queries": 0, "recall": 1.0, "top1": 1.0}
+
+    positions = np.arange(count)
+    if sample and sample < count:
+        positions = np.sort(np.random.default_rng(seed).choice(count, sample, replace=False))
+
+    hits = top1 = 0
+    with span("cpu.recall_at_k", setting=codec.name, rows=count):
+        for start in range(0, len(positions), chunk):
+            rows = positions[start:start + chunk]
+            exact = matrix[rows] @ matrix.T
+            approx = codec.scores(codes, matrix[rows])
+            own = np.arange(len(rows))
+            exact[own, rows] = -np.inf
+            approx[own, rows] = -np.inf
+
+            exact_top = _top_k_rows(exact, k)
+            approx_top = _top_k_rows(approx, k)
+            hits += sum(len(np.intersect1d(a, b, assume_unique=True)) for a, b in zip(exact_top, approx_top))
+            top1 += int((exact.argmax(axis=1) == approx.argmax(axis=1)).sum())
+
+    return {"k": k, "queries": len(positions), "recall": hits / (len(positions) * k),
+            "top1": top1 / len(positions)}
+
+def evaluate_settings(matrix, settings, k=10, sample=None, seed=42):
+    """설정마다 코덱 학습 + recall@k → [(리포트 dict, 코덱, 코드)] (작은 표현부터)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    source_bytes = matrix.shape[1] * 4
+    pca = fit_pca(matrix) if any(0 < dims < matrix.shape[1] for dims, _ in settings) else None
+    results = []
+    for dims, dtype in settings:
+        codec = Codec.fit(matrix, dims, dtype, pca=pca)
+        codes = codec.encode(matrix)
+        report = {
+            "setting": codec.name,
+            "dims": codec.dims,
+            "dtype": dtype,
+            "bytesPerVector": codec.bytes_per_vector,
+            "ratio": source_bytes / codec.bytes_per_vector,
+            "explainedVariance": codec.explained,
+            **recall_at_k(matrix, codec, codes, k=k, sample=sample, seed=seed),
+        }
+        results.append((report, codec, codes))
+    results.sort(key=lambda r: (r[0]["bytesPerVector"], -r[0]["recall"]))
+    return results
+
+def pick_setting(reports, min_recall, min_top1=0.0):
+    """recall@k (와 top1) 기준을 넘는 가장 작은 설정 이름 (없으면 None)"""
+    passing = [r for r in reports if r["recall"] >= min_recall and r["top1"] >= min_top1]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r["bytesPerVector"], -r["recall"]))["setting"]
+
+# ==================== 저장 ====================
+
+def write_compressed(collection, ids, codec, codes, source_meta, report, directory=DEFAULT_COMPRESSED_DIR,
+                     settings_key=None):
+    """압축 표현 저장 → 메타 dict (npz 먼저, 메타 마지막에 교체)"""
+    codes_path, meta_path = compressed_paths(collection, directory)
+    os.makedirs(directory, exist_ok=True)
+
+    codes = np.ascontiguousarray(codes, dtype=DTYPES[codec.dtype])
+    source_dims = len(codec.mean)
+    arrays = {
+        "codes": codes,
+        "mean": codec.mean,
+        "components": codec.components if codec.components is not None
+                      else np.zeros((0, source_dims), dtype=np.float32),
+        "scale": codec.scale if codec.scale is not None else np.zeros(0, dtype=np.float32),
+    }
+    meta = {
+        "format": COMPRESSED_FORMAT,
+        "collection": collection,
+        "model": source_meta.get("model"),
+        "setting": codec.name,
+        "dims": source_dims,
+        "codeDims": codec.dims,
+        "dtype": codec.dtype,
+        "count": len(ids),
+        "bytesPerVector": codec.bytes_per_vector,
+        "explainedVariance": codec.explained,
+        "sha256": hashlib.sha256(codes.tobytes()).hexdigest(),
+        "sourceSha256": source_meta.get("sha256"),
+        "settingsKey": settings_key,
+        "builtAt": datetime.now().isoformat(timespec="seconds"),
+        "report": report,
+        "ids": list(ids),
+    }
+
+    with span("fs.write_compressed", collection=collection):
+        tmp_path = codes_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, codes_path)
+
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+    return meta
+
+def load_compressed_meta(collection, directory=DEFAULT_COMPRESSED_DIR):
+    """메타 JSON (없거나 깨졌으면 None)"""
+    _, meta_path = compressed_paths(collection, directory)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format") == COMPRESSED_FORMAT else None
+
+# ==================== 검색 ====================
+
+class CompressedIndex(VectorIndex):
+    """압축 코드로 검색하는 VectorIndex (질의는 원본 차원 벡터 그대로)"""
+
+    def __init__(self, meta, codec, codes):
+        super().__init__(meta, codes)
+        self.codec = codec
+
+    @classmethod
+    def load(cls, collection, directory=DEFAULT_COMPRESSED_DIR, verify=False):
+        meta = load_compressed_meta(collection, directory)
+        if meta is None:
+            raise FileNotFoundError(f"압축 인덱스가 없습니다: {compressed_paths(collection, directory)[1]}")
+        codes_path, _ = compressed_paths(collection, directory)
+        with np.load(codes_path, allow_pickle=False) as arrays:
+            codes = arrays["codes"]
+            components = arrays["components"] if len(arrays["components"]) else None
+            scale = arrays["scale"] if len(arrays["scale"]) else None
+            codec = Codec(meta["dtype"], arrays["mean"], components, scale, meta["explainedVariance"])
+        if codes.shape != (meta["count"], meta["codeDims"]):
+            raise ValueError(f"압축 인덱스 크기 불일치: {codes_path} ({codes.shape})")
+        if verify and hashlib.sha256(codes.tobytes()).hexdigest() != meta["sha256"]:
+            raise ValueError(f"압축 인덱스 해시 불일치: {codes_path}")
+        return cls(meta, codec, codes)
+
+    def vector(self, doc_id):
+        """코드에서 복원한 근사 벡터 (정규화), 없으면 None"""
+        i = self.position(doc_id)
+        if i is None:
+            return None
+        vector = self.codec.decode(self.matrix[i:i + 1])[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def scores(self, query):
+        """질의 벡터와 모든 행의 근사 코사인 유사도"""
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape != (self.dims,):
+            raise ValueError(f"질의 차원 {query.shape} != 인덱스 차원 {self.dims}")
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.zeros(len(self.ids), dtype=np.float32)
+        return self.codec.scores(self.matrix, query / norm)[0]
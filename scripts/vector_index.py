@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+스타일 유사도 검색용 로컬 벡터 인덱스
+- 컬렉션(styles / men_styles)마다 <컬렉션>.f32 + <컬렉션>.json 두 파일
+  · .f32: 헤더 없는 float32 행렬 (행 = 스타일, L2 정규화) → numpy.memmap으로 바로 매핑
+  · .json: ID 표(행 순서), 차원, 스타일별 임베딩 버전(embeddingKey), 행렬 SHA-256
+- 정규화된 행이므로 코사인 유사도 = 내적 → top-k는 행렬-벡터 곱 한 번 + argpartition
+- JS 쪽은 질의마다 모든 스타일 embedding을 Firestore에서 받아서 하나씩 코사인 계산
+- 파일은 임시 파일에 쓴 뒤 os.replace (읽는 쪽은 항상 완성된 인덱스만 봄)
+
+사용법:
+  write_index("men_styles", [(style_id, vector, version), ...])
+  index = VectorIndex.load("men_styles")
+  index.search(query_vector, k=5)   # [(style_id, 유사도), ...]
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+
+import numpy as np
+
+from dataset_index import CACHE_DIR
+from profiling import span
+
+# ==================== 설정 ====================
+
+DEFAULT_INDEX_DIR = os.path.join(CACHE_DIR, "vector-index")
+INDEX_FORMAT = 1
+COLLECTIONS = ["styles", "men_styles"]
+
+def index_paths(collection, directory=DEFAULT_INDEX_DIR):
+    """(행렬 경로, 메타 경로)"""
+    base = os.path.join(directory, collection)
+    return base + ".f32", base + ".json"
+
+def normalize_rows(matrix):
+    """행별 L2 정규화 (길이 0인 행은 0 그대로)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+# ==================== 생성 ====================
+
+def prepare_rows(rows):
+    """[(id, 벡터, 버전)] → (ids, 행렬, versions, 제외 목록)
+
+    차원이 다수와 다른 벡터, 길이 0 벡터는 검색 결과를 망가뜨리므로 제외 (JS cosineSimilarity는 0 처리)
+    versions는 제외된 문서까지 포함한 입력 상태 (다음 생성 때 변경 여부 판단용)
+    """
+    rows = [(doc_id, vector, version) for doc_id, vector, version in rows if vector]
+    versions = {doc_id: version for doc_id, _, version in rows if version}
+    if not rows:
+        return [], np.zeros((0, 0), dtype=np.float32), versions, []
+
+    dims_count = {}
+    for _, vector, _ in rows:
+        dims_count[len(vector)] = dims_count.get(len(vector), 0) + 1
+    dims = max(dims_count, key=dims_count.get)
+
+    ids, vectors, excluded = [], [], []
+    for doc_id, vector, _ in sorted(rows, key=lambda r: r[0]):
+        if len(vector) != dims:
+            excluded.append((doc_id, f"차원 {len(vector)} (인덱스 {dims})"))
+            continue
+        ids.append(doc_id)
+        vectors.append(vector)
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    zero = np.linalg.norm(matrix, axis=1) == 0
+    if zero.any():
+        excluded += [(doc_id, "길이 0 벡터") for doc_id, z in zip(ids, zero) if z]
+        ids = [doc_id for doc_id, z in zip(ids, zero) if not z]
+        matrix = matrix[~zero]
+
+    return ids, normalize_rows(matrix).astype(np.float32), versions, excluded
+
+def write_index(collection, rows, directory=DEFAULT_INDEX_DIR, model=None):
+    """벡터 인덱스 파일 생성 → (메타 dict, 제외 목록)"""
+    with span("cpu.build_vector_index", collection=collection):
+        ids, matrix, versions, excluded = prepare_rows(rows)
+    matrix_path, meta_path = index_paths(collection, directory)
+    os.makedirs(directory, exist_ok=True)
+
+    data = np.ascontiguousarray(matrix, dtype="<f4").tobytes()
+    meta = {
+        "format": INDEX_FORMAT,
+        "collection": collection,
+        "model": model,
+        "dims": int(matrix.shape[1]) if ids else 0,
+        "count": len(ids),
+        "dtype": "float32",
+        "normalized": True,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "builtAt": datetime.now().isoformat(timespec="seconds"),
+        "ids": ids,
+        "versions": versions,
+    }
+
+    # 행렬 먼저 교체하고 메타를 마지막에 교체 → 메타의 sha256으로 짝이 맞는지 확인 가능
+    with span("fs.write_vector_index", collection=collection):
+        for path, payload in ((matrix_path, data),
+                              (meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8"))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+    return meta, excluded
+
+def load_meta(collection, directory=DEFAULT_INDEX_DIR):
+    """메타 JSON (없거나 깨졌으면 None)"""
+    _, meta_path = index_paths(collection, directory)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("format") == INDEX_FORMAT else None
+
+# ==================== 검색 ====================
+
+class VectorIndex:
+    """memmap된 정규화 행렬 + ID 표"""
+
+    def __init__(self, meta, matrix):
+        self.meta = meta
+        self.collection = meta["collection"]
+        self.ids = meta["ids"]
+        self.dims = meta["dims"]
+        self.matrix = matrix
+        self._positions = None
+
+    @classmethod
+    def load(cls, collection, directory=DEFAULT_INDEX_DIR, verify=False):
+        """인덱스 열기 (행렬은 memmap이라 실제로 읽는 건 검색할 때)
+
+        verify=True: 행렬 SHA-256을 메타와 비교 (전체를 한 번 읽음)
+        """
+        meta = load_meta(collection, directory)
+        if meta is None:
+            raise FileNotFoundError(f"벡터 인덱스가 없습니다: {index_paths(collection, directory)[1]}")
+        matrix_path, _ = index_paths(collection, directory)
+        expected = meta["count"] * meta["dims"] * 4
+        if os.path.getsize(matrix_path) != expected:
+            raise ValueError(f"벡터 인덱스 크기 불일치: {matrix_path} ({os.path.getsize(matrix_path)} != {expected})")
+
+        if meta["count"] == 0:
+            matrix = np.zeros((0, meta["dims"]), dtype=np.float32)
+        else:
+            matrix = np.memmap(matrix_path, dtype="<f4", mode="r", shape=(meta["count"], meta["dims"]))
+        if verify:
+            digest = hashlib.sha256(np.asarray(matrix).tobytes()).hexdigest()
+            if digest != meta["sha256"]:
+                raise ValueError(f"벡터 인덱스 해시 불일치: {matrix_path}")
+        return cls(meta, matrix)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, doc_id):
+        if self._positions is None:
+            self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        return self._positions.get(doc_id)
+
+    def vector(self, doc_id):
+        """저장된 (정규화된) 벡터, 없으면 None"""
+        i = self.position(doc_id)
+        return None if i is None else np.array(self.matrix[i])
+
+    def scores(self, query):
+        """질의 벡터와 모든 행의 코사인 유사도 (행렬-벡터 곱 한 번)"""
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape != (self.dims,):
+            raise ValueError(f"질의 차원 {query.shape} != 인덱스 차원 {self.dims}")
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.zeros(len(self.ids), dtype=np.float32)
+        return self.matrix @ (query / norm)
+
+    def search(self, query, k=5, exclude=()):
+        """top-k [(id, 유사도)] (유사도 내림차순)"""
+        with span("cpu.vector_search", rows=len(self.ids)):
+            scores = self.scores(query)
+            excluded = [i for i in (self.position(doc_id) for doc_id in exclude) if i is not None]
+            if excluded:
+                scores = scores.copy()
+                scores[excluded] = -np.inf
+            k = min(k, len(self.ids) - len(excluded))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in top]